@@ -3,21 +3,44 @@ FastAPI Application for Deal Win Probability Prediction
 
 This API provides endpoints to:
 1. Generate synthetic training data
-2. Train the XGBoost model
-3. Predict deal outcomes from uploaded Excel files
+2. Train the XGBoost model (synchronously, or as a background job with live progress)
+3. Predict deal outcomes from uploaded Excel, CSV or Parquet files or JSON deal records
 """
 
-from fastapi import FastAPI, File, UploadFile, HTTPException
+from fastapi import FastAPI, File, UploadFile, HTTPException, Body, Header, Query
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import FileResponse, JSONResponse
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import pandas as pd
-import joblib
+import numpy as np
+import asyncio
 import os
-import io
+import json
+import subprocess
+import sys
+from dataclasses import asdict
 from datetime import datetime
 from sklearn.preprocessing import LabelEncoder
 
+from utils.model_store import ModelStore
+from utils.schema import FEATURE_SCHEMA_FILENAME
+from utils.worker_pool import PoolOverloaded, WorkerPool
+from utils.batching import MicroBatcher
+from utils.datasets import read_training_frame, resolve_dataset
+from utils.explain import format_drivers
+from utils.formats import (
+    DEFAULT_OUTPUT_FORMAT, OUTPUT_FORMATS, UnsupportedOutputFormatError, create_writer, media_type_for, resolve_output_format
+)
+from utils.ingest import UnsupportedFormatError, count_rows, detect_format, iter_chunks, spool_to_disk
+from utils.jobs import FINISHED_STATES, JOB_SUCCEEDED, JobStore
+from utils.normalization import NORMALIZER
+from utils.prediction_cache import PredictionCache
+from utils.rubric import ORDINAL_MAPPINGS, logic_status, score_block, win_probability_category
+from utils.model_update import UpdateConfig, update_model
+from utils.training import SEARCH_MODES, TrainingConfig, train
+from utils.training_progress import TrainingCancelled, TrainingProgress
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Deal Win Probability API",
@@ -30,102 +53,162 @@ app = FastAPI(
 # Define paths
 PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
 MODEL_PATH = os.path.join(PROJECT_ROOT, "models", "xgb_classifier.pkl")
-SYNTHETIC_DATA_PATH = os.path.join(PROJECT_ROOT, "data", "output", "synthetic_data_v3.xlsx")
+ENCODER_PATH = os.path.join(PROJECT_ROOT, "models", "label_encoder.pkl")
+FEATURE_SCHEMA_PATH = os.path.join(PROJECT_ROOT, "models", FEATURE_SCHEMA_FILENAME)
+# Names the training datasets; training and updates use its default (see utils/datasets.py)
+DATASET_MANIFEST_PATH = os.path.join(PROJECT_ROOT, "data", "datasets.json")
 OUTPUT_DIR = os.path.join(PROJECT_ROOT, "data", "output")
+JOBS_DIR = os.path.join(PROJECT_ROOT, "data", "jobs")
 
-# Global mappings for normalization and scoring
-NORMALIZATION_MAP = {
-    "Account Engagement": {
-        "high": "High (Existing+Good)", "good": "High (Existing+Good)",
-        "medium": "Medium (Existing+Poor)", "average": "Medium (Existing+Poor)",
-        "low": "Low (New Account)", "new": "Low (New Account)", "none": "Low (New Account)"
-    },
-    "Client Relationship": {
-        "high": "Strong", "strong": "Strong", "good": "Strong",
-        "medium": "Neutral", "neutral": "Neutral", "average": "Neutral",
-        "low": "Weak", "weak": "Weak", "poor": "Weak", "new": "Weak", "none": "Weak"
-    },
-    "Deal Coach": {
-        "active": "Active & Available", "available": "Active & Available",
-        "passive": "Passive",
-        "not": "Not Available", "none": "Not Available"
-    },
-    "Incumbency Share": {
-        "high": "High (>50%)", ">50%": "High (>50%)",
-        "medium": "Medium (20-50%)", "20-50%": "Medium (20-50%)",
-        "low": "Low (<20%)", "<20%": "Low (<20%)", "none": "None"
-    },
-    "Bidder Rank": {
-        "1": "Top", "top": "Top", "first": "Top", "high": "Top",
-        "2": "Middle", "middle": "Middle", "second": "Middle", "medium": "Middle",
-        "3": "Bottom", "bottom": "Bottom", "last": "Bottom", "low": "Bottom"
-    },
-    "References": {
-        "strong": "Strong (Domain+Tech)",
-        "average": "Average", "medium": "Average",
-        "weak": "Weak/None", "none": "Weak/None"
-    },
-    "Solution Strength": {
-        "high": "Strong (Covers all)", "strong": "Strong (Covers all)",
-        "medium": "Average (Gaps)", "average": "Average (Gaps)",
-        "low": "Weak", "weak": "Weak"
-    },
-    "Client Impression": {
-        "positive": "Positive", "good": "Positive",
-        "neutral": "Neutral", "medium": "Neutral",
-        "negative": "Negative", "bad": "Negative"
-    },
-    "Orals Score": {
-        "strong": "Strong", "high": "Strong",
-        "par": "At Par", "medium": "At Par", "average": "At Par",
-        "weak": "Weak", "low": "Weak"
-    },
-    "Price Alignment": {
-        "on par": "On par with Client Budget", "budget": "On par with Client Budget", "aligned": "On par with Client Budget", "high": "On par with Client Budget",
-        "caveats": "Above Client Budget with Rationale/Caveats", "rationale": "Above Client Budget with Rationale/Caveats", "medium": "Above Client Budget with Rationale/Caveats",
-        "above": "Above Client Budget", "deviating": "Above Client Budget", "low": "Above Client Budget",
-        "info not available": "Client Budget Info not available", "no intel": "Client Budget Info not available"
-    },
-    "Price Position": {
-        "lowest": "Lowest", "low": "Lowest",
-        "competitive": "Competitive", "medium": "Competitive",
-        "expensive": "Expensive", "high": "Expensive"
-    }
-}
+# Loaded once per process and hot-reloaded when /train-model writes new artifacts
+# FAST_INFERENCE=0 scores through the sklearn pipeline instead of the booster directly;
+# MODEL_BUNDLE=0 loads the pickle even when the UBJSON model bundle is up to date
+MODEL_STORE = ModelStore(MODEL_PATH, ENCODER_PATH, FEATURE_SCHEMA_PATH,
+                         fast_inference=os.environ.get("FAST_INFERENCE", "1") != "0",
+                         use_bundle=os.environ.get("MODEL_BUNDLE", "1") != "0")
 
-ORDINAL_MAPPINGS = {
-    "Account Engagement": {"High (Existing+Good)": 5, "Medium (Existing+Poor)": 3, "Low (New Account)": 0},
-    "Client Relationship": {"Strong": 5, "Neutral": 3, "Weak": 0},
-    "Deal Coach": {"Active & Available": 5, "Passive": 3, "Not Available": 0},
-    "Bidder Rank": {"Top": 5, "Middle": 3, "Bottom": 0},
-    "Incumbency Share": {"High (>50%)": 5, "Medium (20-50%)": 3, "Low (<20%)": 0, "None": 0},
-    "References": {"Strong (Domain+Tech)": 5, "Average": 3, "Weak/None": 0},
-    "Solution Strength": {"Strong (Covers all)": 5, "Average (Gaps)": 3, "Weak": 0},
-    "Client Impression": {"Positive": 5, "Neutral": 3, "Negative": 0},
-    "Orals Score": {"Strong": 5, "At Par": 3, "Weak": 0},
-    "Price Alignment": {"On par with Client Budget": 5, "Above Client Budget with Rationale/Caveats": 3, "Above Client Budget": 0, "Client Budget Info not available": 2},
-    "Price Position": {"Lowest": 5, "Competitive": 3, "Expensive": 0},
-    "Current RFP Stage": {"Negotiation": 15, "Defence Cleared": 10, "Proposal Submitted": 5, "RFP Received": 0}
-}
+# Probabilities of rows already scored by the current model; only new or changed rows
+# reach predict_proba. PREDICTION_CACHE_MB=0 disables it, PREDICTION_CACHE_PATH adds a
+# SQLite file that survives restarts and is shared by worker processes.
+PREDICTION_CACHE_MB = float(os.environ.get("PREDICTION_CACHE_MB", "64"))
+PREDICTION_CACHE = PredictionCache(
+    max_bytes=int(PREDICTION_CACHE_MB * 1024 * 1024),
+    db_path=os.environ.get("PREDICTION_CACHE_PATH") or None
+) if PREDICTION_CACHE_MB > 0 else None
+
+# Blocking work runs off the event loop so /health keeps answering during long jobs.
+# PREDICT_EXECUTOR may be "thread" or "process"; excess requests get 429 + Retry-After.
+PREDICT_POOL = WorkerPool(
+    "predict",
+    kind=os.environ.get("PREDICT_EXECUTOR", "thread"),
+    max_workers=int(os.environ.get("PREDICT_WORKERS", "2")),
+    max_queue=int(os.environ.get("PREDICT_QUEUE_SIZE", "16")),
+    timeout=float(os.environ.get("PREDICT_TIMEOUT_SECONDS", "120"))
+)
+# One training/generation run at a time; a second request is rejected rather than queued
+TRAINING_POOL = WorkerPool(
+    "training",
+    kind="thread",
+    max_workers=1,
+    max_queue=0,
+    timeout=float(os.environ.get("TRAINING_TIMEOUT_SECONDS", "1800"))
+)
+# Cores one training run may use, split between parallel fits and XGBoost threads
+# (unset: every core the process may run on)
+TRAINING_CORES = int(os.environ["TRAINING_CORES"]) if os.environ.get("TRAINING_CORES") else None
+# Background prediction jobs: persistent job table plus their own workers, so a
+# long export does not hold an HTTP connection or starve interactive requests
+JOB_STORE = JobStore(os.path.join(JOBS_DIR, "jobs.sqlite3"), os.path.join(JOBS_DIR, "inputs"))
+JOB_POOL = WorkerPool(
+    "jobs",
+    kind="thread",
+    max_workers=int(os.environ.get("JOBS_WORKERS", "1")),
+    max_queue=int(os.environ.get("JOBS_QUEUE_SIZE", "32")),
+    timeout=None
+)
+JOB_TASKS = set()
+# Live progress of the training jobs running in this process, by job id (cancel() stops them)
+TRAINING_RUNS: Dict[str, TrainingProgress] = {}
+# Uploads are read, scored and written this many rows at a time
+INGEST_CHUNK_ROWS = int(os.environ.get("INGEST_CHUNK_ROWS", "5000"))
 
 # Pydantic models for request/response
 class HealthResponse(BaseModel):
     status: str
     message: str
     model_loaded: bool
+    model_version: Optional[str] = None
 
 class PredictionResponse(BaseModel):
     success: bool
     message: str
     predictions_file: str
     total_records: int
+    output_format: str = DEFAULT_OUTPUT_FORMAT
+    warnings: List[str] = []
+
+class RecordPrediction(BaseModel):
+    record_index: int
+    crm_id: Optional[str] = None
+    active: bool
+    predicted_deal_status: str
+    business_logic_status: str
+    business_logic_score: Optional[int] = None
+    win_probability: str
+    probabilities: Dict[str, float] = {}
+    explained_class: Optional[str] = None
+    top_drivers: Optional[List[Dict[str, Any]]] = None
+
+class RecordsPredictionResponse(BaseModel):
+    success: bool
+    message: str
+    model_version: str
+    total_records: int
+    predictions: List[RecordPrediction]
+    warnings: List[str] = []
+
+class JobResponse(BaseModel):
+    job_id: str
+    status: str
+    stage: Optional[str] = None
+    rows_total: Optional[int] = None
+    rows_processed: int = 0
+    input_filename: Optional[str] = None
+    output_format: Optional[str] = None
+    result_file: Optional[str] = None
+    result_url: Optional[str] = None
+    model_version: Optional[str] = None
     warnings: List[str] = []
+    error: Optional[str] = None
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
 
 class TrainingResponse(BaseModel):
     success: bool
     message: str
     validation_accuracy: float
     model_path: str
+    model_version: Optional[str] = None
+    training_rows: int = 0
+    classes: List[str] = []
+    metrics: Dict[str, Any] = {}
+    best_params: Dict[str, Any] = {}
+    timings: Dict[str, float] = {}
+    core_splits: Dict[str, Dict[str, int]] = {}
+    dataset_fingerprint: Optional[str] = None
+    feature_cache_hit: bool = False
+    training_cache_hit: bool = False
+    training_cache_key: Optional[str] = None
+    feature_contributions: Dict[str, float] = {}
+    artifacts: Dict[str, Optional[str]] = {}
+
+class TrainingJobResponse(BaseModel):
+    job_id: str
+    status: str
+    stage: Optional[str] = None
+    params: Dict[str, Any] = {}
+    progress: Dict[str, Any] = {}
+    status_url: str
+    cancel_url: Optional[str] = None
+    result: Optional[TrainingResponse] = None
+    error: Optional[str] = None
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+
+class ModelUpdateResponse(BaseModel):
+    success: bool
+    message: str
+    promoted: bool
+    model_version: Optional[str] = None
+    new_rows: int
+    boosted_rows: int
+    holdout_rows: int
+    trees_before: int
+    trees_after: int
+    metrics: Dict[str, Any] = {}
+    timings: Dict[str, float] = {}
 
 class SyntheticDataResponse(BaseModel):
     success: bool
@@ -147,20 +230,233 @@ async def root():
             "redoc": "/redoc",
             "generate_data": "/generate-synthetic-data",
             "train": "/train-model",
-            "predict": "/predict"
+            "train_job": "/train-model/jobs",
+            "update_model": "/train-model/update",
+            "predict": "/predict",
+            "predict_records": "/predict/records",
+            "predict_job": "/jobs/predict",
+            "metrics": "/metrics"
         }
     }
 
 
+@app.on_event("startup")
+async def load_model_on_startup():
+    """Warm the model cache so the first prediction does not pay the unpickling cost"""
+    await model_snapshot()
+
+
+@app.on_event("startup")
+async def resume_unfinished_jobs():
+    """Re-queue jobs that were queued or running when the API last stopped"""
+    for job_id in JOB_STORE.unfinished("predict"):
+        enqueue_job(job_id)
+    for job_id in JOB_STORE.unfinished("train"):
+        enqueue_training_job(job_id)
+
+
+@app.on_event("shutdown")
+async def shutdown_worker_pools():
+    PREDICT_POOL.shutdown()
+    TRAINING_POOL.shutdown()
+    JOB_POOL.shutdown()
+
+
+class PredictionInputError(ValueError):
+    """Invalid upload detected inside a worker; reported to the client as HTTP 400"""
+
+
+async def model_snapshot():
+    """
+    ``MODEL_STORE.get()`` without blocking the event loop
+
+    A (re)load unpickles the model and hashes its file, so it runs in the
+    threadpool; when the files are unchanged the snapshot in memory is
+    returned directly.
+    """
+    if MODEL_STORE.needs_load():
+        return await run_in_threadpool(MODEL_STORE.get)
+    return MODEL_STORE.snapshot
+
+
+async def run_in_pool(pool: WorkerPool, fn, *args):
+    """Run blocking work in ``pool``, translating backpressure and timeouts to HTTP errors"""
+    return await pool_result(pool, pool.run(fn, *args))
+
+
+async def pool_result(pool: WorkerPool, awaitable):
+    """Await work scheduled on ``pool`` and map its failures to HTTP errors"""
+    try:
+        return await awaitable
+    except PoolOverloaded as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=503,
+            detail=f"{pool.name} request timed out after {pool.timeout:.0f}s",
+            headers={"Retry-After": str(pool.retry_after())}
+        )
+    except PredictionInputError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def run_script(script_name: str) -> tuple:
+    """Run one of the src/ scripts and return (returncode, stdout, stderr)"""
+    script_path = os.path.join(PROJECT_ROOT, "src", script_name)
+    result = subprocess.run([sys.executable, script_path], capture_output=True, text=True)
+    return result.returncode, result.stdout, result.stderr
+
+
+def training_data_path() -> Optional[str]:
+    """The manifest's default training dataset, or None when there is none or its file is missing"""
+    try:
+        return resolve_dataset(manifest_path=DATASET_MANIFEST_PATH)
+    except (FileNotFoundError, KeyError):
+        return None
+
+
+def require_training_data() -> str:
+    """The default training dataset, or a 400 asking for synthetic data to be generated"""
+    data_path = training_data_path()
+    if data_path is None:
+        raise HTTPException(
+            status_code=400,
+            detail="Synthetic data not found. Please generate data first using /generate-synthetic-data"
+        )
+    return data_path
+
+
+def run_generation() -> tuple:
+    """Generate synthetic data and count the records of the dataset it registered (worker side)"""
+    returncode, stdout, stderr = run_script("generate_synthetic_data.py")
+    data_path = training_data_path() if returncode == 0 else None
+    records = len(read_training_frame(data_path)) if data_path is not None else None
+    return returncode, stderr, records, data_path
+
+
+def training_response(result, snapshot) -> "TrainingResponse":
+    """Response body of a finished training run (also stored as a training job's result)"""
+    return TrainingResponse(
+        success=True,
+        message=("Data and settings unchanged: reused the stored training run" if result.training_cache_hit
+                 else "Model trained successfully"),
+        validation_accuracy=result.validation_accuracy,
+        model_path=result.model_path,
+        model_version=snapshot.version if snapshot is not None else None,
+        training_rows=result.training_rows,
+        classes=result.classes,
+        metrics={
+            "baseline": asdict(result.baseline),
+            "final": asdict(result.final),
+            "cv_f1_scores": result.cv_f1_scores,
+            "cv_f1_mean": result.cv_f1_mean,
+            "cv_best_iterations": result.cv_best_iterations,
+            "search": {
+                "mode": result.search_mode,
+                "fits": result.search_fits,
+                "best_cv_f1": result.search_best_f1,
+                "candidates": result.search_candidates,
+            },
+        },
+        best_params=result.best_params,
+        timings=result.timings,
+        core_splits={stage: asdict(split) for stage, split in result.core_splits.items()},
+        dataset_fingerprint=result.dataset_fingerprint,
+        feature_cache_hit=result.feature_cache_hit,
+        training_cache_hit=result.training_cache_hit,
+        training_cache_key=result.training_cache_key,
+        feature_contributions=result.feature_contributions,
+        artifacts={
+            "model": result.model_path,
+            "label_encoder": result.encoder_path,
+            "feature_schema": result.schema_path,
+            "shap_summary": result.shap_summary_path,
+            "bundle": result.bundle_path,
+        }
+    )
+
+
+def run_training_job(job_id: str) -> None:
+    """Train for a background job, publishing progress to the job table (worker side)"""
+    job = JOB_STORE.get(job_id)
+    if job is None or job["status"] in FINISHED_STATES:
+        return
+    # Iteration updates reach the table at most once a second; stage changes right away
+    progress = TrainingProgress(
+        publish=lambda state: JOB_STORE.update(job_id, stage=state["stage"], progress=json.dumps(state))
+    )
+    TRAINING_RUNS[job_id] = progress
+    JOB_STORE.start(job_id)
+    try:
+        config = TrainingConfig(data_path=job["input_path"], models_dir=os.path.dirname(MODEL_PATH),
+                                n_cores=TRAINING_CORES, **json.loads(job["params"] or "{}"))
+        result = train(config, progress)
+        snapshot = MODEL_STORE.get()
+        JOB_STORE.finish(
+            job_id, progress=json.dumps(progress.state()), result=training_response(result, snapshot).model_dump_json(),
+            model_version=snapshot.version if snapshot is not None else None
+        )
+    except TrainingCancelled as e:
+        JOB_STORE.update(job_id, progress=json.dumps(progress.state()))
+        JOB_STORE.cancel(job_id, str(e))
+    except Exception as e:
+        JOB_STORE.fail(job_id, f"{type(e).__name__}: {e}")
+    finally:
+        TRAINING_RUNS.pop(job_id, None)
+
+
+def enqueue_training_job(job_id: str) -> None:
+    """Run a training job in the training pool without waiting for it"""
+    async def run():
+        try:
+            await TRAINING_POOL.run(run_training_job, job_id)
+        except PoolOverloaded as e:
+            JOB_STORE.fail(job_id, str(e))
+        except asyncio.TimeoutError:
+            # Stop the run instead of letting it hold the training worker
+            progress = TRAINING_RUNS.get(job_id)
+            if progress is not None:
+                progress.cancel(f"Training timed out after {TRAINING_POOL.timeout:.0f}s")
+
+    task = asyncio.get_running_loop().create_task(run())
+    JOB_TASKS.add(task)
+    task.add_done_callback(JOB_TASKS.discard)
+
+
+def training_job_response(job: dict) -> "TrainingJobResponse":
+    # A run in this process reports its live state; otherwise the last published one
+    progress = TRAINING_RUNS.get(job["id"])
+    state = progress.state() if progress is not None else json.loads(job["progress"] or "{}")
+    return TrainingJobResponse(
+        job_id=job["id"],
+        status=job["status"],
+        stage=state["stage"] if progress is not None else job["stage"],
+        params=json.loads(job["params"] or "{}"),
+        progress=state,
+        status_url=f"/train-model/{job['id']}",
+        cancel_url=f"/train-model/{job['id']}/cancel" if job["status"] not in FINISHED_STATES else None,
+        result=TrainingResponse.model_validate_json(job["result"]) if job["result"] else None,
+        **{k: job[k] for k in ("error", "created_at", "started_at", "finished_at")}
+    )
+
+
+def require_training_job(job_id: str) -> dict:
+    job = JOB_STORE.get(job_id)
+    if job is None or job["kind"] != "train":
+        raise HTTPException(status_code=404, detail="Training job not found")
+    return job
+
+
 @app.get("/health", response_model=HealthResponse, tags=["Health"])
 async def health_check():
-    """Check API health and model availability"""
-    model_exists = os.path.exists(MODEL_PATH)
+    """Check API health and which model is loaded in memory (never loads or reloads it)"""
+    snapshot = MODEL_STORE.snapshot
     
     return HealthResponse(
         status="healthy",
         message="API is running",
-        model_loaded=model_exists
+        model_loaded=snapshot is not None,
+        model_version=snapshot.version if snapshot is not None else None
     )
 
 
@@ -173,345 +469,790 @@ async def generate_synthetic_data():
     training data for the XGBoost model.
     """
     try:
-        # Import and run the generation script
-        import subprocess
-        import sys
+        # Run the generation script in the training worker
+        returncode, stderr, records, data_path = await run_in_pool(TRAINING_POOL, run_generation)
         
-        script_path = os.path.join(PROJECT_ROOT, "src", "generate_synthetic_data.py")
-        result = subprocess.run([sys.executable, script_path], capture_output=True, text=True)
-        
-        if result.returncode != 0:
-            raise HTTPException(status_code=500, detail=f"Data generation failed: {result.stderr}")
+        if returncode != 0:
+            raise HTTPException(status_code=500, detail=f"Data generation failed: {stderr}")
         
         # Check if file was created
-        if not os.path.exists(SYNTHETIC_DATA_PATH):
+        if records is None:
             raise HTTPException(status_code=500, detail="Synthetic data file not created")
         
-        # Count records
-        df = pd.read_excel(SYNTHETIC_DATA_PATH)
-        
         return SyntheticDataResponse(
             success=True,
             message="Synthetic data generated successfully",
-            records_generated=len(df),
-            output_path=SYNTHETIC_DATA_PATH
+            records_generated=records,
+            output_path=data_path
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/train-model", response_model=TrainingResponse, tags=["Model Training"])
-async def train_model():
+async def train_model(
+    tune: bool = Query(True, description="Run the hyper-parameter search"),
+    search: str = Query("random", description="Search mode: 'random' (RandomizedSearchCV) or 'halving' (successive halving)"),
+    retrain: bool = Query(False, description="Train even if a stored run has the same data, settings and library versions")
+):
     """
     Train the XGBoost classifier model
     
     This endpoint trains a new model using the synthetic data.
-    The model is saved to the models directory.
+    The model is saved to the models directory. When the data, the settings
+    and the library versions match a stored run, that run's model and
+    metrics are reused instead (``training_cache_hit``); ``retrain=true``
+    trains anyway.
     """
     try:
-        import subprocess
-        import sys
-        
-        # Check if synthetic data exists
-        if not os.path.exists(SYNTHETIC_DATA_PATH):
-            raise HTTPException(
-                status_code=400, 
-                detail="Synthetic data not found. Please generate data first using /generate-synthetic-data"
-            )
+        # The manifest's default dataset, as for the training script
+        data_path = require_training_data()
         
-        script_path = os.path.join(PROJECT_ROOT, "src", "train_xgb_classifier.py")
-        result = subprocess.run([sys.executable, script_path], capture_output=True, text=True)
+        if search not in SEARCH_MODES:
+            raise HTTPException(status_code=400, detail=f"Unknown search mode '{search}'. Use one of: {', '.join(SEARCH_MODES)}")
         
-        if result.returncode != 0:
-            raise HTTPException(status_code=500, detail=f"Model training failed: {result.stderr}")
+        # Train in-process in the training worker; the result carries the metrics directly
+        config = TrainingConfig(data_path=data_path, models_dir=os.path.dirname(MODEL_PATH), tune=tune,
+                                search=search, n_cores=TRAINING_CORES, reuse_cached_run=not retrain)
+        progress = TrainingProgress()
+        try:
+            result = await run_in_pool(TRAINING_POOL, train, config, progress)
+        except HTTPException as e:
+            if e.status_code == 503:
+                # Timed out: stop the run instead of letting it hold the training worker
+                progress.cancel(e.detail)
+            raise
         
-        # Extract accuracy from output (if printed)
-        accuracy = 0.0
-        if "Validation Accuracy:" in result.stdout:
-            try:
-                accuracy_line = [line for line in result.stdout.split('\n') if 'Validation Accuracy:' in line][0]
-                accuracy = float(accuracy_line.split(':')[1].strip())
-            except:
-                pass
-        
-        return TrainingResponse(
-            success=True,
-            message="Model trained successfully",
-            validation_accuracy=accuracy,
-            model_path=MODEL_PATH
-        )
+        # Swap the freshly written artifacts into memory for subsequent requests
+        return training_response(result, await model_snapshot())
         
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=500, detail=f"Model training failed: {e}")
 
 
-@app.post("/predict", response_model=PredictionResponse, tags=["Prediction"])
-async def predict_deal_outcomes(file: UploadFile = File(..., description="Excel file with deal data")):
+@app.post("/train-model/update", response_model=ModelUpdateResponse, tags=["Model Training"])
+async def update_trained_model(
+    file: UploadFile = File(..., description="Newly labeled deals (.xlsx, .csv or .parquet) with a 'Deal Status' column"),
+    rounds: int = Query(50, ge=1, le=1000, description="Trees added to the current model"),
+    learning_rate: Optional[float] = Query(None, gt=0, le=1, description="Learning rate of the added trees (default: the model's)"),
+    tolerance: float = Query(0.0, ge=0, le=1, description="Weighted-F1 drop still accepted for promotion")
+):
     """
-    Predict deal outcomes from uploaded Excel file
-    
-    Upload an Excel file with deal information and get predictions.
-    The file should have the same structure as the training data.
+    Update the trained model with newly labeled deals
     
-    Returns a downloadable Excel file with predictions.
+    Adds trees to the current booster, fitted on the uploaded rows only, and
+    compares the result with the current model on a holdout of the new rows
+    plus the training data's holdout. The updated model replaces the saved one
+    only if its weighted F1 is no worse; ``promoted`` says which happened.
     """
     try:
-        import numpy as np
+        await require_snapshot()
+        try:
+            detect_format(file.filename)
+        except UnsupportedFormatError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
-        # Check if model exists
-        if not os.path.exists(MODEL_PATH):
-            raise HTTPException(
-                status_code=400,
-                detail="Model not found. Please train the model first using /train-model"
+        upload_path = await run_in_threadpool(spool_to_disk, file.file, file.filename)
+        reference_path = training_data_path()
+        try:
+            config = UpdateConfig(
+                new_data_path=upload_path, models_dir=os.path.dirname(MODEL_PATH), rounds=rounds,
+                learning_rate=learning_rate, tolerance=tolerance, reference_data_path=reference_path,
+                use_reference=reference_path is not None, n_cores=TRAINING_CORES
             )
+            result = await run_in_pool(TRAINING_POOL, update_model, config)
+        except (KeyError, ValueError) as e:
+            raise HTTPException(status_code=400, detail=f"Model update failed: {e}")
+        finally:
+            os.remove(upload_path)
         
-        # Check if label encoder exists
-        encoder_path = os.path.join(PROJECT_ROOT, "models", "label_encoder.pkl")
-        if not os.path.exists(encoder_path):
-            raise HTTPException(
-                status_code=400,
-                detail="Label encoder not found. Please train the model first using /train-model"
-            )
+        snapshot = await model_snapshot()
         
-        # Validate file type
-        if not file.filename.endswith(('.xlsx', '.xls')):
-            raise HTTPException(status_code=400, detail="Only Excel files (.xlsx, .xls) are supported")
+        return ModelUpdateResponse(
+            success=True,
+            message=f"Model {'updated' if result.promoted else 'unchanged'}: {result.reason}",
+            promoted=result.promoted,
+            model_version=snapshot.version if snapshot is not None else None,
+            new_rows=result.new_rows,
+            boosted_rows=result.boosted_rows,
+            holdout_rows=result.holdout_rows,
+            trees_before=result.trees_before,
+            trees_after=result.trees_after,
+            metrics={"current": asdict(result.current), "updated": asdict(result.candidate)},
+            timings=result.timings
+        )
         
-        # Read uploaded file
-        contents = await file.read()
-        raw_df = pd.read_excel(io.BytesIO(contents))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Model update failed: {e}")
+
+
+@app.post("/train-model/jobs", response_model=TrainingJobResponse, status_code=202, tags=["Model Training"])
+async def create_training_job(
+    tune: bool = Query(True, description="Run the hyper-parameter search"),
+    search: str = Query("random", description="Search mode: 'random' (RandomizedSearchCV) or 'halving' (successive halving)"),
+    retrain: bool = Query(False, description="Train even if a stored run has the same data, settings and library versions")
+):
+    """
+    Start training in the background
+
+    Returns a job id immediately. Poll GET /train-model/{job_id} for the
+    stage, the search candidate / CV fold being fitted, the boosting
+    iteration, its evaluation metric and the elapsed time; the job's
+    ``result`` holds the same body as POST /train-model once it has
+    succeeded. POST /train-model/{job_id}/cancel stops it.
+    """
+    data_path = require_training_data()
+    if search not in SEARCH_MODES:
+        raise HTTPException(status_code=400, detail=f"Unknown search mode '{search}'. Use one of: {', '.join(SEARCH_MODES)}")
+
+    # One training run at a time, as for /train-model
+    if TRAINING_POOL.in_flight >= TRAINING_POOL.capacity:
+        retry_after = TRAINING_POOL.retry_after()
+        raise HTTPException(
+            status_code=429,
+            detail=f"training pool is busy, retry in {retry_after}s",
+            headers={"Retry-After": str(retry_after)}
+        )
+
+    job = JOB_STORE.create("train", data_path, os.path.basename(data_path),
+                           params=json.dumps({"tune": tune, "search": search, "reuse_cached_run": not retrain}))
+    enqueue_training_job(job["id"])
+    return training_job_response(job)
+
+
+@app.get("/train-model/{job_id}", response_model=TrainingJobResponse, tags=["Model Training"])
+async def get_training_job(job_id: str):
+    """Status and live progress of a background training job"""
+    return training_job_response(require_training_job(job_id))
+
+
+@app.post("/train-model/{job_id}/cancel", response_model=TrainingJobResponse, tags=["Model Training"])
+async def cancel_training_job(job_id: str):
+    """
+    Cancel a queued or running training job
+
+    A running job stops at its next boosting iteration and keeps the
+    previously saved model; its status turns to ``cancelled`` shortly after.
+    """
+    job = require_training_job(job_id)
+    if job["status"] in FINISHED_STATES:
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}")
+
+    progress = TRAINING_RUNS.get(job_id)
+    if progress is not None:
+        progress.cancel()
+    else:
+        # Still queued, or marked running by a process that has since stopped
+        JOB_STORE.cancel(job_id, "Training was cancelled")
+    return training_job_response(JOB_STORE.get(job_id))
+
+
+# Column names accepted case-insensitively in uploads, plus a few known aliases
+STANDARD_COLUMNS = [
+    "SBU", "Account Name", "Opportunity Name", "SST Sales Stage", "Stage Description",
+    "Type of Business", "Account Engagement", "Client Relationship", "Deal Coach",
+    "References", "Solution Strength", "Client Impression", "Orals Score", "Price Alignment",
+    "Expected TCV ($Mn)"
+]
+COLUMN_ALIASES = {
+    "expected tcv ($mn) ": "Expected TCV ($Mn)",
+    "expected tcv": "Expected TCV ($Mn)",
+    "sales description": "Stage Description"
+}
+MANDATORY_COLUMNS = list(STANDARD_COLUMNS)
+INACTIVE_STATUSES = ["won", "lost", "aborted", "hold", "nan", "none", ""]
+
+
+def standardize_columns(raw_df: pd.DataFrame) -> pd.DataFrame:
+    """Strip column names and rename known columns to their standard spelling"""
+    raw_df.columns = raw_df.columns.astype(str).str.strip()
+    
+    # Create mapping from lowercase standard name to standard name
+    standard_map = {col.lower(): col for col in STANDARD_COLUMNS}
+    standard_map.update(COLUMN_ALIASES)
+    
+    raw_df.columns = [standard_map.get(col.lower(), col) for col in raw_df.columns]
+    return raw_df
+
+
+def active_deal_mask(raw_df: pd.DataFrame) -> pd.Series:
+    """
+    Active deals are scored; won/lost/aborted/hold deals keep their stage as status.
+    
+    Without a Stage Description column every deal is treated as active.
+    """
+    if "Stage Description" not in raw_df.columns:
+        return pd.Series(True, index=raw_df.index)
+    raw_df["Stage Description"] = raw_df["Stage Description"].astype(str).str.strip()
+    return ~raw_df["Stage Description"].str.lower().isin(INACTIVE_STATUSES)
+
+
+def empty_field_rows(raw_df: pd.DataFrame, active_mask: pd.Series, row_offset: int, found: Optional[Dict[str, List[int]]] = None) -> Dict[str, List[int]]:
+    """
+    Row numbers of empty mandatory fields on active deals, per column
+    
+    Keeps at most six rows per column (five to show, one to know there are
+    more), so it can be accumulated across chunks of a large file.
+    """
+    found = {} if found is None else found
+    active_rows = raw_df[active_mask]
+    for col in MANDATORY_COLUMNS:
+        if col in raw_df.columns:
+            rows = found.setdefault(col, [])
+            if len(rows) > 5:
+                continue
+            empty_mask = active_rows[col].isna() | (active_rows[col].astype(str).str.strip().replace({'nan': '', 'None': '', 'NaN': '', 'none': '', 'null': '', 'NULL': ''}) == '')
+            if empty_mask.any():
+                empty_indices = empty_mask[empty_mask].index.tolist()
+                rows.extend(idx + row_offset for idx in empty_indices[:6 - len(rows)])
+    return found
+
+
+def format_empty_field_warnings(found: Dict[str, List[int]], row_label: str) -> List[str]:
+    """Warn about empty mandatory fields, citing up to five row numbers"""
+    warnings = []
+    for col in MANDATORY_COLUMNS:
+        rows = found.get(col)
+        if rows:
+            rows_str = ", ".join(map(str, rows[:5]))
+            if len(rows) > 5:
+                rows_str += "..."
+            warnings.append(f"'{col}' Field empty at {row_label}(s): {rows_str}. Enter Input")
+    return warnings
+
+
+def empty_field_warnings(raw_df: pd.DataFrame, active_mask: pd.Series, row_offset: int, row_label: str) -> List[str]:
+    """Warn about empty mandatory fields on active deals, citing up to five row numbers"""
+    return format_empty_field_warnings(empty_field_rows(raw_df, active_mask, row_offset), row_label)
+
+
+def prepare_features(raw_df: pd.DataFrame, schema) -> pd.DataFrame:
+    """Build the model input frame: schema columns, cleaning, normalization and ordinal mapping"""
+    # Add missing columns with appropriate default values based on expected type
+    schema.add_missing_columns(raw_df)
+    
+    # Preprocessing - same as training
+    X_input = raw_df[schema.columns].copy()
+    
+    # Convert columns to match expected types from training
+    schema.coerce_types(X_input)
+    
+    # Now identify numeric vs categorical based on actual dtypes
+    numeric_cols = X_input.select_dtypes(include=['int64', 'float64']).columns.tolist()
+    categorical_cols = X_input.select_dtypes(include=['object']).columns.tolist()
+    
+    # Clean categorical columns
+    for col in categorical_cols:
+        X_input[col] = X_input[col].str.strip()
+        X_input[col] = X_input[col].replace({'nan': np.nan, 'None': np.nan, '': np.nan, 'NaN': np.nan})
+        X_input[col] = X_input[col].fillna("UNKNOWN")
+    
+    # Apply normalization mapping (each distinct spelling is matched once)
+    NORMALIZER.normalize_frame(X_input)
+    
+    # Impute numeric columns with the training medians
+    schema.fill_numeric(X_input, numeric_cols)
+            
+    # --- BUSINESS LOGIC: Explicit Ordinal Mapping ---
+    # Map values to numbers for business logic calculations and predictions
+    for col, mapping in ORDINAL_MAPPINGS.items():
+        if col in X_input.columns:
+            X_input[col] = pd.to_numeric(X_input[col].map(mapping).fillna(2), errors='coerce').fillna(2)
+    
+    X_input.columns = X_input.columns.astype(str)
+    return X_input
+
+
+def score_active_deals(X_input_active: pd.DataFrame, snapshot):
+    """Return (class probabilities, business logic scores) for the active deals"""
+    # Rows seen before with this model come from the cache; the rest go to the
+    # booster in one call. Predicted labels are not used downstream.
+    if PREDICTION_CACHE is not None:
+        pred_probs_active = PREDICTION_CACHE.predict_proba(X_input_active, snapshot.version, snapshot.predict_proba)
+    else:
+        pred_probs_active = snapshot.predict_proba(X_input_active)
+    
+    # Business logic score (rubric points looked up for the whole block at once)
+    active_business_scores = pd.Series(score_block(X_input_active).total, index=X_input_active.index)
+    return pred_probs_active, active_business_scores
+
+
+def explain_active_deals(X_input_active: pd.DataFrame, pred_probs_active, snapshot, drivers: int) -> list:
+    """Top ``drivers`` features of each active deal's most likely class (empty when not requested)"""
+    if drivers <= 0 or len(X_input_active) == 0:
+        return []
+    # One approximate-contributions call for the whole block (utils/explain.py)
+    return snapshot.top_drivers(X_input_active, drivers, np.argmax(pred_probs_active, axis=1))
+
+
+def build_result_frame(raw_df: pd.DataFrame, active_mask: pd.Series, pred_probs_active, active_business_scores, classes,
+                       active_drivers=None) -> pd.DataFrame:
+    """Append the prediction columns written to the result file to a copy of the upload"""
+    non_active_mask = ~active_mask
+    
+    # Initialize output columns in result_df
+    result_df = raw_df.copy()
+    result_df["Predicted Deal Status"] = ""
+    result_df["Business Logic Score"] = ""
+    result_df["Business Logic Status"] = ""
+    result_df["Win Probability"] = ""
+    
+    for class_name in classes:
+        result_df[f"Probability_{class_name}"] = ""
         
-        # Load model and label encoder
-        model = joblib.load(MODEL_PATH)
-        le = joblib.load(encoder_path)
+    # Process Active Deals
+    if active_mask.any():
+        result_df.loc[active_mask, "Business Logic Status"] = logic_status(active_business_scores.to_numpy())
+        result_df.loc[active_mask, "Business Logic Score"] = [f"{int(s)}%" for s in active_business_scores]
         
-        validation_warnings = []
+        # Override Predicted Deal Status and Win Probability based on Business Logic Score to align ML output with business rules
+        result_df.loc[active_mask, "Predicted Deal Status"] = result_df.loc[active_mask, "Business Logic Status"]
+        result_df.loc[active_mask, "Win Probability"] = win_probability_category(active_business_scores.to_numpy())
         
-        # Load synthetic data to get expected column structure
-        if not os.path.exists(SYNTHETIC_DATA_PATH):
-            raise HTTPException(status_code=400, detail="Synthetic data not found. Please train the model first.")
+        for idx, class_name in enumerate(classes):
+            result_df.loc[active_mask, f"Probability_{class_name}"] = [
+                f"{round(p * 100)}%" for p in pred_probs_active[:, idx]
+            ]
         
-        synthetic_df = pd.read_excel(SYNTHETIC_DATA_PATH)
-        drop_cols = ["CRM ID", "Opportunity Name", "Account Name", "Detailed Remarks", "Deal Status", "Stage Description", "SST Sales Stage"]
-        expected_cols = [c for c in synthetic_df.columns if c not in drop_cols]
+        if active_drivers:
+            result_df["Top Drivers"] = ""
+            result_df.loc[active_mask, "Top Drivers"] = [format_drivers(d) for d in active_drivers]
+            
+    # Process Non-Active Deals
+    if non_active_mask.any():
+        clean_statuses = raw_df.loc[non_active_mask, "Stage Description"].str.strip()
+        result_df.loc[non_active_mask, "Predicted Deal Status"] = clean_statuses
+        result_df.loc[non_active_mask, "Business Logic Status"] = clean_statuses
+        result_df.loc[non_active_mask, "Business Logic Score"] = "N/A"
+        result_df.loc[non_active_mask, "Win Probability"] = "N/A"
         
-        # 1. Normalize column names to strip spaces and handle casing variations
-        raw_df.columns = raw_df.columns.astype(str).str.strip()
-        
-        standard_cols = [
-            "SBU", "Account Name", "Opportunity Name", "SST Sales Stage", "Stage Description",
-            "Type of Business", "Account Engagement", "Client Relationship", "Deal Coach",
-            "References", "Solution Strength", "Client Impression", "Orals Score", "Price Alignment",
-            "Expected TCV ($Mn)"
-        ]
-        
-        # Create mapping from lowercase standard name to standard name
-        standard_map = {col.lower(): col for col in standard_cols}
-        standard_map["expected tcv ($mn) "] = "Expected TCV ($Mn)"
-        standard_map["expected tcv"] = "Expected TCV ($Mn)"
-        standard_map["sales description"] = "Stage Description"
-        
-        # Rename columns in raw_df that match standard columns case-insensitively
-        new_columns = []
-        for col in raw_df.columns:
-            col_lower = col.lower()
-            if col_lower in standard_map:
-                new_columns.append(standard_map[col_lower])
-            else:
-                new_columns.append(col)
-        raw_df.columns = new_columns
-        
-        tcv_col = "Expected TCV ($Mn)"
-        
-        # 2. Enforce all mandatory columns are present and not empty
-        mandatory_cols = [
-            "SBU", "Account Name", "Opportunity Name", "SST Sales Stage", "Stage Description",
-            "Type of Business", "Account Engagement", "Client Relationship", "Deal Coach",
-            "References", "Solution Strength", "Client Impression", "Orals Score", "Price Alignment",
-            tcv_col
-        ]
-        
-        # Check if any mandatory column is missing entirely
-        missing_cols = [col for col in mandatory_cols if col not in raw_df.columns]
-        if missing_cols:
-            raise HTTPException(status_code=400, detail=f"Missing mandatory columns: {', '.join(missing_cols)}")
+        for class_name in classes:
+            result_df.loc[non_active_mask, f"Probability_{class_name}"] = "N/A"
+        if "Top Drivers" in result_df.columns:
+            result_df.loc[non_active_mask, "Top Drivers"] = "N/A"
             
+    # Remove Deal Status column if exists
+    if "Deal Status" in result_df.columns:
+        result_df = result_df.drop(columns=["Deal Status"])
+    return result_df
+
+
+def build_record_predictions(raw_df: pd.DataFrame, active_mask: pd.Series, pred_probs_active, active_business_scores, classes,
+                             active_drivers=None) -> List["RecordPrediction"]:
+    """Per-deal predictions for the JSON route, in input order"""
+    predictions = []
+    active_positions = {idx: pos for pos, idx in enumerate(raw_df.index[active_mask])}
+    if active_business_scores is not None:
+        statuses = logic_status(active_business_scores.to_numpy())
+        categories = win_probability_category(active_business_scores.to_numpy())
+    for record_index, idx in enumerate(raw_df.index):
+        crm_id = raw_df.at[idx, "CRM ID"] if "CRM ID" in raw_df.columns else None
+        crm_id = None if pd.isna(crm_id) else str(crm_id)
+        pos = active_positions.get(idx)
+        if pos is None:
+            status = str(raw_df.at[idx, "Stage Description"]).strip()
+            predictions.append(RecordPrediction(
+                record_index=record_index,
+                crm_id=crm_id,
+                active=False,
+                predicted_deal_status=status,
+                business_logic_status=status,
+                win_probability="N/A"
+            ))
+            continue
+        score = int(active_business_scores.iloc[pos])
+        explained = {}
+        if active_drivers:
+            explained = {
+                "explained_class": str(classes[int(np.argmax(pred_probs_active[pos]))]),
+                "top_drivers": active_drivers[pos]
+            }
+        predictions.append(RecordPrediction(
+            record_index=record_index,
+            crm_id=crm_id,
+            active=True,
+            predicted_deal_status=str(statuses[pos]),
+            business_logic_status=str(statuses[pos]),
+            business_logic_score=score,
+            win_probability=str(categories[pos]),
+            probabilities={str(c): round(float(p), 4) for c, p in zip(classes, pred_probs_active[pos])},
+            **explained
+        ))
+    return predictions
+
+
+async def require_snapshot():
+    """Return the loaded model snapshot or raise the matching HTTP error"""
+    # Check if model exists
+    if not os.path.exists(MODEL_PATH):
+        raise HTTPException(
+            status_code=400,
+            detail="Model not found. Please train the model first using /train-model"
+        )
+    
+    # Check if label encoder exists
+    if not os.path.exists(ENCODER_PATH):
+        raise HTTPException(
+            status_code=400,
+            detail="Label encoder not found. Please train the model first using /train-model"
+        )
+    
+    snapshot = await model_snapshot()
+    if snapshot is None:
+        raise HTTPException(status_code=503, detail=f"Model could not be loaded: {MODEL_STORE.last_error}")
+    
+    # Expected column structure comes from the schema saved next to the model
+    if snapshot.schema is None:
+        raise HTTPException(status_code=400, detail="Feature schema not found. Please retrain the model using /train-model")
+    return snapshot
+
+
+def current_snapshot():
+    """Snapshot used inside workers (each process keeps its own model store)"""
+    snapshot = MODEL_STORE.get()
+    if snapshot is None or snapshot.schema is None:
+        raise PredictionInputError("Model or feature schema not available. Please train the model first using /train-model")
+    return snapshot
+
+
+def predict_file(path: str, fmt: str, snapshot, writer, progress=None, drivers: int = 0) -> tuple:
+    """
+    Stream an uploaded file through validation, scoring and ``writer`` chunk by chunk
+    
+    Returns (rows processed, warnings). ``progress(rows_done)`` is called after
+    every chunk. Memory use depends on INGEST_CHUNK_ROWS, not on the file size.
+    ``drivers`` > 0 adds a "Top Drivers" column for the active deals.
+    """
+    # Row numbers in warnings refer to the file: +2 for the 1-based header row
+    row_offset, row_label = {"xlsx": (2, "Excel row"), "xls": (2, "Excel row"), "csv": (2, "CSV row")}.get(fmt, (1, "row"))
+    empty_rows = {}
+    total_rows = 0
+    
+    for chunk in iter_chunks(path, fmt, INGEST_CHUNK_ROWS):
+        # 1. Normalize column names to strip spaces and handle casing variations
+        standardize_columns(chunk)
+        
+        # 2. Enforce all mandatory columns are present (the header is the same for every chunk)
+        if total_rows == 0:
+            missing_cols = [col for col in MANDATORY_COLUMNS if col not in chunk.columns]
+            if missing_cols:
+                raise PredictionInputError(f"Missing mandatory columns: {', '.join(missing_cols)}")
+        
         # Check for empty cells in any of the mandatory columns (only for Active deals)
-        raw_df["Stage Description"] = raw_df["Stage Description"].astype(str).str.strip()
-        inactive_statuses = ["won", "lost", "aborted", "hold", "nan", "none", ""]
-        active_mask = ~raw_df["Stage Description"].str.lower().isin(inactive_statuses)
-        active_rows = raw_df[active_mask]
-        
-        for col in mandatory_cols:
-            if col in raw_df.columns:
-                empty_mask = active_rows[col].isna() | (active_rows[col].astype(str).str.strip().replace({'nan': '', 'None': '', 'NaN': '', 'none': '', 'null': '', 'NULL': ''}) == '')
-                if empty_mask.any():
-                    empty_indices = empty_mask[empty_mask].index.tolist()
-                    row_numbers = [idx + 2 for idx in empty_indices[:5]] # +2 offset for excel 1-based index and header row
-                    rows_str = ", ".join(map(str, row_numbers))
-                    if len(empty_indices) > 5:
-                        rows_str += "..."
-                    validation_warnings.append(f"'{col}' Field empty at Excel row(s): {rows_str}. Enter Input")
-        
-        # Add missing columns with appropriate default values based on expected type
-        expected_types = {}
-        for col in expected_cols:
-            expected_types[col] = synthetic_df[col].dtype
-            
-        for col in expected_cols:
-            if col not in raw_df.columns:
-                if expected_types[col] in ['int64', 'float64']:
-                    raw_df[col] = 0.0
-                else:
-                    raw_df[col] = "UNKNOWN"
-        
-        # Preprocessing - same as training
-        X_input = raw_df.drop(columns=[c for c in drop_cols if c in raw_df.columns], errors="ignore").copy()
-        
-        # Convert columns to match expected types from training
-        for col in X_input.columns:
-            if col in expected_types:
-                if expected_types[col] in ['int64', 'float64']:
-                    X_input[col] = pd.to_numeric(X_input[col], errors='coerce')
-                else:
-                    X_input[col] = X_input[col].astype(str)
-        
-        # Now identify numeric vs categorical based on actual dtypes
-        numeric_cols = X_input.select_dtypes(include=['int64', 'float64']).columns.tolist()
-        categorical_cols = X_input.select_dtypes(include=['object']).columns.tolist()
-        
-        # Clean categorical columns
-        for col in categorical_cols:
-            X_input[col] = X_input[col].str.strip()
-            X_input[col] = X_input[col].replace({'nan': np.nan, 'None': np.nan, '': np.nan, 'NaN': np.nan})
-            X_input[col] = X_input[col].fillna("UNKNOWN")
-        
-        # Apply normalization mapping
-        for col, mapping in NORMALIZATION_MAP.items():
-            if col in X_input.columns:
-                def normalize_val(val):
-                    if pd.isna(val): return val
-                    s = str(val).lower().strip()
-                    for key, target in mapping.items():
-                        if key in s:
-                             return target
-                    return val
-                X_input[col] = X_input[col].apply(normalize_val)
-        
-        # Impute numeric columns
-        for col in numeric_cols:
-            if X_input[col].isna().any():
-                median_val = X_input[col].median()
-                if pd.isna(median_val):
-                    median_val = 0.0
-                X_input[col] = X_input[col].fillna(median_val)
-                
-        # --- BUSINESS LOGIC: Explicit Ordinal Mapping ---
-        # Map values to numbers for business logic calculations and predictions
-        for col, mapping in ORDINAL_MAPPINGS.items():
-            if col in X_input.columns:
-                X_input[col] = pd.to_numeric(X_input[col].map(mapping).fillna(2), errors='coerce').fillna(2)
-                
-        # Determine Active vs Non-Active Deals based on Stage Description
-        raw_df["Stage Description"] = raw_df["Stage Description"].astype(str).str.strip()
-        inactive_statuses = ["won", "lost", "aborted", "hold", "nan", "none", ""]
-        active_mask = ~raw_df["Stage Description"].str.lower().isin(inactive_statuses)
-        non_active_mask = ~active_mask
-        
-        # Initialize output columns in result_df
-        result_df = raw_df.copy()
-        result_df["Predicted Deal Status"] = ""
-        result_df["Business Logic Score"] = ""
-        result_df["Business Logic Status"] = ""
-        result_df["Win Probability"] = ""
-        
-        for class_name in le.classes_:
-            result_df[f"Probability_{class_name}"] = ""
-            
-        def calculate_business_score(row):
-            score = 0
-            score += {5: 10, 3: 5, 2: 2, 0: 0}.get(row.get("Account Engagement", 0), 0)
-            score += {5: 10, 3: 5, 2: 2, 0: 0}.get(row.get("Client Relationship", 0), 0)
-            score += {5: 10, 3: 5, 2: 2, 0: 0}.get(row.get("Deal Coach", 0), 0)
-            score += {5: 15, 3: 5, 2: 2, 0: 0}.get(row.get("Bidder Rank", 0), 0)
-            score += {5: 10, 3: 5, 2: 2, 0: 0}.get(row.get("Incumbency Share", 0), 0)
-            score += {5: 7, 3: 3, 2: 1, 0: 0}.get(row.get("References", 0), 0)
-            score += {5: 7, 3: 3, 2: 1, 0: 0}.get(row.get("Solution Strength", 0), 0)
-            score += {5: 6, 3: 3, 2: 1, 0: 0}.get(row.get("Client Impression", 0), 0)
-            score += {5: 15, 3: 8, 2: 4, 0: 0}.get(row.get("Orals Score", 0), 0)
-            score += {5: 5, 3: 3, 2: 2, 0: 0}.get(row.get("Price Alignment", 0), 0)
-            score += {5: 5, 3: 2, 0: 0}.get(row.get("Price Position", 0), 0)
-            return score
-            
-        def get_logic_status(score):
-            if score >= 60: return "Won"
-            if score <= 40: return "Lost"
-            return "Aborted/Risk"
-            
-        def get_prob_category(p):
-            pct = round(p * 100)
-            if pct > 80: return "Very High"
-            elif pct >= 61: return "High"
-            elif pct >= 41: return "Medium"
-            else: return "Low"
-            
-        # Process Active Deals
+        active_mask = active_deal_mask(chunk)
+        empty_field_rows(chunk, active_mask, row_offset, found=empty_rows)
+        
+        X_input = prepare_features(chunk, snapshot.schema)
+        
+        pred_probs_active, active_business_scores, active_drivers = None, None, None
         if active_mask.any():
-            X_input_active = X_input[active_mask].copy()
-            X_input_active.columns = X_input_active.columns.astype(str)
-            
-            # Predict using model
-            pred_numeric_active = model.predict(X_input_active)
-            pred_labels_active = le.inverse_transform(pred_numeric_active)
-            pred_probs_active = model.predict_proba(X_input_active)
-            
-            # Business logic score
-            active_business_scores = X_input_active.apply(calculate_business_score, axis=1)
-            
-            result_df.loc[active_mask, "Business Logic Status"] = active_business_scores.apply(get_logic_status)
-            result_df.loc[active_mask, "Business Logic Score"] = [f"{int(s)}%" for s in active_business_scores]
-            
-            # Override Predicted Deal Status and Win Probability based on Business Logic Score to align ML output with business rules
-            result_df.loc[active_mask, "Predicted Deal Status"] = result_df.loc[active_mask, "Business Logic Status"]
-            result_df.loc[active_mask, "Win Probability"] = [get_prob_category(score / 100.0) for score in active_business_scores]
-            
-            for idx, class_name in enumerate(le.classes_):
-                result_df.loc[active_mask, f"Probability_{class_name}"] = [
-                    f"{round(p * 100)}%" for p in pred_probs_active[:, idx]
-                ]
-                
-        # Process Non-Active Deals
-        if non_active_mask.any():
-            clean_statuses = raw_df.loc[non_active_mask, "Stage Description"].str.strip()
-            result_df.loc[non_active_mask, "Predicted Deal Status"] = clean_statuses
-            result_df.loc[non_active_mask, "Business Logic Status"] = clean_statuses
-            result_df.loc[non_active_mask, "Business Logic Score"] = "N/A"
-            result_df.loc[non_active_mask, "Win Probability"] = "N/A"
-            
-            for class_name in le.classes_:
-                result_df.loc[non_active_mask, f"Probability_{class_name}"] = "N/A"
-                
-        # Remove Deal Status column if exists
-        if "Deal Status" in result_df.columns:
-            result_df = result_df.drop(columns=["Deal Status"])
-            
-        # Save to output
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_filename = f"predictions_{timestamp}.xlsx"
-        output_path = os.path.join(OUTPUT_DIR, output_filename)
+            pred_probs_active, active_business_scores = score_active_deals(X_input[active_mask], snapshot)
+            active_drivers = explain_active_deals(X_input[active_mask], pred_probs_active, snapshot, drivers)
+        
+        writer.write(build_result_frame(chunk, active_mask, pred_probs_active, active_business_scores,
+                                        snapshot.label_encoder.classes_, active_drivers))
+        total_rows += len(chunk)
+        if progress is not None:
+            progress(total_rows)
+    
+    if total_rows == 0:
+        raise PredictionInputError("The uploaded file contains no deal rows")
+    return total_rows, format_empty_field_warnings(empty_rows, row_label)
+
+
+def run_file_prediction(path: str, fmt: str, output_format: str = DEFAULT_OUTPUT_FORMAT, drivers: int = 0) -> dict:
+    """Score a spooled upload and write predictions_<timestamp> in ``output_format`` (worker side)"""
+    # Take one snapshot for the whole request so a concurrent retrain cannot mix models
+    snapshot = current_snapshot()
+    
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    output_filename = f"predictions_{timestamp}{OUTPUT_FORMATS[output_format].extension}"
+    writer = create_writer(output_format, os.path.join(OUTPUT_DIR, output_filename))
+    try:
+        total_rows, validation_warnings = predict_file(path, fmt, snapshot, writer, drivers=drivers)
+        writer.close()
+    except Exception:
+        writer.abort()
+        raise
+    
+    return {
+        "predictions_file": output_filename,
+        "total_records": total_rows,
+        "output_format": output_format,
+        "warnings": validation_warnings
+    }
+
+
+def run_prediction_job(job_id: str) -> None:
+    """Score a spooled upload for a background job, recording progress in the job table (worker side)"""
+    job = JOB_STORE.get(job_id)
+    if job is None or job["status"] in FINISHED_STATES:
+        return
+    JOB_STORE.start(job_id)
+    writer = None
+    try:
+        snapshot = current_snapshot()
+        fmt = detect_format(job["input_filename"])
+        JOB_STORE.update(job_id, stage="scoring", rows_total=count_rows(job["input_path"], fmt),
+                         rows_processed=0, model_version=snapshot.version)
+        
+        # Same layout as /predict, so /download-predictions serves job results too
+        output_format = job["output_format"] or DEFAULT_OUTPUT_FORMAT
+        output_filename = f"predictions_{job_id}{OUTPUT_FORMATS[output_format].extension}"
+        writer = create_writer(output_format, os.path.join(OUTPUT_DIR, output_filename))
+        params = json.loads(job["params"]) if job["params"] else {}
+        total_rows, validation_warnings = predict_file(
+            job["input_path"], fmt, snapshot, writer,
+            progress=lambda rows_done: JOB_STORE.update(job_id, rows_processed=rows_done),
+            drivers=params.get("drivers", 0)
+        )
+        JOB_STORE.update(job_id, stage="writing", rows_total=total_rows)
+        writer.close()
+        
+        JOB_STORE.finish(job_id, result_file=output_filename, warnings=json.dumps(validation_warnings))
+    except Exception as e:
+        if writer is not None:
+            writer.abort()
+        JOB_STORE.fail(job_id, f"{type(e).__name__}: {e}")
+
+
+def enqueue_job(job_id: str) -> None:
+    """Run a job in the job pool without waiting for it"""
+    async def run():
+        try:
+            await JOB_POOL.run(run_prediction_job, job_id)
+        except PoolOverloaded as e:
+            JOB_STORE.fail(job_id, str(e))
+    
+    task = asyncio.get_running_loop().create_task(run())
+    JOB_TASKS.add(task)
+    task.add_done_callback(JOB_TASKS.discard)
+
+
+def job_response(job: dict) -> "JobResponse":
+    result_url = None
+    if job["status"] == JOB_SUCCEEDED:
+        result_url = f"/jobs/{job['id']}/result"
+    return JobResponse(
+        job_id=job["id"],
+        result_url=result_url,
+        warnings=json.loads(job["warnings"]) if job["warnings"] else [],
+        **{k: job[k] for k in (
+            "status", "stage", "rows_total", "rows_processed", "input_filename", "output_format",
+            "result_file", "model_version", "error", "created_at", "started_at", "finished_at"
+        )}
+    )
+
+
+def load_records(records: List[Dict[str, Any]], schema) -> tuple:
+    """Frame one request's records; returns (raw_df, active_mask, warnings)"""
+    raw_df = pd.DataFrame.from_records(records)
+    standardize_columns(raw_df)
+    
+    # Records from CRM sync often omit fields; report them instead of rejecting the batch
+    validation_warnings = []
+    missing_cols = [col for col in MANDATORY_COLUMNS if col not in raw_df.columns]
+    if missing_cols:
+        validation_warnings.append(f"Missing fields (using default/neutral assumptions): {', '.join(missing_cols)}")
+    
+    active_mask = active_deal_mask(raw_df)
+    validation_warnings += empty_field_warnings(raw_df, active_mask, row_offset=0, row_label="record")
+    
+    # Defaults are filled per request so a field omitted by one caller does not
+    # turn into NaN when its rows are stacked with another caller's
+    schema.add_missing_columns(raw_df)
+    return raw_df, active_mask, validation_warnings
+
+
+def run_record_batch(batches: List[tuple]) -> List[Any]:
+    """
+    Score several record requests with one feature transform and one predict_proba (worker side)
+    
+    Each request is ``(records, drivers)``. Returns one result dict per
+    request, or the exception that request raised.
+    """
+    snapshot = current_snapshot()
+    schema = snapshot.schema
+    
+    parts = []
+    for records, _ in batches:
+        try:
+            parts.append(load_records(records, schema))
+        except Exception as e:
+            parts.append(PredictionInputError(f"Invalid records: {e}"))
+    loaded = [part for part in parts if not isinstance(part, Exception)]
+    if not loaded:
+        return parts
+    
+    # All rows of the batch go through preprocessing and the model together
+    frames = [raw_df[schema.columns] for raw_df, _, _ in loaded]
+    if len(frames) > 1:
+        # Stack as object columns; coerce_types restores the training dtypes afterwards
+        frames = [frame.astype(object) for frame in frames]
+    combined_df = pd.concat(frames, ignore_index=True)
+    combined_mask = pd.concat([mask for _, mask, _ in loaded], ignore_index=True)
+    X_input = prepare_features(combined_df, schema)
+    
+    pred_probs_active, active_business_scores = None, None
+    if combined_mask.any():
+        pred_probs_active, active_business_scores = score_active_deals(X_input[combined_mask], snapshot)
+    
+    # Drivers only for the active rows of requests that asked for them, in one call
+    requested = [(part, drivers) for part, (_, drivers) in zip(parts, batches) if not isinstance(part, Exception)]
+    explain_rows = np.concatenate([np.full(int(mask.sum()), drivers > 0) for (_, mask, _), drivers in requested])
+    max_drivers = max(drivers for _, drivers in requested)
+    explained = iter(())
+    if explain_rows.any():
+        X_active = X_input[combined_mask]
+        explained = iter(explain_active_deals(X_active[explain_rows], pred_probs_active[explain_rows], snapshot, max_drivers))
+    
+    # Hand each request back its own slice of the active rows
+    results = []
+    active_offset = 0
+    for part, (_, drivers) in zip(parts, batches):
+        if isinstance(part, Exception):
+            results.append(part)
+            continue
+        raw_df, active_mask, validation_warnings = part
+        n_active = int(active_mask.sum())
+        part_probs, part_scores, part_drivers = None, None, None
+        if n_active:
+            part_probs = pred_probs_active[active_offset:active_offset + n_active]
+            part_scores = active_business_scores.iloc[active_offset:active_offset + n_active]
+            if drivers > 0:
+                part_drivers = [next(explained)[:drivers] for _ in range(n_active)]
+        active_offset += n_active
+        
+        predictions = build_record_predictions(raw_df, active_mask, part_probs, part_scores, snapshot.label_encoder.classes_,
+                                               part_drivers)
+        results.append({
+            "model_version": snapshot.version,
+            "total_records": len(predictions),
+            "predictions": [p.model_dump() for p in predictions],
+            "warnings": validation_warnings
+        })
+    return results
+
+
+def run_record_prediction(records: List[Dict[str, Any]], drivers: int = 0) -> dict:
+    """Score JSON deal records and return the per-deal results (worker side)"""
+    result = run_record_batch([(records, drivers)])[0]
+    if isinstance(result, Exception):
+        raise result
+    return result
+
+
+# Concurrent /predict/records calls arriving within the window share one model call.
+# PREDICT_BATCH_WINDOW_MS=0 turns coalescing off.
+RECORD_BATCHER = None
+if float(os.environ.get("PREDICT_BATCH_WINDOW_MS", "2")) > 0:
+    RECORD_BATCHER = MicroBatcher(
+        "predict_records",
+        run_record_batch,
+        PREDICT_POOL,
+        max_wait_ms=float(os.environ.get("PREDICT_BATCH_WINDOW_MS", "2")),
+        max_batch_size=int(os.environ.get("PREDICT_BATCH_MAX_ROWS", "256")),
+        size_of=lambda request: len(request[0])
+    )
+
+
+def requested_output_format(output_format: Optional[str], accept: Optional[str]) -> str:
+    """Result format from the ``format`` parameter or the Accept header; 400 if unknown"""
+    try:
+        return resolve_output_format(output_format, accept)
+    except UnsupportedOutputFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+OUTPUT_FORMAT_DESCRIPTION = f"Result file format: {', '.join(OUTPUT_FORMATS)} (default {DEFAULT_OUTPUT_FORMAT}, or taken from the Accept header)"
+
+MAX_TOP_DRIVERS = 10
+DRIVERS_DESCRIPTION = "Top features driving each active deal's most likely class (0 = none)"
+
+
+@app.post("/predict", response_model=PredictionResponse, tags=["Prediction"])
+async def predict_deal_outcomes(
+    file: UploadFile = File(..., description="Deal data as .xlsx, .xls, .csv or .parquet"),
+    output_format: Optional[str] = Query(None, alias="format", description=OUTPUT_FORMAT_DESCRIPTION),
+    drivers: int = Query(0, ge=0, le=MAX_TOP_DRIVERS, description=DRIVERS_DESCRIPTION),
+    accept: Optional[str] = Header(None)
+):
+    """
+    Predict deal outcomes from an uploaded file
+    
+    Upload an Excel, CSV or Parquet file with deal information and get predictions.
+    The file should have the same structure as the training data.
+    
+    Returns a downloadable predictions file: Excel by default, or CSV, Parquet,
+    Arrow IPC stream or JSON Lines via ``?format=`` or an Accept header such as
+    ``application/vnd.apache.parquet``. ``?drivers=3`` adds a "Top Drivers"
+    column with each active deal's three strongest feature contributions.
+    """
+    try:
+        await require_snapshot()
         
-        os.makedirs(OUTPUT_DIR, exist_ok=True)
-        result_df.to_excel(output_path, index=False)
+        # Validate file type
+        try:
+            fmt = detect_format(file.filename)
+        except UnsupportedFormatError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        output_format = requested_output_format(output_format, accept)
+        
+        # Copy the upload to disk instead of reading it into memory
+        upload_path = await run_in_threadpool(spool_to_disk, file.file, file.filename)
+        try:
+            # Reading, scoring and writing run chunk by chunk in the predict worker pool
+            result = await run_in_pool(PREDICT_POOL, run_file_prediction, upload_path, fmt, output_format, drivers)
+        finally:
+            os.remove(upload_path)
         
         return PredictionResponse(
             success=True,
             message="Predictions generated successfully",
-            predictions_file=output_filename,
-            total_records=len(result_df),
-            warnings=validation_warnings
+            **result
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
+
+
+@app.post("/predict/records", response_model=RecordsPredictionResponse, tags=["Prediction"])
+async def predict_deal_records(
+    records: List[Dict[str, Any]] = Body(..., description="Deal records, one dict per deal"),
+    drivers: int = Query(0, ge=0, le=MAX_TOP_DRIVERS, description=DRIVERS_DESCRIPTION)
+):
+    """
+    Predict deal outcomes for a JSON array of deal records
+    
+    Accepts the same fields as the Excel upload (e.g. the rows in input3_data.json)
+    and returns the class probabilities, business logic score and status for each
+    deal inline. Nothing is written to disk. With ``?drivers=k`` each active deal
+    also lists the k features contributing most to its most likely class.
+    """
+    try:
+        await require_snapshot()
+        
+        if not records:
+            raise HTTPException(status_code=400, detail="No records provided")
+        
+        if RECORD_BATCHER is not None:
+            result = await pool_result(PREDICT_POOL, RECORD_BATCHER.submit((records, drivers)))
+        else:
+            result = await run_in_pool(PREDICT_POOL, run_record_prediction, records, drivers)
+        
+        return RecordsPredictionResponse(
+            success=True,
+            message="Predictions generated successfully",
+            **result
         )
         
     except HTTPException:
@@ -535,26 +1276,120 @@ async def download_predictions(filename: str):
     return FileResponse(
         path=file_path,
         filename=filename,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        media_type=media_type_for(filename)
+    )
+
+
+@app.post("/jobs/predict", response_model=JobResponse, status_code=202, tags=["Jobs"])
+async def create_prediction_job(
+    file: UploadFile = File(..., description="Deal data as .xlsx, .xls, .csv or .parquet"),
+    output_format: Optional[str] = Query(None, alias="format", description=OUTPUT_FORMAT_DESCRIPTION),
+    drivers: int = Query(0, ge=0, le=MAX_TOP_DRIVERS, description=DRIVERS_DESCRIPTION),
+    accept: Optional[str] = Header(None)
+):
+    """
+    Queue an Excel, CSV or Parquet file for background scoring
+    
+    Returns a job id immediately; poll GET /jobs/{job_id} for progress and
+    fetch the results from GET /jobs/{job_id}/result when it has succeeded.
+    The result format and ``drivers`` work as for /predict.
+    """
+    await require_snapshot()
+    
+    try:
+        detect_format(file.filename)
+    except UnsupportedFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    output_format = requested_output_format(output_format, accept)
+    
+    if JOB_POOL.in_flight >= JOB_POOL.capacity:
+        retry_after = JOB_POOL.retry_after()
+        raise HTTPException(
+            status_code=429,
+            detail=f"jobs pool is busy, retry in {retry_after}s",
+            headers={"Retry-After": str(retry_after)}
+        )
+    
+    input_path = await run_in_threadpool(spool_to_disk, file.file, file.filename, JOB_STORE.spool_dir)
+    job = JOB_STORE.create("predict", input_path, file.filename, output_format,
+                           params=json.dumps({"drivers": drivers}) if drivers else None)
+    enqueue_job(job["id"])
+    return job_response(job)
+
+
+@app.get("/jobs/{job_id}", response_model=JobResponse, tags=["Jobs"])
+async def get_job(job_id: str):
+    """Status, stage and progress of a background job"""
+    job = JOB_STORE.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_response(job)
+
+
+@app.get("/jobs/{job_id}/result", tags=["Jobs"])
+async def get_job_result(job_id: str):
+    """Download the predictions file of a finished job"""
+    job = JOB_STORE.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] != JOB_SUCCEEDED:
+        detail = f"Job is {job['status']}"
+        if job["error"]:
+            detail += f": {job['error']}"
+        raise HTTPException(status_code=409, detail=detail)
+    
+    file_path = os.path.join(OUTPUT_DIR, job["result_file"])
+    if not os.path.exists(file_path):
+        raise HTTPException(status_code=404, detail="Result file no longer exists")
+    return FileResponse(
+        path=file_path,
+        filename=job["result_file"],
+        media_type=media_type_for(job["result_file"])
     )
 
 
 @app.get("/model-info", tags=["Model"])
 async def get_model_info():
-    """Get information about the current model"""
-    if not os.path.exists(MODEL_PATH):
+    """Get information about the model currently loaded in memory"""
+    snapshot = await model_snapshot()
+    if snapshot is None:
         return {
-            "model_exists": False,
-            "message": "No model found. Please train a model first."
+            "model_exists": os.path.exists(MODEL_PATH),
+            "model_loaded": False,
+            "message": "No model loaded. Please train a model first.",
+            "load_error": MODEL_STORE.last_error
         }
     
-    model_stats = os.stat(MODEL_PATH)
-    
     return {
         "model_exists": True,
-        "model_path": MODEL_PATH,
-        "model_size_mb": round(model_stats.st_size / (1024 * 1024), 2),
-        "last_modified": datetime.fromtimestamp(model_stats.st_mtime).isoformat()
+        "model_loaded": True,
+        "model_path": snapshot.model_path,
+        "model_format": snapshot.model_format,
+        "model_version": snapshot.version,
+        "model_size_mb": round(snapshot.model_size_bytes / (1024 * 1024), 2),
+        "last_modified": snapshot.model_modified.isoformat(),
+        "loaded_at": snapshot.loaded_at.isoformat(),
+        "load_ms": round(snapshot.load_seconds * 1000, 1),
+        "reload_count": MODEL_STORE.reload_count,
+        "classes": snapshot.classes,
+        "inference_path": snapshot.inference_path,
+        "feature_schema_loaded": snapshot.schema is not None,
+        "feature_count": len(snapshot.schema.columns) if snapshot.schema is not None else None,
+        "feature_contributions": snapshot.feature_importance,
+        "load_error": MODEL_STORE.last_error
+    }
+
+
+@app.get("/metrics", tags=["Health"])
+async def get_metrics():
+    """Worker pool queue depth, wait/run times and rejection counts"""
+    return {
+        "predict_pool": PREDICT_POOL.stats(),
+        "training_pool": TRAINING_POOL.stats(),
+        "job_pool": JOB_POOL.stats(),
+        "record_batcher": RECORD_BATCHER.stats() if RECORD_BATCHER is not None else None,
+        "normalization_cache": NORMALIZER.cache_info(),
+        "prediction_cache": PREDICTION_CACHE.stats() if PREDICTION_CACHE is not None else None
     }
 
 
@@ -10,89 +10,26 @@ import pandas as pd
 import os
 import sys
 import subprocess
-import joblib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import io
 import re
+import time
 import numpy as np
 from sklearn.preprocessing import LabelEncoder
 
 import plotly.express as px
 
-# Global mappings for normalization and scoring
-NORMALIZATION_MAP = {
-    "Account Engagement": {
-        "high": "High (Existing+Good)", "good": "High (Existing+Good)",
-        "medium": "Medium (Existing+Poor)", "average": "Medium (Existing+Poor)",
-        "low": "Low (New Account)", "new": "Low (New Account)", "none": "Low (New Account)"
-    },
-    "Client Relationship": {
-        "high": "Strong", "strong": "Strong", "good": "Strong",
-        "medium": "Neutral", "neutral": "Neutral", "average": "Neutral",
-        "low": "Weak", "weak": "Weak", "poor": "Weak", "new": "Weak", "none": "Weak"
-    },
-    "Deal Coach": {
-        "active": "Active & Available", "available": "Active & Available",
-        "passive": "Passive",
-        "not": "Not Available", "none": "Not Available"
-    },
-    "Incumbency Share": {
-        "high": "High (>50%)", ">50%": "High (>50%)",
-        "medium": "Medium (20-50%)", "20-50%": "Medium (20-50%)",
-        "low": "Low (<20%)", "<20%": "Low (<20%)", "none": "None"
-    },
-    "Bidder Rank": {
-        "1": "Top", "top": "Top", "first": "Top", "high": "Top",
-        "2": "Middle", "middle": "Middle", "second": "Middle", "medium": "Middle",
-        "3": "Bottom", "bottom": "Bottom", "last": "Bottom", "low": "Bottom"
-    },
-    "References": {
-        "strong": "Strong (Domain+Tech)",
-        "average": "Average", "medium": "Average",
-        "weak": "Weak/None", "none": "Weak/None"
-    },
-    "Solution Strength": {
-        "high": "Strong (Covers all)", "strong": "Strong (Covers all)",
-        "medium": "Average (Gaps)", "average": "Average (Gaps)",
-        "low": "Weak", "weak": "Weak"
-    },
-    "Client Impression": {
-        "positive": "Positive", "good": "Positive",
-        "neutral": "Neutral", "medium": "Neutral",
-        "negative": "Negative", "bad": "Negative"
-    },
-    "Orals Score": {
-        "strong": "Strong", "high": "Strong",
-        "par": "At Par", "medium": "At Par", "average": "At Par",
-        "weak": "Weak", "low": "Weak"
-    },
-    "Price Alignment": {
-        "on par": "On par with Client Budget", "budget": "On par with Client Budget", "aligned": "On par with Client Budget", "high": "On par with Client Budget",
-        "caveats": "Above Client Budget with Rationale/Caveats", "rationale": "Above Client Budget with Rationale/Caveats", "medium": "Above Client Budget with Rationale/Caveats",
-        "above": "Above Client Budget", "deviating": "Above Client Budget", "low": "Above Client Budget",
-        "info not available": "Client Budget Info not available", "no intel": "Client Budget Info not available"
-    },
-    "Price Position": {
-        "lowest": "Lowest", "low": "Lowest",
-        "competitive": "Competitive", "medium": "Competitive",
-        "expensive": "Expensive", "high": "Expensive"
-    }
-}
-
-ORDINAL_MAPPINGS = {
-    "Account Engagement": {"High (Existing+Good)": 5, "Medium (Existing+Poor)": 3, "Low (New Account)": 0},
-    "Client Relationship": {"Strong": 5, "Neutral": 3, "Weak": 0},
-    "Deal Coach": {"Active & Available": 5, "Passive": 3, "Not Available": 0},
-    "Bidder Rank": {"Top": 5, "Middle": 3, "Bottom": 0},
-    "Incumbency Share": {"High (>50%)": 5, "Medium (20-50%)": 3, "Low (<20%)": 0, "None": 0},
-    "References": {"Strong (Domain+Tech)": 5, "Average": 3, "Weak/None": 0},
-    "Solution Strength": {"Strong (Covers all)": 5, "Average (Gaps)": 3, "Weak": 0},
-    "Client Impression": {"Positive": 5, "Neutral": 3, "Negative": 0},
-    "Orals Score": {"Strong": 5, "At Par": 3, "Weak": 0},
-    "Price Alignment": {"On par with Client Budget": 5, "Above Client Budget with Rationale/Caveats": 3, "Above Client Budget": 0, "Client Budget Info not available": 2},
-    "Price Position": {"Lowest": 5, "Competitive": 3, "Expensive": 0},
-    "Current RFP Stage": {"Negotiation": 15, "Defence Cleared": 10, "Proposal Submitted": 5, "RFP Received": 0}
-}
+from utils.datasets import resolve_dataset
+from utils.ingest import spool_to_disk
+from utils.model_store import ModelStore
+from utils.model_update import UpdateConfig, update_model
+from utils.schema import FEATURE_SCHEMA_FILENAME
+from utils.formats import DEFAULT_OUTPUT_FORMAT, OUTPUT_FORMATS, output_format_of, read_frame, write_frame
+from utils.normalization import NORMALIZER
+from utils.rubric import ORDINAL_MAPPINGS, RUBRIC, RUBRIC_GROUPS, logic_status, score_block, win_probability_category
+from utils.training import SEARCH_MODES, TrainingConfig, train
+from utils.training_progress import TrainingCancelled, TrainingProgress
 
 def get_deal_score_breakdown(row):
     # We need to get the mapped value (numeric) for each attribute in the row
@@ -104,12 +41,8 @@ def get_deal_score_breakdown(row):
             return float(val)
         val_str = str(val).strip()
         
-        # Apply normalization if present in NORMALIZATION_MAP
-        norm_map = NORMALIZATION_MAP.get(col, {})
-        for key, target in norm_map.items():
-            if key in val_str.lower():
-                val_str = target
-                break
+        # Apply normalization if the column has a normalization map
+        val_str = NORMALIZER.resolve(col, val_str) or val_str
                 
         # First check direct mapping
         mapping = ORDINAL_MAPPINGS.get(col, {})
@@ -121,104 +54,30 @@ def get_deal_score_breakdown(row):
                 return v
         return default_val
 
-    # Get scores for each field
-    eng_val = row.get("Account Engagement", "Unknown")
-    eng_pts = {5: 10, 3: 5, 2: 2, 0: 0}.get(get_mapped_val("Account Engagement"), 0)
-    
-    # Client Relationship
-    rel_val = row.get("Client Relationship", "Unknown")
-    rel_pts = {5: 10, 3: 5, 2: 2, 0: 0}.get(get_mapped_val("Client Relationship"), 0)
-    
-    # Deal Coach
-    coach_val = row.get("Deal Coach", "Unknown")
-    coach_pts = {5: 10, 3: 5, 2: 2, 0: 0}.get(get_mapped_val("Deal Coach"), 0)
-    
-    # Bidder Rank
-    rank_val = row.get("Bidder Rank", "Unknown")
-    rank_pts = {5: 15, 3: 5, 2: 2, 0: 0}.get(get_mapped_val("Bidder Rank"), 0)
-    
-    # Incumbency Share
-    inc_val = row.get("Incumbency Share", "Unknown")
-    inc_pts = {5: 10, 3: 5, 2: 2, 0: 0}.get(get_mapped_val("Incumbency Share"), 0)
-    
-    # References
-    ref_val = row.get("References", "Unknown")
-    ref_pts = {5: 7, 3: 3, 2: 1, 0: 0}.get(get_mapped_val("References"), 0)
-    
-    # Solution Strength
-    sol_val = row.get("Solution Strength", "Unknown")
-    sol_pts = {5: 7, 3: 3, 2: 1, 0: 0}.get(get_mapped_val("Solution Strength"), 0)
-    
-    # Client Impression
-    imp_val = row.get("Client Impression", "Unknown")
-    imp_pts = {5: 6, 3: 3, 2: 1, 0: 0}.get(get_mapped_val("Client Impression"), 0)
-    
-    # Orals Score
-    orals_val = row.get("Orals Score", "Unknown")
-    orals_pts = {5: 15, 3: 8, 2: 4, 0: 0}.get(get_mapped_val("Orals Score"), 0)
+    # Score the row with the shared rubric tables
+    codes = [get_mapped_val(factor.name) for factor in RUBRIC]
+    scores = score_block(np.array([codes], dtype=float))
     
-    # Price Alignment
-    pa_val = row.get("Price Alignment", "Unknown")
-    pa_pts = {5: 5, 3: 3, 2: 2, 0: 0}.get(get_mapped_val("Price Alignment", 2), 0)
-    
-    # Price Position
-    pp_val = row.get("Price Position", "Unknown")
-    pp_pts = {5: 5, 3: 2, 0: 0}.get(get_mapped_val("Price Position"), 0)
-    
-    # Calculate group totals
-    relationship_score = eng_pts + rel_pts + coach_pts
-    competition_score = rank_pts + inc_pts
-    solution_score = ref_pts + sol_pts + imp_pts
-    orals_score = orals_pts
-    price_score = pa_pts + pp_pts
-    
-    total = relationship_score + competition_score + solution_score + orals_score + price_score
+    groups = {}
+    for group in RUBRIC_GROUPS:
+        factor_ids = [i for i, factor in enumerate(RUBRIC) if factor.group == group]
+        groups[group] = {
+            "score": int(scores.groups[group][0]),
+            "max": sum(RUBRIC[i].max_points for i in factor_ids),
+            "details": [
+                {
+                    "parameter": RUBRIC[i].name,
+                    "value": row.get(RUBRIC[i].name, "Unknown"),
+                    "points": int(scores.points[0, i]),
+                    "max_pts": RUBRIC[i].max_points
+                }
+                for i in factor_ids
+            ]
+        }
     
     return {
-        "groups": {
-            "Relationship": {
-                "score": relationship_score,
-                "max": 30,
-                "details": [
-                    {"parameter": "Account Engagement", "value": eng_val, "points": eng_pts, "max_pts": 10},
-                    {"parameter": "Client Relationship", "value": rel_val, "points": rel_pts, "max_pts": 10},
-                    {"parameter": "Deal Coach", "value": coach_val, "points": coach_pts, "max_pts": 10}
-                ]
-            },
-            "Competition": {
-                "score": competition_score,
-                "max": 25,
-                "details": [
-                    {"parameter": "Bidder Rank", "value": rank_val, "points": rank_pts, "max_pts": 15},
-                    {"parameter": "Incumbency Share", "value": inc_val, "points": inc_pts, "max_pts": 10}
-                ]
-            },
-            "Solution": {
-                "score": solution_score,
-                "max": 20,
-                "details": [
-                    {"parameter": "References", "value": ref_val, "points": ref_pts, "max_pts": 7},
-                    {"parameter": "Solution Strength", "value": sol_val, "points": sol_pts, "max_pts": 7},
-                    {"parameter": "Client Impression", "value": imp_val, "points": imp_pts, "max_pts": 6}
-                ]
-            },
-            "Orals": {
-                "score": orals_score,
-                "max": 15,
-                "details": [
-                    {"parameter": "Orals Score", "value": orals_val, "points": orals_pts, "max_pts": 15}
-                ]
-            },
-            "Price": {
-                "score": price_score,
-                "max": 10,
-                "details": [
-                    {"parameter": "Price Alignment", "value": pa_val, "points": pa_pts, "max_pts": 5},
-                    {"parameter": "Price Position", "value": pp_val, "points": pp_pts, "max_pts": 5}
-                ]
-            }
-        },
-        "total": total
+        "groups": groups,
+        "total": int(scores.total[0])
     }
 
 # Page configuration
@@ -285,14 +144,35 @@ st.markdown("""
 # Project paths
 PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
 MODEL_PATH = os.path.join(PROJECT_ROOT, "models", "xgb_classifier.pkl")
-SYNTHETIC_DATA_PATH = os.path.join(PROJECT_ROOT, "data", "output", "synthetic_data_v3.xlsx")
+ENCODER_PATH = os.path.join(PROJECT_ROOT, "models", "label_encoder.pkl")
+FEATURE_SCHEMA_PATH = os.path.join(PROJECT_ROOT, "models", FEATURE_SCHEMA_FILENAME)
 OUTPUT_DIR = os.path.join(PROJECT_ROOT, "data", "output")
 
+
+def training_data_path():
+    """The dataset manifest's default training data, or None when there is none yet"""
+    try:
+        return resolve_dataset()
+    except (FileNotFoundError, KeyError):
+        return None
+
+
+@st.cache_resource
+def get_training_executor():
+    """One training worker per Streamlit server process, so sessions cannot train concurrently"""
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix="training")
+
+
+@st.cache_resource
+def get_model_store():
+    """One model store per Streamlit server process, shared across reruns and sessions"""
+    return ModelStore(MODEL_PATH, ENCODER_PATH, FEATURE_SCHEMA_PATH)
+
 # Initialize session state
 if 'model_trained' not in st.session_state:
     st.session_state.model_trained = os.path.exists(MODEL_PATH)
 if 'synthetic_data_generated' not in st.session_state:
-    st.session_state.synthetic_data_generated = os.path.exists(SYNTHETIC_DATA_PATH)
+    st.session_state.synthetic_data_generated = training_data_path() is not None
 if 'last_prediction_file' not in st.session_state:
     st.session_state.last_prediction_file = None
 
@@ -381,7 +261,7 @@ if page == "🏠 Home":
     
     with col1:
         if st.session_state.synthetic_data_generated:
-            df = pd.read_excel(SYNTHETIC_DATA_PATH)
+            df = read_frame(training_data_path())
             st.metric("Training Records", len(df))
         else:
             st.metric("Training Records", "N/A")
@@ -431,7 +311,7 @@ elif page == "📁 Data Generation":
                 
                 if result.returncode == 0:
                     st.session_state.synthetic_data_generated = True
-                    df = pd.read_excel(SYNTHETIC_DATA_PATH)
+                    df = read_frame(training_data_path())
                     
                     st.markdown(f"""
                     <div class="success-box">
@@ -469,7 +349,7 @@ elif page == "📁 Data Generation":
     # Show existing data if available
     if st.session_state.synthetic_data_generated and not generate_btn:
         st.markdown("### 📊 Current Synthetic Data")
-        df = pd.read_excel(SYNTHETIC_DATA_PATH)
+        df = read_frame(training_data_path())
         st.dataframe(df, use_container_width=True)
         
         # Download button
@@ -503,62 +383,92 @@ elif page == "🤖 Model Training":
         
         col1, col2 = st.columns([3, 1])
         
+        with col1:
+            search_mode = st.selectbox(
+                "Hyper-parameter search",
+                SEARCH_MODES,
+                format_func=lambda mode: {"random": "Randomized (20 candidates)", "halving": "Successive halving (faster)"}[mode]
+            )
+            retrain = st.checkbox("Retrain even if the data and settings are unchanged", value=False)
+        
         with col2:
             train_btn = st.button("🎯 Train Model", type="primary", use_container_width=True)
         
-        if train_btn:
-            with st.spinner("Training model... This may take a moment."):
-                try:
-                    script_path = os.path.join(PROJECT_ROOT, "src", "train_xgb_classifier.py")
-                    result = subprocess.run([sys.executable, script_path], capture_output=True, text=True)
-                    
-                    if result.returncode == 0:
-                        st.session_state.model_trained = True
-                        
-                        # Try to extract accuracy from output
-                        accuracy = "N/A"
-                        # Look for "Accuracy :" in the output
-                        if "Accuracy :" in result.stdout:
-                            try:
-                                # Get all lines with accuracy
-                                accuracy_lines = [line for line in result.stdout.split('\n') if 'Accuracy :' in line]
-                                if accuracy_lines:
-                                    # Take the last one (final accuracy)
-                                    accuracy_line = accuracy_lines[-1]
-                                    # Format is "Accuracy : 0.85" or similar
-                                    accuracy = accuracy_line.split(':')[1].strip()
-                                    # Convert to percentage
-                                    acc_val = float(accuracy)
-                                    accuracy = f"{acc_val:.2%}"
-                            except:
-                                pass
-                        
-                        st.markdown(f"""
-                        <div class="success-box">
-                            ✅ Model trained successfully!<br>
-                            Validation Accuracy: {accuracy}
-                        </div>
-                        """, unsafe_allow_html=True)
-                        
-                        # Show model info
-                        if os.path.exists(MODEL_PATH):
-                            model_size = os.path.getsize(MODEL_PATH) / (1024 * 1024)
-                            st.metric("Model Size", f"{model_size:.2f} MB")
-                    else:
-                        st.markdown(f"""
-                        <div class="error-box">
-                            ❌ Training failed: {result.stderr}
-                        </div>
-                        """, unsafe_allow_html=True)
-                except Exception as e:
-                    st.markdown(f"""
-                    <div class="error-box">
-                        ❌ Error: {str(e)}
-                    </div>
-                    """, unsafe_allow_html=True)
+        if train_btn and st.session_state.get("training_run") is None:
+            # Train in-process on the shared worker; the session keeps the future and its live progress
+            progress = TrainingProgress()
+            st.session_state.training_run = {
+                "progress": progress,
+                "future": get_training_executor().submit(
+                    train, TrainingConfig(data_path=None, models_dir=os.path.dirname(MODEL_PATH),
+                                          search=search_mode, reuse_cached_run=not retrain), progress
+                ),
+            }
+
+        training_run = st.session_state.get("training_run")
+        if training_run is not None:
+            progress, future = training_run["progress"], training_run["future"]
+            # A click reruns the script; the run itself keeps going on the worker until it sees the flag
+            if st.button("⏹ Cancel training", disabled=progress.cancelled or future.done()):
+                progress.cancel()
+            bar = st.progress(0.0, text="Waiting for the training worker...")
+            while not future.done():
+                state = progress.state()
+                bar.progress(state["fraction"] or 0.0, text=state["summary"])
+                time.sleep(0.5)
+            bar.empty()
+            st.session_state.training_run = None
+
+            try:
+                result = future.result()
+                st.session_state.model_trained = True
+
+                headline = ("Data and settings unchanged: reused the stored training run"
+                            if result.training_cache_hit else "Model trained successfully")
+                st.markdown(f"""
+                <div class="success-box">
+                    ✅ {headline}!<br>
+                    Validation Accuracy: {result.validation_accuracy:.2%}
+                </div>
+                """, unsafe_allow_html=True)
+
+                # Show model info
+                col1, col2, col3, col4 = st.columns(4)
+                with col1:
+                    st.metric("F1-score", f"{result.final.f1:.2%}")
+                with col2:
+                    st.metric("Mean CV F1", f"{result.cv_f1_mean:.2%}" if result.cv_f1_mean is not None else "N/A")
+                with col3:
+                    st.metric("Training Time", f"{result.timings['total']:.1f} s")
+                with col4:
+                    model_size = os.path.getsize(result.model_path) / (1024 * 1024)
+                    st.metric("Model Size", f"{model_size:.2f} MB")
+                if result.best_params:
+                    st.markdown("**Best parameters:**")
+                    st.json(result.best_params)
+                if result.feature_contributions:
+                    contributions = pd.DataFrame(
+                        list(result.feature_contributions.items())[:15], columns=["Feature", "Mean |contribution|"]
+                    )
+                    fig = px.bar(contributions, x="Mean |contribution|", y="Feature", orientation="h",
+                                 title="Feature contributions on the holdout (SHAP)")
+                    fig.update_layout(yaxis={"categoryorder": "total ascending"})
+                    st.plotly_chart(fig, use_container_width=True)
+            except TrainingCancelled as e:
+                st.markdown(f"""
+                <div class="info-box">
+                    ⏹ {str(e)}; the previously saved model is unchanged.
+                </div>
+                """, unsafe_allow_html=True)
+            except Exception as e:
+                st.markdown(f"""
+                <div class="error-box">
+                    ❌ Training failed: {str(e)}
+                </div>
+                """, unsafe_allow_html=True)
         
         # Show model info if already trained
-        if st.session_state.model_trained and not train_btn:
+        if st.session_state.model_trained and training_run is None:
             st.markdown("### 📊 Model Information")
             
             col1, col2, col3 = st.columns(3)
@@ -575,6 +485,40 @@ elif page == "🤖 Model Training":
                 if os.path.exists(MODEL_PATH):
                     mod_time = datetime.fromtimestamp(os.path.getmtime(MODEL_PATH))
                     st.metric("Last Trained", mod_time.strftime("%Y-%m-%d %H:%M"))
+        
+        # Daily refresh: add trees for newly closed deals instead of a full training run
+        if os.path.exists(MODEL_PATH):
+            with st.expander("🔁 Update model with newly labeled deals"):
+                new_deals = st.file_uploader(
+                    "Closed deals with a 'Deal Status' column", type=["xlsx", "csv", "parquet"], key="update_upload"
+                )
+                update_rounds = st.slider("Trees to add", 10, 200, 50, step=10)
+                if new_deals is not None and st.button("Update Model"):
+                    with st.spinner("Updating model..."):
+                        new_path = spool_to_disk(new_deals, new_deals.name)
+                        reference_path = training_data_path()
+                        try:
+                            update = get_training_executor().submit(
+                                update_model, UpdateConfig(new_data_path=new_path, models_dir=os.path.dirname(MODEL_PATH),
+                                                           rounds=update_rounds, reference_data_path=reference_path,
+                                                           use_reference=reference_path is not None)
+                            ).result()
+                            box = "success-box" if update.promoted else "info-box"
+                            outcome = "✅ Model updated" if update.promoted else "ℹ️ Current model kept"
+                            st.markdown(f"""
+                            <div class="{box}">
+                                {outcome}: {update.reason}<br>
+                                Trees: {update.trees_before} → {update.trees_after}, {update.timings['total']:.1f} s
+                            </div>
+                            """, unsafe_allow_html=True)
+                        except Exception as e:
+                            st.markdown(f"""
+                            <div class="error-box">
+                                ❌ Update failed: {str(e)}
+                            </div>
+                            """, unsafe_allow_html=True)
+                        finally:
+                            os.remove(new_path)
 
 # Predictions Page
 elif page == "🔮 Predictions":
@@ -603,7 +547,7 @@ elif page == "🔮 Predictions":
         # 2. Fallback: check last prediction file
         if selected_deal is None and st.session_state.last_prediction_file and os.path.exists(st.session_state.last_prediction_file):
             try:
-                df_latest = pd.read_excel(st.session_state.last_prediction_file)
+                df_latest = read_frame(st.session_state.last_prediction_file)
                 mask = df_latest['CRM ID'].apply(lambda x: match_crm_id(x, crm_id))
                 match = df_latest[mask]
                 if not match.empty:
@@ -613,11 +557,11 @@ elif page == "🔮 Predictions":
                 
         # 3. Fallback: scan prediction files in output directory
         if selected_deal is None and os.path.exists(OUTPUT_DIR):
-            pred_files = [f for f in os.listdir(OUTPUT_DIR) if f.startswith("predictions_") and f.endswith(".xlsx")]
+            pred_files = [f for f in os.listdir(OUTPUT_DIR) if f.startswith("predictions_") and output_format_of(f)]
             pred_files.sort(reverse=True)
             for file in pred_files[:5]:
                 try:
-                    df_latest = pd.read_excel(os.path.join(OUTPUT_DIR, file))
+                    df_latest = read_frame(os.path.join(OUTPUT_DIR, file))
                     mask = df_latest['CRM ID'].apply(lambda x: match_crm_id(x, crm_id))
                     match = df_latest[mask]
                     if not match.empty:
@@ -743,6 +687,14 @@ elif page == "🔮 Predictions":
                 st.dataframe(raw_df.head(10), use_container_width=True)
                 st.caption(f"Total records: {len(raw_df)}")
                 
+                result_format = st.selectbox(
+                    "Results format",
+                    list(OUTPUT_FORMATS),
+                    index=list(OUTPUT_FORMATS).index(DEFAULT_OUTPUT_FORMAT),
+                    format_func=str.upper,
+                    help="Excel for reading in a spreadsheet; CSV, Parquet, Arrow or JSONL are much faster to write and have no row limit"
+                )
+                
                 predict_btn = st.button("🔮 Generate Predictions", type="primary", use_container_width=True)
                 
                 if predict_btn:
@@ -815,57 +767,30 @@ elif page == "🔮 Predictions":
                             
                     with st.spinner("Generating predictions..."):
                         try:
-                            # Load model and label encoder
-                            model = joblib.load(MODEL_PATH)
-                            encoder_path = os.path.join(PROJECT_ROOT, "models", "label_encoder.pkl")
-                            le = joblib.load(encoder_path)
-                            
-                            # Load synthetic data to get expected column structure
-                            if not os.path.exists(SYNTHETIC_DATA_PATH):
-                                st.error("Synthetic data not found. Please generate and train the model first.")
+                            # Load model, label encoder and feature schema (cached across reruns)
+                            snapshot = get_model_store().get()
+                            if snapshot is None:
+                                st.error("Model not found. Please train the model first.")
                                 st.stop()
+                            le = snapshot.label_encoder
                             
-                            synthetic_df = pd.read_excel(SYNTHETIC_DATA_PATH)
-                            drop_cols = ["CRM ID", "Opportunity Name", "Account Name", "Detailed Remarks", "Deal Status", "Stage Description", "SST Sales Stage"]
-                            expected_cols = [c for c in synthetic_df.columns if c not in drop_cols]
-                            
-                            # Get the expected types for each column from synthetic data
-                            expected_types = {}
-                            for col in expected_cols:
-                                expected_types[col] = synthetic_df[col].dtype
+                            # Expected column structure comes from the schema saved next to the model
+                            schema = snapshot.schema
+                            if schema is None:
+                                st.error("Feature schema not found. Please retrain the model.")
+                                st.stop()
                             
                             # Add missing columns with appropriate default values based on expected type
-                            for col in expected_cols:
-                                if col not in raw_df.columns:
-                                    if expected_types[col] in ['int64', 'float64']:
-                                        raw_df[col] = 0.0
-                                    else:
-                                        raw_df[col] = "UNKNOWN"
+                            schema.add_missing_columns(raw_df)
                             
                             # Preprocessing - same as training
-                            X_input = raw_df.drop(columns=[c for c in drop_cols if c in raw_df.columns], errors="ignore").copy()
+                            X_input = raw_df[schema.columns].copy()
                             
                             # Convert columns to match expected types from training
-                            for col in X_input.columns:
-                                if col in expected_types:
-                                    if expected_types[col] in ['int64', 'float64']:
-                                        X_input[col] = pd.to_numeric(X_input[col], errors='coerce')
-                                    else:
-                                        X_input[col] = X_input[col].astype(str)
+                            schema.coerce_types(X_input)
                             
                             # --- Data Cleaning & Normalization (MATCHING TRAINING SCRIPT) ---
-                            normalization_map = NORMALIZATION_MAP
-                            
-                            for col, mapping in normalization_map.items():
-                                if col in X_input.columns:
-                                    def normalize_val(val):
-                                        if pd.isna(val): return val
-                                        s = str(val).lower().strip()
-                                        for key, target in mapping.items():
-                                            if key in s:
-                                                 return target
-                                        return val
-                                    X_input[col] = X_input[col].apply(normalize_val)
+                            NORMALIZER.normalize_frame(X_input)
                             
                             # Identify numeric vs categorical
                             numeric_cols = X_input.select_dtypes(include=['int64', 'float64']).columns.tolist()
@@ -885,12 +810,8 @@ elif page == "🔮 Predictions":
                                 X_input[col] = X_input[col].replace({'nan': np.nan, 'None': np.nan, '': np.nan, 'NaN': np.nan})
                                 X_input[col] = X_input[col].fillna("UNKNOWN")
                                 
-                            for col in numeric_cols:
-                                if X_input[col].isna().any():
-                                    median_val = X_input[col].median()
-                                    if pd.isna(median_val):
-                                        median_val = 0.0
-                                    X_input[col] = X_input[col].fillna(median_val)
+                            # Impute numeric columns with the training medians
+                            schema.fill_numeric(X_input, numeric_cols)
                                     
                             # Determine Active vs Non-Active Deals based on Stage Description
                             raw_df["Stage Description"] = raw_df["Stage Description"].astype(str).str.strip()
@@ -908,48 +829,18 @@ elif page == "🔮 Predictions":
                             for class_name in le.classes_:
                                 result_df[f"Probability_{class_name}"] = ""
                                 
-                            # Define the helper score calculators locally
-                            def calculate_business_score(row):
-                                score = 0
-                                score += {5: 10, 3: 5, 2: 2, 0: 0}.get(row.get("Account Engagement", 0), 0)
-                                score += {5: 10, 3: 5, 2: 2, 0: 0}.get(row.get("Client Relationship", 0), 0)
-                                score += {5: 10, 3: 5, 2: 2, 0: 0}.get(row.get("Deal Coach", 0), 0)
-                                score += {5: 15, 3: 5, 2: 2, 0: 0}.get(row.get("Bidder Rank", 0), 0)
-                                score += {5: 10, 3: 5, 2: 2, 0: 0}.get(row.get("Incumbency Share", 0), 0)
-                                score += {5: 7, 3: 3, 2: 1, 0: 0}.get(row.get("References", 0), 0)
-                                score += {5: 7, 3: 3, 2: 1, 0: 0}.get(row.get("Solution Strength", 0), 0)
-                                score += {5: 6, 3: 3, 2: 1, 0: 0}.get(row.get("Client Impression", 0), 0)
-                                score += {5: 15, 3: 8, 2: 4, 0: 0}.get(row.get("Orals Score", 0), 0)
-                                score += {5: 5, 3: 3, 2: 2, 0: 0}.get(row.get("Price Alignment", 0), 0)
-                                score += {5: 5, 3: 2, 0: 0}.get(row.get("Price Position", 0), 0)
-                                return score
-                                
-                            def get_logic_status(score):
-                                if score >= 60: return "Won"
-                                if score <= 40: return "Lost"
-                                return "Aborted/Risk"
-                                
-                            def get_prob_category(p):
-                                pct = round(p * 100)
-                                if pct > 80: return "Very High"
-                                elif pct >= 61: return "High"
-                                elif pct >= 41: return "Medium"
-                                else: return "Low"
-                                
                             # Process Active Deals
                             if active_mask.any():
                                 X_input_active = X_input[active_mask].copy()
                                 X_input_active.columns = X_input_active.columns.astype(str)
                                 
-                                # Predict using model
-                                pred_numeric_active = model.predict(X_input_active)
-                                pred_labels_active = le.inverse_transform(pred_numeric_active)
-                                pred_probs_active = model.predict_proba(X_input_active)
+                                # Predict with the booster directly (pipeline fallback inside the snapshot)
+                                pred_probs_active = snapshot.predict_proba(X_input_active)
                                 
-                                # Business logic score
-                                active_business_scores = X_input_active.apply(calculate_business_score, axis=1)
+                                # Business logic score (rubric points looked up for the whole block at once)
+                                active_business_scores = score_block(X_input_active).total
                                 
-                                result_df.loc[active_mask, "Business Logic Status"] = active_business_scores.apply(get_logic_status)
+                                result_df.loc[active_mask, "Business Logic Status"] = logic_status(active_business_scores)
                                 
                                 # Override Predicted Deal Status and Win Probability based on Business Logic Score to align ML output with business rules
                                 result_df.loc[active_mask, "Predicted Deal Status"] = result_df.loc[active_mask, "Business Logic Status"]
@@ -961,7 +852,7 @@ elif page == "🔮 Predictions":
                                 ]
                                 
                                 # Set Win Probability category based on Business Logic Score
-                                result_df.loc[active_mask, "Win Probability"] = [get_prob_category(score / 100.0) for score in active_business_scores]
+                                result_df.loc[active_mask, "Win Probability"] = win_probability_category(active_business_scores)
                                 
                                 for idx, class_name in enumerate(le.classes_):
                                     result_df.loc[active_mask, f"Probability_{class_name}"] = [
@@ -996,11 +887,10 @@ elif page == "🔮 Predictions":
                                         export_df.at[idx, "Business Logic Score"] = match.group(1)
                                         
                             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                            output_filename = f"predictions_{timestamp}.xlsx"
+                            output_filename = f"predictions_{timestamp}{OUTPUT_FORMATS[result_format].extension}"
                             output_path = os.path.join(OUTPUT_DIR, output_filename)
                             
-                            os.makedirs(OUTPUT_DIR, exist_ok=True)
-                            export_df.to_excel(output_path, index=False)
+                            write_frame(export_df, output_path, result_format)
                             st.session_state.last_prediction_file = output_path
                             
                             st.markdown("""
@@ -1045,17 +935,15 @@ elif page == "🔮 Predictions":
                                 aborted_count = len(result_df[result_df['Predicted Deal Status'].astype(str).str.strip().str.lower().str.startswith('aborted')])
                                 st.metric("Predicted Aborted", aborted_count)
                             
-                            # Download button
-                            buffer = io.BytesIO()
-                            export_df.to_excel(buffer, index=False)
-                            buffer.seek(0)
-                            st.download_button(
-                                label="📥 Download Predictions",
-                                data=buffer,
-                                file_name=output_filename,
-                                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                                type="primary"
-                            )
+                            # Download button (serves the file just written instead of rendering it again)
+                            with open(output_path, "rb") as f:
+                                st.download_button(
+                                    label="📥 Download Predictions",
+                                    data=f.read(),
+                                    file_name=output_filename,
+                                    mime=OUTPUT_FORMATS[result_format].media_type,
+                                    type="primary"
+                                )
                             
                         except Exception as e:
                             st.markdown(f"""
@@ -1083,7 +971,7 @@ elif page == "📈 Audit Trail":
     
     # Scan for prediction files
     if os.path.exists(OUTPUT_DIR):
-        pred_files = [f for f in os.listdir(OUTPUT_DIR) if f.startswith("predictions_") and f.endswith(".xlsx")]
+        pred_files = [f for f in os.listdir(OUTPUT_DIR) if f.startswith("predictions_") and output_format_of(f)]
         pred_files.sort(reverse=True) # Newest first
     else:
         pred_files = []
@@ -1100,15 +988,15 @@ elif page == "📈 Audit Trail":
         for i, file in enumerate(pred_files):
             try:
                 # Extract timestamp from filename
-                # Format: predictions_YYYYMMDD_HHMMSS.xlsx
-                ts_str = file.replace("predictions_", "").replace(".xlsx", "")
+                # Format: predictions_YYYYMMDD_HHMMSS.<ext>
+                ts_str = os.path.splitext(file)[0].replace("predictions_", "")
                 try:
                     timestamp = datetime.strptime(ts_str, "%Y%m%d_%H%M%S")
                 except ValueError:
                     # Fallback to file creation time if format doesn't match
                     timestamp = datetime.fromtimestamp(os.path.getctime(os.path.join(OUTPUT_DIR, file)))
                 
-                df = pd.read_excel(os.path.join(OUTPUT_DIR, file))
+                df = read_frame(os.path.join(OUTPUT_DIR, file))
                 
                 # Add metadata
                 df['Prediction_Date'] = timestamp
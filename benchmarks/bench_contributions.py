@@ -0,0 +1,110 @@
+"""
+Cost of per-deal top drivers, and how close the approximate drivers are to exact TreeSHAP
+
+For each size, deals are resampled from the test-set workbook and timed in
+two ways:
+
+- worker side of ``/predict/records`` (``api.run_record_batch``): every
+  record scored with ``drivers=0`` and with ``drivers=3``; ``overhead`` is
+  what the drivers add to the whole call
+- ``/predict`` file route (``api.run_file_prediction``) on the deals saved
+  as an .xlsx upload, with a CSV result file, at the largest size
+- booster only: ``FastPredictor.predict_proba`` against
+  ``FastPredictor.top_drivers`` with the approximate contributions the API
+  uses (``approx_contribs``) and with exact TreeSHAP
+
+The prediction cache is switched off so the scoring cost is not hidden by
+cache hits. The agreement table compares the approximate and exact top-3
+drivers of the largest size: the same top driver, the share of the top-3
+columns both pick, and the same sign for the top driver.
+
+Usage
+-----
+```bash
+python benchmarks/bench_contributions.py
+```
+"""
+import json
+import os
+import tempfile
+
+import numpy as np
+
+from common import print_table, sample_deals, summarize, time_calls
+
+import api
+from utils.fast_inference import FastPredictor
+
+# rows -> timed repeats
+SIZES = {1: 200, 100: 50, 2_000: 5}
+TOP = 3
+
+
+def agreement(approx, exact) -> dict:
+    """Share of rows with the same top driver, mean top-k overlap and same top-driver sign"""
+    top1, overlap, sign = [], [], []
+    for a, e in zip(approx, exact):
+        top1.append(a[0]["feature"] == e[0]["feature"])
+        overlap.append(len({d["feature"] for d in a} & {d["feature"] for d in e}) / len(e))
+        sign.append(np.sign(a[0]["contribution"]) == np.sign(e[0]["contribution"]))
+    return {"same_top_driver": float(np.mean(top1)), f"top{TOP}_overlap": float(np.mean(overlap)),
+            "same_sign": float(np.mean(sign))}
+
+
+def main():
+    api.PREDICTION_CACHE = None
+    snapshot = api.current_snapshot()
+    predictor = FastPredictor(snapshot.model)
+
+    rows, agree = [], None
+    for n, repeat in SIZES.items():
+        raw = sample_deals(n)
+        records = json.loads(raw.to_json(orient="records"))
+        api.standardize_columns(raw)
+        X = api.prepare_features(raw, snapshot.schema)
+        classes = np.argmax(predictor.predict_proba(X), axis=1)
+
+        route = {k: summarize(time_calls(lambda k=k: api.run_record_batch([(records, k)]), repeat=repeat))
+                 for k in (0, TOP)}
+        booster = {
+            "predict_proba": summarize(time_calls(lambda: predictor.predict_proba(X), repeat=repeat)),
+            "approx": summarize(time_calls(lambda: predictor.top_drivers(X, TOP, classes), repeat=repeat)),
+            "exact": summarize(time_calls(lambda: predictor.top_drivers(X, TOP, classes, approx=False),
+                                          repeat=max(1, repeat // 5))),
+        }
+        rows.append({
+            "rows": f"{n:,}",
+            "route_ms": route[0]["p50_ms"],
+            "route_drivers_ms": route[TOP]["p50_ms"],
+            "overhead": f"{(route[TOP]['p50_ms'] / route[0]['p50_ms'] - 1) * 100:+.0f}%",
+            "predict_proba_ms": booster["predict_proba"]["p50_ms"],
+            "approx_drivers_ms": booster["approx"]["p50_ms"],
+            "exact_drivers_ms": booster["exact"]["p50_ms"],
+        })
+        agree = agreement(predictor.top_drivers(X, TOP, classes), predictor.top_drivers(X, TOP, classes, approx=False))
+
+    # The file route: upload read, scoring and result file written, as /predict runs it
+    n = list(SIZES)[-1]
+    file_rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "deals.xlsx")
+        sample_deals(n).to_excel(path, index=False)
+        api.OUTPUT_DIR = tmp
+        timings = {k: summarize(time_calls(lambda k=k: api.run_file_prediction(path, "xlsx", "csv", k), repeat=3))
+                   for k in (0, TOP)}
+    file_rows.append({
+        "rows": f"{n:,}",
+        "file_route_ms": timings[0]["p50_ms"],
+        "file_route_drivers_ms": timings[TOP]["p50_ms"],
+        "overhead": f"{(timings[TOP]['p50_ms'] / timings[0]['p50_ms'] - 1) * 100:+.0f}%",
+    })
+
+    print_table(rows)
+    print()
+    print_table(file_rows)
+    print()
+    print_table([{"rows": f"{list(SIZES)[-1]:,}", **agree}])
+
+
+if __name__ == "__main__":
+    main()
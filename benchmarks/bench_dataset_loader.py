@@ -0,0 +1,152 @@
+"""
+Projected, typed dataset loading vs reading every column of the newest workbook
+
+The training workbook is resampled to each size and written as .xlsx, .csv
+and .parquet to a temporary directory, then read in two ways:
+
+- ``scan + full read``: the previous training input: list the folder, take
+  the newest ``synthetic_data*`` file by modification time and read every
+  column of it (``pd.read_excel`` / ``read_csv`` / ``read_parquet``)
+- ``manifest + projected``: ``utils.datasets``: resolve the dataset from a
+  manifest and ``read_training_frame`` it (feature and target columns only,
+  declared types, text as ``category``)
+
+Each read runs in a fresh interpreter, so ``peak_mb`` (peak resident memory
+after the imports, ``VmHWM``) belongs to that read alone. ``load_ms`` is the
+median over ``--repeat`` interpreters, and ``frame_mb`` is the size of the
+frame that training holds afterwards (``memory_usage(deep=True)``).
+
+Usage
+-----
+```bash
+python benchmarks/bench_dataset_loader.py                      # 1,000 and 20,000 rows
+python benchmarks/bench_dataset_loader.py --sizes 200000 --formats csv parquet
+```
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from common import PROJECT_ROOT, print_table
+
+from utils.datasets import register_dataset, resolve_dataset
+
+SIZES = [1_000, 20_000]
+FORMATS = ["xlsx", "csv", "parquet"]
+MODES = ["scan + full read", "manifest + projected"]
+
+
+def peak_rss_mb() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def reset_peak() -> None:
+    # Writing 5 to clear_refs resets VmHWM to the current RSS (Linux)
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def newest_file(data_dir: str) -> str:
+    """The previous discovery: newest ``synthetic_data*`` file in the folder"""
+    files = [f for f in os.listdir(data_dir) if f.startswith("synthetic_data") and not f.startswith("~$")]
+    files.sort(key=lambda x: os.path.getmtime(os.path.join(data_dir, x)), reverse=True)
+    return os.path.join(data_dir, files[0])
+
+
+def read_full(path: str) -> pd.DataFrame:
+    ext = os.path.splitext(path)[1]
+    if ext == ".xlsx":
+        return pd.read_excel(path)
+    if ext == ".csv":
+        return pd.read_csv(path)
+    return pd.read_parquet(path)
+
+
+def run_case(mode: str, data_dir: str, manifest_path: str) -> None:
+    """Child process: one read, timings and memory printed as JSON"""
+    from utils.datasets import read_training_frame  # noqa: F401  (imports stay out of the timed read)
+
+    reset_peak()
+    base = peak_rss_mb()
+    start = time.perf_counter()
+    if mode == MODES[0]:
+        df = read_full(newest_file(data_dir))
+    else:
+        df = read_training_frame(resolve_dataset(manifest_path=manifest_path))
+    elapsed = (time.perf_counter() - start) * 1000
+    print(json.dumps({
+        "load_ms": elapsed,
+        "peak_mb": peak_rss_mb() - base,
+        "frame_mb": df.memory_usage(deep=True).sum() / 1024 ** 2,
+        "columns": df.shape[1],
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--formats", nargs="+", default=FORMATS, choices=FORMATS)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--run", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--data-dir", help=argparse.SUPPRESS)
+    parser.add_argument("--manifest", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.run:
+        run_case(args.run, args.data_dir, args.manifest)
+        return
+
+    base = pd.read_excel(resolve_dataset())
+    rows = []
+    for size in args.sizes:
+        df = base.sample(size, replace=size > len(base), random_state=0).reset_index(drop=True)
+        for fmt in args.formats:
+            with tempfile.TemporaryDirectory() as tmp:
+                data_dir = os.path.join(tmp, "output")
+                os.makedirs(data_dir)
+                path = os.path.join(data_dir, f"synthetic_data_bench.{fmt}")
+                if fmt == "xlsx":
+                    df.to_excel(path, index=False)
+                elif fmt == "csv":
+                    df.to_csv(path, index=False)
+                else:
+                    df.to_parquet(path, index=False)
+                manifest_path = os.path.join(tmp, "datasets.json")
+                register_dataset("bench", path, make_default=True, manifest_path=manifest_path)
+
+                for mode in MODES:
+                    results = []
+                    for _ in range(args.repeat):
+                        out = subprocess.run(
+                            [sys.executable, __file__, "--run", mode, "--data-dir", data_dir,
+                             "--manifest", manifest_path],
+                            capture_output=True, text=True, check=True, cwd=PROJECT_ROOT,
+                        )
+                        results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+                    rows.append({
+                        "format": fmt,
+                        "rows": f"{size:,}",
+                        "mode": mode,
+                        "columns": results[0]["columns"],
+                        "load_ms": float(np.median([r["load_ms"] for r in results])),
+                        "peak_mb": float(np.median([r["peak_mb"] for r in results])),
+                        "frame_mb": results[0]["frame_mb"],
+                    })
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Search time and F1 with and without early stopping inside every fold
+
+Runs the tuning step of ``utils.training.train`` on the training split of
+the workbook for both search modes, once with ``early_stopping=False`` (the
+sklearn searches, every fit grows its full 500-1,500 trees) and once with
+``early_stopping=True`` (``utils.search.EarlyStoppingSearch``: each fit
+early-stops on 10% of its fold's training rows). Both evaluate the same
+candidates on the same folds. The winner is then refit on the training
+split (with the tuned tree count when early stopping is on) and scored on
+the holdout.
+
+Usage
+-----
+```bash
+python benchmarks/bench_early_stopping.py
+python benchmarks/bench_early_stopping.py --seeds 3 --data path/to/larger_workbook.xlsx
+```
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import LabelEncoder
+
+from common import print_table
+
+from utils.datasets import resolve_dataset
+from utils.training import SEARCH_MODES, TrainingConfig, available_cores, build_model, evaluate, make_search, search_fits
+from utils.training_data import load_training_data
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seeds", type=int, default=2)
+    parser.add_argument("--data", help="Training workbook (default: newest data/output/synthetic_data*.xlsx)")
+    args = parser.parse_args()
+
+    data = load_training_data(args.data or resolve_dataset())
+    le = LabelEncoder()
+    y = le.fit_transform(data.target)
+    X_train, X_test, y_train, y_test = train_test_split(data.matrix, y, test_size=0.2, stratify=y, random_state=42)
+    cores = available_cores()
+
+    runs = []
+    for seed in range(args.seeds):
+        for mode in SEARCH_MODES:
+            for early_stopping in (False, True):
+                config = TrainingConfig(search=mode, random_state=seed, early_stopping=early_stopping)
+                pipeline = Pipeline([("model", build_model(len(le.classes_), seed))])
+                pipeline.set_params(model__n_jobs=1)
+                if not early_stopping:
+                    pipeline.set_params(model__early_stopping_rounds=None)
+                search = make_search(pipeline, config, n_jobs=cores)
+                start = time.perf_counter()
+                search.fit(X_train, y_train)
+                wall = time.perf_counter() - start
+
+                best_params = dict(search.best_params_)
+                if early_stopping:
+                    best_params["model__n_estimators"] = search.best_iteration_
+                best = clone(pipeline).set_params(**best_params, model__early_stopping_rounds=None, model__n_jobs=cores)
+                best.fit(X_train, y_train)
+                runs.append({
+                    "search": mode,
+                    "early_stopping": early_stopping,
+                    "wall_s": wall,
+                    "fits": search_fits(search),
+                    "refit_trees": best_params.get("model__n_estimators"),
+                    "cv_f1": search.best_score_,
+                    "holdout_f1": evaluate(best, X_test, y_test, le.classes_).f1,
+                })
+
+    frame = pd.DataFrame(runs)
+    rows = []
+    for (mode, early_stopping), part in frame.groupby(["search", "early_stopping"], sort=False):
+        rows.append({
+            "search": mode,
+            "early_stopping": "on" if early_stopping else "off",
+            "seeds": len(part),
+            "fits": int(part["fits"].iloc[0]),
+            "wall_s_median": float(part["wall_s"].median()),
+            "refit_trees_median": int(np.median(part["refit_trees"])),
+            "best_cv_f1_mean": f"{part['cv_f1'].mean():.4f}",
+            "holdout_f1_mean": f"{part['holdout_f1'].mean():.4f}",
+        })
+    for row in rows:
+        baseline = next(r for r in rows if r["search"] == row["search"] and r["early_stopping"] == "off")
+        row["speedup"] = baseline["wall_s_median"] / row["wall_s_median"]
+    print(f"{len(X_train):,} training rows, {cores} core(s)")
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
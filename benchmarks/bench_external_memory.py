@@ -0,0 +1,128 @@
+"""
+Peak memory of in-memory vs external-memory (streamed shard) training
+
+Resamples the training workbook to ``--rows`` rows, writes them as
+``--shards`` Parquet files, and fits ``--rounds`` trees two ways, each in
+its own interpreter so peak RSS (``ru_maxrss``) is measured per run:
+
+- ``in-memory``: what ``train`` does with one dataset: read every row into
+  one DataFrame, preprocess, one-hot encode into a dense float32 matrix,
+  fit ``XGBClassifier``
+- ``external (batch N)``: ``scan_shards`` plus ``ShardIterator`` feeding an
+  ``ExtMemQuantileDMatrix`` in batches of N rows, then ``xgb.train``
+
+``data_mb`` is the peak RSS (``VmHWM``) minus the peak after imports. Early stopping and
+the holdout are left out of both, so the runs fit identical tree counts.
+
+Usage
+-----
+```bash
+python benchmarks/bench_external_memory.py
+python benchmarks/bench_external_memory.py --rows 2000000 --batch-rows 20000 100000
+```
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from common import print_table
+
+from utils.datasets import resolve_dataset
+from utils.training import booster_params, build_model
+from utils.training_data import build_preprocessor, preprocess
+
+
+def peak_rss_mb() -> float:
+    """High-water RSS of this process image (VmHWM; ru_maxrss would include the forking parent's)"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # kB on Linux
+
+
+def run_in_memory(shard_dir: str, rounds: int) -> None:
+    from sklearn.preprocessing import LabelEncoder
+
+    df = pd.concat([pd.read_parquet(os.path.join(shard_dir, f)) for f in sorted(os.listdir(shard_dir))],
+                   ignore_index=True)
+    X, target, numeric_cols, categorical_cols, _ = preprocess(df)
+    matrix = build_preprocessor(numeric_cols, categorical_cols).fit_transform(X).astype(np.float32)
+    y = LabelEncoder().fit_transform(target)
+    model = build_model(len(np.unique(y))).set_params(n_estimators=rounds, early_stopping_rounds=None)
+    model.fit(matrix, y)
+
+
+def run_external(shard_dir: str, rounds: int, batch_rows: int) -> None:
+    import xgboost as xgb
+    from utils.training_shards import ShardIterator, list_shards, scan_shards
+
+    scan = scan_shards(list_shards(shard_dir), batch_rows)
+    n_classes = len(scan.label_encoder.classes_)
+    with tempfile.TemporaryDirectory() as cache_dir:
+        it = ShardIterator(scan, "train", 0.0, batch_rows, cache_prefix=os.path.join(cache_dir, "train"))
+        dtrain = xgb.ExtMemQuantileDMatrix(it)
+        xgb.train(booster_params(build_model(n_classes), n_classes, os.cpu_count() or 1, 42), dtrain,
+                  num_boost_round=rounds)
+
+
+def child(args) -> None:
+    base = peak_rss_mb()
+    start = time.perf_counter()
+    if args.run == "in-memory":
+        run_in_memory(args.data, args.rounds)
+    else:
+        run_external(args.data, args.rounds, args.run_batch)
+    print(json.dumps({"wall_s": time.perf_counter() - start, "peak_mb": peak_rss_mb(), "data_mb": peak_rss_mb() - base}))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--shards", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--batch-rows", type=int, nargs="+", default=[10_000, 50_000])
+    parser.add_argument("--run", help=argparse.SUPPRESS)
+    parser.add_argument("--run-batch", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--data", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.run:
+        child(args)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        df = pd.read_excel(resolve_dataset())
+        df = df.sample(args.rows, replace=True, random_state=0).reset_index(drop=True)
+        for i, part in enumerate(np.array_split(np.arange(args.rows), args.shards)):
+            df.iloc[part].to_parquet(os.path.join(tmp, f"part-{i:03d}.parquet"), index=False)
+        shard_mb = sum(os.path.getsize(os.path.join(tmp, f)) for f in os.listdir(tmp)) / 1024 ** 2
+        del df
+
+        runs = [("in-memory", "in-memory", 0)]
+        runs += [(f"external (batch {b:,})", "external", b) for b in args.batch_rows]
+        rows = []
+        for label, mode, batch in runs:
+            out = subprocess.run(
+                [sys.executable, "-W", "ignore", __file__, "--run", mode, "--run-batch", str(batch),
+                 "--data", tmp, "--rounds", str(args.rounds)],
+                check=True, capture_output=True, text=True
+            )
+            rows.append({"path": label, **json.loads(out.stdout.strip().splitlines()[-1])})
+
+    print(f"{args.rows:,} rows in {args.shards} Parquet shards ({shard_mb:.1f} MB), {args.rounds} trees")
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
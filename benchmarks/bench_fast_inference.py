@@ -0,0 +1,72 @@
+"""
+Pipeline inference vs direct booster inference (``utils/fast_inference.py``)
+
+Features are prepared once per size (as ``api.prepare_features`` does), then
+three ways of scoring them are timed:
+
+- ``pipeline predict+proba``: ``model.predict`` then ``model.predict_proba``,
+  the ColumnTransformer running twice (what the batch script did)
+- ``pipeline proba``: one ``model.predict_proba``
+- ``booster``: ``FastPredictor.predict_proba``, labels from the argmax
+
+Before timing, the benchmark checks that the booster path gives the same
+probabilities and labels as the pipeline.
+
+Usage
+-----
+```bash
+python benchmarks/bench_fast_inference.py
+```
+"""
+import numpy as np
+
+from common import print_table, sample_deals, summarize, time_calls
+
+import api
+from utils.fast_inference import FastPredictor
+
+# rows -> timed repeats
+SIZES = {1: 300, 100: 100, 100_000: 5}
+
+
+def check_parity(model, predictor, X) -> float:
+    """Max absolute probability difference; raises if any label differs"""
+    expected = model.predict_proba(X)
+    actual = predictor.predict_proba(X)
+    np.testing.assert_allclose(actual, expected, rtol=0, atol=1e-6)
+    np.testing.assert_array_equal(predictor.predict(X), model.predict(X))
+    return float(np.abs(actual - expected).max())
+
+
+def main():
+    snapshot = api.current_snapshot()
+    model = snapshot.model
+    predictor = FastPredictor(model)
+
+    rows = []
+    for n, repeat in SIZES.items():
+        raw = sample_deals(n)
+        api.standardize_columns(raw)
+        X = api.prepare_features(raw, snapshot.schema)
+        max_diff = check_parity(model, predictor, X)
+
+        cases = {
+            "pipeline predict+proba": lambda: (model.predict(X), model.predict_proba(X)),
+            "pipeline proba": lambda: model.predict_proba(X),
+            "booster": lambda: predictor.predict_proba(X),
+        }
+        timings = {name: summarize(time_calls(fn, repeat=repeat)) for name, fn in cases.items()}
+        for name, stats in timings.items():
+            rows.append({
+                "rows": f"{n:,}",
+                "path": name,
+                "p50_ms": stats["p50_ms"],
+                "p99_ms": stats["p99_ms"],
+                "speedup_vs_pipeline_proba": timings["pipeline proba"]["p50_ms"] / stats["p50_ms"],
+                "max_abs_diff": max_diff if name == "booster" else 0.0,
+            })
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Encoded feature matrix cache vs re-preprocessing and per-fold encoding
+
+Two parts of training are timed with and without ``utils/training_data.py``:
+
+- loading: reading the workbook + cleaning + ordinal mapping + one-hot encoding
+  of the workbook, against memory-mapping the cached matrix of an unchanged
+  file (``load_training_data`` hit)
+- search: a small randomized search (10 candidates x 3 folds, 50 trees, so
+  per-fold overhead is visible) over the full Pipeline on the cleaned
+  DataFrame, which refits the ColumnTransformer and rebuilds a dense matrix
+  per fold, against the model alone on rows of the cached matrix
+
+``--rows`` resamples the workbook to a larger file first (written to a
+temporary directory, as is the cache).
+
+Usage
+-----
+```bash
+python benchmarks/bench_feature_cache.py
+python benchmarks/bench_feature_cache.py --rows 20000
+```
+"""
+import argparse
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import RandomizedSearchCV
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import LabelEncoder
+
+from common import print_table, summarize, time_calls
+
+from utils.datasets import resolve_dataset
+from utils.training import PARAM_DISTRIBUTIONS, build_model
+from utils.training_data import build_preprocessor, load_training_data
+
+SEARCH_PARAMS = dict(PARAM_DISTRIBUTIONS, model__n_estimators=[50])
+
+
+def search(estimator, X, y):
+    RandomizedSearchCV(
+        estimator, SEARCH_PARAMS, n_iter=10, cv=3, scoring="f1_weighted", random_state=42, refit=False
+    ).fit(X, y)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=0, help="Resample the workbook to this many rows")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_path = resolve_dataset()
+        if args.rows:
+            df = pd.read_excel(data_path)
+            df = df.sample(args.rows, replace=args.rows > len(df), random_state=0).reset_index(drop=True)
+            data_path = os.path.join(tmp, "synthetic_data_resampled.xlsx")
+            df.to_excel(data_path, index=False)
+        cache_dir = os.path.join(tmp, "features")
+
+        data = load_training_data(data_path, cache_dir)  # Fills the cache
+        y = LabelEncoder().fit_transform(data.target)
+        n_classes = len(np.unique(y))
+
+        def full_pipeline():
+            model = build_model(n_classes).set_params(early_stopping_rounds=None, n_jobs=1)
+            return Pipeline([("prep", build_preprocessor(data.numeric_columns, data.categorical_columns)),
+                             ("model", model)])
+
+        def model_only():
+            return Pipeline([("model", build_model(n_classes).set_params(early_stopping_rounds=None, n_jobs=1))])
+
+        cases = [
+            ("load", "read + preprocess + encode", lambda: load_training_data(data_path, cache_dir=None)),
+            ("load", "cached matrix (hit)", lambda: load_training_data(data_path, cache_dir)),
+            ("search", "pipeline, encode per fold", lambda: search(full_pipeline(), data.X, y)),
+            ("search", "cached matrix rows", lambda: search(model_only(), data.matrix, y)),
+        ]
+        rows = []
+        for step, label, fn in cases:
+            stats = summarize(time_calls(fn, repeat=args.repeat))
+            rows.append({"step": step, "path": label, "rows": f"{len(y):,}", **stats})
+
+    for first, second in ((0, 1), (2, 3)):
+        rows[first]["speedup"] = 1.0
+        rows[second]["speedup"] = rows[first]["p50_ms"] / rows[second]["p50_ms"]
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
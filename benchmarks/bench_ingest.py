@@ -0,0 +1,157 @@
+"""
+Streamed, chunked ingestion vs reading the whole upload into one DataFrame
+
+Every case runs ``api.predict_file`` (standardize, validate, normalize,
+predict, score) in a fresh subprocess, so the peak resident memory
+(``VmHWM``) belongs to that case alone. ``streamed`` uses the ingestion layer in
+``utils/ingest.py``; ``whole_file`` swaps in the previous behaviour (raw bytes
+in memory, then ``pd.read_excel`` / ``read_csv`` / ``read_parquet`` on the
+whole upload, scored as a single chunk). Results go to a writer that only
+counts rows, so the numbers cover ingestion and scoring; output formats are
+compared in their own benchmark.
+
+Usage
+-----
+```bash
+python benchmarks/bench_ingest.py                      # 10k, 100k, 1M rows
+python benchmarks/bench_ingest.py --sizes 10000 100000
+python benchmarks/bench_ingest.py --formats xlsx --sizes 1000000 --xlsx-max-rows 1000000
+```
+"""
+import argparse
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import PROJECT_ROOT, print_table, sample_deals
+
+SIZES = [10_000, 100_000, 1_000_000]
+FORMATS = ["csv", "parquet", "xlsx"]
+MODES = ["streamed", "whole_file"]
+# openpyxl parses about 2k rows/s of this sheet either way; 1M-row workbooks
+# take minutes per case, so they only run when asked for with --xlsx-max-rows
+XLSX_MAX_ROWS = 100_000
+
+
+class CountingWriter:
+    """Stands in for the result writer; keeps nothing"""
+
+    def __init__(self):
+        self.rows_written = 0
+
+    def write(self, df):
+        self.rows_written += len(df)
+
+
+def peak_rss_mb() -> float:
+    # VmHWM starts fresh at exec; ru_maxrss would inherit the parent's peak
+    # (the parent holds the generated frame), so prefer it where available
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def read_whole_file(path: str, fmt: str):
+    import pandas as pd
+
+    with open(path, "rb") as f:
+        contents = f.read()
+    if fmt == "xlsx":
+        return pd.read_excel(io.BytesIO(contents))
+    if fmt == "csv":
+        return pd.read_csv(io.BytesIO(contents))
+    return pd.read_parquet(io.BytesIO(contents))
+
+
+def run_case(path: str, fmt: str, mode: str) -> dict:
+    """Body of one subprocess: load the model, then time predict_file on ``path``"""
+    import api
+
+    if mode == "whole_file":
+        api.iter_chunks = lambda path, fmt, chunk_rows: iter([read_whole_file(path, fmt)])
+
+    snapshot = api.current_snapshot()
+    rss_before_mb = peak_rss_mb()
+    start = time.perf_counter()
+    total_rows, _ = api.predict_file(path, fmt, snapshot, CountingWriter())
+    seconds = time.perf_counter() - start
+    return {
+        "rows": total_rows,
+        "seconds": seconds,
+        "baseline_rss_mb": rss_before_mb,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def write_input(df, path: str, fmt: str) -> None:
+    if fmt == "csv":
+        df.to_csv(path, index=False)
+    elif fmt == "parquet":
+        df.to_parquet(path, index=False)
+    else:
+        from utils.formats import ExcelChunkWriter
+
+        writer = ExcelChunkWriter(path)
+        for start in range(0, len(df), 50_000):
+            writer.write(df.iloc[start:start + 50_000])
+        writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--formats", nargs="+", default=FORMATS, choices=FORMATS)
+    parser.add_argument("--xlsx-max-rows", type=int, default=XLSX_MAX_ROWS)
+    parser.add_argument("--case", nargs=3, metavar=("PATH", "FORMAT", "MODE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        path, fmt, mode = args.case
+        print(json.dumps(run_case(path, fmt, mode)))
+        return
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            df = sample_deals(n)
+            for fmt in args.formats:
+                if fmt == "xlsx" and n > args.xlsx_max_rows:
+                    continue
+                path = os.path.join(tmp, f"deals_{n}.{fmt}")
+                write_input(df, path, fmt)
+                size_mb = os.path.getsize(path) / 1e6
+                for mode in MODES:
+                    proc = subprocess.run(
+                        [sys.executable, os.path.abspath(__file__), "--case", path, fmt, mode],
+                        capture_output=True, text=True, cwd=PROJECT_ROOT,
+                    )
+                    if proc.returncode != 0:
+                        raise RuntimeError(proc.stderr)
+                    result = json.loads(proc.stdout.strip().splitlines()[-1])
+                    rows.append({
+                        "rows": f"{n:,}",
+                        "format": fmt,
+                        "file_mb": size_mb,
+                        "mode": mode,
+                        "seconds": result["seconds"],
+                        "rows_per_sec": result["rows"] / result["seconds"],
+                        "peak_rss_mb": result["peak_rss_mb"],
+                        "rss_growth_mb": result["peak_rss_mb"] - result["baseline_rss_mb"],
+                    })
+                os.remove(path)
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
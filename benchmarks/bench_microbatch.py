@@ -0,0 +1,80 @@
+"""
+Throughput and tail latency of /predict/records with and without micro-batching
+
+Each simulated client sends single-deal requests back to back; the benchmark
+reports requests/second and per-request p50/p99 at several concurrency levels.
+
+Usage
+-----
+```bash
+python benchmarks/bench_microbatch.py
+```
+"""
+import asyncio
+import json
+import time
+
+from common import print_table, sample_deals, summarize
+
+import httpx
+
+import api
+from utils.batching import MicroBatcher
+
+CONCURRENCY = [1, 8, 32, 64]
+REQUESTS_PER_CLIENT = 20
+WINDOWS_MS = [2.0, 5.0]
+
+
+async def run_load(client: httpx.AsyncClient, bodies: list, concurrency: int) -> tuple:
+    latencies = []
+
+    async def worker(offset: int):
+        for i in range(REQUESTS_PER_CLIENT):
+            body = bodies[(offset * REQUESTS_PER_CLIENT + i) % len(bodies)]
+            start = time.perf_counter()
+            r = await client.post("/predict/records", content=body, headers={"content-type": "application/json"})
+            r.raise_for_status()
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(c) for c in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return len(latencies) / elapsed, latencies
+
+
+async def main():
+    df = sample_deals(200)
+    bodies = [json.dumps([row]) for row in json.loads(df.to_json(orient="records"))]
+
+    # Let every request in; this measures queueing, not admission control
+    api.PREDICT_POOL.max_queue = 10_000
+
+    modes = [("off", None)] + [
+        (f"{w:g} ms", MicroBatcher("bench", api.run_record_batch, api.PREDICT_POOL, max_wait_ms=w, max_batch_size=256,
+                                   size_of=lambda request: len(request[0])))
+        for w in WINDOWS_MS
+    ]
+    rows = []
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.post("/predict/records", content=bodies[0], headers={"content-type": "application/json"})
+        for concurrency in CONCURRENCY:
+            for label, batcher in modes:
+                api.RECORD_BATCHER = batcher
+                throughput, latencies = await run_load(client, bodies, concurrency)
+                stats = summarize(latencies)
+                rows.append({
+                    "clients": concurrency,
+                    "batching": label,
+                    "req_per_s": throughput,
+                    "p50_ms": stats["p50_ms"],
+                    "p99_ms": stats["p99_ms"],
+                })
+
+    api.PREDICT_POOL.shutdown()
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,129 @@
+"""
+Cold and warm load of the pickled pipeline vs the UBJSON model bundle
+
+Writes the bundle of the model in ``models/`` to a temporary directory
+(``utils.model_bundle.save_model_bundle``), then compares:
+
+- ``pickle``: ``joblib.load`` of ``xgb_classifier.pkl`` and
+  ``label_encoder.pkl`` plus ``build_fast_predictor``, as ``ModelStore`` did
+- ``bundle``: ``load_model_bundle`` (UBJSON booster + JSON spec)
+
+Cold: each run is a fresh interpreter that imports what the loader needs,
+loads the model and scores one deal (``import_ms``, ``load_ms``,
+``first_predict_ms``, ``total_ms``). ``bundle, no sklearn`` does the same
+with sklearn made unimportable. Warm: the same loads repeated in this
+process, libraries already imported. The benchmark checks that both give the
+same probabilities on 2,000 deals before timing.
+
+Usage
+-----
+```bash
+python benchmarks/bench_model_bundle.py
+python benchmarks/bench_model_bundle.py --runs 10
+```
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import joblib
+import numpy as np
+
+from common import PROJECT_ROOT, print_table, sample_deals, summarize, time_calls
+
+import api
+from utils.fast_inference import build_fast_predictor
+from utils.model_bundle import load_model_bundle, save_model_bundle
+
+MODELS_DIR = os.path.join(PROJECT_ROOT, "models")
+
+# Run in a fresh interpreter: argv = loader, models dir, deal row as JSON
+COLD_SCRIPT = """
+import sys, time, json
+t0 = time.perf_counter()
+if sys.argv[1] == "bundle, no sklearn":
+    sys.modules["sklearn"] = None
+sys.path.insert(0, {root!r})
+import pandas as pd
+if sys.argv[1] == "pickle":
+    import joblib
+    from utils.fast_inference import build_fast_predictor
+else:
+    from utils.model_bundle import load_model_bundle
+t1 = time.perf_counter()
+if sys.argv[1] == "pickle":
+    model = joblib.load(sys.argv[2] + "/xgb_classifier.pkl")
+    joblib.load(sys.argv[2] + "/label_encoder.pkl")
+    predictor = build_fast_predictor(model)
+else:
+    predictor, _, _ = load_model_bundle(sys.argv[2])
+t2 = time.perf_counter()
+predictor.predict_proba(pd.DataFrame.from_records([json.loads(sys.argv[3])]))
+t3 = time.perf_counter()
+print(json.dumps({{"import_ms": (t1 - t0) * 1000, "load_ms": (t2 - t1) * 1000, "first_predict_ms": (t3 - t2) * 1000}}))
+""".format(root=PROJECT_ROOT)
+
+
+def cold_runs(loader: str, models_dir: str, row: str, runs: int) -> dict:
+    results = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", COLD_SCRIPT, loader, models_dir, row],
+                             capture_output=True, text=True, check=True)
+        results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    medians = {key: float(np.median([r[key] for r in results])) for key in results[0]}
+    medians["total_ms"] = sum(medians.values())
+    return medians
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    model = joblib.load(os.path.join(MODELS_DIR, "xgb_classifier.pkl"))
+    label_encoder = joblib.load(os.path.join(MODELS_DIR, "label_encoder.pkl"))
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in ("xgb_classifier.pkl", "label_encoder.pkl"):
+            with open(os.path.join(MODELS_DIR, name), "rb") as src, open(os.path.join(tmp, name), "wb") as dst:
+                dst.write(src.read())
+        save_model_bundle(model, label_encoder, tmp)
+
+        raw = sample_deals(2000)
+        api.standardize_columns(raw)
+        X = api.prepare_features(raw, api.current_snapshot().schema)
+        bundle_predictor, _, _ = load_model_bundle(tmp)
+        max_diff = float(np.abs(bundle_predictor.predict_proba(X) - model.predict_proba(X)).max())
+        np.testing.assert_allclose(bundle_predictor.predict_proba(X), model.predict_proba(X), rtol=0, atol=1e-6)
+        row = X.iloc[[0]].to_json(orient="records")[1:-1]
+
+        sizes = {
+            "pickle": sum(os.path.getsize(os.path.join(tmp, f)) for f in ("xgb_classifier.pkl", "label_encoder.pkl")),
+            "bundle": sum(os.path.getsize(os.path.join(tmp, f))
+                          for f in ("xgb_classifier.ubj", "xgb_preprocessing.json")),
+        }
+        warm = {
+            "pickle": lambda: build_fast_predictor(joblib.load(os.path.join(tmp, "xgb_classifier.pkl"))),
+            "bundle": lambda: load_model_bundle(tmp),
+        }
+        rows = []
+        for loader in ("pickle", "bundle", "bundle, no sklearn"):
+            cold = cold_runs(loader, tmp, row, args.runs)
+            kind = loader.split(",")[0]
+            rows.append({
+                "loader": loader,
+                "size_kb": sizes[kind] / 1024,
+                "cold_import_ms": cold["import_ms"],
+                "cold_load_ms": cold["load_ms"],
+                "cold_first_predict_ms": cold["first_predict_ms"],
+                "cold_total_ms": cold["total_ms"],
+                "warm_load_ms": summarize(time_calls(warm[kind], repeat=30))["p50_ms"],
+            })
+    print(f"max |probability difference| pickle vs bundle on {len(X):,} deals: {max_diff:.1e}")
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
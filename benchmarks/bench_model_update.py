@@ -0,0 +1,97 @@
+"""
+Incremental update vs a full training run for a batch of newly labeled deals
+
+Times three ways of folding ``--rows`` new labeled deals (drawn from
+``synthetic_data_v2.xlsx``, a separate draw of the generator) into the model:
+
+- ``train (random search)``: what /train-model does by default, on the
+  training workbook with the new rows appended
+- ``train (no search)``: the same without the hyper-parameter search
+- ``update_model``: ``--rounds`` trees added to the current booster, fitted
+  on the new rows only, plus the holdout comparison
+
+Every run starts from a copy of ``models/`` in a temporary directory; the
+saved model and the feature cache are left alone. The update row also shows
+the current and updated model's weighted F1 on the update holdout; the
+training rows show the F1 on their own holdout split.
+
+Usage
+-----
+```bash
+python benchmarks/bench_model_update.py
+python benchmarks/bench_model_update.py --rows 1000 --rounds 100
+```
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import pandas as pd
+
+from common import PROJECT_ROOT, print_table
+
+from utils.datasets import resolve_dataset
+from utils.model_update import UpdateConfig, update_model
+from utils.training import TrainingConfig, train
+
+NEW_DEALS_PATH = os.path.join(PROJECT_ROOT, "data", "output", "synthetic_data_v2.xlsx")
+ARTIFACTS = ("xgb_classifier.pkl", "label_encoder.pkl", "feature_schema.json")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=300, help="Newly labeled deals")
+    parser.add_argument("--rounds", type=int, default=UpdateConfig.rounds)
+    args = parser.parse_args()
+
+    reference_path = resolve_dataset()
+    new_deals = pd.read_excel(NEW_DEALS_PATH).sample(args.rows, random_state=0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        models_dir = os.path.join(tmp, "models")
+        new_path = os.path.join(tmp, "new_deals.csv")
+        combined_path = os.path.join(tmp, "synthetic_data_combined.xlsx")
+        new_deals.to_csv(new_path, index=False)
+        pd.concat([pd.read_excel(reference_path), new_deals], ignore_index=True).to_excel(combined_path, index=False)
+
+        def fresh_models():
+            shutil.rmtree(models_dir, ignore_errors=True)
+            os.makedirs(models_dir)
+            for name in ARTIFACTS:
+                shutil.copy(os.path.join(PROJECT_ROOT, "models", name), models_dir)
+
+        def full_train(tune):
+            return train(TrainingConfig(data_path=combined_path, models_dir=models_dir, output_dir=tmp, tune=tune,
+                                        shap_summary=False, feature_cache_dir=None))
+
+        rows = []
+        for label, tune in (("train (random search)", True), ("train (no search)", False)):
+            fresh_models()
+            start = time.perf_counter()
+            result = full_train(tune)
+            rows.append({"path": label, "wall_s": time.perf_counter() - start,
+                         "trees": "-", "f1": f"{result.final.f1:.4f}", "promoted": "-"})
+
+        fresh_models()
+        start = time.perf_counter()
+        update = update_model(UpdateConfig(new_data_path=new_path, models_dir=models_dir, rounds=args.rounds,
+                                           reference_data_path=reference_path))
+        rows.append({
+            "path": "update_model",
+            "wall_s": time.perf_counter() - start,
+            "trees": f"{update.trees_before} -> {update.trees_after}",
+            "f1": f"{update.current.f1:.4f} -> {update.candidate.f1:.4f}",
+            "promoted": str(update.promoted),
+        })
+        print(f"{args.rows} new rows; update stage timings (s): {update.timings}")
+
+    baseline = rows[0]["wall_s"]
+    for row in rows:
+        row["speedup"] = baseline / row["wall_s"]
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
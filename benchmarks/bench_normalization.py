@@ -0,0 +1,86 @@
+"""
+Per-cell normalization (``Series.apply``) vs the factorized, compiled normalizer
+
+The row-wise reference below is the closure the API, UI and batch script used
+before ``utils/normalization.py``; the benchmark also checks both produce the
+same frame.
+
+Usage
+-----
+```bash
+python benchmarks/bench_normalization.py
+```
+"""
+import numpy as np
+import pandas as pd
+
+from common import print_table, summarize, time_calls
+
+from utils.normalization import NORMALIZATION_MAP, ColumnNormalizer
+
+SIZES = [100_000, 1_000_000]
+
+# A handful of spellings per column, as seen in real uploads
+SPELLINGS = {
+    "Account Engagement": ["High (Existing+Good)", "high", "Medium (Existing+Poor)", "Low (New Account)", "new account", "UNKNOWN"],
+    "Client Relationship": ["Strong", "good", "Neutral", "Weak", "Poor relationship", "UNKNOWN"],
+    "Deal Coach": ["Active & Available", "Passive", "Not Available", "none", "UNKNOWN"],
+    "Incumbency Share": ["High (>50%)", "Medium (20-50%)", "Low (<20%)", "None", "UNKNOWN"],
+    "Bidder Rank": ["Top", "1", "Middle", "2nd", "Bottom", "last", "UNKNOWN"],
+    "References": ["Strong (Domain+Tech)", "Average", "Weak/None", "UNKNOWN"],
+    "Solution Strength": ["Strong (Covers all)", "Average (Gaps)", "Weak", "high", "UNKNOWN"],
+    "Client Impression": ["Positive", "Neutral", "Negative", "good", "UNKNOWN"],
+    "Orals Score": ["Strong", "At Par", "Weak", "UNKNOWN"],
+    "Price Alignment": ["On par with Client Budget", "Above Client Budget with Rationale/Caveats", "Above Client Budget", "Client Budget Info not available", "UNKNOWN"],
+    "Price Position": ["Lowest", "Competitive", "Expensive", "UNKNOWN"],
+}
+
+
+def legacy_normalize(df: pd.DataFrame) -> pd.DataFrame:
+    for col, mapping in NORMALIZATION_MAP.items():
+        if col in df.columns:
+            def normalize_val(val):
+                if pd.isna(val): return val
+                s = str(val).lower().strip()
+                for key, target in mapping.items():
+                    if key in s:
+                         return target
+                return val
+            df[col] = df[col].apply(normalize_val)
+    return df
+
+
+def upload_frame(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        col: rng.choice(np.array(values, dtype=object), size=n_rows)
+        for col, values in SPELLINGS.items()
+    })
+
+
+def main():
+    rows = []
+    for n in SIZES:
+        df = upload_frame(n)
+
+        expected = legacy_normalize(df.copy())
+        # A fresh normalizer per size so the first (cold-cache) call is timed too
+        normalizer = ColumnNormalizer(NORMALIZATION_MAP)
+        cold_ms = summarize(time_calls(lambda: normalizer.normalize_frame(df.copy()), repeat=1, warmup=0))["p50_ms"]
+        actual = normalizer.normalize_frame(df.copy())
+        pd.testing.assert_frame_equal(actual, expected)
+
+        legacy_ms = summarize(time_calls(lambda: legacy_normalize(df.copy()), repeat=1, warmup=0))["p50_ms"]
+        warm_ms = summarize(time_calls(lambda: normalizer.normalize_frame(df.copy()), repeat=5))["p50_ms"]
+        rows.append({
+            "rows": f"{n:,}",
+            "apply_ms": legacy_ms,
+            "compiled_cold_ms": cold_ms,
+            "compiled_warm_ms": warm_ms,
+            "speedup": legacy_ms / warm_ms,
+        })
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
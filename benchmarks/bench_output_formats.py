@@ -0,0 +1,86 @@
+"""
+Write time of a typical prediction result in each output format
+
+Scores 20,000 resampled deals once through ``api.predict_file``, then writes
+the resulting frame with ``DataFrame.to_excel`` (how results were written
+before ``utils/formats.py``) and with each chunk writer, fed in
+``INGEST_CHUNK_ROWS`` chunks as the API does. Every file is read back with
+``read_frame`` to check the row count.
+
+Usage
+-----
+```bash
+python benchmarks/bench_output_formats.py
+python benchmarks/bench_output_formats.py --rows 100000
+```
+"""
+import argparse
+import os
+import tempfile
+
+import pandas as pd
+
+from common import print_table, sample_deals, summarize, time_calls
+
+import api
+from utils.formats import OUTPUT_FORMATS, create_writer, read_frame
+
+DEFAULT_ROWS = 20_000
+
+
+class CollectingWriter:
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, df):
+        self.chunks.append(df)
+
+
+def prediction_output(n_rows: int, tmp: str) -> pd.DataFrame:
+    path = os.path.join(tmp, "deals.csv")
+    sample_deals(n_rows).to_csv(path, index=False)
+    collector = CollectingWriter()
+    api.predict_file(path, "csv", api.current_snapshot(), collector)
+    return pd.concat(collector.chunks)
+
+
+def write_chunked(df: pd.DataFrame, output_format: str, path: str) -> None:
+    writer = create_writer(output_format, path)
+    for start in range(0, len(df), api.INGEST_CHUNK_ROWS):
+        writer.write(df.iloc[start:start + api.INGEST_CHUNK_ROWS])
+    writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        df = prediction_output(args.rows, tmp)
+
+        cases = [("to_excel (previous)", "xlsx", lambda path: df.to_excel(path, index=False))]
+        cases += [(name, name, lambda path, name=name: write_chunked(df, name, path)) for name in OUTPUT_FORMATS]
+
+        rows = []
+        for label, output_format, write in cases:
+            path = os.path.join(tmp, "predictions" + OUTPUT_FORMATS[output_format].extension)
+            stats = summarize(time_calls(lambda: write(path), repeat=args.repeat, warmup=0))
+            assert len(read_frame(path)) == len(df)
+            rows.append({
+                "format": label,
+                "rows": f"{len(df):,}",
+                "write_ms": stats["p50_ms"],
+                "file_mb": os.path.getsize(path) / 1e6,
+            })
+            os.remove(path)
+
+    baseline_ms = rows[0]["write_ms"]
+    for row in rows:
+        row["vs_to_excel"] = baseline_ms / row["write_ms"]
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Latency of the Excel upload route vs the JSON record route
+
+Usage
+-----
+```bash
+python benchmarks/bench_predict_routes.py
+```
+"""
+import io
+import os
+
+from common import print_table, sample_deals, summarize, time_calls
+
+from fastapi.testclient import TestClient
+
+import api
+
+BATCH_SIZES = [1, 10, 100, 500]
+REPEAT = 30
+
+
+def main():
+    client = TestClient(api.app)
+    written = []
+    rows = []
+    with client:
+        for n in BATCH_SIZES:
+            df = sample_deals(n)
+            buffer = io.BytesIO()
+            df.to_excel(buffer, index=False)
+            xlsx_bytes = buffer.getvalue()
+            records_json = df.to_json(orient="records")
+
+            def call_excel():
+                r = client.post("/predict", files={"file": ("bench.xlsx", xlsx_bytes, "application/octet-stream")})
+                r.raise_for_status()
+                written.append(r.json()["predictions_file"])
+
+            def call_records():
+                r = client.post("/predict/records", content=records_json, headers={"content-type": "application/json"})
+                r.raise_for_status()
+
+            for route, fn in (("/predict (xlsx)", call_excel), ("/predict/records (json)", call_records)):
+                stats = summarize(time_calls(fn, REPEAT))
+                rows.append({"route": route, "rows": n, **stats})
+
+    for filename in set(written):
+        path = os.path.join(api.OUTPUT_DIR, filename)
+        if os.path.exists(path):
+            os.remove(path)
+
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Re-uploading a workbook with and without the row-level prediction cache
+
+Builds a 20,000-row upload where every deal has a distinct feature row
+(``Expected TCV ($Mn)`` is drawn per deal), prepares the features once, and
+times the prediction step of ``api.score_active_deals`` for:
+
+- ``no cache``: every row goes to the model
+- ``cold``: first upload, every row is a miss (hashing + model + insert)
+- ``warm``: the same upload again
+- ``5% changed``: the same upload with 1 in 20 deals edited
+- ``warm (sqlite)``: a new process's cache, filled only from the SQLite file
+
+Every cached result is checked against the uncached probabilities.
+
+Usage
+-----
+```bash
+python benchmarks/bench_prediction_cache.py
+```
+"""
+import os
+import tempfile
+
+import numpy as np
+
+from common import print_table, sample_deals, summarize, time_calls
+
+import api
+from utils.prediction_cache import PredictionCache
+
+N_ROWS = 20_000
+CACHE_BYTES = 64 * 1024 * 1024
+
+
+def upload(n_rows: int, seed: int = 0):
+    raw = sample_deals(n_rows)
+    rng = np.random.default_rng(seed)
+    raw["Expected TCV ($Mn)"] = rng.uniform(0.5, 200, size=n_rows).round(3)
+    api.standardize_columns(raw)
+    return raw
+
+
+def main():
+    snapshot = api.current_snapshot()
+    raw = upload(N_ROWS)
+    X = api.prepare_features(raw, snapshot.schema)
+    X = X[api.active_deal_mask(raw)]
+
+    changed = X.copy()
+    edited = changed.index[::20]
+    changed.loc[edited, "Expected TCV ($Mn)"] += 1.0
+
+    expected = snapshot.predict_proba(X)
+    expected_changed = snapshot.predict_proba(changed)
+
+    def cached(cache, frame):
+        return cache.predict_proba(frame, snapshot.version, snapshot.predict_proba)
+
+    rows = []
+
+    def record(label, fn, check, repeat=5, reset=None):
+        durations = []
+        for _ in range(repeat):
+            if reset is not None:
+                reset()
+            durations.extend(time_calls(fn, repeat=1, warmup=0))
+        np.testing.assert_array_equal(fn(), check)
+        rows.append({"case": label, "rows": f"{len(X):,}", **summarize(durations)})
+
+    record("no cache", lambda: snapshot.predict_proba(X), expected)
+
+    cache = PredictionCache(CACHE_BYTES)
+    record("cold", lambda: cached(cache, X), expected, reset=cache.clear)
+    record("warm", lambda: cached(cache, X), expected)
+    cached(cache, X)
+    record("5% changed", lambda: cached(cache, changed), expected_changed,
+           reset=lambda: (cache.clear(), cached(cache, X)))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "predictions.sqlite3")
+        cached(PredictionCache(CACHE_BYTES, db_path), X)
+        fresh = {}
+
+        def new_process_cache():
+            fresh["cache"] = PredictionCache(CACHE_BYTES, db_path)
+
+        record("warm (sqlite)", lambda: cached(fresh["cache"], X), expected, reset=new_process_cache)
+
+    baseline = rows[0]["p50_ms"]
+    for row in rows:
+        row["speedup"] = baseline / row["p50_ms"]
+    print_table(rows)
+    print(f"memory cache after warm run: {cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
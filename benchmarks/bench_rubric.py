@@ -0,0 +1,70 @@
+"""
+Row-wise business score (``DataFrame.apply``) vs the vectorized rubric
+
+The row-wise reference below is the scorer the API and UI used before
+``utils/rubric.py``; the benchmark also checks that both give identical totals.
+
+Usage
+-----
+```bash
+python benchmarks/bench_rubric.py
+```
+"""
+import numpy as np
+import pandas as pd
+
+from common import print_table, summarize, time_calls
+
+from utils.rubric import RUBRIC, score_block
+
+SIZES = [100_000, 1_000_000]
+
+
+def legacy_business_score(row):
+    score = 0
+    score += {5: 10, 3: 5, 2: 2, 0: 0}.get(row.get("Account Engagement", 0), 0)
+    score += {5: 10, 3: 5, 2: 2, 0: 0}.get(row.get("Client Relationship", 0), 0)
+    score += {5: 10, 3: 5, 2: 2, 0: 0}.get(row.get("Deal Coach", 0), 0)
+    score += {5: 15, 3: 5, 2: 2, 0: 0}.get(row.get("Bidder Rank", 0), 0)
+    score += {5: 10, 3: 5, 2: 2, 0: 0}.get(row.get("Incumbency Share", 0), 0)
+    score += {5: 7, 3: 3, 2: 1, 0: 0}.get(row.get("References", 0), 0)
+    score += {5: 7, 3: 3, 2: 1, 0: 0}.get(row.get("Solution Strength", 0), 0)
+    score += {5: 6, 3: 3, 2: 1, 0: 0}.get(row.get("Client Impression", 0), 0)
+    score += {5: 15, 3: 8, 2: 4, 0: 0}.get(row.get("Orals Score", 0), 0)
+    score += {5: 5, 3: 3, 2: 2, 0: 0}.get(row.get("Price Alignment", 0), 0)
+    score += {5: 5, 3: 2, 0: 0}.get(row.get("Price Position", 0), 0)
+    return score
+
+
+def ordinal_frame(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """Ordinal-coded deals as produced by the prediction preprocessing (float codes 0/2/3/5)"""
+    rng = np.random.default_rng(seed)
+    codes = rng.choice(np.array([0.0, 2.0, 3.0, 5.0]), size=(n_rows, len(RUBRIC)))
+    df = pd.DataFrame(codes, columns=[f.name for f in RUBRIC])
+    df["Expected TCV ($Mn)"] = rng.random(n_rows) * 50
+    return df
+
+
+def main():
+    rows = []
+    for n in SIZES:
+        df = ordinal_frame(n)
+
+        legacy = df.apply(legacy_business_score, axis=1).to_numpy()
+        vectorized = score_block(df).total
+        if not np.array_equal(legacy, vectorized):
+            raise AssertionError(f"Rubric totals differ from the row-wise scorer at {n} rows")
+
+        legacy_ms = summarize(time_calls(lambda: df.apply(legacy_business_score, axis=1), repeat=1, warmup=0))["p50_ms"]
+        vector_ms = summarize(time_calls(lambda: score_block(df), repeat=5))["p50_ms"]
+        rows.append({
+            "rows": f"{n:,}",
+            "apply_ms": legacy_ms,
+            "score_block_ms": vector_ms,
+            "speedup": legacy_ms / vector_ms,
+        })
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
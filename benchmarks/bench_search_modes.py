@@ -0,0 +1,92 @@
+"""
+F1 vs wall-clock time of the two hyper-parameter search modes
+
+Runs the tuning step of ``utils.training.train`` on the training workbook
+with ``search="random"`` (RandomizedSearchCV, 20 candidates x 3 folds, up to
+1,500 trees, what training always did) and ``search="halving"`` (successive
+halving over the same space, tree count as the budget), for several seeds.
+For each run it records the search time, the number of fits, the best
+cross-validated F1, and the holdout F1 of the winner refit on the training
+split.
+
+Usage
+-----
+```bash
+python benchmarks/bench_search_modes.py
+python benchmarks/bench_search_modes.py --seeds 5
+```
+"""
+import argparse
+import time
+
+import pandas as pd
+from sklearn.base import clone
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import LabelEncoder
+
+from common import print_table
+
+from utils.datasets import resolve_dataset
+from utils.training import (
+    HALVING_ROUNDS, SEARCH_MODES, TrainingConfig, available_cores, build_model, evaluate, make_search, search_fits,
+    split_cores
+)
+from utils.training_data import load_training_data
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seeds", type=int, default=3)
+    args = parser.parse_args()
+
+    data = load_training_data(resolve_dataset())
+    le = LabelEncoder()
+    y = le.fit_transform(data.target)
+    X_train, X_test, y_train, y_test = train_test_split(data.matrix, y, test_size=0.2, stratify=y, random_state=42)
+    cores = available_cores()
+
+    runs = []
+    for seed in range(args.seeds):
+        for mode in SEARCH_MODES:
+            config = TrainingConfig(search=mode, random_state=seed, early_stopping=False)
+            first_round = config.n_iter if mode == "random" else config.halving_factor ** (HALVING_ROUNDS - 1)
+            split = split_cores(cores, len(X_train) * 2 // 3, first_round * config.search_cv)
+            pipeline = Pipeline([("model", build_model(len(le.classes_), seed))])
+            pipeline.set_params(model__early_stopping_rounds=None, model__n_jobs=split.threads)
+            search = make_search(pipeline, config, split.workers)
+            start = time.perf_counter()
+            search.fit(X_train, y_train)
+            wall = time.perf_counter() - start
+
+            best = clone(pipeline).set_params(**search.best_params_, model__n_jobs=cores).fit(X_train, y_train)
+            runs.append({
+                "mode": mode,
+                "wall_s": wall,
+                "fits": search_fits(search),
+                "cv_f1": search.best_score_,
+                "holdout_f1": evaluate(best, X_test, y_test, le.classes_).f1,
+            })
+
+    frame = pd.DataFrame(runs)
+    rows = []
+    for mode in SEARCH_MODES:
+        part = frame[frame["mode"] == mode]
+        rows.append({
+            "search": mode,
+            "seeds": len(part),
+            "fits": int(part["fits"].iloc[0]),
+            "wall_s_median": float(part["wall_s"].median()),
+            "best_cv_f1_mean": f"{part['cv_f1'].mean():.4f}",
+            "holdout_f1_mean": f"{part['holdout_f1'].mean():.4f}",
+            "holdout_f1_min": f"{part['holdout_f1'].min():.4f}",
+        })
+    baseline = rows[0]["wall_s_median"]
+    for row in rows:
+        row["speedup"] = baseline / row["wall_s_median"]
+    print(f"{len(X_train):,} training rows, {cores} core(s)")
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
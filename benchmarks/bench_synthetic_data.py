@@ -0,0 +1,108 @@
+"""
+Synthetic deal generation: record at a time (``generate_record``) vs columnar (``utils.synthetic_data``)
+
+Throughput: each generator builds a DataFrame of ``n`` deals; the row-wise
+one only at the smaller sizes (about 20,000 rows/s). ``rows_per_min`` is
+from the median of ``--repeat`` runs; nothing is written to disk.
+
+Distributions: ``--compare`` deals are drawn twice with the row-wise
+generator (different seeds) and once with the columnar one. For every label
+column and target status, the share of each value is compared; ``max_abs_diff``
+is the largest difference over all of them. Two row-wise draws show how large
+that difference is from sampling alone. The score columns compare the mean
+and standard deviation of ``Calculated Score`` per status.
+
+Usage
+-----
+```bash
+python benchmarks/bench_synthetic_data.py
+python benchmarks/bench_synthetic_data.py --sizes 1000000 5000000 --row-wise-max 0
+```
+"""
+import argparse
+import contextlib
+import importlib.util
+import io
+import os
+import random
+
+from common import PROJECT_ROOT, print_table, summarize, time_calls
+
+from utils.synthetic_data import DEAL_STATUSES, FACTORS, generate_deals
+
+SIZES = [10_000, 100_000, 1_000_000]
+LABEL_COLUMNS = ["SBU", "Type of Business"] + [f.name for f in FACTORS] + [
+    "Primary L1", "Primary L2", "Secondary L2", "Tertiary L2", "Were we the lowest price? Y/N"]
+
+
+def load_row_wise_generator():
+    """``src/generate_synthetic_data.py`` as a module (it only runs its CLI as ``__main__``)"""
+    path = os.path.join(PROJECT_ROOT, "src", "generate_synthetic_data.py")
+    spec = importlib.util.spec_from_file_location("generate_synthetic_data", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def row_wise(module, n_rows: int):
+    with contextlib.redirect_stdout(io.StringIO()):  # It prints every 50 records
+        return module.generate_row_wise(n_rows)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--row-wise-max", type=int, default=100_000,
+                        help="Largest size the row-wise generator is timed at")
+    parser.add_argument("--compare", type=int, default=60_000, help="Deals per generator for the distribution check")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    module = load_row_wise_generator()
+
+    rows = []
+    for size in args.sizes:
+        cases = [("columnar (NumPy)", lambda: generate_deals(size))]
+        if size <= args.row_wise_max:
+            cases.insert(0, ("row-wise (generate_record)", lambda: row_wise(module, size)))
+        for name, fn in cases:
+            repeat = 1 if name.startswith("row-wise") else args.repeat
+            stats = summarize(time_calls(fn, repeat=repeat, warmup=0 if repeat == 1 else 1))
+            rows.append({
+                "generator": name,
+                "rows": f"{size:,}",
+                "p50_ms": stats["p50_ms"],
+                "rows_per_min": f"{size / stats['p50_ms'] * 60_000:,.0f}",
+            })
+    print_table(rows)
+    print()
+
+    random.seed(0)
+    reference = row_wise(module, args.compare)
+    random.seed(1)
+    draws = {"row-wise": row_wise(module, args.compare), "columnar": generate_deals(args.compare, seed=1)}
+    rows = []
+    for status in DEAL_STATUSES:
+        a = reference[reference["Deal Status"] == status]
+        for name, draw in draws.items():
+            b = draw[draw["Deal Status"] == status]
+            diffs = {
+                col: a[col].astype(str).value_counts(normalize=True).subtract(
+                    b[col].astype(str).value_counts(normalize=True), fill_value=0).abs().max()
+                for col in LABEL_COLUMNS
+            }
+            worst = max(diffs, key=diffs.get)
+            rows.append({
+                "status": status,
+                "vs row-wise reference": name,
+                "max_abs_diff": f"{diffs[worst]:.4f}",
+                "column": worst,
+                "score_mean": f"{b['Calculated Score'].astype(float).mean():.2f} "
+                              f"({a['Calculated Score'].astype(float).mean():.2f})",
+                "score_std": f"{b['Calculated Score'].astype(float).std():.2f} "
+                             f"({a['Calculated Score'].astype(float).std():.2f})",
+            })
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
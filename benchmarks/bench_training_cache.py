@@ -0,0 +1,78 @@
+"""
+Training cache: a full training run vs a repeated run with unchanged data and settings
+
+For each setting, ``train`` runs three times against temporary models,
+output, feature-cache and training-cache folders:
+
+- ``miss``: nothing stored yet; the run trains, saves and stores itself
+  (the feature cache is warm, so only the training cache is compared)
+- ``hit, same models dir``: the same call again; the stored artifacts are
+  identical to the saved ones, so nothing is copied
+- ``hit, new models dir``: the same settings with an empty models folder;
+  the stored pipeline, encoder, schema and model bundle are copied there
+
+``metrics_equal`` checks that the hit returns the miss's metrics and best
+parameters.
+
+Usage
+-----
+```bash
+python benchmarks/bench_training_cache.py
+python benchmarks/bench_training_cache.py --settings baseline
+```
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from common import print_table
+
+from utils.datasets import resolve_dataset
+from utils.training import TrainingConfig, train
+from utils.training_data import load_training_data
+
+SETTINGS = {
+    "baseline": dict(tune=False),
+    "random search": dict(tune=True, search="random"),
+}
+
+
+def timed_train(config: TrainingConfig):
+    start = time.perf_counter()
+    result = train(config)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--settings", nargs="+", default=list(SETTINGS), choices=list(SETTINGS))
+    args = parser.parse_args()
+
+    rows = []
+    data_path = resolve_dataset()
+    for name in args.settings:
+        with tempfile.TemporaryDirectory() as tmp:
+            base = dict(data_path=data_path, output_dir=tmp, shap_summary=False,
+                        feature_cache_dir=os.path.join(tmp, "features"),
+                        training_cache_dir=os.path.join(tmp, "training"), **SETTINGS[name])
+            load_training_data(data_path, base["feature_cache_dir"])  # Warm the feature cache
+
+            miss, miss_ms = timed_train(TrainingConfig(models_dir=os.path.join(tmp, "models"), **base))
+            same, same_ms = timed_train(TrainingConfig(models_dir=os.path.join(tmp, "models"), **base))
+            fresh, fresh_ms = timed_train(TrainingConfig(models_dir=os.path.join(tmp, "models-2"), **base))
+            for case, result, ms in (("miss", miss, miss_ms), ("hit, same models dir", same, same_ms),
+                                     ("hit, new models dir", fresh, fresh_ms)):
+                rows.append({
+                    "setting": name,
+                    "case": case,
+                    "cache_hit": result.training_cache_hit,
+                    "train_ms": ms,
+                    "speedup": f"{miss_ms / ms:,.0f}x",
+                    "metrics_equal": result.final == miss.final and result.best_params == miss.best_params,
+                })
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Training through a subprocess vs an in-process ``utils.training.train`` call
+
+The API and UI used to start ``src/train_xgb_classifier.py`` with
+``subprocess.run`` and scrape its stdout. This times that against calling
+``train`` in the already-running process, with the same quick configuration
+(no search, no cross-validation, no SHAP plot), so the difference is the
+interpreter start plus the pandas/sklearn/xgboost imports paid on every
+subprocess call. Artifacts go to a temporary directory, not ``models/``.
+
+Usage
+-----
+```bash
+python benchmarks/bench_training_call.py
+```
+"""
+import os
+import subprocess
+import sys
+import tempfile
+
+from common import PROJECT_ROOT, print_table, summarize, time_calls
+
+from utils.training import TrainingConfig, train
+
+SCRIPT_PATH = os.path.join(PROJECT_ROOT, "src", "train_xgb_classifier.py")
+REPEAT = 5
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        config = TrainingConfig(models_dir=tmp, output_dir=tmp, cv_folds=0, tune=False, shap_summary=False)
+
+        def run_subprocess():
+            subprocess.run(
+                [sys.executable, "-W", "ignore", SCRIPT_PATH, "--models-dir", tmp,
+                 "--cv-folds", "0", "--no-tuning", "--no-shap"],
+                check=True, capture_output=True, text=True
+            )
+
+        cases = {"subprocess": run_subprocess, "in-process train()": lambda: train(config)}
+        rows = []
+        for name, fn in cases.items():
+            stats = summarize(time_calls(fn, repeat=REPEAT))
+            rows.append({"path": name, **stats})
+
+        result = train(config)
+        print(f"validation accuracy: {result.validation_accuracy:.4f}, stage timings (s): {result.timings}")
+
+    baseline = rows[0]["p50_ms"]
+    for row in rows:
+        row["speedup"] = baseline / row["p50_ms"]
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
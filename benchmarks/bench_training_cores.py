@@ -0,0 +1,108 @@
+"""
+Core scaling of the hyper-parameter search: parallel fits x XGBoost threads
+
+Runs the same small randomized search (``--candidates`` settings x 3 folds,
+200 trees each) over the preprocessed training workbook once per way of
+spending the core budget:
+
+- ``previous``: ``RandomizedSearchCV(n_jobs=-1)`` over ``XGBClassifier(n_jobs=-1)``
+  on a machine with ``budget`` cores: budget workers, each fit asking for
+  budget threads
+- every ``workers x threads`` split whose product equals the budget
+- ``auto``: what ``utils.training.split_cores`` picks for this data size
+
+``--rows`` resamples the workbook to a larger training set, where more
+threads per fit start to pay off. ``--cores`` sets the budget (default: the
+cores this process may use); a budget above the real core count shows what
+oversubscription costs. Each split is timed ``--repeat`` times (median);
+the process pool joblib starts for the first parallel split is reused.
+
+Usage
+-----
+```bash
+python benchmarks/bench_training_cores.py
+python benchmarks/bench_training_cores.py --rows 200000 --candidates 2
+```
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import RandomizedSearchCV, train_test_split
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import LabelEncoder
+
+from common import print_table
+
+from utils.datasets import resolve_dataset
+from utils.training import PARAM_DISTRIBUTIONS, available_cores, build_model, split_cores
+from utils.training_data import build_preprocessor, preprocess
+
+SEARCH_CV = 3
+
+
+def training_frame(n_rows):
+    df = pd.read_excel(resolve_dataset())
+    if n_rows and n_rows != len(df):
+        df = df.sample(n_rows, replace=n_rows > len(df), random_state=0).reset_index(drop=True)
+    X, target, numeric_cols, categorical_cols, _ = preprocess(df)
+    # Encoded once, as training does (utils/training_data.py)
+    matrix = build_preprocessor(numeric_cols, categorical_cols).fit_transform(X).astype(np.float32)
+    y = LabelEncoder().fit_transform(target)
+    M_train, _, y_train, _ = train_test_split(matrix, y, test_size=0.2, stratify=y, random_state=42)
+    return M_train, y_train, len(np.unique(y))
+
+
+def run_search(data, workers: int, threads: int, candidates: int) -> float:
+    M_train, y_train, num_classes = data
+    pipeline = Pipeline([("model", build_model(num_classes))])
+    pipeline.set_params(model__early_stopping_rounds=None, model__n_jobs=threads)
+    params = dict(PARAM_DISTRIBUTIONS, model__n_estimators=[200])
+    search = RandomizedSearchCV(
+        pipeline, params, n_iter=candidates, cv=SEARCH_CV, scoring="f1_weighted",
+        random_state=42, n_jobs=workers, refit=False
+    )
+    start = time.perf_counter()
+    search.fit(M_train, y_train)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cores", type=int, default=available_cores())
+    parser.add_argument("--rows", type=int, default=0, help="Resample the workbook to this many rows")
+    parser.add_argument("--candidates", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    data = training_frame(args.rows)
+    n_rows = len(data[0]) * (SEARCH_CV - 1) // SEARCH_CV
+    budget = args.cores
+    auto = split_cores(budget, n_rows, args.candidates * SEARCH_CV)
+
+    splits = [("previous", budget, budget)]
+    splits += [(f"{w}x{budget // w}", w, budget // w) for w in range(1, budget + 1) if budget % w == 0]
+    rows = []
+    for label, workers, threads in splits:
+        if label != "previous" and (workers, threads) == (auto.workers, auto.threads):
+            label += " (auto)"
+        wall = float(np.median([run_search(data, workers, threads, args.candidates) for _ in range(args.repeat)]))
+        rows.append({
+            "split": label,
+            "workers": workers,
+            "threads": threads,
+            "threads_per_core": workers * threads / available_cores(),
+            "wall_s": wall,
+        })
+
+    baseline = rows[0]["wall_s"]
+    for row in rows:
+        row["speedup"] = baseline / row["wall_s"]
+    print(f"budget {budget} cores ({available_cores()} available), {n_rows:,} rows per fit, "
+          f"{args.candidates * SEARCH_CV} fits; auto split {auto.workers}x{auto.threads}")
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Cost of live training progress, and how quickly a cancelled run stops
+
+Runs ``utils.training.train`` on the training workbook (artifacts go to a
+temporary directory) in three ways:
+
+- ``no progress``: ``train(config)``, as before
+- ``progress -> job table``: ``train(config, progress)`` with a
+  ``TrainingProgress`` publishing to a ``JobStore`` in a temp SQLite file,
+  as the API's training jobs do (callback on every boosting iteration,
+  table write at most once a second)
+- ``cancelled after N s``: the same, with ``progress.cancel()`` called from
+  another thread after ``--cancel-after`` seconds; ``stop_ms`` is the time
+  from the cancel call until ``train`` has raised ``TrainingCancelled``
+
+Usage
+-----
+```bash
+python benchmarks/bench_training_progress.py
+python benchmarks/bench_training_progress.py --search halving --no-early-stopping --repeat 3
+```
+"""
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from common import print_table
+
+from utils.jobs import JobStore
+from utils.training import SEARCH_MODES, TrainingConfig, train
+from utils.training_progress import TrainingCancelled, TrainingProgress
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--search", choices=SEARCH_MODES, default="random")
+    parser.add_argument("--no-early-stopping", action="store_true")
+    parser.add_argument("--repeat", type=int, default=2)
+    parser.add_argument("--cancel-after", type=float, default=2.0)
+    parser.add_argument("--data", help="Training workbook (default: newest data/output/synthetic_data*.xlsx)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = JobStore(os.path.join(tmp, "jobs.sqlite3"), os.path.join(tmp, "inputs"))
+        config = TrainingConfig(data_path=args.data, models_dir=tmp, output_dir=tmp, shap_summary=False,
+                                search=args.search, early_stopping=not args.no_early_stopping)
+        train(config)  # warm the feature cache
+
+        def tracked() -> TrainingProgress:
+            job = store.create("train", config.data_path or "", "bench")
+            return TrainingProgress(
+                publish=lambda state: store.update(job["id"], stage=state["stage"], progress=json.dumps(state))
+            )
+
+        rows = []
+        for label in ("no progress", "progress -> job table"):
+            walls, updates = [], []
+            for _ in range(args.repeat):
+                progress = tracked() if label != "no progress" else None
+                iterations = []
+                if progress is not None:
+                    # Count every boosting iteration the callback reported
+                    report = progress.iteration
+                    progress.iteration = lambda *a: (iterations.append(1), report(*a))
+                start = time.perf_counter()
+                train(config, progress)
+                walls.append(time.perf_counter() - start)
+                updates.append(len(iterations))
+            rows.append({"run": label, "wall_s_median": float(np.median(walls)),
+                         "iterations_reported": int(np.median(updates)), "stop_ms": "-"})
+
+        stops = []
+        for _ in range(args.repeat):
+            progress = tracked()
+            timer = threading.Timer(args.cancel_after, progress.cancel)
+            timer.start()
+            start = time.perf_counter()
+            try:
+                train(config, progress)
+            except TrainingCancelled:
+                pass
+            stops.append((time.perf_counter() - start - args.cancel_after) * 1000)
+        rows.append({"run": f"cancelled after {args.cancel_after:g} s", "wall_s_median": args.cancel_after + np.median(stops) / 1000,
+                     "iterations_reported": "-", "stop_ms": f"{np.median(stops):.0f}"})
+
+    baseline = rows[0]["wall_s_median"]
+    for row in rows[:2]:
+        row["overhead"] = f"{(row['wall_s_median'] / baseline - 1) * 100:+.1f}%"
+    rows[2]["overhead"] = "-"
+    print(f"{args.search} search, early stopping {'off' if args.no_early_stopping else 'on'}, "
+          f"{os.cpu_count()} core(s)")
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
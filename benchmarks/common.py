@@ -0,0 +1,67 @@
+"""
+Shared helpers for the benchmark scripts
+
+Benchmarks are run from the project root, e.g.
+``python benchmarks/bench_predict_routes.py``. They need a trained model in
+``models/`` (run ``python src/train_xgb_classifier.py`` first).
+"""
+import os
+import sys
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+SAMPLE_INPUT_PATH = os.path.join(PROJECT_ROOT, "data", "input", "Input - Test Set with Stages and Description.xlsx")
+
+
+def sample_deals(n_rows: int, seed: int = 42) -> pd.DataFrame:
+    """Return ``n_rows`` deals resampled from the repo's test-set workbook"""
+    base = pd.read_excel(SAMPLE_INPUT_PATH)
+    rng = np.random.default_rng(seed)
+    idx = rng.integers(0, len(base), size=n_rows)
+    df = base.iloc[idx].reset_index(drop=True)
+    if "CRM ID" in df.columns:
+        df["CRM ID"] = np.arange(500000, 500000 + n_rows)
+    return df
+
+
+def time_calls(fn: Callable[[], object], repeat: int, warmup: int = 1) -> List[float]:
+    """Call ``fn`` ``warmup + repeat`` times and return the timed durations in ms"""
+    for _ in range(warmup):
+        fn()
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        durations.append((time.perf_counter() - start) * 1000)
+    return durations
+
+
+def summarize(durations_ms: List[float]) -> Dict[str, float]:
+    arr = np.asarray(durations_ms)
+    return {
+        "p50_ms": float(np.percentile(arr, 50)),
+        "p99_ms": float(np.percentile(arr, 99)),
+        "mean_ms": float(arr.mean()),
+    }
+
+
+def print_table(rows: List[Dict[str, object]]) -> None:
+    """Print rows as a Markdown table (ready to paste into docs/PERFORMANCE.md)"""
+    if not rows:
+        return
+    headers = list(rows[0].keys())
+    print("| " + " | ".join(headers) + " |")
+    print("|" + "|".join("---" for _ in headers) + "|")
+    for row in rows:
+        cells = []
+        for h in headers:
+            v = row[h]
+            cells.append(f"{v:,.2f}" if isinstance(v, float) else str(v))
+        print("| " + " | ".join(cells) + " |")
@@ -1,17 +1,45 @@
+"""
+Generate synthetic deals for training and register them in the dataset manifest.
+
+By default the deals come from the columnar generator of
+`utils/synthetic_data.py` (all rows at once with NumPy); `--row-wise` uses
+`generate_record` below, one record at a time, which the columnar generator
+reproduces in distribution.
+
+Usage
+-----
+```bash
+python src/generate_synthetic_data.py                      # 1,000 deals to data/output/synthetic_data_v3.xlsx
+python src/generate_synthetic_data.py --rows 1000000 --output data/output/synthetic_1m.parquet --dataset synthetic_1m
+python src/generate_synthetic_data.py --seed 7              # reproducible draw
+python src/generate_synthetic_data.py --row-wise            # original record-at-a-time generator
+```
+"""
+import argparse
 import os
+import sys
 import random
 import pandas as pd
 
-# STEP 1: Load your Excel file
-input_file = "data/input/Data-Input.xlsx"   # Path to input file
-df = pd.ExcelFile(input_file)
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+from utils.datasets import register_dataset
+from utils.ingest import detect_format
+from utils.rubric import RUBRIC_BY_NAME, label_points
+from utils.synthetic_data import generate_deals
+
+
+def read_input_schema(input_file="data/input/Data-Input.xlsx"):
+    # STEP 1: Load your Excel file
+    df = pd.ExcelFile(input_file)
 
-# Pick the first sheet (or loop through all)
-sheet_name = df.sheet_names[0]
-data = df.parse(sheet_name)
+    # Pick the first sheet (or loop through all)
+    sheet_name = df.sheet_names[0]
+    data = df.parse(sheet_name)
 
-# STEP 2: Extract schema (column names)
-columns = list(data.columns)
+    # STEP 2: Extract schema (column names)
+    return list(data.columns)
 
 # Define schema from Excel (simplified for illustration)
 valid_tags = [
@@ -186,40 +214,15 @@ def generate_record(index, target_status=None):
     contributions = []
 
     # Helper to add score only if available
-    def add_score(val, max_points, name, l1, l2):
+    def add_score(val, name, l1, l2):
         nonlocal current_score, max_possible_score
         # Check if value indicates "missing" or "not applicable"
         if val in ["Not Available", "No Intel", "Unknown", None]:
             return # Do not punish scalar score, do not add to max possible
         
-        # Calculate scalar score based on maps (re-defined locally for clarity)
-        # We need the numeric score here. 
-        # For simplicity, we define the maps inside.
-        score = 0
-        if name == "Account Engagement":
-            score = {"High (Existing+Good)": 10, "Medium (Existing+Poor)": 5, "Low (New Account)": 0}.get(val, 0)
-        elif name == "Client Relationship":
-            score = {"Strong": 10, "Neutral": 5, "Weak": 0}.get(val, 0)
-        elif name == "Deal Coach":
-            score = {"Active & Available": 10, "Passive": 5, "Not Available": 0}.get(val, 0)
-        elif name == "Bidder Rank":
-            score = {"Top": 15, "Middle": 5, "Bottom": 0}.get(val, 0)
-        elif name == "Incumbency Share":
-            score = {"High (>50%)": 10, "Medium (20-50%)": 5, "Low (<20%)": 2, "None": 0}.get(val, 0)
-        elif name == "References":
-            score = {"Strong (Domain+Tech)": 7, "Average": 3, "Weak/None": 0}.get(val, 0)
-        elif name == "Solution Strength":
-            score = {"Strong (Covers all)": 7, "Average (Gaps)": 3, "Weak": 0}.get(val, 0)
-        elif name == "Client Impression":
-            score = {"Positive": 6, "Neutral": 3, "Negative": 0}.get(val, 0)
-        elif name == "Orals Score":
-            score = {"Strong": 15, "At Par": 8, "Weak": 0}.get(val, 0)
-        elif name == "Price Alignment":
-            score = {"On par with Client Budget": 5, "Above Client Budget with Rationale/Caveats": 3, "Above Client Budget": 0, "Client Budget Info not available": 2}.get(val, 0)
-        elif name == "Price Position":
-            score = {"Lowest": 5, "Competitive": 3, "Expensive": 0}.get(val, 0)
-        elif name == "Current RFP Stage":
-            score = {"Negotiation": 15, "Defence Cleared": 10, "Proposal Submitted": 5, "RFP Received": 0}.get(val, 0)
+        # Points and maximum come from the shared rubric (utils/rubric.py)
+        score = label_points(name, val)
+        max_points = RUBRIC_BY_NAME[name].max_points
             
         current_score += score
         max_possible_score += max_points
@@ -229,7 +232,7 @@ def generate_record(index, target_status=None):
     rfp_stage = pick_weighted(["Negotiation", "Defence Cleared", "Proposal Submitted", "RFP Received"], w4)
     if is_early_stage and random.random() < 0.7:
         rfp_stage = pick_weighted(["Proposal Submitted", "RFP Received"], [0.5, 0.5])
-    add_score(rfp_stage, 15, "Current RFP Stage", "Process", "RFP Stage")
+    add_score(rfp_stage, "Current RFP Stage", "Process", "RFP Stage")
 
     # A. Relationship (Can now be missing in very early stages)
     # ---------------------------------------------------------
@@ -252,7 +255,7 @@ def generate_record(index, target_status=None):
             else:
                 acc_engagement = pick_weighted(["High (Existing+Good)", "Medium (Existing+Poor)"], [w[0], w[1]+w[2]])
     
-    add_score(acc_engagement, 10, "Account Engagement", "Relationship", "Client Relationship (CXOs, decision makers, influencers)")
+    add_score(acc_engagement, "Account Engagement", "Relationship", "Client Relationship (CXOs, decision makers, influencers)")
 
     # Client Relationship
     # Options: ["Strong", "Neutral", "Weak"]
@@ -271,29 +274,29 @@ def generate_record(index, target_status=None):
     else:
         client_rel = pick_weighted(["Strong", "Neutral", "Weak"], w)
         
-    add_score(client_rel, 10, "Client Relationship", "Relationship", "Client Relationship (CXOs, decision makers, influencers)")
+    add_score(client_rel, "Client Relationship", "Relationship", "Client Relationship (CXOs, decision makers, influencers)")
     
     # Deal Coach (Maybe Missing)
     deal_coach = pick_weighted(["Active & Available", "Passive", "Not Available"], w)
     if force_sparse_win or (is_early_stage and random.random() < 0.3): deal_coach = "Not Available"
-    add_score(deal_coach, 10, "Deal Coach", "Relationship", "Deal Coach availability/ fit")
+    add_score(deal_coach, "Deal Coach", "Relationship", "Deal Coach availability/ fit")
     
     # B. Competition (Rank maybe missing)
     bidder_rank = pick_weighted(["Top", "Middle", "Bottom"], w)
     if force_sparse_win or is_early_stage: bidder_rank = "Not Available" # Often unknown early
-    add_score(bidder_rank, 15, "Bidder Rank", "Relationship", "Competition and Incumbency (strategic, CSAT, delivery track record)")
+    add_score(bidder_rank, "Bidder Rank", "Relationship", "Competition and Incumbency (strategic, CSAT, delivery track record)")
     
     # Incumbency (Known)
     # incumbency generated above (but could be None for NN)
     if force_sparse_win or (is_early_stage and random.random() < 0.3):
         incumbency = "Unknown"
         
-    add_score(incumbency, 10, "Incumbency Share", "Commercials", "Incumbency advantage/discounting")
+    add_score(incumbency, "Incumbency Share", "Commercials", "Incumbency advantage/discounting")
     
     # C. Solution (References known, others maybe not)
     references = pick_weighted(["Strong (Domain+Tech)", "Average", "Weak/None"], w)
     if force_sparse_win: references = "Weak/None" # Or Unknown? Let's say absent.
-    add_score(references, 7, "References", "Capability_or_Credentials", "References (Scale, Domain, Usecase) & Case Studies")
+    add_score(references, "References", "Capability_or_Credentials", "References (Scale, Domain, Usecase) & Case Studies")
     
     sol_strength = pick_weighted(["Strong (Covers all)", "Average (Gaps)", "Weak"], w)
     if force_relationship_loss:
@@ -304,16 +307,16 @@ def generate_record(index, target_status=None):
         sol_strength = "Strong (Covers all)" # Force Strong for sparse win
     elif is_early_stage and random.random() < 0.5: 
         sol_strength = "Not Available"
-    add_score(sol_strength, 7, "Solution Strength", "Solution", "Technical Response Quality (coherent, competitive, consultative, competitive)")
+    add_score(sol_strength, "Solution Strength", "Solution", "Technical Response Quality (coherent, competitive, consultative, competitive)")
     
     client_impression = pick_weighted(["Positive", "Neutral", "Negative"], w)
     if force_sparse_win or is_early_stage: client_impression = "Neutral" 
-    add_score(client_impression, 6, "Client Impression", "Solution", "PoV/ Thought Leadership")
+    add_score(client_impression, "Client Impression", "Solution", "PoV/ Thought Leadership")
     
     # D. Orals (Often missing early)
     orals_score_val = pick_weighted(["Strong", "At Par", "Weak"], w)
     if force_sparse_win or is_early_stage: orals_score_val = "Not Available"
-    add_score(orals_score_val, 15, "Orals Score", "Solution", "Orals Performance")
+    add_score(orals_score_val, "Orals Score", "Solution", "Orals Performance")
 
     # E. Price (Often missing early)
     price_alignment = pick_weighted(["On par with Client Budget", "Above Client Budget with Rationale/Caveats", "Above Client Budget", "Client Budget Info not available"], w4)
@@ -322,7 +325,7 @@ def generate_record(index, target_status=None):
         price_alignment = "Above Client Budget"
     elif force_sparse_win or is_early_stage: 
         price_alignment = "Client Budget Info not available"
-    add_score(price_alignment, 5, "Price Alignment", "Commercials", "Deviation/fit to win price")
+    add_score(price_alignment, "Price Alignment", "Commercials", "Deviation/fit to win price")
     
     price_position = pick_weighted(["Lowest", "Competitive", "Expensive"], w)
     if force_relationship_loss:
@@ -330,7 +333,7 @@ def generate_record(index, target_status=None):
         price_position = "Expensive"
     elif force_sparse_win or is_early_stage: 
         price_position = "Not Available"
-    add_score(price_position, 5, "Price Position", "Commercials", "Pricing model innovation/ Commercial Structure")
+    add_score(price_position, "Price Position", "Commercials", "Pricing model innovation/ Commercial Structure")
     
     # --- CALCULATE FINAL PERCENTAGE SCORE ---
     if max_possible_score == 0:
@@ -466,39 +469,81 @@ def generate_record(index, target_status=None):
     }
 
 
-# STEP 4: Generate 1000 synthetic records using the generate_record function
-print("Generating 1000 synthetic records...")
-synthetic_records = []
-target_distribution = ["Won", "Lost", "Aborted"]
-for i in range(1, 1001):
-    # Cycle through targets to ensure roughly equal distribution
-    target = target_distribution[i % 3]
-    record = generate_record(i, target_status=target)
-    synthetic_records.append(record)
-    if i % 50 == 0:
-        print(f"Generated {i}/1000 records...")
-
-# STEP 5: Convert to DataFrame
-synthetic_df = pd.DataFrame(synthetic_records)
-
-# STEP 6: Save to Excel
-project_root = os.getcwd()
-output_dir = os.path.join(project_root, "data", "output")
-os.makedirs(output_dir, exist_ok=True)
-output_file = os.path.join(output_dir, "synthetic_data_v3.xlsx")
-
-try:
-    synthetic_df.to_excel(output_file, index=False)
-    print(f"\nSynthetic data generation complete!")
-    print(f"Generated {len(synthetic_df)} records")
-    print(f"Saved to: {output_file}")
-except PermissionError:
-    # File is locked (probably open in Excel), save with timestamp
-    from datetime import datetime
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    backup_file = f"data/output/synthetic_data_v2_{timestamp}.xlsx"
-    synthetic_df.to_excel(backup_file, index=False)
-    print(f"\n[WARNING] Could not save to {output_file} (file is open)")
-    print(f"[SUCCESS] Saved to backup file: {backup_file}")
-    print(f"Generated {len(synthetic_df)} records")
+def generate_row_wise(n_rows):
+    """The original record-at-a-time generator, kept as the reference for ``utils.synthetic_data``"""
+    synthetic_records = []
+    target_distribution = ["Won", "Lost", "Aborted"]
+    for i in range(1, n_rows + 1):
+        # Cycle through targets to ensure roughly equal distribution
+        target = target_distribution[i % 3]
+        record = generate_record(i, target_status=target)
+        synthetic_records.append(record)
+        if i % 50 == 0:
+            print(f"Generated {i}/{n_rows} records...")
+    return pd.DataFrame(synthetic_records)
+
+
+def write_frame(synthetic_df, output_file):
+    fmt = detect_format(output_file)
+    if fmt == "csv":
+        synthetic_df.to_csv(output_file, index=False)
+    elif fmt == "parquet":
+        synthetic_df.to_parquet(output_file, index=False)
+    else:
+        synthetic_df.to_excel(output_file, index=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic deals for training")
+    parser.add_argument("--rows", type=int, default=1000, help="Deals to generate (default: %(default)s)")
+    parser.add_argument("--seed", type=int, help="Random seed (default: fresh entropy)")
+    parser.add_argument("--output", default=os.path.join("data", "output", "synthetic_data_v3.xlsx"),
+                        help="Output file, .xlsx, .csv or .parquet (default: %(default)s)")
+    parser.add_argument("--dataset", default="synthetic_v3",
+                        help="Name the output is registered under in data/datasets.json (default: %(default)s)")
+    parser.add_argument("--row-wise", action="store_true",
+                        help="Use the original record-at-a-time generator instead of the columnar one")
+    args = parser.parse_args(argv)
+    read_input_schema()
+
+    # STEP 4: Generate the synthetic records
+    print(f"Generating {args.rows:,} synthetic records...")
+    if args.row_wise:
+        random.seed(args.seed)
+        synthetic_df = generate_row_wise(args.rows)
+    else:
+        synthetic_df = generate_deals(args.rows, seed=args.seed)
+
+    # STEP 5: Save (.xlsx by default)
+    output_file = os.path.abspath(args.output)
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+
+    try:
+        write_frame(synthetic_df, output_file)
+        saved_file, dataset_name = output_file, args.dataset
+        print(f"\nSynthetic data generation complete!")
+        print(f"Generated {len(synthetic_df)} records")
+        print(f"Saved to: {output_file}")
+    except PermissionError:
+        # File is locked (probably open in Excel), save with timestamp
+        from datetime import datetime
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        stem, ext = os.path.splitext(output_file)
+        backup_file = f"{stem}_{timestamp}{ext}"
+        write_frame(synthetic_df, backup_file)
+        # The copy is registered under its own name, so args.dataset keeps naming the locked file
+        saved_file, dataset_name = backup_file, f"{args.dataset}_{timestamp}"
+        print(f"\n[WARNING] Could not save to {output_file} (file is open)")
+        print(f"[SUCCESS] Saved to backup file: {backup_file}")
+        print(f"Generated {len(synthetic_df)} records")
+        print(f"Registered as dataset '{dataset_name}' (the new default)")
+
+    # STEP 6: Point the dataset manifest's default at the new data, so training picks it up.
+    # That holds for a timestamped copy too: it is what was just generated, and the API, the UI
+    # and the training script all train on the manifest's default.
+    register_dataset(dataset_name, saved_file, description=f"{len(synthetic_df):,} synthetic deals written by "
+                     "src/generate_synthetic_data.py", make_default=True)
+
 
+if __name__ == "__main__":
+    main()
@@ -3,10 +3,12 @@
 Predict the deal outcome using the XGBoost classifier trained on the synthetic data.
 
 The script expects an input Excel file named **Data-Input.xlsx** located in the
-`data/input` directory. It loads the saved model (`models/xgb_classifier.pkl`),
+`data/input` directory. It loads the saved model (`models/xgb_classifier.pkl`)
+and the feature schema written next to it (`models/feature_schema.json`),
 applies the same preprocessing steps used during training (one‑hot encoding
 and column alignment), and writes the predictions to
-`data/output/predictions.xlsx`.
+`data/output/predictions.xlsx` (or `.csv`, `.parquet`, `.arrows`, `.jsonl` with
+``--format``).
 
 Requirements
 ------------
@@ -19,10 +21,13 @@ Usage
 -----
 ```bash
 python src/predict_xgb_classifier.py
+python src/predict_xgb_classifier.py --format parquet
 ```
 """
 
+import argparse
 import os
+import sys
 import pandas as pd
 import numpy as np
 import joblib
@@ -31,15 +36,31 @@ import joblib
 # Paths
 # ---------------------------------------------------------------------------
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+from utils.fast_inference import build_fast_predictor
+from utils.formats import DEFAULT_OUTPUT_FORMAT, OUTPUT_FORMATS, write_frame
+from utils.normalization import NORMALIZER
+from utils.rubric import ORDINAL_MAPPINGS
+from utils.schema import FEATURE_SCHEMA_FILENAME, load_feature_schema
+
+parser = argparse.ArgumentParser(description="Predict deal outcomes for data/input/Data-Input.xlsx")
+parser.add_argument("--format", default=DEFAULT_OUTPUT_FORMAT, choices=list(OUTPUT_FORMATS),
+                    help="Output file format (default: %(default)s)")
+args = parser.parse_args()
+
 model_path   = os.path.join(project_root, "models", "xgb_classifier.pkl")
 encoder_path = os.path.join(project_root, "models", "label_encoder.pkl")
+schema_path  = os.path.join(project_root, "models", FEATURE_SCHEMA_FILENAME)
 input_path   = os.path.join(project_root, "data", "input", "Data-Input.xlsx")
-output_path  = os.path.join(project_root, "data", "output", "predictions.xlsx")
+output_path  = os.path.join(project_root, "data", "output", "predictions" + OUTPUT_FORMATS[args.format].extension)
 
 if not os.path.exists(model_path):
     raise FileNotFoundError(f"Trained model not found at {model_path}")
 if not os.path.exists(encoder_path):
     raise FileNotFoundError(f"Label encoder not found at {encoder_path}")
+if not os.path.exists(schema_path):
+    raise FileNotFoundError(f"Feature schema not found at {schema_path}. Please retrain the model.")
 if not os.path.exists(input_path):
     raise FileNotFoundError(f"Input file not found at {input_path}")
 
@@ -54,6 +75,7 @@ try:
     # ---------------------------------------------------------------------------
     model = joblib.load(model_path)
     le = joblib.load(encoder_path)
+    schema = load_feature_schema(schema_path)
 
     # Load data without skipping rows (assuming headers are in the first row as in generation script)
     raw_df = pd.read_excel(input_path)
@@ -61,118 +83,28 @@ try:
     # ---------------------------------------------------------------------------
     # Pre-processing – prepare features similar to training
     # ---------------------------------------------------------------------------
-    # Find the latest synthetic data file to use as schema template
-    output_dir = os.path.join(project_root, "data", "output")
-    files = [f for f in os.listdir(output_dir) if f.startswith("synthetic_data") and f.endswith(".xlsx") and not f.startswith("~$")]
-    files.sort(key=lambda x: os.path.getmtime(os.path.join(output_dir, x)), reverse=True)
-
-    if not files:
-        raise FileNotFoundError("No synthetic data found to use as schema template. Please train the model first.")
-
-    SYNTHETIC_DATA_PATH = os.path.join(output_dir, files[0])
-    print(f"Using schema from: {SYNTHETIC_DATA_PATH}")
-
-    synthetic_df = pd.read_excel(SYNTHETIC_DATA_PATH)
-    
-    # Define columns to drop (must match training script + outcome variables)
-    drop_cols = [
-        "CRM ID", "Opportunity Name", "Account Name", "Detailed Remarks", "Deal Status",
-        "Calculated Score",
-        "Primary L1", "Primary L2", "Secondary L1", "Secondary L2", "Tertiary L1", "Tertiary L2"
-    ]
-    expected_cols = [c for c in synthetic_df.columns if c not in drop_cols]
-
-    # Get the expected types for each column from synthetic data
-    expected_types = {}
-    for col in expected_cols:
-        expected_types[col] = synthetic_df[col].dtype
+    # The feature schema saved at training time describes the expected columns
+    print(f"Using schema from: {schema_path}")
 
     # Add missing columns with appropriate default values based on expected type
-    for col in expected_cols:
-        if col not in raw_df.columns:
-            if expected_types[col] in ['int64', 'float64']:
-                raw_df[col] = 0.0
-            else:
-                raw_df[col] = "UNKNOWN"
+    schema.add_missing_columns(raw_df)
 
-    # Drop identifier and long-text columns from features (same as training)
-    X_input = raw_df.drop(columns=[c for c in drop_cols if c in raw_df.columns], errors="ignore").copy()
+    # Keep only the training features (identifier and long-text columns are not in the schema)
+    X_input = raw_df[schema.columns].copy()
 
     # Convert columns to match expected types from training
-    # Convert columns to match expected types from training
+    schema.coerce_types(X_input)
     for col in X_input.columns:
-        if col in expected_types:
-            if expected_types[col] in ['int64', 'float64']:
-                # This should be numeric
-                X_input[col] = pd.to_numeric(X_input[col], errors='coerce')
-            else:
-                # This should be categorical
-                X_input[col] = X_input[col].astype(str).str.strip().replace({'nan': np.nan, 'None': np.nan, '': np.nan, 'NaN': np.nan})
+        if not schema.is_numeric(col):
+            # This should be categorical
+            X_input[col] = X_input[col].str.strip().replace({'nan': np.nan, 'None': np.nan, '': np.nan, 'NaN': np.nan})
 
     # --- Data Cleaning & Normalization ---
-    # Map shorthand/variant inputs to model categories
-    normalization_map = {
-        "Account Engagement": {
-            "high": "High (Existing+Good)", "good": "High (Existing+Good)",
-            "medium": "Medium (Existing+Poor)", "average": "Medium (Existing+Poor)",
-            "low": "Low (New Account)", "new": "Low (New Account)", "none": "Low (New Account)"
-        },
-        "Client Relationship": {
-            "high": "Strong", "strong": "Strong", "good": "Strong",
-            "medium": "Neutral", "neutral": "Neutral", "average": "Neutral",
-            "low": "Weak", "weak": "Weak", "poor": "Weak", "new": "Weak", "none": "Weak"
-        },
-        "Incumbency Share": {
-            "high": "High (>50%)", ">50%": "High (>50%)",
-            "medium": "Medium (20-50%)", "20-50%": "Medium (20-50%)",
-            "low": "Low (<20%)", "<20%": "Low (<20%)", "none": "None"
-        },
-        "Bidder Rank": {
-            "1": "Top", "top": "Top", "first": "Top",
-            "2": "Middle", "middle": "Middle", "second": "Middle",
-            "3": "Bottom", "bottom": "Bottom", "last": "Bottom"
-        },
-        "Price Alignment": {
-            "on par": "On par with Client Budget", "budget": "On par with Client Budget", "aligned": "On par with Client Budget",
-            "caveats": "Above Client Budget with Rationale/Caveats", "rationale": "Above Client Budget with Rationale/Caveats",
-            "above": "Above Client Budget", "deviating": "Above Client Budget",
-            "info not available": "Client Budget Info not available", "no intel": "Client Budget Info not available"
-        },
-        "Solution Strength": {
-            "high": "Strong (Covers all)", "strong": "Strong (Covers all)",
-            "medium": "Average (Gaps)", "average": "Average (Gaps)",
-            "low": "Weak", "weak": "Weak"
-        }
-    }
-
-    for col, mapping in normalization_map.items():
-        if col in X_input.columns:
-            # Normalize to lowercase for matching, then map
-            def normalize_val(val):
-                if pd.isna(val): return val
-                s = str(val).lower().strip()
-                for key, target in mapping.items():
-                    if key in s: # simple substring match
-                         return target
-                return val # Return original if no match
-            
-            X_input[col] = X_input[col].apply(normalize_val)
+    # Map shorthand/variant inputs to model categories (same normalizer as the API)
+    NORMALIZER.normalize_frame(X_input)
 
     # --- BUSINESS LOGIC: Explicit Ordinal Mapping (Must align with training) ---
-    ordinal_mappings = {
-        "Account Engagement": {"High (Existing+Good)": 5, "Medium (Existing+Poor)": 3, "Low (New Account)": 0},
-        "Client Relationship": {"Strong": 5, "Neutral": 3, "Weak": 0},
-        "Deal Coach": {"Active & Available": 5, "Passive": 3, "Not Available": 0},
-        "Bidder Rank": {"Top": 5, "Middle": 3, "Bottom": 0},
-        "Incumbency Share": {"High (>50%)": 5, "Medium (20-50%)": 3, "Low (<20%)": 0, "None": 0},
-        "References": {"Strong (Domain+Tech)": 5, "Average": 3, "Weak/None": 0},
-        "Solution Strength": {"Strong (Covers all)": 5, "Average (Gaps)": 3, "Weak": 0},
-        "Client Impression": {"Positive": 5, "Neutral": 3, "Negative": 0},
-        "Orals Score": {"Strong": 5, "At Par": 3, "Weak": 0},
-        "Price Alignment": {"On par with Client Budget": 5, "Above Client Budget with Rationale/Caveats": 3, "Above Client Budget": 0, "Client Budget Info not available": 2},
-        "Price Position": {"Lowest": 5, "Competitive": 3, "Expensive": 0},
-        "Current RFP Stage": {"Negotiation": 15, "Defence Cleared": 10, "Proposal Submitted": 5, "RFP Received": 0}
-    }
+    ordinal_mappings = ORDINAL_MAPPINGS
 
     # Apply mappings
     for col, mapping in ordinal_mappings.items():
@@ -223,26 +155,24 @@ try:
         X_input[col] = X_input[col].str.strip()
         X_input[col] = X_input[col].fillna("UNKNOWN")
 
-    # Impute numeric columns
-    for col in numeric_cols:
-        if X_input[col].isna().any():
-            median_val = X_input[col].median()
-            if pd.isna(median_val):
-                median_val = 0.0
-            X_input[col] = X_input[col].fillna(median_val)
+    # Impute numeric columns with the training medians
+    schema.fill_numeric(X_input, numeric_cols)
 
     # ---------------------------------------------------------------------------
     # Prediction
     # ---------------------------------------------------------------------------
-    # The pipeline handles preprocessing automatically
-    pred_numeric = model.predict(X_input)
+    # One booster call on a prebuilt feature matrix (the pipeline is the fallback
+    # for layouts FastPredictor does not know); labels are the argmax
+    predictor = build_fast_predictor(model)
+    if predictor is not None:
+        pred_probs = predictor.predict_proba(X_input)
+    else:
+        pred_probs = model.predict_proba(X_input)
+    pred_numeric = model.classes_[np.argmax(pred_probs, axis=1)]
 
     # Convert numeric labels back to original string labels
     pred_labels = le.inverse_transform(pred_numeric)
 
-    # Get prediction probabilities
-    pred_probs = model.predict_proba(X_input)
-
     # Append predictions to the original dataframe for easy reference
     result_df = raw_df.copy()
     result_df["Predicted Deal Status"] = pred_labels
@@ -261,7 +191,7 @@ try:
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
 
     try:
-        result_df.to_excel(output_path, index=False)
+        write_frame(result_df, output_path, args.format)
         print(f"Predictions written to {output_path}")
         print(f"Total records processed: {len(result_df)}")
         print(f"Prediction distribution:")
@@ -273,8 +203,9 @@ try:
         # Try a fallback name
         import time
         timestamp = int(time.time())
-        fallback_path = output_path.replace(".xlsx", f"_{timestamp}.xlsx")
-        result_df.to_excel(fallback_path, index=False)
+        base, ext = os.path.splitext(output_path)
+        fallback_path = f"{base}_{timestamp}{ext}"
+        write_frame(result_df, fallback_path, args.format)
         print(f"Predictions written to {fallback_path}")
 
 except Exception as e:
@@ -0,0 +1,89 @@
+# src/update_xgb_classifier.py
+"""
+Update the trained XGBoost classifier with newly labeled deals instead of
+retraining it. The current booster in `models/xgb_classifier.pkl` gets
+`--rounds` more trees fitted on the new rows only; the result replaces the
+saved model only if its weighted F1 on the holdout (part of the new rows
+plus the training workbook's holdout split) is no worse than the current
+model's.
+
+The work is done by `utils.model_update.update_model`, which the API calls
+in-process as well; this script only parses flags and prints the result.
+
+Usage
+-----
+```bash
+python src/update_xgb_classifier.py data/input/closed_deals_week_42.xlsx
+python src/update_xgb_classifier.py new_deals.csv --rounds 100 --learning-rate 0.05
+```
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+from utils.model_update import UpdateConfig, update_model
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Add trees for newly labeled deals to the deal outcome classifier")
+    parser.add_argument("data", help="Newly labeled deals (.xlsx, .csv or .parquet) with a 'Deal Status' column")
+    parser.add_argument("--models-dir", default=UpdateConfig.models_dir, help="Where the current artifacts live")
+    parser.add_argument("--rounds", type=int, default=UpdateConfig.rounds,
+                        help="Trees added to the booster (default: %(default)s)")
+    parser.add_argument("--learning-rate", type=float, help="Learning rate of the added trees (default: the model's)")
+    parser.add_argument("--holdout-size", type=float, default=UpdateConfig.holdout_size,
+                        help="Share of the new rows held out for the comparison (default: %(default)s)")
+    parser.add_argument("--reference", help="Training data whose holdout is also scored "
+                                            "(default: the default dataset of data/datasets.json)")
+    parser.add_argument("--no-reference", action="store_true", help="Compare on the new rows' holdout only")
+    parser.add_argument("--tolerance", type=float, default=UpdateConfig.tolerance,
+                        help="Weighted-F1 drop still accepted for promotion (default: %(default)s)")
+    parser.add_argument("--cores", type=int, help="XGBoost threads (default: all available cores)")
+    parser.add_argument("--json", action="store_true", help="Print the full result as JSON")
+    args = parser.parse_args(argv)
+
+    log_dir = os.path.join(project_root, "logs")
+    os.makedirs(log_dir, exist_ok=True)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(os.path.join(log_dir, "training.log")),
+            logging.StreamHandler()
+        ]
+    )
+
+    result = update_model(UpdateConfig(
+        new_data_path=args.data,
+        models_dir=args.models_dir,
+        rounds=args.rounds,
+        learning_rate=args.learning_rate,
+        holdout_size=args.holdout_size,
+        reference_data_path=args.reference,
+        use_reference=not args.no_reference,
+        tolerance=args.tolerance,
+        n_cores=args.cores,
+    ))
+
+    if args.json:
+        print(json.dumps(result.to_dict(), indent=2))
+        return
+    print(f"\nNew rows: {result.new_rows} ({result.boosted_rows} boosted on, {result.holdout_rows} holdout rows)")
+    print(f"Trees: {result.trees_before} -> {result.trees_after}")
+    print(f"Current F1 (weighted): {result.current.f1:.4f}")
+    print(f"Updated F1 (weighted): {result.candidate.f1:.4f}")
+    print("Timings (s):", result.timings)
+    if result.promoted:
+        print(f"\nUpdated model saved to: {result.model_path}")
+    else:
+        print("\nUpdated model was worse on the holdout; the current model is unchanged")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Shared fixtures
+
+Tests run from the project root with ``pytest``. A small model is trained
+once per session on the checked-in synthetic workbook into a temporary
+folder (no search, no CV, no caches), so nothing under ``models/`` or
+``data/cache/`` is touched.
+"""
+import glob
+import os
+import sys
+
+import pytest
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+TRAINING_DATA_PATH = os.path.join(PROJECT_ROOT, "data", "output", "synthetic_data_v3.xlsx")
+
+# The sample deal workbooks checked in at the project root
+INPUT_WORKBOOKS = sorted(glob.glob(os.path.join(PROJECT_ROOT, "Input*.xlsx")))
+
+
+@pytest.fixture(scope="session")
+def trained_model(tmp_path_factory):
+    """``TrainingResult`` of a quick run; its artifacts live in a temporary models folder"""
+    from utils.training import TrainingConfig, train
+
+    models_dir = str(tmp_path_factory.mktemp("models"))
+    return train(TrainingConfig(
+        data_path=TRAINING_DATA_PATH,
+        models_dir=models_dir,
+        output_dir=models_dir,
+        tune=False,
+        cv_folds=0,
+        shap_summary=False,
+        feature_cache_dir=None,
+        training_cache_dir=None,
+    ))
+
+
+@pytest.fixture(scope="session")
+def pipeline(trained_model):
+    """The trained sklearn pipeline (``prep`` ColumnTransformer + ``model`` XGBClassifier)"""
+    import joblib
+
+    return joblib.load(trained_model.model_path)
+
+
+@pytest.fixture(scope="session")
+def feature_schema(trained_model):
+    from utils.schema import load_feature_schema
+
+    return load_feature_schema(trained_model.schema_path)
+
+
+@pytest.fixture(scope="session")
+def api_module(trained_model, tmp_path_factory):
+    """The ``api`` module serving the session's model; job tables and result files go to temporary folders"""
+    import api
+    from utils.jobs import JobStore
+    from utils.model_store import ModelStore
+
+    jobs_dir = str(tmp_path_factory.mktemp("jobs"))
+    output_dir = str(tmp_path_factory.mktemp("output"))
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(api, "MODEL_PATH", trained_model.model_path)
+        patch.setattr(api, "ENCODER_PATH", trained_model.encoder_path)
+        patch.setattr(api, "FEATURE_SCHEMA_PATH", trained_model.schema_path)
+        patch.setattr(api, "MODEL_STORE", ModelStore(trained_model.model_path, trained_model.encoder_path,
+                                                     trained_model.schema_path))
+        patch.setattr(api, "OUTPUT_DIR", output_dir)
+        patch.setattr(api, "JOBS_DIR", jobs_dir)
+        patch.setattr(api, "JOB_STORE", JobStore(os.path.join(jobs_dir, "jobs.sqlite3"),
+                                                 os.path.join(jobs_dir, "inputs")))
+        yield api
+
+
+@pytest.fixture(scope="session")
+def client(api_module):
+    """One TestClient for the whole session: leaving it runs the shutdown hook, which stops the worker pools"""
+    from fastapi.testclient import TestClient
+
+    with TestClient(api_module.app) as test_client:
+        yield test_client
@@ -0,0 +1,99 @@
+"""MicroBatcher: coalescing, per-caller results and error propagation"""
+import asyncio
+import threading
+
+import pytest
+
+from utils.batching import MicroBatcher
+from utils.worker_pool import WorkerPool
+
+
+@pytest.fixture
+def pool():
+    pool = WorkerPool("test", kind="thread", max_workers=2, max_queue=16, timeout=10)
+    yield pool
+    pool.shutdown(wait=True)
+
+
+def run_while_busy(batcher, first, rest, release):
+    """Submit ``first`` (sent at once), then ``rest`` while its batch is still running; returns every result"""
+    async def scenario():
+        head = asyncio.ensure_future(batcher.submit(first))
+        await asyncio.sleep(0)
+        tail = [asyncio.ensure_future(batcher.submit(item)) for item in rest]
+        await asyncio.sleep(0)
+        release.set()
+        return await asyncio.gather(head, *tail, return_exceptions=True)
+
+    return asyncio.run(scenario())
+
+
+def test_requests_arriving_during_a_batch_go_out_together(pool):
+    release = threading.Event()
+    seen = []
+
+    def process(batch):
+        release.wait(5)
+        seen.append(list(batch))
+        return [sum(rows) * 10 for rows in batch]
+
+    batcher = MicroBatcher("test", process, pool, max_wait_ms=50, max_batch_size=100)
+    results = run_while_busy(batcher, [1], [[2], [3, 4], [5]], release)
+
+    assert results == [10, 20, 70, 50]
+    assert seen == [[[1]], [[2], [3, 4], [5]]]
+    stats = batcher.stats()
+    assert stats["batches"] == 2 and stats["items"] == 4 and stats["rows"] == 5
+    assert stats["requests_per_batch_max"] == 3
+
+
+def test_max_batch_size_flushes_early(pool):
+    release = threading.Event()
+    seen = []
+
+    def process(batch):
+        release.wait(5)
+        seen.append(len(batch))
+        return batch
+
+    # The window is far longer than the test: only the size limit can send the second batch
+    batcher = MicroBatcher("test", process, pool, max_wait_ms=60_000, max_batch_size=3)
+    results = run_while_busy(batcher, [0], [[1], [2], [3]], release)
+
+    assert results == [[0], [1], [2], [3]]
+    assert seen == [1, 3]
+
+
+def test_an_exception_result_fails_only_its_caller(pool):
+    release = threading.Event()
+
+    def process(batch):
+        release.wait(5)
+        return [ValueError(f"bad {rows[0]}") if rows[0] < 0 else rows[0] for rows in batch]
+
+    batcher = MicroBatcher("test", process, pool, max_wait_ms=50)
+    results = run_while_busy(batcher, [1], [[2], [-3], [4]], release)
+
+    assert results[:2] == [1, 2] and results[3] == 4
+    assert isinstance(results[2], ValueError) and str(results[2]) == "bad -3"
+    assert batcher.stats()["failed_batches"] == 0
+
+
+def test_a_failed_batch_fails_every_caller_in_it(pool):
+    release = threading.Event()
+
+    def process(batch):
+        release.wait(5)
+        if len(batch) > 1:
+            raise RuntimeError("model call failed")
+        return batch
+
+    batcher = MicroBatcher("test", process, pool, max_wait_ms=50)
+    results = run_while_busy(batcher, [1], [[2], [3]], release)
+
+    assert results[0] == [1]
+    assert all(isinstance(r, RuntimeError) and str(r) == "model call failed" for r in results[1:])
+    assert batcher.stats()["failed_batches"] == 1
+
+    # The batcher keeps working after a failure
+    assert asyncio.run(batcher.submit([7])) == [7]
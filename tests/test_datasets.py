@@ -0,0 +1,70 @@
+"""The dataset manifest: which file the generator registers and which one training reads"""
+import functools
+import importlib.util
+import os
+import shutil
+
+import pytest
+
+from conftest import PROJECT_ROOT, TRAINING_DATA_PATH
+from utils.datasets import load_manifest, register_dataset, resolve_dataset
+
+
+@pytest.fixture
+def manifest_path(tmp_path):
+    data_path = str(tmp_path / "deals.xlsx")
+    shutil.copyfile(TRAINING_DATA_PATH, data_path)
+    path = str(tmp_path / "datasets.json")
+    register_dataset("deals", data_path, manifest_path=path)
+    return path
+
+
+def load_generator():
+    spec = importlib.util.spec_from_file_location(
+        "generate_synthetic_data", os.path.join(PROJECT_ROOT, "src", "generate_synthetic_data.py")
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_generator_registers_a_locked_workbooks_copy_under_its_own_name(manifest_path, tmp_path, monkeypatch):
+    generator = load_generator()
+    output = str(tmp_path / "synthetic.csv")
+    write_frame = generator.write_frame
+
+    def locked(df, path):
+        if path == output:
+            raise PermissionError(path)
+        write_frame(df, path)
+
+    monkeypatch.chdir(PROJECT_ROOT)
+    monkeypatch.setattr(generator, "write_frame", locked)
+    monkeypatch.setattr(generator, "register_dataset",
+                        functools.partial(register_dataset, manifest_path=manifest_path))
+    generator.main(["--rows", "20", "--seed", "1", "--output", output, "--dataset", "synthetic"])
+
+    manifest = load_manifest(manifest_path)
+    assert "synthetic" not in manifest.datasets
+    assert manifest.default.startswith("synthetic_")
+    copy = resolve_dataset(manifest_path=manifest_path)
+    assert copy != output and os.path.basename(copy).startswith("synthetic_")
+
+
+def test_api_trains_on_the_manifest_default(api_module, client, manifest_path, monkeypatch):
+    queued = []
+    monkeypatch.setattr(api_module, "DATASET_MANIFEST_PATH", manifest_path)
+    monkeypatch.setattr(api_module, "enqueue_training_job", queued.append)
+
+    response = client.post("/train-model/jobs", params={"tune": False})
+    assert response.status_code == 202, response.text
+    assert api_module.JOB_STORE.get(queued[0])["input_path"] == resolve_dataset(manifest_path=manifest_path)
+
+
+def test_api_asks_for_data_when_the_default_is_missing(api_module, client, manifest_path, monkeypatch):
+    monkeypatch.setattr(api_module, "DATASET_MANIFEST_PATH", manifest_path)
+    os.remove(resolve_dataset(manifest_path=manifest_path))
+    for route in ("/train-model", "/train-model/jobs"):
+        response = client.post(route, params={"tune": False})
+        assert response.status_code == 400
+        assert "generate data first" in response.json()["detail"]
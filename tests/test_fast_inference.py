@@ -0,0 +1,75 @@
+"""FastPredictor (and the model bundle built from it) against the sklearn pipeline it replaces"""
+import os
+
+import numpy as np
+import pytest
+
+from conftest import TRAINING_DATA_PATH
+from utils.datasets import read_training_frame
+from utils.fast_inference import FastPredictor
+from utils.model_bundle import load_model_bundle
+from utils.training_data import preprocess
+
+# Probabilities are float32 from the same booster; only summation order may differ
+ATOL = 1e-6
+
+
+@pytest.fixture(scope="module")
+def raw_deals():
+    return read_training_frame(TRAINING_DATA_PATH).sample(300, random_state=0).reset_index(drop=True)
+
+
+@pytest.fixture(scope="module", params=["pipeline", "bundle"])
+def predictor(request, pipeline, trained_model):
+    """Compiled from the pickled pipeline, or rebuilt from the UBJSON bundle as serving loads it"""
+    if request.param == "pipeline":
+        return FastPredictor(pipeline)
+    return load_model_bundle(os.path.dirname(trained_model.model_path))[0]
+
+
+def assert_same_predictions(predictor, pipeline, X):
+    np.testing.assert_allclose(predictor.predict_proba(X), pipeline.predict_proba(X), rtol=0, atol=ATOL)
+    np.testing.assert_array_equal(predictor.predict(X), pipeline.predict(X))
+
+
+def test_matches_pipeline(predictor, pipeline, raw_deals, feature_schema):
+    X, *_ = preprocess(raw_deals, feature_schema)
+    assert_same_predictions(predictor, pipeline, X)
+
+
+def test_unseen_categories(predictor, pipeline, raw_deals, feature_schema):
+    X, *_ = preprocess(raw_deals, feature_schema)
+    categorical = [c for c in X.columns if c in feature_schema.categorical_columns]
+    assert categorical
+    # Every other row gets a label the encoder never saw, in every categorical column
+    X.loc[X.index[::2], categorical] = "Not a category seen in training"
+    assert_same_predictions(predictor, pipeline, X)
+
+
+def test_missing_columns(predictor, pipeline, raw_deals, feature_schema):
+    numeric = [c for c in feature_schema.numeric_columns if c not in feature_schema.ordinal_columns]
+    dropped = [feature_schema.categorical_columns[0], numeric[0], feature_schema.ordinal_columns[0]]
+    X, *_ = preprocess(raw_deals.drop(columns=dropped), feature_schema)
+    assert list(X.columns) == feature_schema.columns
+    assert_same_predictions(predictor, pipeline, X)
+
+
+def test_nan_values(predictor, pipeline, raw_deals, feature_schema):
+    X, *_ = preprocess(raw_deals, feature_schema)
+    numeric = [c for c in feature_schema.numeric_columns if c in X.columns]
+    rng = np.random.default_rng(0)
+    # A third of the numeric cells reach the model as NaN (XGBoost's missing value)
+    X[numeric] = X[numeric].mask(rng.random((len(X), len(numeric))) < 1 / 3)
+    X.loc[X.index[::5], feature_schema.categorical_columns[0]] = np.nan
+    assert X[numeric].isna().any().all()
+    assert_same_predictions(predictor, pipeline, X)
+
+
+def test_empty_frame(predictor, pipeline, raw_deals, feature_schema):
+    X, *_ = preprocess(raw_deals, feature_schema)
+    assert predictor.predict_proba(X.iloc[:0]).shape == (0, len(pipeline.named_steps["model"].classes_))
+
+
+def test_single_row(predictor, pipeline, raw_deals, feature_schema):
+    X, *_ = preprocess(raw_deals.iloc[[7]], feature_schema)
+    assert_same_predictions(predictor, pipeline, X)
@@ -0,0 +1,132 @@
+"""Result writers for every output format, format negotiation, and /predict's format parameter"""
+import io
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import PROJECT_ROOT
+from utils.formats import (
+    DEFAULT_OUTPUT_FORMAT, OUTPUT_FORMATS, UnsupportedOutputFormatError, create_writer, media_type_for,
+    output_format_of, read_frame, resolve_output_format, write_frame
+)
+
+
+@pytest.fixture
+def results():
+    """A prediction-result-like frame: text, text mixed with numbers, floats, ints and gaps"""
+    n = 250
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "CRM ID": np.arange(1000, 1000 + n),
+        "Opportunity Name": [f"Deal {i} – café" for i in range(n)],
+        "Deal Coach": np.where(np.arange(n) % 7 == 0, None, "Strong"),
+        "Bid-Team size": [str(i) if i % 3 else f"{i} people" for i in range(n)],
+        "Probability_Won": rng.random(n).round(6),
+        "Predicted Deal Status": rng.choice(["Won", "Lost", "Aborted/Risk"], n),
+    })
+
+
+def path_for(tmp_path, output_format):
+    return str(tmp_path / f"predictions{OUTPUT_FORMATS[output_format].extension}")
+
+
+@pytest.mark.parametrize("output_format", list(OUTPUT_FORMATS))
+def test_round_trip(tmp_path, results, output_format):
+    path = path_for(tmp_path, output_format)
+    # Several chunks, the last one short
+    write_frame(results, path, output_format, chunk_rows=100)
+    assert output_format_of(path) == output_format
+
+    back = read_frame(path)
+    assert list(back.columns) == list(results.columns)
+    assert len(back) == len(results)
+    assert back["CRM ID"].tolist() == results["CRM ID"].tolist()
+    assert back["Opportunity Name"].tolist() == results["Opportunity Name"].tolist()
+    assert back["Predicted Deal Status"].tolist() == results["Predicted Deal Status"].tolist()
+    np.testing.assert_allclose(back["Probability_Won"], results["Probability_Won"], atol=1e-9)
+    assert back["Deal Coach"].isna().sum() == results["Deal Coach"].isna().sum()
+    assert back["Bid-Team size"].astype(str).tolist() == results["Bid-Team size"].tolist()
+
+
+@pytest.mark.parametrize("output_format", ["parquet", "arrow"])
+def test_later_chunks_keep_the_first_chunks_schema(tmp_path, output_format):
+    path = path_for(tmp_path, output_format)
+    writer = create_writer(output_format, path)
+    writer.write(pd.DataFrame({"rows": [1, 2], "note": [None, None], "value": ["a", 3]}))
+    # Missing values turn the integers into floats; the note column only now has text
+    writer.write(pd.DataFrame({"rows": [3, np.nan], "note": ["late", None], "value": [4.5, "b"]}))
+    writer.close()
+
+    back = read_frame(path)
+    assert back["rows"].tolist()[:3] == [1, 2, 3] and pd.isna(back["rows"].iloc[3])
+    assert back["note"].tolist() == [None, None, "late", None]
+    assert back["value"].tolist() == ["a", "3", "4.5", "b"]
+
+
+@pytest.mark.parametrize("output_format", list(OUTPUT_FORMATS))
+def test_empty_result_is_a_valid_file(tmp_path, output_format):
+    path = path_for(tmp_path, output_format)
+    write_frame(pd.DataFrame({"CRM ID": pd.Series([], dtype="int64")}), path, output_format)
+    assert len(read_frame(path)) == 0
+
+
+def test_abort_removes_the_partial_file(tmp_path, results):
+    path = path_for(tmp_path, "csv")
+    writer = create_writer("csv", path)
+    writer.write(results.iloc[:10])
+    writer.abort()
+    assert not os.path.exists(path)
+
+
+@pytest.mark.parametrize("requested, accept, expected", [
+    (None, None, DEFAULT_OUTPUT_FORMAT),
+    ("parquet", None, "parquet"),
+    (".CSV", None, "csv"),
+    ("excel", None, "xlsx"),
+    ("ndjson", None, "jsonl"),
+    ("csv", "application/vnd.apache.parquet", "csv"),
+    (None, "application/vnd.apache.parquet", "parquet"),
+    (None, "application/json, text/csv;q=0.5, application/x-ndjson;q=0.9", "jsonl"),
+    (None, "application/vnd.apache.arrow.stream;q=0.2, text/csv;q=0.1", "arrow"),
+    (None, "*/*", DEFAULT_OUTPUT_FORMAT),
+    (None, "text/csv;q=0", DEFAULT_OUTPUT_FORMAT),
+])
+def test_resolve_output_format(requested, accept, expected):
+    assert resolve_output_format(requested, accept) == expected
+
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(UnsupportedOutputFormatError, match="Supported: xlsx, csv, parquet, arrow, jsonl"):
+        resolve_output_format("pdf")
+    assert media_type_for("predictions.pdf") == "application/octet-stream"
+    assert media_type_for("predictions.parquet") == "application/vnd.apache.parquet"
+
+
+@pytest.mark.parametrize("output_format", ["parquet", "jsonl"])
+def test_predict_returns_the_requested_format(client, output_format):
+    workbook = os.path.join(PROJECT_ROOT, "Input - Test Set 1.xlsx")
+    with open(workbook, "rb") as f:
+        response = client.post("/predict", params={"format": output_format},
+                               files={"file": ("deals.xlsx", f.read())})
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["output_format"] == output_format
+    assert body["predictions_file"].endswith(OUTPUT_FORMATS[output_format].extension)
+
+    download = client.get(f"/download-predictions/{body['predictions_file']}")
+    assert download.status_code == 200
+    assert download.headers["content-type"].startswith(OUTPUT_FORMATS[output_format].media_type)
+    if output_format == "parquet":
+        predictions = pd.read_parquet(io.BytesIO(download.content))
+    else:
+        predictions = pd.read_json(io.BytesIO(download.content), lines=True)
+    assert len(predictions) == len(pd.read_excel(workbook))
+    assert "Predicted Deal Status" in predictions.columns
+
+
+def test_predict_rejects_an_unknown_format(client):
+    with open(os.path.join(PROJECT_ROOT, "Input - Test Set 1.xlsx"), "rb") as f:
+        response = client.post("/predict", params={"format": "pdf"}, files={"file": ("deals.xlsx", f.read())})
+    assert response.status_code == 400
@@ -0,0 +1,124 @@
+"""Background prediction jobs: the persistent job table and the /jobs API"""
+import io
+import os
+import sqlite3
+import time
+
+import pandas as pd
+import pytest
+
+from conftest import PROJECT_ROOT
+from utils.jobs import JOB_FAILED, JOB_QUEUED, JOB_RUNNING, JOB_SUCCEEDED, JobStore
+
+SAMPLE_WORKBOOK = os.path.join(PROJECT_ROOT, "Input - Test Set with Stages and Description.xlsx")
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(str(tmp_path / "jobs.sqlite3"), str(tmp_path / "inputs"))
+
+
+def test_job_lifecycle(store):
+    job = store.create("predict", "in.xlsx", "deals.xlsx", output_format="csv")
+    assert job["status"] == JOB_QUEUED and job["rows_processed"] == 0 and job["attempts"] == 0
+
+    store.start(job["id"])
+    store.update(job["id"], stage="scoring", rows_total=10, rows_processed=4)
+    job = store.get(job["id"])
+    assert (job["status"], job["stage"], job["rows_processed"], job["attempts"]) == (JOB_RUNNING, "scoring", 4, 1)
+    assert job["started_at"] and not job["finished_at"]
+
+    store.finish(job["id"], result_file="predictions_x.csv")
+    job = store.get(job["id"])
+    assert (job["status"], job["stage"], job["result_file"]) == (JOB_SUCCEEDED, "done", "predictions_x.csv")
+    assert job["finished_at"]
+
+    failed = store.create("predict", "in.csv", "other.csv")
+    store.fail(failed["id"], "ValueError: bad file")
+    assert store.get(failed["id"])["status"] == JOB_FAILED
+    assert store.get("no-such-job") is None
+
+
+def test_unknown_fields_are_rejected(store):
+    job = store.create("predict", "in.xlsx", "deals.xlsx")
+    with pytest.raises(ValueError, match="Unknown job fields: colour"):
+        store.update(job["id"], colour="red")
+
+
+def test_unfinished_jobs_survive_a_restart(store, tmp_path):
+    queued = store.create("predict", "a.xlsx", "a.xlsx")
+    running = store.create("predict", "b.xlsx", "b.xlsx")
+    done = store.create("predict", "c.xlsx", "c.xlsx")
+    training = store.create("train", "", "")
+    store.start(running["id"])
+    store.finish(done["id"], result_file="predictions_c.xlsx")
+
+    reopened = JobStore(store.db_path, store.spool_dir)
+    assert reopened.unfinished("predict") == [queued["id"], running["id"]]
+    assert reopened.unfinished() == [queued["id"], running["id"], training["id"]]
+    assert reopened.get(done["id"])["result_file"] == "predictions_c.xlsx"
+
+
+def test_tables_from_before_a_column_existed_are_upgraded(tmp_path):
+    db_path = str(tmp_path / "jobs.sqlite3")
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            "CREATE TABLE jobs (id TEXT PRIMARY KEY, kind TEXT NOT NULL, status TEXT NOT NULL, stage TEXT, "
+            "rows_total INTEGER, rows_processed INTEGER NOT NULL DEFAULT 0, input_path TEXT, input_filename TEXT, "
+            "result_file TEXT, model_version TEXT, warnings TEXT, error TEXT, attempts INTEGER NOT NULL DEFAULT 0, "
+            "created_at TEXT NOT NULL, started_at TEXT, finished_at TEXT)"
+        )
+    store = JobStore(db_path, str(tmp_path / "inputs"))
+    job = store.create("train", "", "", params='{"tune": false}')
+    store.update(job["id"], progress='{"stage": "fit"}', result='{"f1": 0.9}')
+    assert store.get(job["id"])["params"] == '{"tune": false}'
+
+
+def wait_for_job(client, job_id, timeout=60):
+    deadline = time.monotonic() + timeout
+    while True:
+        job = client.get(f"/jobs/{job_id}").json()
+        if job["status"] not in (JOB_QUEUED, JOB_RUNNING) or time.monotonic() > deadline:
+            return job
+        time.sleep(0.05)
+
+
+def submit(client, filename, content, **params):
+    return client.post("/jobs/predict", params=params, files={"file": (filename, content)})
+
+
+def test_prediction_job_end_to_end(client):
+    with open(SAMPLE_WORKBOOK, "rb") as f:
+        response = submit(client, "deals.xlsx", f.read(), format="csv")
+    assert response.status_code == 202, response.text
+    job = response.json()
+    assert job["status"] in (JOB_QUEUED, JOB_RUNNING, JOB_SUCCEEDED)
+
+    job = wait_for_job(client, job["job_id"])
+    expected_rows = len(pd.read_excel(SAMPLE_WORKBOOK))
+    assert job["status"] == JOB_SUCCEEDED, job["error"]
+    assert job["rows_total"] == job["rows_processed"] == expected_rows
+    assert job["output_format"] == "csv" and job["result_url"] == f"/jobs/{job['job_id']}/result"
+
+    result = client.get(job["result_url"])
+    assert result.status_code == 200
+    assert result.headers["content-type"].startswith("text/csv")
+    predictions = pd.read_csv(io.BytesIO(result.content))
+    assert len(predictions) == expected_rows
+    assert {"Predicted Deal Status", "Business Logic Score", "Win Probability"} <= set(predictions.columns)
+
+
+def test_failed_job_reports_its_error(client):
+    response = submit(client, "deals.xlsx", b"this is not a workbook")
+    assert response.status_code == 202, response.text
+    job = wait_for_job(client, response.json()["job_id"])
+    assert job["status"] == JOB_FAILED and job["error"]
+
+    result = client.get(f"/jobs/{job['job_id']}/result")
+    assert result.status_code == 409
+    assert result.json()["detail"].startswith("Job is failed")
+
+
+def test_unknown_job(client):
+    assert client.get("/jobs/does-not-exist").status_code == 404
+    assert client.get("/jobs/does-not-exist/result").status_code == 404
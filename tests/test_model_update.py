@@ -0,0 +1,90 @@
+"""Incremental updates: trees added to the truncated booster, and the F1 gate on promotion"""
+import os
+import shutil
+
+import joblib
+import numpy as np
+import pytest
+
+from conftest import TRAINING_DATA_PATH
+from utils.datasets import read_training_frame
+from utils.model_bundle import BUNDLE_BOOSTER_FILENAME, BUNDLE_SPEC_FILENAME
+from utils.model_store import file_digest
+from utils.model_update import UpdateConfig, update_model
+from utils.training_data import TARGET_COLUMN
+
+ARTIFACTS = ("xgb_classifier.pkl", BUNDLE_BOOSTER_FILENAME, BUNDLE_SPEC_FILENAME)
+
+
+@pytest.fixture
+def models_dir(trained_model, tmp_path):
+    """A copy of the session's model, so a promotion does not change it for other tests"""
+    path = str(tmp_path / "models")
+    shutil.copytree(os.path.dirname(trained_model.model_path), path)
+    return path
+
+
+def new_deals(tmp_path, rows=200, relabel=None):
+    """Deals from the training data as a CSV upload, optionally with their outcomes swapped by ``relabel``"""
+    df = read_training_frame(TRAINING_DATA_PATH).iloc[:rows].copy()
+    if relabel is not None:
+        df[TARGET_COLUMN] = df[TARGET_COLUMN].astype(str).map(relabel).fillna(df[TARGET_COLUMN].astype(str))
+    path = str(tmp_path / "new_deals.csv")
+    df.to_csv(path, index=False)
+    return path
+
+
+def digests(models_dir):
+    return {name: file_digest(os.path.join(models_dir, name)) for name in ARTIFACTS}
+
+
+def test_worse_candidate_leaves_the_model_alone(models_dir, tmp_path):
+    classes = [str(c) for c in joblib.load(os.path.join(models_dir, "label_encoder.pkl")).classes_]
+    # Every outcome swapped for another: boosting hard on these rows wrecks the reference holdout
+    swapped = dict(zip(classes, classes[1:] + classes[:1]))
+    before = digests(models_dir)
+    mtime = os.path.getmtime(os.path.join(models_dir, "xgb_classifier.pkl"))
+
+    result = update_model(UpdateConfig(
+        new_data_path=new_deals(tmp_path, relabel=swapped), models_dir=models_dir, rounds=100, learning_rate=1.0,
+        holdout_size=0.0, reference_data_path=TRAINING_DATA_PATH, feature_cache_dir=None,
+    ))
+
+    assert not result.promoted and result.candidate.f1 < result.current.f1
+    assert "kept the current model" in result.reason
+    assert digests(models_dir) == before
+    assert os.path.getmtime(os.path.join(models_dir, "xgb_classifier.pkl")) == mtime
+
+
+def test_promoted_candidate_rewrites_the_pickle_and_the_bundle(models_dir, tmp_path):
+    model = joblib.load(os.path.join(models_dir, "xgb_classifier.pkl")).named_steps["model"]
+    kept_trees = model.best_iteration + 1
+    before = digests(models_dir)
+
+    result = update_model(UpdateConfig(
+        new_data_path=new_deals(tmp_path), models_dir=models_dir, rounds=10, tolerance=1.0,
+        reference_data_path=TRAINING_DATA_PATH, feature_cache_dir=None,
+    ))
+
+    assert result.promoted
+    # 20% of the new rows are held out, next to the reference holdout
+    assert result.boosted_rows == 160 and result.holdout_rows > 40
+    # Trees past best_iteration are dropped before the new ones are added
+    assert result.trees_after == kept_trees + 10
+    after = digests(models_dir)
+    assert after["xgb_classifier.pkl"] != before["xgb_classifier.pkl"]
+    assert after[BUNDLE_BOOSTER_FILENAME] != before[BUNDLE_BOOSTER_FILENAME]
+    # The encoder is not refit, so the bundle's preprocessing spec is rewritten unchanged
+    assert after[BUNDLE_SPEC_FILENAME] == before[BUNDLE_SPEC_FILENAME]
+    saved = joblib.load(result.model_path).named_steps["model"]
+    assert saved.get_booster().num_boosted_rounds() == result.trees_after
+
+
+def test_update_route_rejects_an_unknown_outcome(api_module, client, tmp_path):
+    before = file_digest(api_module.MODEL_PATH)
+    path = new_deals(tmp_path, rows=40, relabel={"Won": "Postponed"})
+    with open(path, "rb") as f:
+        response = client.post("/train-model/update", files={"file": ("new_deals.csv", f.read())})
+    assert response.status_code == 400
+    assert "Postponed" in response.json()["detail"]
+    assert file_digest(api_module.MODEL_PATH) == before
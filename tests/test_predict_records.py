@@ -0,0 +1,142 @@
+"""/predict/records: inline scoring of JSON deal records, alone and coalesced into micro-batches"""
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import PROJECT_ROOT
+
+
+@pytest.fixture(scope="module")
+def records():
+    """The 16 deals of the checked-in test set as JSON records (NaN becomes null, as a client sends it)"""
+    df = pd.read_excel(os.path.join(PROJECT_ROOT, "Input - Test Set 1.xlsx"))
+    return json.loads(df.to_json(orient="records"))
+
+
+@pytest.fixture(scope="module")
+def requests(records):
+    """Eight two-deal requests, each missing a different field so defaults cannot leak between them"""
+    fields = ["Deal Coach", "References", "Orals Score", "Expected TCV ($Mn)",
+              "Client Relationship", "Bid Timeline", "Price Alignment", "Deal Size bucket"]
+    return [
+        [{k: v for k, v in record.items() if k != field} for record in records[2 * i:2 * i + 2]]
+        for i, field in enumerate(fields)
+    ]
+
+
+def post_records(client, records, **params):
+    return client.post("/predict/records", json=records, params=params)
+
+
+def same_predictions(got, expected):
+    """Per-deal outputs equal, probabilities up to float32 rounding"""
+    assert [p["crm_id"] for p in got] == [p["crm_id"] for p in expected]
+    for a, b in zip(got, expected):
+        assert {k: v for k, v in a.items() if k != "probabilities"} == \
+            {k: v for k, v in b.items() if k != "probabilities"}
+        assert a["probabilities"].keys() == b["probabilities"].keys()
+        np.testing.assert_allclose(list(a["probabilities"].values()), list(b["probabilities"].values()), atol=1e-6)
+
+
+def test_single_record(client, records, trained_model):
+    response = post_records(client, records[:1])
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["success"] and body["total_records"] == 1
+    prediction = body["predictions"][0]
+    assert prediction["record_index"] == 0
+    assert prediction["crm_id"] == str(records[0]["CRM ID"])
+    assert prediction["active"]
+    assert sorted(prediction["probabilities"]) == sorted(trained_model.classes)
+    assert sum(prediction["probabilities"].values()) == pytest.approx(1.0, abs=1e-3)
+    assert prediction["business_logic_status"] in ("Won", "Lost", "Aborted/Risk")
+    assert 0 <= prediction["business_logic_score"] <= 100
+
+
+def test_multiple_records(client, records):
+    response = post_records(client, records)
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["total_records"] == len(records)
+    assert [p["record_index"] for p in body["predictions"]] == list(range(len(records)))
+    assert [p["crm_id"] for p in body["predictions"]] == [str(r["CRM ID"]) for r in records]
+
+    # Scoring a deal alone or among others gives the same result
+    alone = [post_records(client, [record]).json()["predictions"][0] for record in records[:3]]
+    for prediction in alone:
+        prediction["record_index"] = None
+    together = [dict(p, record_index=None) for p in body["predictions"][:3]]
+    same_predictions(together, alone)
+
+
+def test_drivers(client, records):
+    response = post_records(client, records[:2], drivers=3)
+    assert response.status_code == 200, response.text
+    for prediction in response.json()["predictions"]:
+        assert len(prediction["top_drivers"]) == 3
+        assert prediction["explained_class"] in prediction["probabilities"]
+
+
+def test_empty_request_is_rejected(client):
+    response = post_records(client, [])
+    assert response.status_code == 400
+
+
+def test_batch_hands_each_request_its_own_rows(api_module, client, requests):
+    """One run_record_batch call over several requests equals scoring each request alone"""
+    alone = [api_module.run_record_batch([(request, 0)])[0] for request in requests]
+    together = api_module.run_record_batch([(request, 0) for request in requests])
+    assert len(together) == len(requests)
+    for got, expected in zip(together, alone):
+        assert got["total_records"] == expected["total_records"] == 2
+        assert got["warnings"] == expected["warnings"]
+        same_predictions(got["predictions"], expected["predictions"])
+
+
+def test_concurrent_callers_are_not_mixed_up(api_module, client, requests):
+    if api_module.RECORD_BATCHER is None:
+        pytest.skip("micro-batching is off (PREDICT_BATCH_WINDOW_MS=0)")
+    expected = [post_records(client, request).json() for request in requests]
+    with ThreadPoolExecutor(max_workers=len(requests)) as pool:
+        for _ in range(3):
+            responses = list(pool.map(lambda request: post_records(client, request), requests))
+            for response, single in zip(responses, expected):
+                assert response.status_code == 200, response.text
+                assert response.json()["warnings"] == single["warnings"]
+                same_predictions(response.json()["predictions"], single["predictions"])
+
+
+def test_invalid_request_fails_alone(api_module, client, requests):
+    """A request that cannot be framed gets its own error; the rest of its batch is scored"""
+    results = api_module.run_record_batch([(requests[0], 0), ([1, 2], 0), (requests[1], 0)])
+    assert isinstance(results[1], api_module.PredictionInputError)
+    assert results[0]["total_records"] == results[2]["total_records"] == 2
+
+
+def test_failed_batch_reaches_every_caller(api_module, client, requests, monkeypatch):
+    if api_module.RECORD_BATCHER is None:
+        pytest.skip("micro-batching is off (PREDICT_BATCH_WINDOW_MS=0)")
+
+    def broken_batch(batch):
+        raise RuntimeError("booster unavailable")
+
+    monkeypatch.setattr(api_module.RECORD_BATCHER, "process_batch", broken_batch)
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        responses = list(pool.map(lambda request: post_records(client, request), requests[:4]))
+    for response in responses:
+        assert response.status_code == 500
+        assert "booster unavailable" in response.json()["detail"]
+
+    # A rejected request maps to 400 for its own caller only
+    def reject_first(batch):
+        return [api_module.PredictionInputError("Invalid records: bad deal")] + \
+            api_module.run_record_batch(batch[1:])
+
+    monkeypatch.setattr(api_module.RECORD_BATCHER, "process_batch", reject_first)
+    response = post_records(client, requests[0])
+    assert response.status_code == 400
+    assert "bad deal" in response.json()["detail"]
@@ -0,0 +1,111 @@
+"""PredictionCache: only uncached rows reach the model, per model version, within its memory budget"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.prediction_cache import PredictionCache, row_keys
+
+
+class CountingModel:
+    """predict_proba stand-in that records which rows it was asked for"""
+
+    def __init__(self, offset: float = 0.0):
+        self.offset = offset
+        self.calls = []
+
+    def __call__(self, X: pd.DataFrame) -> np.ndarray:
+        self.calls.append(X["deal"].tolist())
+        p = (X["deal"].to_numpy(dtype=np.float64) % 10) / 10 + self.offset
+        return np.column_stack([p, 1 - p])
+
+
+def deals(ids, coach="Strong"):
+    return pd.DataFrame({"deal": ids, "coach": coach, "tcv": [i * 1.5 for i in ids]})
+
+
+def test_only_misses_reach_the_model():
+    cache, model = PredictionCache(max_bytes=1_000_000), CountingModel()
+    first = cache.predict_proba(deals([1, 2, 3]), "v1", model)
+    second = cache.predict_proba(deals([3, 4, 1, 1]), "v1", model)
+
+    assert model.calls == [[1, 2, 3], [4]]
+    np.testing.assert_allclose(first, model(deals([1, 2, 3])), atol=1e-7)
+    np.testing.assert_allclose(second, model(deals([3, 4, 1, 1])), atol=1e-7)
+    assert second.dtype == np.float32
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (3, 4, 4)
+
+
+def test_rows_are_keyed_by_values_not_index():
+    X = deals([1, 2, 3])
+    assert row_keys(X) == row_keys(X.set_axis([10, 11, 12]))
+    assert row_keys(X)[0] != row_keys(deals([1], coach="Weak"))[0]
+    assert len(set(row_keys(deals(list(range(1000)))))) == 1000
+
+
+def test_duplicate_rows_are_predicted_once():
+    cache, model = PredictionCache(max_bytes=1_000_000), CountingModel()
+    probs = cache.predict_proba(deals([5, 5, 6, 5]), "v1", model)
+    assert model.calls == [[5, 6]]
+    np.testing.assert_array_equal(probs[0], probs[3])
+
+
+def test_a_new_model_version_recomputes():
+    cache = PredictionCache(max_bytes=1_000_000)
+    old, new = CountingModel(), CountingModel(offset=0.05)
+    cache.predict_proba(deals([1, 2]), "v1", old)
+    probs = cache.predict_proba(deals([1, 2]), "v2", new)
+    assert new.calls == [[1, 2]]
+    np.testing.assert_allclose(probs, new(deals([1, 2])), atol=1e-7)
+    assert cache.stats()["entries"] == 2
+
+
+def test_memory_budget_evicts_least_recently_used():
+    probe = PredictionCache(max_bytes=10**9)
+    probe.predict_proba(deals([0]), "v1", CountingModel())
+    entry_bytes = probe.stats()["bytes"]
+
+    cache, model = PredictionCache(max_bytes=3 * entry_bytes), CountingModel()
+    cache.predict_proba(deals([1, 2, 3]), "v1", model)
+    cache.predict_proba(deals([1]), "v1", model)  # 1 is now the most recently used
+    cache.predict_proba(deals([4]), "v1", model)  # Evicts 2
+    model.calls.clear()
+    cache.predict_proba(deals([1, 3, 4, 2]), "v1", model)
+
+    assert model.calls == [[2]]
+    stats = cache.stats()
+    assert stats["bytes"] <= stats["max_bytes"] and stats["entries"] == 3
+    assert stats["evictions"] == 2
+
+
+def test_disk_store_survives_a_restart(tmp_path):
+    db_path = str(tmp_path / "predictions.sqlite3")
+    model = CountingModel()
+    PredictionCache(max_bytes=1_000_000, db_path=db_path).predict_proba(deals([1, 2]), "v1", model)
+
+    restarted = PredictionCache(max_bytes=1_000_000, db_path=db_path)
+    probs = restarted.predict_proba(deals([2, 1, 7]), "v1", model)
+    assert model.calls == [[1, 2], [7]]
+    np.testing.assert_allclose(probs, model(deals([2, 1, 7])), atol=1e-7)
+    assert restarted.stats()["disk_hits"] == 2
+
+    # Writing for a new version drops the old version's rows from the file
+    restarted.predict_proba(deals([1]), "v2", model)
+    model.calls.clear()
+    PredictionCache(max_bytes=1_000_000, db_path=db_path).predict_proba(deals([2]), "v1", model)
+    assert model.calls == [[2]]
+
+
+def test_repeated_upload_is_served_from_the_cache(api_module, client):
+    if api_module.PREDICTION_CACHE is None:
+        pytest.skip("prediction cache is off (PREDICTION_CACHE_MB=0)")
+    records = [{"CRM ID": 900001 + i, "Deal Coach": coach, "Orals Score": "Strong"}
+               for i, coach in enumerate(["Strong", "Weak", "Moderate"])]
+    first = client.post("/predict/records", json=records).json()
+    before = api_module.PREDICTION_CACHE.stats()
+    again = client.post("/predict/records", json=records).json()
+    after = api_module.PREDICTION_CACHE.stats()
+
+    assert after["misses"] == before["misses"]
+    assert after["hits"] - before["hits"] == len(records)
+    assert [p["probabilities"] for p in again["predictions"]] == [p["probabilities"] for p in first["predictions"]]
@@ -0,0 +1,67 @@
+"""The vectorized rubric against the row-wise scorer the API and UI used before it"""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import INPUT_WORKBOOKS
+from utils.rubric import RUBRIC, logic_status, score_block, win_probability_category
+
+
+# The previous implementation, as it was in api.py and app.py
+def calculate_business_score(row):
+    score = 0
+    score += {5: 10, 3: 5, 2: 2, 0: 0}.get(row.get("Account Engagement", 0), 0)
+    score += {5: 10, 3: 5, 2: 2, 0: 0}.get(row.get("Client Relationship", 0), 0)
+    score += {5: 10, 3: 5, 2: 2, 0: 0}.get(row.get("Deal Coach", 0), 0)
+    score += {5: 15, 3: 5, 2: 2, 0: 0}.get(row.get("Bidder Rank", 0), 0)
+    score += {5: 10, 3: 5, 2: 2, 0: 0}.get(row.get("Incumbency Share", 0), 0)
+    score += {5: 7, 3: 3, 2: 1, 0: 0}.get(row.get("References", 0), 0)
+    score += {5: 7, 3: 3, 2: 1, 0: 0}.get(row.get("Solution Strength", 0), 0)
+    score += {5: 6, 3: 3, 2: 1, 0: 0}.get(row.get("Client Impression", 0), 0)
+    score += {5: 15, 3: 8, 2: 4, 0: 0}.get(row.get("Orals Score", 0), 0)
+    score += {5: 5, 3: 3, 2: 2, 0: 0}.get(row.get("Price Alignment", 0), 0)
+    score += {5: 5, 3: 2, 0: 0}.get(row.get("Price Position", 0), 0)
+    return score
+
+
+def get_logic_status(score):
+    if score >= 60: return "Won"
+    if score <= 40: return "Lost"
+    return "Aborted/Risk"
+
+
+def get_prob_category(p):
+    pct = round(p * 100)
+    if pct > 80: return "Very High"
+    elif pct >= 61: return "High"
+    elif pct >= 41: return "Medium"
+    else: return "Low"
+
+
+def assert_same_scores(X):
+    legacy = X.apply(calculate_business_score, axis=1).to_numpy()
+    scores = score_block(X)
+    np.testing.assert_array_equal(scores.total, legacy)
+    assert scores.status.tolist() == [get_logic_status(s) for s in legacy]
+    assert win_probability_category(scores.total).tolist() == [get_prob_category(s / 100.0) for s in legacy]
+    np.testing.assert_array_equal(logic_status(legacy), scores.status)
+
+
+@pytest.mark.parametrize("path", INPUT_WORKBOOKS, ids=os.path.basename)
+def test_input_workbooks(path, api_module, feature_schema):
+    """Each checked-in input workbook, prepared exactly as /predict prepares it"""
+    raw_df = api_module.standardize_columns(pd.read_excel(path))
+    X = api_module.prepare_features(raw_df, feature_schema)
+    assert any(factor.name in X.columns for factor in RUBRIC)
+    assert_same_scores(X)
+
+
+def test_every_code_and_missing_factors():
+    """Codes off the points tables, and factors absent from the frame, earn nothing in both"""
+    rng = np.random.default_rng(0)
+    codes = np.array([0.0, 1.0, 2.0, 3.0, 4.0, 5.0, 2.5])
+    X = pd.DataFrame(rng.choice(codes, size=(2_000, len(RUBRIC))), columns=[f.name for f in RUBRIC])
+    assert_same_scores(X)
+    assert_same_scores(X.drop(columns=["Bidder Rank", "Price Position"]))
@@ -0,0 +1,100 @@
+"""Training cache hits: restoring a stored run, and keeping a model promoted since"""
+import json
+import os
+import time
+from dataclasses import replace
+
+import joblib
+import pytest
+
+from conftest import TRAINING_DATA_PATH
+from utils.model_store import file_digest
+from utils.training import TrainingConfig, train
+from utils.training_cache import read_meta, write_entry
+
+
+@pytest.fixture
+def config(tmp_path):
+    return TrainingConfig(
+        data_path=TRAINING_DATA_PATH,
+        models_dir=str(tmp_path / "models"),
+        output_dir=str(tmp_path / "output"),
+        tune=False,
+        cv_folds=0,
+        shap_summary=False,
+        feature_cache_dir=str(tmp_path / "features"),
+        training_cache_dir=str(tmp_path / "training"),
+    )
+
+
+def model_digest(config):
+    return file_digest(os.path.join(config.models_dir, "xgb_classifier.pkl"))
+
+
+def stored_entry(config, key):
+    entry_dir = os.path.join(config.training_cache_dir, key)
+    with open(os.path.join(entry_dir, "meta.json"), encoding="utf-8") as f:
+        meta = json.load(f)
+    with open(os.path.join(entry_dir, "result.json"), encoding="utf-8") as f:
+        return meta, json.load(f)
+
+
+def test_hit_restores_the_stored_run(config):
+    first = train(config)
+    trained = model_digest(config)
+    other = train(replace(config, random_state=7))
+    assert not other.training_cache_hit and model_digest(config) != trained
+
+    again = train(config)
+    assert again.training_cache_hit and again.final == first.final
+    assert model_digest(config) == trained
+
+    os.remove(first.model_path)
+    train(config)
+    assert model_digest(config) == trained
+
+
+def test_hit_keeps_a_promoted_model(config):
+    first = train(config)
+    # What /train-model/update does when it promotes: a newer pickle no training run wrote
+    time.sleep(0.01)
+    pipeline = joblib.load(first.model_path)
+    pipeline.named_steps["model"].set_params(n_jobs=1)
+    joblib.dump(pipeline, first.model_path)
+    promoted = model_digest(config)
+
+    again = train(config)
+    assert again.training_cache_hit and again.final == first.final
+    assert model_digest(config) == promoted
+
+    # Asking for a fresh run still replaces it, and the stored run with it
+    old_meta, old_result = stored_entry(config, first.training_cache_key)
+    fresh = train(replace(config, reuse_cached_run=False))
+    assert not fresh.training_cache_hit and model_digest(config) != promoted
+    meta, result = stored_entry(config, fresh.training_cache_key)
+    # Training is deterministic, so the same model comes out; the entry is still the fresh run's
+    assert meta["model_digest"] == model_digest(config) == old_meta["model_digest"]
+    assert result["timings"] == fresh.timings != old_result["timings"]
+
+    # The next hit restores the fresh run rather than keeping its model as a promoted one
+    again = train(config)
+    assert again.training_cache_hit and again.final == fresh.final
+    assert model_digest(config) == meta["model_digest"]
+
+
+def test_replacing_an_entry(tmp_path):
+    cache_dir = str(tmp_path / "training")
+    artifact = tmp_path / "xgb_classifier.pkl"
+    artifact.write_bytes(b"first")
+    write_entry(cache_dir, "k", [str(artifact)], {"run": 1}, {"model_digest": "a"})
+
+    # Another writer of the same key is turned away, and the stored run stays
+    artifact.write_bytes(b"second")
+    with pytest.raises(FileExistsError):
+        write_entry(cache_dir, "k", [str(artifact)], {"run": 2}, {"model_digest": "b"})
+    assert read_meta(os.path.join(cache_dir, "k"))["model_digest"] == "a"
+
+    entry_dir = write_entry(cache_dir, "k", [str(artifact)], {"run": 2}, {"model_digest": "b"}, replace=True)
+    assert read_meta(entry_dir)["model_digest"] == "b"
+    assert (tmp_path / "training" / "k" / "xgb_classifier.pkl").read_bytes() == b"second"
+    assert os.listdir(cache_dir) == ["k"]
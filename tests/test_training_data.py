@@ -0,0 +1,61 @@
+"""Cached training matrix and the encoder fitted on the training split"""
+import joblib
+import numpy as np
+import pytest
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import LabelEncoder
+
+from conftest import TRAINING_DATA_PATH
+from utils.datasets import read_training_frame
+from utils.training import TrainingConfig, train
+from utils.training_data import TARGET_COLUMN, load_training_data
+
+HOLDOUT_ONLY = "Holdout-only SBU"
+
+
+@pytest.fixture(scope="module")
+def holdout_category_csv(tmp_path_factory):
+    """The training data as CSV, with an SBU that only occurs in rows train() holds out"""
+    df = read_training_frame(TRAINING_DATA_PATH)
+    y = LabelEncoder().fit_transform(df[TARGET_COLUMN].astype(str))
+    defaults = TrainingConfig()
+    _, test_idx = train_test_split(np.arange(len(y)), test_size=defaults.test_size, stratify=y,
+                                   random_state=defaults.random_state)
+    df["SBU"] = df["SBU"].astype(object)
+    df.loc[df.index[test_idx[:15]], "SBU"] = HOLDOUT_ONLY
+    path = tmp_path_factory.mktemp("data") / "holdout_category.csv"
+    df.to_csv(path, index=False)
+    return str(path), test_idx
+
+
+def test_cache_hit_returns_the_same_data(tmp_path):
+    cache_dir = str(tmp_path / "features")
+    fresh = load_training_data(TRAINING_DATA_PATH, cache_dir)
+    cached = load_training_data(TRAINING_DATA_PATH, cache_dir)
+    assert not fresh.cache_hit and cached.cache_hit
+    np.testing.assert_array_equal(cached.matrix, fresh.matrix)
+    assert cached.X.equals(fresh.X) and cached.target.equals(fresh.target)
+
+
+def test_fit_encoder_drops_categories_outside_its_rows(holdout_category_csv):
+    path, test_idx = holdout_category_csv
+    data = load_training_data(path, cache_dir=None)
+    train_rows = np.setdiff1d(np.arange(len(data.X)), test_idx)
+    prep, columns = data.fit_encoder(train_rows)
+
+    sbu = data.categorical_columns.index("SBU")
+    assert HOLDOUT_ONLY in data.prep.named_transformers_["onehot"].categories_[sbu]
+    assert HOLDOUT_ONLY not in prep.named_transformers_["onehot"].categories_[sbu]
+    assert len(columns) == data.matrix.shape[1] - 1
+    # Holdout rows with the new SBU encode as all zeros in its block, as a train-fitted pipeline would
+    np.testing.assert_allclose(np.asarray(prep.transform(data.X), dtype=np.float32), data.matrix[:, columns],
+                               equal_nan=True)
+
+
+def test_saved_encoder_only_knows_training_categories(holdout_category_csv, tmp_path):
+    path, _ = holdout_category_csv
+    result = train(TrainingConfig(data_path=path, models_dir=str(tmp_path), output_dir=str(tmp_path), tune=False,
+                                  cv_folds=0, shap_summary=False, feature_cache_dir=None, training_cache_dir=None))
+    onehot = joblib.load(result.model_path).named_steps["prep"].named_transformers_["onehot"]
+    categories = dict(zip(onehot.feature_names_in_, onehot.categories_))
+    assert HOLDOUT_ONLY not in categories["SBU"]
@@ -0,0 +1,66 @@
+"""External-memory scan: column roles from the declared types, vocabularies from the training rows only"""
+import numpy as np
+import pytest
+
+from conftest import TRAINING_DATA_PATH
+from utils.datasets import read_training_frame
+from utils.training_data import load_training_data
+from utils.training_shards import ShardIterator, holdout_rows, list_shards, scan_shards
+
+BATCH_ROWS = 200
+HOLDOUT_SIZE = 0.2
+HOLDOUT_ONLY = "Holdout-only SBU"
+
+
+@pytest.fixture(scope="module")
+def shard_dir(tmp_path_factory):
+    """The training data as two CSV shards; an SBU only held-out rows have, and a first batch with a stray text"""
+    df = read_training_frame(TRAINING_DATA_PATH).astype({"SBU": object, "Deal Scope": object})
+    df.loc[df.index[:BATCH_ROWS], "Deal Scope"] = "n/a"
+    shards = np.array_split(np.arange(len(df)), 2)
+    path = tmp_path_factory.mktemp("shards")
+    number = 0
+    for i, rows in enumerate(shards):
+        shard = df.iloc[rows].copy()
+        # Batches are numbered across shards, as ShardIterator numbers them
+        for start in range(0, len(shard), BATCH_ROWS):
+            held_out = holdout_rows(min(BATCH_ROWS, len(shard) - start), number, HOLDOUT_SIZE, 42)
+            shard.iloc[start + np.flatnonzero(held_out)[:3], shard.columns.get_loc("SBU")] = HOLDOUT_ONLY
+            number += 1
+        shard.to_csv(path / f"part-{i}.csv", index=False)
+    return str(path)
+
+
+def rows_fed(iterator):
+    labels = []
+    iterator.reset()
+    while iterator.next(lambda data, label: labels.append(label)):
+        pass
+    return sum(len(batch) for batch in labels)
+
+
+def sbu_vocabulary(scan):
+    onehot = scan.prep.named_transformers_["onehot"]
+    return dict(zip(onehot.feature_names_in_, onehot.categories_))["SBU"]
+
+
+def test_vocabulary_comes_from_the_training_rows(shard_dir):
+    paths = list_shards(shard_dir)
+    scan = scan_shards(paths, BATCH_ROWS, holdout_size=HOLDOUT_SIZE)
+    assert HOLDOUT_ONLY not in sbu_vocabulary(scan)
+    assert HOLDOUT_ONLY not in scan.schema.categories["SBU"]
+    assert HOLDOUT_ONLY in sbu_vocabulary(scan_shards(paths, BATCH_ROWS, holdout_size=0.0))
+
+    # Every labeled row is fed to exactly one part
+    held_out = rows_fed(ShardIterator(scan, "holdout", HOLDOUT_SIZE, BATCH_ROWS))
+    assert 0 < held_out < scan.rows
+    assert held_out + rows_fed(ShardIterator(scan, "train", HOLDOUT_SIZE, BATCH_ROWS)) == scan.rows
+
+
+def test_column_roles_follow_the_declared_types(shard_dir):
+    scan = scan_shards(list_shards(shard_dir), BATCH_ROWS, holdout_size=HOLDOUT_SIZE)
+    in_memory = load_training_data(TRAINING_DATA_PATH, cache_dir=None)
+    # "Deal Scope" holds only text in the first batch; it stays numeric
+    assert scan.schema.numeric_columns == in_memory.numeric_columns
+    assert scan.schema.categorical_columns == in_memory.categorical_columns
+    assert scan.schema.columns == list(in_memory.X.columns)
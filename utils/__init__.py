@@ -1,9 +1,5 @@
 # Utils package
 from .helpers import (
-    load_excel_file,
-    save_to_json,
-    load_from_json,
-    ensure_directory_exists,
     print_section_header,
     print_subsection_header,
     print_success,
@@ -13,10 +9,6 @@ from .helpers import (
 )
 
 __all__ = [
-    'load_excel_file',
-    'save_to_json',
-    'load_from_json',
-    'ensure_directory_exists',
     'print_section_header',
     'print_subsection_header',
     'print_success',
@@ -0,0 +1,124 @@
+"""
+Request coalescing for small prediction calls
+
+When many clients score one or two deals each, most of the cost per request is
+fixed overhead (building the feature frame, the ColumnTransformer pass and the
+``predict_proba`` call). ``MicroBatcher`` collects the requests that arrive
+within a short window, hands them to a batch function as one list, and gives
+every caller back its own result. The window and the maximum batch size bound
+how much latency batching can add.
+"""
+import asyncio
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from .worker_pool import WorkerPool
+
+
+class MicroBatcher:
+    """
+    Coalesce concurrent submissions into one call of ``process_batch``
+
+    A request that finds the batcher idle is sent immediately. While a batch is
+    running, new requests wait up to ``max_wait_ms`` (or until
+    ``max_batch_size`` rows are pending) and are then sent together.
+
+    ``process_batch`` receives the submitted items as a list and must return a
+    list of the same length, in the same order. An element may be an
+    ``Exception`` instance; it is raised to that caller only, so one bad
+    request does not fail the others in its batch.
+
+    Args:
+        name: Label used in metrics
+        process_batch: Blocking function run in ``pool`` once per batch
+        pool: Worker pool the batch function runs in (keeps its backpressure)
+        max_wait_ms: Longest time the first item of a batch waits for company
+        max_batch_size: Flush as soon as the pending items reach this size
+        size_of: Size of one item (defaults to ``len``, i.e. number of rows)
+    """
+
+    def __init__(self, name: str, process_batch: Callable[[List[Any]], List[Any]], pool: WorkerPool,
+                 max_wait_ms: float = 3.0, max_batch_size: int = 256,
+                 size_of: Callable[[Any], int] = len):
+        self.name = name
+        self.process_batch = process_batch
+        self.pool = pool
+        self.max_wait_ms = max(0.0, float(max_wait_ms))
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.size_of = size_of
+        self._pending = []
+        self._pending_size = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._running = 0
+        self._lock = threading.Lock()
+        self._batch_sizes = deque(maxlen=1000)
+        self.counters = {"batches": 0, "items": 0, "rows": 0, "failed_batches": 0}
+
+    async def submit(self, item: Any) -> Any:
+        """Queue ``item`` for the next batch and wait for its result"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        self._pending_size += self.size_of(item)
+
+        # Nothing to wait behind when idle; under load, requests queue up
+        # while the previous batch runs and go out together.
+        if self._running == 0 or self._pending_size >= self.max_batch_size or self.max_wait_ms == 0:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_ms / 1000, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending, self._pending_size = self._pending, [], 0
+        self._running += 1
+        asyncio.get_running_loop().create_task(self._run_batch(batch))
+
+    async def _run_batch(self, batch: list):
+        items = [item for item, _ in batch]
+        with self._lock:
+            self.counters["batches"] += 1
+            self.counters["items"] += len(items)
+            self.counters["rows"] += sum(self.size_of(item) for item in items)
+            self._batch_sizes.append(len(items))
+        try:
+            results = await self.pool.run(self.process_batch, items)
+        except Exception as e:
+            with self._lock:
+                self.counters["failed_batches"] += 1
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self._running -= 1
+
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                # Caller went away (client disconnected or request cancelled)
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        """Configuration and batch-size statistics"""
+        with self._lock:
+            sizes = list(self._batch_sizes)
+            return {
+                "max_wait_ms": self.max_wait_ms,
+                "max_batch_size": self.max_batch_size,
+                "pending": len(self._pending),
+                **self.counters,
+                "requests_per_batch_mean": round(float(np.mean(sizes)), 2) if sizes else None,
+                "requests_per_batch_max": max(sizes) if sizes else None,
+            }
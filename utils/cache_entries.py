@@ -0,0 +1,68 @@
+"""
+Folders of an on-disk cache: one per key, written atomically, least recently used pruned
+
+Shared by the feature cache (``utils/training_data.py``) and the training
+run cache (``utils/training_cache.py``). An entry is written into
+``<entry>.tmp-<pid>`` and renamed into place, so readers never see half an
+entry; an entry being replaced is moved aside first. Readers ``os.utime``
+the entries they use so pruning keeps them.
+"""
+import os
+import shutil
+from contextlib import contextmanager
+from typing import Iterator, List
+
+
+@contextmanager
+def writing_entry(entry_dir: str, replace: bool = False) -> Iterator[str]:
+    """
+    Yield an empty temporary folder and rename it to ``entry_dir`` once the block finishes
+
+    If the block raises, the temporary folder is removed. With ``replace``
+    an existing entry is moved aside and swapped for ours; callers pass it
+    when they rebuilt an entry they found unusable or were told to refresh.
+    Otherwise the first writer wins: when another process renamed its entry
+    into place while we were writing, ours is discarded and
+    ``FileExistsError`` is raised.
+    """
+    tmp_dir = f"{entry_dir}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    try:
+        yield tmp_dir
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    old_dir = f"{entry_dir}.tmp-old-{os.getpid()}"
+    try:
+        if replace and os.path.isdir(entry_dir):
+            shutil.rmtree(old_dir, ignore_errors=True)
+            os.replace(entry_dir, old_dir)
+        os.replace(tmp_dir, entry_dir)
+    except OSError:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        if os.path.isdir(old_dir) and not os.path.exists(entry_dir):
+            os.replace(old_dir, entry_dir)
+        if os.path.isdir(entry_dir):
+            raise FileExistsError(f"Kept the entry another writer stored first: {entry_dir}") from None
+        raise
+    finally:
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def list_entries(cache_dir: str) -> List[str]:
+    """Complete entry folders under ``cache_dir``, most recently used first"""
+    if not os.path.isdir(cache_dir):
+        return []
+    entries = [
+        os.path.join(cache_dir, name) for name in os.listdir(cache_dir)
+        if os.path.isdir(os.path.join(cache_dir, name)) and ".tmp-" not in name
+    ]
+    entries.sort(key=os.path.getmtime, reverse=True)
+    return entries
+
+
+def prune_entries(cache_dir: str, keep: int) -> None:
+    """Remove all but the ``keep`` most recently used entries"""
+    for stale in list_entries(cache_dir)[keep:]:
+        shutil.rmtree(stale, ignore_errors=True)
@@ -0,0 +1,312 @@
+"""
+Training datasets: a manifest that names them, and a projected, typed reader
+
+Training used to list ``data/output``, take the newest
+``synthetic_data*.xlsx`` by modification time and ``pd.read_excel`` every
+column of it, including the long ``Detailed Remarks`` text and the L1/L2
+explanations that preprocessing drops again. Now:
+
+- ``data/datasets.json`` names the datasets and marks one as the default.
+  Paths are relative to the manifest's folder. ``resolve_dataset`` turns a
+  name (or the default) into a path, so the input of a run no longer
+  depends on which file was touched last. The training script, the API and
+  the Streamlit app all train on the default. When the generator cannot
+  overwrite a file that is open in Excel, it writes a timestamped copy and
+  registers that under its own name as the new default: it holds the data
+  just generated.
+- ``read_training_frame`` reads .parquet, .csv or .xlsx. It keeps only the
+  columns of ``TRAINING_COLUMN_TYPES`` (the features and the target, in
+  that order) and gives each one its declared type. Parquet reads only those
+  columns, CSV parses only those columns, and .xlsx rows are streamed with
+  openpyxl and only the wanted cells kept. Text columns are held as
+  ``category``, which stores each distinct value once.
+
+Declared types do not depend on the file: a numeric column that is empty in
+one file is still numeric, and a stray string in it becomes missing instead
+of turning the whole column into a categorical feature. Columns that are not
+declared are ignored, and declared columns a file lacks are left out
+(``preprocess`` fills them in when given a schema).
+"""
+import json
+import operator
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .ingest import detect_format
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATASET_MANIFEST_PATH = os.path.join(PROJECT_ROOT, "data", "datasets.json")
+MANIFEST_FORMAT_VERSION = 1
+
+# Formats read whole into memory for training (.xls has no projected reader)
+DATASET_FORMATS = ("parquet", "csv", "xlsx")
+
+# Every column training reads, in feature order, with its type:
+# "text" (categorical), "number" (float64) or "integer" (int64, float64 if a value is missing)
+TRAINING_COLUMN_TYPES: Dict[str, str] = {
+    "SBU": "text",
+    "Qtr of closure": "text",
+    "Deal Status": "text",
+    "Expected TCV ($Mn)": "number",
+    "Deal Size bucket": "text",
+    "Type of Business": "text",
+    "Current RFP Stage": "text",
+    "Account Engagement": "text",
+    "Client Relationship": "text",
+    "Deal Coach": "text",
+    "Bidder Rank": "text",
+    "Incumbency Share": "text",
+    "References": "text",
+    "Solution Strength": "text",
+    "Client Impression": "text",
+    "Orals Score": "text",
+    "Price Alignment": "text",
+    "Price Position": "text",
+    "Bid Qualification (BQ)  Score": "number",
+    "Winnability/ BQ  Feedback": "number",
+    "SBU Head Involved": "number",
+    "SL Heads Involved": "number",
+    "Were we the lowest price? Y/N": "text",
+    "Bid Timeline": "text",
+    "Bid-Team size": "integer",
+    "Deal Scope": "number",
+    "DD": "number",
+    "EA": "number",
+    "Client Partner/ Opp. Owner": "number",
+    "BM": "number",
+}
+
+# The dtype each type is recorded with in the feature schema, as read_excel inferred it
+SCHEMA_DTYPES = {"text": "object", "number": "float64", "integer": "int64"}
+
+
+@dataclass
+class Dataset:
+    """One manifest entry; ``path`` is absolute"""
+    name: str
+    path: str
+    description: str = ""
+    added_at: str = ""
+
+
+@dataclass
+class DatasetManifest:
+    """The named training datasets and which one training uses by default"""
+    path: str
+    default: Optional[str] = None
+    datasets: Dict[str, Dataset] = field(default_factory=dict)
+
+    def get(self, name: Optional[str] = None) -> Dataset:
+        """Dataset ``name``, or the default one when ``name`` is None"""
+        name = name or self.default
+        if name is None:
+            raise KeyError(f"No default dataset in {self.path}")
+        if name not in self.datasets:
+            known = ", ".join(sorted(self.datasets)) or "none"
+            raise KeyError(f"Unknown dataset '{name}' in {self.path} (known: {known})")
+        return self.datasets[name]
+
+    def to_dict(self) -> dict:
+        base = os.path.dirname(self.path)
+        return {
+            "format_version": MANIFEST_FORMAT_VERSION,
+            "default": self.default,
+            "datasets": {
+                name: {
+                    "path": os.path.relpath(d.path, base).replace(os.sep, "/"),
+                    "description": d.description,
+                    "added_at": d.added_at,
+                }
+                for name, d in self.datasets.items()
+            },
+        }
+
+
+def load_manifest(manifest_path: str = DATASET_MANIFEST_PATH) -> DatasetManifest:
+    """
+    Read the dataset manifest
+
+    Raises:
+        FileNotFoundError: The manifest does not exist
+        ValueError: The manifest was written by a newer format
+    """
+    if not os.path.exists(manifest_path):
+        raise FileNotFoundError(f"Dataset manifest not found at {manifest_path}")
+    with open(manifest_path, encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("format_version", 0) > MANIFEST_FORMAT_VERSION:
+        raise ValueError(f"Dataset manifest format {data['format_version']} is newer than this code supports")
+    base = os.path.dirname(os.path.abspath(manifest_path))
+    datasets = {
+        name: Dataset(
+            name=name,
+            path=os.path.normpath(os.path.join(base, entry["path"])),
+            description=entry.get("description", ""),
+            added_at=entry.get("added_at", ""),
+        )
+        for name, entry in data.get("datasets", {}).items()
+    }
+    return DatasetManifest(path=os.path.abspath(manifest_path), default=data.get("default"), datasets=datasets)
+
+
+def save_manifest(manifest: DatasetManifest) -> None:
+    """Write the manifest atomically"""
+    tmp_path = f"{manifest.path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest.to_dict(), f, indent=2)
+    os.replace(tmp_path, manifest.path)
+
+
+def resolve_dataset(name: Optional[str] = None, manifest_path: str = DATASET_MANIFEST_PATH) -> str:
+    """
+    Path of dataset ``name`` (None: the manifest's default)
+
+    Raises:
+        FileNotFoundError: The manifest or the dataset's file does not exist
+        KeyError: The manifest has no such dataset, or no default
+    """
+    dataset = load_manifest(manifest_path).get(name)
+    if not os.path.exists(dataset.path):
+        raise FileNotFoundError(f"Dataset '{dataset.name}' not found at {dataset.path}")
+    return dataset.path
+
+
+def register_dataset(name: str, path: str, description: str = "", make_default: bool = False,
+                     manifest_path: str = DATASET_MANIFEST_PATH) -> Dataset:
+    """
+    Add or replace manifest entry ``name``; creates the manifest if needed
+
+    The manifest is only rewritten when the entry's path or description or
+    the default changes, so re-registering the same file (every generator
+    run) leaves it untouched. An entry that keeps its path keeps its
+    ``added_at``.
+    """
+    if os.path.exists(manifest_path):
+        manifest = load_manifest(manifest_path)
+    else:
+        manifest = DatasetManifest(path=os.path.abspath(manifest_path))
+    path = os.path.abspath(path)
+    existing = manifest.datasets.get(name)
+    same_path = existing is not None and existing.path == path
+    default = name if make_default or manifest.default is None else manifest.default
+    if same_path and existing.description == description and default == manifest.default \
+            and os.path.exists(manifest.path):
+        return existing
+
+    added_at = existing.added_at if same_path and existing.added_at else time.strftime("%Y-%m-%dT%H:%M:%S")
+    dataset = Dataset(name=name, path=path, description=description, added_at=added_at)
+    manifest.datasets[name] = dataset
+    manifest.default = default
+    save_manifest(manifest)
+    return dataset
+
+
+def read_training_frame(path: str, column_types: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+    """
+    The declared columns of a .parquet/.csv/.xlsx file, in declared order and with declared types
+
+    Args:
+        path: Data file
+        column_types: Columns to keep and their types; None uses ``TRAINING_COLUMN_TYPES``
+
+    Raises:
+        FileNotFoundError: ``path`` does not exist
+        UnsupportedFormatError: ``path`` is not a .parquet, .csv or .xlsx file
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Training data not found at {path}")
+    column_types = column_types or TRAINING_COLUMN_TYPES
+    fmt = detect_format(path)
+    if fmt == "parquet":
+        df = _read_parquet(path, column_types)
+    elif fmt == "csv":
+        # Text columns become categories while parsing; numbers are coerced below
+        text = {c: "category" for c, kind in column_types.items() if kind == "text"}
+        df = pd.read_csv(path, usecols=lambda c: c in column_types, dtype=text)
+    elif fmt == "xlsx":
+        df = _read_xlsx(path, column_types)
+    else:
+        raise ValueError(f"Training data must be one of {', '.join(DATASET_FORMATS)}, got '{fmt}'")
+    return apply_column_types(df, column_types)
+
+
+def apply_column_types(df: pd.DataFrame, column_types: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+    """Declared columns of ``df`` in declared order, text as ``category`` and numbers as float64/int64"""
+    column_types = column_types or TRAINING_COLUMN_TYPES
+    columns = {}
+    for col, kind in column_types.items():
+        if col not in df.columns:
+            continue
+        s = df[col]
+        if kind == "text":
+            s = s if isinstance(s.dtype, pd.CategoricalDtype) else s.astype("category")
+            # Categories are strings: numbers typed into a text column keep their spelling
+            if not all(isinstance(v, str) for v in s.cat.categories):
+                s = s.astype(object).where(s.isna(), s.astype(str)).astype("category")
+        else:
+            s = pd.to_numeric(s, errors="coerce").astype(np.float64)
+            if kind == "integer" and s.notna().all():
+                s = s.astype(np.int64)
+        columns[col] = s
+    return pd.DataFrame(columns, index=df.index)
+
+
+def schema_frame(df: pd.DataFrame, column_types: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+    """Zero-row frame of ``df``'s columns with the dtypes the feature schema records for their types"""
+    column_types = column_types or TRAINING_COLUMN_TYPES
+    dtypes = {c: SCHEMA_DTYPES[column_types[c]] for c in df.columns if c in column_types}
+    # An integer column with missing values was read as float64, as read_excel would have
+    dtypes.update({c: "float64" for c, t in dtypes.items() if t == "int64" and df[c].dtype != np.int64})
+    return df.iloc[:0].astype(dtypes)
+
+
+def declared_columns(columns: List[str], column_types: Optional[Dict[str, str]] = None) -> List[str]:
+    """``columns`` that are declared, in declared order"""
+    column_types = column_types or TRAINING_COLUMN_TYPES
+    present = set(columns)
+    return [c for c in column_types if c in present]
+
+
+def _read_parquet(path: str, column_types: Dict[str, str]) -> pd.DataFrame:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pq.read_schema(path)
+    columns = declared_columns(schema.names, column_types)
+    # Text columns are decoded straight into categories (one copy of each distinct value)
+    text = [c for c in columns if column_types[c] == "text" and pa.types.is_string(schema.field(c).type)]
+    return pq.read_table(path, columns=columns, read_dictionary=text).to_pandas()
+
+
+def _read_xlsx(path: str, column_types: Dict[str, str]) -> pd.DataFrame:
+    from openpyxl import load_workbook
+
+    # Like pandas.read_excel: first sheet, first row is the header, blank rows skipped
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return pd.DataFrame()
+        positions = {str(name): i for i, name in enumerate(header) if name is not None}
+        columns = declared_columns(list(positions), column_types)
+        if not columns:
+            return pd.DataFrame()
+        indices = [positions[c] for c in columns]
+        width = max(indices) + 1
+        pick = operator.itemgetter(*indices)
+        kept = []
+        for row in rows:
+            if all(value is None for value in row):
+                continue
+            if len(row) < width:
+                row = tuple(row) + (None,) * (width - len(row))
+            kept.append(pick(row) if len(indices) > 1 else (pick(row),))
+    finally:
+        workbook.close()
+    return pd.DataFrame.from_records(kept, columns=columns)
@@ -0,0 +1,177 @@
+"""
+Direct booster inference for the trained sklearn pipeline
+
+``Pipeline.predict_proba`` runs the ColumnTransformer on a pandas frame
+(column selection, a passthrough copy, ``OneHotEncoder.transform`` with its
+per-column validation, an ``hstack``) before XGBoost sees a single row.
+``FastPredictor`` reads the fitted layout once: the passthrough columns and
+each one-hot column's ``categories_``. It then builds the float32 feature
+matrix itself and calls ``Booster.inplace_predict`` directly. Class labels are
+the argmax of the probabilities, as ``XGBClassifier.predict`` computes them.
+``top_drivers`` explains rows from the same matrix (see ``utils/explain.py``).
+
+Only the layout the training script produces is supported: a ``prep``
+ColumnTransformer of passthrough and dense ``OneHotEncoder`` (no ``drop``, no
+infrequent categories) steps followed by an ``XGBClassifier``.
+``build_fast_predictor`` returns None for anything else, and callers keep
+using the pipeline.
+
+``layout()`` is the same layout as plain JSON, and ``from_layout`` rebuilds a
+predictor from it and a booster; that is how the model bundle
+(``utils/model_bundle.py``) serves without unpickling the pipeline. sklearn is
+only imported to read a pipeline.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .explain import booster_contributions, column_contributions, column_groups, top_drivers
+
+
+class UnsupportedPipelineError(ValueError):
+    """Raised when a pipeline's layout cannot be reproduced by FastPredictor"""
+
+
+def _is_passthrough(transformer) -> bool:
+    from sklearn.preprocessing import FunctionTransformer
+    # Recent scikit-learn stores "passthrough" as an identity FunctionTransformer once fitted
+    if isinstance(transformer, str):
+        return transformer == "passthrough"
+    return isinstance(transformer, FunctionTransformer) and transformer.func is None
+
+
+def best_iteration_range(model) -> Tuple[int, int]:
+    """Trees ``XGBClassifier.predict_proba`` uses: up to the best iteration when early stopping was used"""
+    try:
+        return (0, model.best_iteration + 1)
+    except AttributeError:
+        return (0, 0)
+
+
+class FastPredictor:
+    """
+    Feature layout and booster of a fitted pipeline, for direct prediction
+
+    Args:
+        pipeline: Fitted ``Pipeline([("prep", ColumnTransformer), ("model", XGBClassifier)])``
+    """
+
+    def __init__(self, pipeline):
+        from sklearn.preprocessing import OneHotEncoder
+
+        steps = getattr(pipeline, "named_steps", {})
+        if "prep" not in steps or "model" not in steps:
+            raise UnsupportedPipelineError("Expected a pipeline with 'prep' and 'model' steps")
+        prep, model = steps["prep"], steps["model"]
+        if not hasattr(model, "get_booster"):
+            raise UnsupportedPipelineError("The 'model' step is not an XGBoost estimator")
+
+        # Output blocks in ColumnTransformer order: ("num", columns) or ("onehot", column, categories)
+        self.blocks: List[Tuple] = []
+        n_features = 0
+        for name, transformer, columns in prep.transformers_:
+            if (isinstance(transformer, str) and transformer == "drop") or len(columns) == 0:
+                continue
+            columns = list(columns)
+            if _is_passthrough(transformer):
+                self.blocks.append(("num", columns, n_features))
+                n_features += len(columns)
+            elif isinstance(transformer, OneHotEncoder):
+                if transformer.drop_idx_ is not None or getattr(transformer, "_infrequent_enabled", False):
+                    raise UnsupportedPipelineError(f"OneHotEncoder '{name}' uses drop or infrequent categories")
+                if transformer.handle_unknown != "ignore":
+                    raise UnsupportedPipelineError(f"OneHotEncoder '{name}' does not ignore unknown categories")
+                for col, categories in zip(columns, transformer.categories_):
+                    self.blocks.append(("onehot", col, n_features, pd.Index(categories)))
+                    n_features += len(categories)
+            else:
+                raise UnsupportedPipelineError(f"Unsupported transformer '{name}': {type(transformer).__name__}")
+
+        self._attach(model.get_booster(), n_features, np.asarray(model.classes_), best_iteration_range(model))
+
+    @classmethod
+    def from_layout(cls, layout: List[Dict[str, Any]], booster, classes, iteration_range) -> "FastPredictor":
+        """Predictor from ``layout()`` output and a booster (no pipeline, no sklearn)"""
+        predictor = cls.__new__(cls)
+        predictor.blocks = []
+        n_features = 0
+        for block in layout:
+            if block["kind"] == "num":
+                predictor.blocks.append(("num", list(block["columns"]), n_features))
+                n_features += len(block["columns"])
+            else:
+                predictor.blocks.append(("onehot", block["column"], n_features, pd.Index(block["categories"])))
+                n_features += len(block["categories"])
+        predictor._attach(booster, n_features, np.asarray(classes), tuple(iteration_range))
+        return predictor
+
+    def _attach(self, booster, n_features: int, classes: np.ndarray, iteration_range: Tuple[int, int]) -> None:
+        if booster.num_features() != n_features:
+            raise UnsupportedPipelineError(
+                f"Booster expects {booster.num_features()} features, layout has {n_features}"
+            )
+        self.booster = booster
+        self.n_features = n_features
+        self.classes_ = classes
+        self.iteration_range = iteration_range
+        # Raw column of each encoded feature, for per-column contributions
+        feature_columns = []
+        for block in self.blocks:
+            feature_columns.extend(block[1] if block[0] == "num" else [block[1]] * len(block[3]))
+        self.columns, self.groups = column_groups([str(c) for c in feature_columns])
+
+    def layout(self) -> List[Dict[str, Any]]:
+        """The blocks as JSON-ready dicts: {"kind": "num", "columns"} or {"kind": "onehot", "column", "categories"}"""
+        out = []
+        for block in self.blocks:
+            if block[0] == "num":
+                out.append({"kind": "num", "columns": [str(c) for c in block[1]]})
+            else:
+                out.append({"kind": "onehot", "column": str(block[1]), "categories": block[3].tolist()})
+        return out
+
+    def transform(self, X: pd.DataFrame) -> np.ndarray:
+        """The float32 matrix the booster was trained on (same values as ``prep.transform``)"""
+        out = np.zeros((len(X), self.n_features), dtype=np.float32)
+        rows = np.arange(len(X))
+        for block in self.blocks:
+            if block[0] == "num":
+                _, columns, start = block
+                out[:, start:start + len(columns)] = X[columns].to_numpy(dtype=np.float32, na_value=np.nan)
+            else:
+                _, col, start, categories = block
+                # Unknown categories (and missing values) map to -1: an all-zero block
+                codes = categories.get_indexer(X[col])
+                known = codes >= 0
+                out[rows[known], start + codes[known]] = 1.0
+        return out
+
+    def predict_proba(self, X: pd.DataFrame) -> np.ndarray:
+        """Class probabilities, shape (rows, classes)"""
+        if len(X) == 0:
+            return np.empty((0, len(self.classes_)), dtype=np.float32)
+        probs = self.booster.inplace_predict(self.transform(X), iteration_range=self.iteration_range)
+        if probs.ndim == 1:
+            # binary:logistic returns P(class 1) only
+            probs = np.column_stack([1.0 - probs, probs])
+        return probs
+
+    def top_drivers(self, X: pd.DataFrame, k: int, class_index: np.ndarray, approx: bool = True) -> List[list]:
+        """The ``k`` columns contributing most to each row's class ``class_index[row]``"""
+        if len(X) == 0:
+            return []
+        contribs = booster_contributions(self.booster, self.transform(X), self.iteration_range, approx=approx)
+        return top_drivers(column_contributions(contribs, self.groups), class_index, self.columns, k)
+
+    def predict(self, X: pd.DataFrame) -> np.ndarray:
+        """Encoded class labels (argmax of ``predict_proba``)"""
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def build_fast_predictor(pipeline) -> Optional[FastPredictor]:
+    """FastPredictor for ``pipeline``, or None if its layout is not supported"""
+    try:
+        return FastPredictor(pipeline)
+    except UnsupportedPipelineError:
+        return None
@@ -0,0 +1,342 @@
+"""
+Incremental writers for prediction results
+
+Results are produced chunk by chunk; a writer appends each chunk to the
+output file so the full result never has to be held in memory. Supported
+outputs:
+
+- ``xlsx``: openpyxl write-only mode (slowest, capped at 1,048,576 rows)
+- ``csv``: ``DataFrame.to_csv`` appended to one open file
+- ``parquet``: ``pyarrow.parquet.ParquetWriter``, one row group per chunk
+- ``arrow``: Arrow IPC stream (``.arrows``), one record batch per chunk
+- ``jsonl``: one JSON object per line
+
+``resolve_output_format`` picks the format from an explicit name or from an
+HTTP ``Accept`` header; ``read_frame`` reads any of them back.
+"""
+import os
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import pandas as pd
+from openpyxl import Workbook
+
+DEFAULT_OUTPUT_FORMAT = "xlsx"
+
+# Data rows per sheet: Excel's 1,048,576-row limit minus the header row
+EXCEL_MAX_ROWS = 1_048_575
+
+
+class UnsupportedOutputFormatError(ValueError):
+    """Raised for result formats no writer exists for"""
+
+
+class ChunkWriter:
+    """
+    Base class: append DataFrame chunks to ``path``
+
+    The column order of the first chunk is used for the whole file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.columns: Optional[List[str]] = None
+        self.rows_written = 0
+
+    def write(self, df: pd.DataFrame) -> None:
+        frame = df.set_axis([str(c) for c in df.columns], axis=1)
+        if self.columns is None:
+            self.columns = list(frame.columns)
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._open(frame)
+        self._write(frame.reindex(columns=self.columns))
+        self.rows_written += len(df)
+
+    def close(self) -> None:
+        if self.columns is None:
+            # Nothing written; still produce a valid (empty) file
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._open(pd.DataFrame())
+        self._close()
+
+    def abort(self) -> None:
+        """Drop a partially written file"""
+        try:
+            self._close()
+        except Exception:
+            pass
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def _open(self, first_chunk: pd.DataFrame) -> None:
+        pass
+
+    def _write(self, df: pd.DataFrame) -> None:
+        raise NotImplementedError
+
+    def _close(self) -> None:
+        pass
+
+
+class ExcelChunkWriter(ChunkWriter):
+    """.xlsx through openpyxl's write-only mode; the workbook is saved on close"""
+
+    def __init__(self, path: str, sheet_name: str = "Sheet1"):
+        super().__init__(path)
+        self._workbook = Workbook(write_only=True)
+        self._sheet = self._workbook.create_sheet(sheet_name)
+
+    def _open(self, first_chunk: pd.DataFrame) -> None:
+        if self.columns:
+            self._sheet.append(self.columns)
+
+    def _write(self, df: pd.DataFrame) -> None:
+        if self.rows_written + len(df) > EXCEL_MAX_ROWS:
+            raise ValueError(
+                f"Result has more than {EXCEL_MAX_ROWS:,} rows, Excel's sheet limit. "
+                "Request csv, parquet, arrow or jsonl output instead."
+            )
+        values = df.astype(object)
+        # Empty cells rather than "nan"/"NaT", as DataFrame.to_excel writes them
+        values = values.where(values.notna(), None)
+        for row in values.itertuples(index=False, name=None):
+            self._sheet.append(row)
+
+    def _close(self) -> None:
+        if self._workbook is not None:
+            workbook, self._workbook = self._workbook, None
+            workbook.save(self.path)
+
+    def abort(self) -> None:
+        # Nothing is on disk until the workbook is saved
+        self._workbook = None
+        super().abort()
+
+
+class CsvChunkWriter(ChunkWriter):
+    """UTF-8 CSV with a header row"""
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._file = None
+
+    def _open(self, first_chunk: pd.DataFrame) -> None:
+        self._file = open(self.path, "w", newline="", encoding="utf-8")
+        pd.DataFrame(columns=self.columns or []).to_csv(self._file, index=False)
+
+    def _write(self, df: pd.DataFrame) -> None:
+        df.to_csv(self._file, header=False, index=False)
+
+    def _close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class JsonLinesChunkWriter(ChunkWriter):
+    """One JSON object per row; missing values become null, dates ISO 8601"""
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._file = None
+
+    def _open(self, first_chunk: pd.DataFrame) -> None:
+        self._file = open(self.path, "w", encoding="utf-8")
+
+    def _write(self, df: pd.DataFrame) -> None:
+        if len(df):
+            text = df.to_json(orient="records", lines=True, date_format="iso", force_ascii=False)
+            self._file.write(text if text.endswith("\n") else text + "\n")
+
+    def _close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class _ArrowChunkWriter(ChunkWriter):
+    """
+    Shared conversion for the Arrow-based writers
+
+    The Arrow schema is fixed by the dtypes of the first chunk. Object columns
+    (free text, or mixed text and numbers as spreadsheets produce) are stored
+    as strings, so every later chunk converts to the same schema; integer
+    columns accept later chunks where missing values made them float.
+    """
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self.schema = None
+        self._writer = None
+
+    def _table(self, df: pd.DataFrame):
+        import pyarrow as pa
+
+        frame = df.copy()
+        for col in frame.columns:
+            if frame[col].dtype == object:
+                values = frame[col]
+                frame[col] = values.astype(str).where(values.notna(), None)
+        if self.schema is None:
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            fields = [
+                pa.field(f.name, pa.string()) if pa.types.is_null(f.type) else f
+                for f in table.schema
+            ]
+            self.schema = pa.schema(fields)
+        return pa.Table.from_pandas(frame, schema=self.schema, preserve_index=False)
+
+    def _close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+class ParquetChunkWriter(_ArrowChunkWriter):
+    """Parquet file; each chunk becomes one row group"""
+
+    def _open(self, first_chunk: pd.DataFrame) -> None:
+        import pyarrow.parquet as pq
+
+        self._table(first_chunk.iloc[:0])
+        self._writer = pq.ParquetWriter(self.path, self.schema)
+
+    def _write(self, df: pd.DataFrame) -> None:
+        self._writer.write_table(self._table(df))
+
+
+class ArrowStreamChunkWriter(_ArrowChunkWriter):
+    """Arrow IPC stream format; each chunk becomes one record batch"""
+
+    def _open(self, first_chunk: pd.DataFrame) -> None:
+        import pyarrow as pa
+
+        self._table(first_chunk.iloc[:0])
+        self._writer = pa.ipc.new_stream(self.path, self.schema)
+
+    def _write(self, df: pd.DataFrame) -> None:
+        self._writer.write_table(self._table(df))
+
+
+@dataclass(frozen=True)
+class OutputFormat:
+    name: str
+    extension: str
+    media_type: str
+    writer: type
+
+
+OUTPUT_FORMATS: Dict[str, OutputFormat] = {
+    "xlsx": OutputFormat("xlsx", ".xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", ExcelChunkWriter),
+    "csv": OutputFormat("csv", ".csv", "text/csv", CsvChunkWriter),
+    "parquet": OutputFormat("parquet", ".parquet", "application/vnd.apache.parquet", ParquetChunkWriter),
+    "arrow": OutputFormat("arrow", ".arrows", "application/vnd.apache.arrow.stream", ArrowStreamChunkWriter),
+    "jsonl": OutputFormat("jsonl", ".jsonl", "application/x-ndjson", JsonLinesChunkWriter),
+}
+
+# Other names and media types clients use for the same formats
+_FORMAT_ALIASES = {
+    "excel": "xlsx",
+    "ndjson": "jsonl",
+    "arrows": "arrow",
+    "ipc": "arrow",
+}
+_MEDIA_TYPE_ALIASES = {
+    "application/x-parquet": "parquet",
+    "application/parquet": "parquet",
+    "application/jsonl": "jsonl",
+    "application/x-jsonlines": "jsonl",
+    "application/jsonlines": "jsonl",
+    "application/vnd.ms-excel": "xlsx",
+}
+_MEDIA_TYPES = {fmt.media_type: name for name, fmt in OUTPUT_FORMATS.items()}
+_MEDIA_TYPES.update(_MEDIA_TYPE_ALIASES)
+
+
+def resolve_output_format(requested: Optional[str] = None, accept: Optional[str] = None) -> str:
+    """
+    Name of the result format for a request
+
+    An explicit ``requested`` name (or extension) wins. Otherwise the first
+    supported media type in the ``Accept`` header, by q-value, is used;
+    wildcards and ``application/json`` (the API's own response body) are
+    ignored. Falls back to ``DEFAULT_OUTPUT_FORMAT``.
+    """
+    if requested:
+        name = requested.strip().lower().lstrip(".")
+        name = _FORMAT_ALIASES.get(name, name)
+        if name not in OUTPUT_FORMATS:
+            supported = ", ".join(OUTPUT_FORMATS)
+            raise UnsupportedOutputFormatError(f"Unsupported output format '{requested}'. Supported: {supported}")
+        return name
+
+    if accept:
+        ranked = []
+        for position, part in enumerate(accept.split(",")):
+            media_type, *params = [p.strip() for p in part.split(";")]
+            q = 1.0
+            for param in params:
+                if param.startswith("q="):
+                    try:
+                        q = float(param[2:])
+                    except ValueError:
+                        q = 0.0
+            ranked.append((-q, position, media_type.lower()))
+        for neg_q, _, media_type in sorted(ranked):
+            if neg_q < 0 and media_type in _MEDIA_TYPES:
+                return _MEDIA_TYPES[media_type]
+    return DEFAULT_OUTPUT_FORMAT
+
+
+def create_writer(output_format: str, path: str) -> ChunkWriter:
+    """Writer for ``output_format``; ``path`` should end in the format's extension"""
+    if output_format not in OUTPUT_FORMATS:
+        raise UnsupportedOutputFormatError(f"Unsupported output format '{output_format}'")
+    return OUTPUT_FORMATS[output_format].writer(path)
+
+
+def write_frame(df: pd.DataFrame, path: str, output_format: str, chunk_rows: int = 50_000) -> None:
+    """Write a whole DataFrame through the chunk writer for ``output_format``"""
+    writer = create_writer(output_format, path)
+    try:
+        for start in range(0, len(df), chunk_rows):
+            writer.write(df.iloc[start:start + chunk_rows])
+        if len(df) == 0:
+            writer.write(df)
+        writer.close()
+    except Exception:
+        writer.abort()
+        raise
+
+
+def output_format_of(filename: str) -> Optional[str]:
+    """Result format of a file from its extension, or None"""
+    ext = os.path.splitext(filename)[1].lower()
+    for name, fmt in OUTPUT_FORMATS.items():
+        if fmt.extension == ext:
+            return name
+    return None
+
+
+def media_type_for(filename: str) -> str:
+    """Download media type from a result file's extension"""
+    name = output_format_of(filename)
+    return OUTPUT_FORMATS[name].media_type if name else "application/octet-stream"
+
+
+def read_frame(path: str) -> pd.DataFrame:
+    """Read a result file written in any of ``OUTPUT_FORMATS`` back into a DataFrame"""
+    name = output_format_of(path)
+    if name == "xlsx":
+        return pd.read_excel(path)
+    if name == "csv":
+        return pd.read_csv(path)
+    if name == "parquet":
+        return pd.read_parquet(path)
+    if name == "arrow":
+        import pyarrow as pa
+        with pa.OSFile(path, "rb") as source:
+            return pa.ipc.open_stream(source).read_pandas()
+    if name == "jsonl":
+        return pd.read_json(path, lines=True)
+    raise UnsupportedOutputFormatError(f"Unsupported result file '{os.path.basename(path)}'")
@@ -0,0 +1,131 @@
+"""
+Chunked readers for uploaded deal files
+
+Uploads are first copied to a temporary file on disk and then read in row
+chunks, so the raw bytes, the parser's object tree and the whole DataFrame
+never sit in memory together. Supported inputs:
+
+- ``.xlsx``: openpyxl in ``read_only`` mode, rows streamed from the sheet XML
+- ``.csv``: ``pandas.read_csv`` with ``chunksize``
+- ``.parquet``: pyarrow record batches
+- ``.xls``: no streaming reader exists; read whole with ``pandas.read_excel``
+"""
+import os
+import shutil
+import tempfile
+from typing import BinaryIO, Iterator, Optional
+
+import pandas as pd
+
+SUPPORTED_FORMATS = {
+    ".xlsx": "xlsx",
+    ".xls": "xls",
+    ".csv": "csv",
+    ".parquet": "parquet",
+}
+
+DEFAULT_CHUNK_ROWS = 5000
+
+
+class UnsupportedFormatError(ValueError):
+    """Raised for file extensions the ingestion layer cannot read"""
+
+
+def detect_format(filename: str) -> str:
+    """Map a filename to one of the supported input formats"""
+    ext = os.path.splitext(filename or "")[1].lower()
+    if ext not in SUPPORTED_FORMATS:
+        supported = ", ".join(SUPPORTED_FORMATS)
+        raise UnsupportedFormatError(f"Unsupported file type '{ext}'. Supported: {supported}")
+    return SUPPORTED_FORMATS[ext]
+
+
+def spool_to_disk(source: BinaryIO, filename: str, directory: Optional[str] = None) -> str:
+    """
+    Copy an upload stream to a temporary file and return its path
+
+    The copy runs in 1 MB blocks; the caller removes the file when done.
+    """
+    suffix = os.path.splitext(filename or "")[1].lower()
+    fd, path = tempfile.mkstemp(suffix=suffix, prefix="upload_", dir=directory)
+    with os.fdopen(fd, "wb") as f:
+        shutil.copyfileobj(source, f, length=1024 * 1024)
+    return path
+
+
+def count_rows(path: str, fmt: str) -> Optional[int]:
+    """Row count from file metadata when it is cheap to get, else None"""
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        return pq.ParquetFile(path).metadata.num_rows
+    if fmt == "xlsx":
+        from openpyxl import load_workbook
+        workbook = load_workbook(path, read_only=True)
+        try:
+            max_row = workbook.worksheets[0].max_row
+        finally:
+            workbook.close()
+        # The sheet dimension may be missing or count trailing blank rows
+        return max(0, max_row - 1) if max_row else None
+    return None
+
+
+def iter_chunks(path: str, fmt: str, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """
+    Yield the rows of ``path`` as DataFrames of at most ``chunk_rows`` rows
+
+    The index of each chunk continues from the previous one (0-based data row
+    number), so row-level messages can refer to positions in the file.
+    """
+    if fmt == "xlsx":
+        chunks = _iter_xlsx(path, chunk_rows)
+    elif fmt == "csv":
+        chunks = pd.read_csv(path, chunksize=chunk_rows)
+    elif fmt == "parquet":
+        chunks = _iter_parquet(path, chunk_rows)
+    elif fmt == "xls":
+        chunks = iter([pd.read_excel(path)])
+    else:
+        raise UnsupportedFormatError(f"Unsupported format: {fmt}")
+
+    start = 0
+    for chunk in chunks:
+        chunk.index = pd.RangeIndex(start, start + len(chunk))
+        start += len(chunk)
+        yield chunk
+
+
+def _iter_xlsx(path: str, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    from openpyxl import load_workbook
+
+    # Like pandas.read_excel: first sheet, first row is the header, blank rows skipped
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [f"Unnamed: {i}" if name is None else str(name) for i, name in enumerate(header)]
+        width = len(columns)
+
+        buffer = []
+        for row in rows:
+            if all(value is None for value in row):
+                continue
+            row = tuple(row[:width]) + (None,) * (width - len(row))
+            buffer.append(row)
+            if len(buffer) >= chunk_rows:
+                yield pd.DataFrame.from_records(buffer, columns=columns)
+                buffer = []
+        if buffer:
+            yield pd.DataFrame.from_records(buffer, columns=columns)
+    finally:
+        workbook.close()
+
+
+def _iter_parquet(path: str, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(path)
+    for batch in parquet_file.iter_batches(batch_size=chunk_rows):
+        yield batch.to_pandas()
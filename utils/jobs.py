@@ -0,0 +1,159 @@
+"""
+Persistent table of background prediction jobs
+
+Large uploads are scored in the background instead of inside the HTTP
+request. Each job is a row in a small SQLite database next to its spooled
+input file, so job ids, progress and finished results survive an API restart.
+Workers update the row as they go (stage, rows processed); clients poll it.
+
+Training jobs use the same table: their settings go in ``params``, the live
+progress snapshot (stage, fold/candidate, iteration, metric) in ``progress``
+and the finished run's metrics in ``result``, each as JSON.
+"""
+import os
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+FINISHED_STATES = (JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED)
+
+_COLUMNS = (
+    "id", "kind", "status", "stage", "rows_total", "rows_processed", "input_path",
+    "input_filename", "output_format", "result_file", "model_version", "warnings", "error", "attempts",
+    "created_at", "started_at", "finished_at", "params", "progress", "result",
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    stage TEXT,
+    rows_total INTEGER,
+    rows_processed INTEGER NOT NULL DEFAULT 0,
+    input_path TEXT,
+    input_filename TEXT,
+    output_format TEXT,
+    result_file TEXT,
+    model_version TEXT,
+    warnings TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL,
+    started_at TEXT,
+    finished_at TEXT,
+    params TEXT,
+    progress TEXT,
+    result TEXT
+)
+"""
+
+# Columns added after the first release of the table, with their DDL
+_ADDED_COLUMNS = {
+    "output_format": "TEXT",
+    "params": "TEXT",
+    "progress": "TEXT",
+    "result": "TEXT",
+}
+
+
+class JobStore:
+    """
+    SQLite-backed job table
+
+    A short-lived connection is opened per operation, so the store can be used
+    from the event loop and from worker threads alike.
+
+    Args:
+        db_path: SQLite file (created if missing)
+        spool_dir: Directory where job input files are kept
+    """
+
+    def __init__(self, db_path: str, spool_dir: str):
+        self.db_path = db_path
+        self.spool_dir = spool_dir
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        os.makedirs(spool_dir, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(_SCHEMA)
+            # Tables created before a column existed get it added in place
+            existing = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for name, ddl in _ADDED_COLUMNS.items():
+                if name not in existing:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {name} {ddl}")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def create(self, kind: str, input_path: str, input_filename: str,
+               output_format: Optional[str] = None, params: Optional[str] = None) -> Dict[str, Any]:
+        """Insert a queued job for an input file already saved under ``spool_dir``; returns the job row"""
+        job_id = uuid.uuid4().hex
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, status, stage, input_path, input_filename, output_format, params, "
+                "created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, JOB_QUEUED, "queued", input_path, input_filename, output_format, params, _now()),
+            )
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def update(self, job_id: str, **fields) -> None:
+        """Set the given columns on one job"""
+        unknown = set(fields) - set(_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown job fields: {', '.join(sorted(unknown))}")
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock, self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    def start(self, job_id: str) -> None:
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, stage = ?, started_at = ?, attempts = attempts + 1, error = NULL WHERE id = ?",
+                (JOB_RUNNING, "starting", _now(), job_id),
+            )
+
+    def finish(self, job_id: str, **fields) -> None:
+        self.update(job_id, status=JOB_SUCCEEDED, stage="done", finished_at=_now(), **fields)
+
+    def fail(self, job_id: str, error: str) -> None:
+        self.update(job_id, status=JOB_FAILED, stage="failed", error=error, finished_at=_now())
+
+    def cancel(self, job_id: str, error: Optional[str] = None) -> None:
+        self.update(job_id, status=JOB_CANCELLED, stage="cancelled", error=error, finished_at=_now())
+
+    def unfinished(self, kind: Optional[str] = None) -> List[str]:
+        """Ids of jobs (of ``kind``, if given) that were queued or running, oldest first (e.g. after a restart)"""
+        query = "SELECT id FROM jobs WHERE status IN (?, ?)"
+        args = [JOB_QUEUED, JOB_RUNNING]
+        if kind is not None:
+            query += " AND kind = ?"
+            args.append(kind)
+        with self._connect() as conn:
+            rows = conn.execute(query + " ORDER BY created_at", args).fetchall()
+        return [row["id"] for row in rows]
+
+
+def _now() -> str:
+    return datetime.now().isoformat()
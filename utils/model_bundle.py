@@ -0,0 +1,120 @@
+"""
+Native model bundle: the booster as UBJSON plus a JSON preprocessing spec
+
+``xgb_classifier.pkl`` is a joblib pickle of the whole sklearn Pipeline.
+Loading it imports and rebuilds the ColumnTransformer, the encoders and the
+``XGBClassifier``, and it only unpickles under compatible library versions.
+Next to it, training writes a bundle that serving loads instead:
+
+- ``xgb_classifier.ubj``: the booster in XGBoost's own binary UBJSON format
+  (``Booster.save_model``), readable by any XGBoost of the same or a newer
+  major version, and by XGBoost in other languages. Booster attributes, such
+  as the stored feature contributions, are kept. Trees past an early-stopped
+  model's best iteration never take part in a prediction and are left out.
+- ``xgb_preprocessing.json``: everything between the prepared feature frame
+  and the booster's matrix. It holds the input column order, the
+  passthrough/one-hot layout with each column's vocabulary, the class labels,
+  the iteration range and, for reference, the ordinal tables the prediction
+  code applies before that (``utils.rubric.ORDINAL_MAPPINGS``).
+
+``load_model_bundle`` turns the two files into a ``FastPredictor``
+(``FastPredictor.from_layout``) and a :class:`ClassLabels` standing in for
+the label encoder. No sklearn object is built and sklearn need not be
+installed: loading costs little more than XGBoost parsing the trees (about
+40 ms for the 3,000 trees of the tuned model). ``ModelStore`` serves the
+bundle whenever it is at least as new as the pickle.
+"""
+import json
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import xgboost as xgb
+
+from .fast_inference import FastPredictor, UnsupportedPipelineError
+from .rubric import NEUTRAL_CODE, ORDINAL_MAPPINGS
+
+BUNDLE_BOOSTER_FILENAME = "xgb_classifier.ubj"
+BUNDLE_SPEC_FILENAME = "xgb_preprocessing.json"
+BUNDLE_FORMAT_VERSION = 1
+
+
+@dataclass(frozen=True)
+class ClassLabels:
+    """The label encoder's classes, without sklearn (``classes_`` and ``inverse_transform``)"""
+    classes_: np.ndarray
+
+    def inverse_transform(self, y: Sequence[int]) -> np.ndarray:
+        return self.classes_[np.asarray(y, dtype=int)]
+
+
+def bundle_paths(models_dir: str) -> Tuple[str, str]:
+    """(booster path, spec path) of the bundle in ``models_dir``"""
+    return os.path.join(models_dir, BUNDLE_BOOSTER_FILENAME), os.path.join(models_dir, BUNDLE_SPEC_FILENAME)
+
+
+def bundle_spec(predictor: FastPredictor, classes: Sequence, input_columns: Sequence[str],
+                iteration_range: Tuple[int, int]) -> Dict[str, Any]:
+    """The JSON preprocessing spec of a compiled predictor"""
+    return {
+        "format_version": BUNDLE_FORMAT_VERSION,
+        "xgboost_version": xgb.__version__,
+        "input_columns": [str(c) for c in input_columns],
+        "layout": predictor.layout(),
+        "n_features": predictor.n_features,
+        "classes": [str(c) for c in classes],
+        "model_classes": predictor.classes_.tolist(),
+        "iteration_range": [int(i) for i in iteration_range],
+        "ordinal_tables": {"default": NEUTRAL_CODE, "mappings": ORDINAL_MAPPINGS},
+    }
+
+
+def save_model_bundle(pipeline, label_encoder, models_dir: str) -> Optional[Tuple[str, str]]:
+    """
+    Write the bundle of a fitted pipeline; returns (booster path, spec path)
+
+    Returns None, and writes nothing, when ``FastPredictor`` cannot read the
+    pipeline's layout (serving then keeps loading the pickle). The spec is
+    written first and the booster last: the booster file is what marks the
+    bundle as complete and newer than the pickle.
+    """
+    try:
+        predictor = FastPredictor(pipeline)
+    except UnsupportedPipelineError:
+        return None
+    booster_path, spec_path = bundle_paths(models_dir)
+    booster, iteration_range = predictor.booster, predictor.iteration_range
+    if 0 < iteration_range[1] < booster.num_boosted_rounds():
+        booster, iteration_range = booster[:iteration_range[1]], (0, 0)
+    spec = bundle_spec(predictor, label_encoder.classes_, pipeline.named_steps["prep"].feature_names_in_,
+                       iteration_range)
+
+    os.makedirs(models_dir, exist_ok=True)
+    tmp_spec = f"{spec_path}.tmp"
+    with open(tmp_spec, "w") as f:
+        json.dump(spec, f, indent=1)
+    os.replace(tmp_spec, spec_path)
+    # Keep the .ubj suffix on the temporary file: save_model picks the format from it
+    tmp_booster = os.path.join(models_dir, f".tmp-{BUNDLE_BOOSTER_FILENAME}")
+    booster.save_model(tmp_booster)
+    os.replace(tmp_booster, booster_path)
+    return booster_path, spec_path
+
+
+def load_model_bundle(models_dir: str) -> Tuple[FastPredictor, ClassLabels, Dict[str, Any]]:
+    """
+    Load the bundle in ``models_dir``; returns (predictor, class labels, spec)
+
+    Raises:
+        FileNotFoundError: The booster or the spec file is missing
+        ValueError: The spec was written by a newer bundle format
+    """
+    booster_path, spec_path = bundle_paths(models_dir)
+    with open(spec_path) as f:
+        spec = json.load(f)
+    if spec.get("format_version", 0) > BUNDLE_FORMAT_VERSION:
+        raise ValueError(f"Model bundle format {spec['format_version']} is newer than this code supports")
+    booster = xgb.Booster(model_file=booster_path)
+    predictor = FastPredictor.from_layout(spec["layout"], booster, spec["model_classes"], spec["iteration_range"])
+    return predictor, ClassLabels(np.asarray(spec["classes"], dtype=object)), spec
@@ -0,0 +1,240 @@
+"""
+Process-wide cache for the trained model artifacts
+
+The pipeline, label encoder and feature schema are loaded once and kept in
+memory. Every lookup does a cheap ``os.stat`` of the files and, when a
+retrain has written new artifacts, loads them and swaps in a fresh immutable
+snapshot. Callers hold on to the snapshot they were given, so in-flight
+requests finish on the model they started with.
+
+Each snapshot also carries a ``FastPredictor`` compiled from the pipeline
+(see ``utils/fast_inference.py``); ``ModelSnapshot.predict_proba`` uses it
+and falls back to the pipeline when the layout is not supported.
+``ModelSnapshot.top_drivers`` explains rows the same way, and
+``feature_importance`` is the mean |contribution| per column stored in the
+model file by training (see ``utils/explain.py``).
+
+When training has also written the model bundle (``utils/model_bundle.py``:
+UBJSON booster plus JSON preprocessing spec) and it is at least as new as the
+pickle, the snapshot is loaded from the bundle instead. That takes
+milliseconds and builds no sklearn objects, so ``model`` is None and
+``label_encoder`` is a ``ClassLabels``.
+"""
+import hashlib
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import joblib
+import numpy as np
+
+from .explain import (booster_contributions, column_contributions, column_groups, encoded_feature_columns,
+                      stored_importance, top_drivers)
+from .fast_inference import FastPredictor, best_iteration_range, build_fast_predictor
+from .model_bundle import bundle_paths, load_model_bundle
+from .schema import FeatureSchema, load_feature_schema
+
+
+@dataclass(frozen=True)
+class ModelSnapshot:
+    """An immutable view of one loaded model/encoder/schema set"""
+    model: Any
+    label_encoder: Any
+    schema: Optional[FeatureSchema]
+    version: str
+    signature: Tuple
+    model_path: str
+    encoder_path: str
+    model_size_bytes: int
+    model_modified: datetime
+    predictor: Optional[FastPredictor] = None
+    model_format: str = "pickle"
+    load_seconds: float = 0.0
+    loaded_at: datetime = field(default_factory=datetime.now)
+
+    @property
+    def classes(self) -> List[str]:
+        return [str(c) for c in self.label_encoder.classes_]
+
+    @property
+    def inference_path(self) -> str:
+        return "booster" if self.predictor is not None else "pipeline"
+
+    def predict_proba(self, X) -> Any:
+        """Class probabilities for a prepared feature frame"""
+        if self.predictor is not None:
+            return self.predictor.predict_proba(X)
+        return self.model.predict_proba(X)
+
+    def top_drivers(self, X, k: int, class_index) -> List[list]:
+        """Per row, the ``k`` columns contributing most to class ``class_index[row]`` (approximate contributions)"""
+        if self.predictor is not None:
+            return self.predictor.top_drivers(X, k, class_index)
+        if len(X) == 0:
+            return []
+        prep, model = self.model.named_steps["prep"], self.model.named_steps["model"]
+        columns, groups = column_groups(encoded_feature_columns(prep))
+        M = np.asarray(prep.transform(X), dtype=np.float32)
+        contribs = booster_contributions(model.get_booster(), M, best_iteration_range(model), approx=True)
+        return top_drivers(column_contributions(contribs, groups), class_index, columns, k)
+
+    @property
+    def feature_importance(self) -> Optional[Dict[str, float]]:
+        """Mean |contribution| per column on the training holdout, if the model file carries it"""
+        if self.predictor is not None:
+            return stored_importance(self.predictor.booster)
+        try:
+            return stored_importance(self.model.named_steps["model"].get_booster())
+        except (AttributeError, KeyError):
+            return None
+
+
+def _stat(path: Optional[str]) -> Optional[Tuple[int, int]]:
+    """(mtime_ns, size) of a file, or None if it does not exist"""
+    if not path:
+        return None
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def file_digest(path: str, length: int = 12) -> str:
+    """
+    Return a short SHA-256 hex digest of a file's contents
+
+    Args:
+        path: File to hash
+        length: Number of hex characters to keep
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()[:length]
+
+
+class ModelStore:
+    """
+    Holds the currently loaded model and reloads it when the files change
+
+    Args:
+        model_path: Path to the joblib-pickled sklearn pipeline
+        encoder_path: Path to the joblib-pickled LabelEncoder
+        schema_path: Optional path to the feature schema JSON written at training time
+        fast_inference: Compile a FastPredictor for each loaded pipeline
+        use_bundle: Load the model bundle next to ``model_path`` when it is up to date
+            (implies ``fast_inference``)
+    """
+
+    def __init__(self, model_path: str, encoder_path: str, schema_path: Optional[str] = None,
+                 fast_inference: bool = True, use_bundle: bool = True):
+        self.model_path = model_path
+        self.encoder_path = encoder_path
+        self.schema_path = schema_path
+        self.fast_inference = fast_inference
+        self.use_bundle = use_bundle and fast_inference
+        self.models_dir = os.path.dirname(model_path)
+        self._snapshot: Optional[ModelSnapshot] = None
+        self._lock = threading.Lock()
+        self.last_error: Optional[str] = None
+        self.reload_count = 0
+
+    def _signature(self) -> Optional[Tuple]:
+        """
+        (mtime_ns, size) of every artifact, or None if the model or encoder is missing
+
+        Returns (model, encoder, schema, bundle booster, bundle spec); entries of
+        files that do not exist are None.
+        """
+        model_sig, encoder_sig = _stat(self.model_path), _stat(self.encoder_path)
+        if model_sig is None or encoder_sig is None:
+            return None
+        booster_sig, spec_sig = None, None
+        if self.use_bundle:
+            booster_sig, spec_sig = (_stat(path) for path in bundle_paths(self.models_dir))
+        return model_sig, encoder_sig, _stat(self.schema_path), booster_sig, spec_sig
+
+    @staticmethod
+    def _bundle_current(signature: Tuple) -> bool:
+        """Both bundle files exist and the booster was written no earlier than the pickle"""
+        model_sig, _, _, booster_sig, spec_sig = signature
+        return booster_sig is not None and spec_sig is not None and booster_sig[0] >= model_sig[0]
+
+    @property
+    def snapshot(self) -> Optional[ModelSnapshot]:
+        """The snapshot currently in memory, without checking the files"""
+        return self._snapshot
+
+    def needs_load(self) -> bool:
+        """Whether ``get`` would load: the artifacts exist and differ from the snapshot in memory (stat only)"""
+        signature = self._signature()
+        current = self._snapshot
+        return signature is not None and (current is None or current.signature != signature)
+
+    def get(self) -> Optional[ModelSnapshot]:
+        """
+        Return the current snapshot, loading or hot-reloading it if needed
+
+        If the artifacts on disk cannot be loaded (for example while a
+        training run is still writing them) the previous snapshot keeps being
+        served and the error is recorded in ``last_error``.
+        """
+        signature = self._signature()
+        current = self._snapshot
+        if signature is None or (current is not None and current.signature == signature):
+            return current
+
+        with self._lock:
+            current = self._snapshot
+            if current is not None and current.signature == signature:
+                return current
+            try:
+                self._snapshot = self._load(signature)
+                self.last_error = None
+                self.reload_count += 1
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+            return self._snapshot
+
+    def _load(self, signature: Tuple) -> ModelSnapshot:
+        started = time.perf_counter()
+        if self._bundle_current(signature):
+            model_format = "ubj"
+            model_path, encoder_path = bundle_paths(self.models_dir)
+            model_sig = signature[3]
+            model = None
+            predictor, label_encoder, _ = load_model_bundle(self.models_dir)
+        else:
+            model_format = "pickle"
+            model_path, encoder_path = self.model_path, self.encoder_path
+            model_sig = signature[0]
+            model = joblib.load(self.model_path)
+            label_encoder = joblib.load(self.encoder_path)
+            predictor = build_fast_predictor(model) if self.fast_inference else None
+        load_seconds = time.perf_counter() - started
+        schema = None
+        if signature[2] is not None:
+            schema = load_feature_schema(self.schema_path)
+        # Files may have been replaced while we were reading them; only trust
+        # the snapshot if the signature is unchanged afterwards.
+        if self._signature() != signature:
+            raise RuntimeError("Model artifacts changed while loading")
+        return ModelSnapshot(
+            model=model,
+            label_encoder=label_encoder,
+            schema=schema,
+            version=file_digest(model_path),
+            signature=signature,
+            model_path=model_path,
+            encoder_path=encoder_path,
+            model_size_bytes=model_sig[1],
+            model_modified=datetime.fromtimestamp(model_sig[0] / 1e9),
+            predictor=predictor,
+            model_format=model_format,
+            load_seconds=load_seconds,
+        )
@@ -0,0 +1,263 @@
+"""
+Incremental model updates: add trees for newly labeled deals
+
+``update_model(config)`` is the daily-refresh path next to the full
+``utils.training.train`` run. It loads the saved pipeline, prepares the new
+rows exactly as the model's training data was prepared (feature schema
+column roles and medians, then the saved encoder), and continues boosting
+the existing booster on them with ``xgb.train(..., xgb_model=booster)``.
+Nothing is searched or cross-validated and the encoder is not refit, so an
+update costs a few dozen trees on a few hundred rows.
+
+The candidate is compared with the current model on a holdout made of a
+stratified share of the new rows plus the holdout split of the reference
+training data (the dataset manifest's default unless given; the same split
+``train`` evaluates on), so it is scored both on the new deals and on the
+deals the model already knew. The new model replaces ``xgb_classifier.pkl``
+only when its weighted F1 is no worse than the current one (with the mean
+|contribution| per column stored in it recomputed on that holdout), and the
+model bundle is rewritten with it; otherwise the saved artifacts are left
+alone.
+"""
+import logging
+import os
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Optional
+
+import joblib
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import Pipeline
+
+from .datasets import (
+    DATASET_FORMATS, DATASET_MANIFEST_PATH, apply_column_types, read_training_frame, resolve_dataset
+)
+from .ingest import detect_format, iter_chunks
+from .model_bundle import save_model_bundle
+from .schema import FEATURE_SCHEMA_FILENAME, load_feature_schema
+from .training import (
+    PROJECT_ROOT, ClassificationMetrics, TrainingConfig, available_cores, booster_params, dump_atomic, evaluate,
+    holdout_importance, log_metrics
+)
+from .training_data import FEATURE_CACHE_DIR, load_training_data, preprocess
+
+logger = logging.getLogger(__name__)
+
+# Fewer labeled rows than this are not worth a new model version
+MIN_UPDATE_ROWS = 20
+
+
+@dataclass
+class UpdateConfig:
+    """
+    Inputs and switches of one incremental update
+
+    Args:
+        new_data_path: Newly labeled deals (.xlsx, .csv or .parquet) with a ``Deal Status`` column
+        models_dir: Folder holding the current pipeline, label encoder and feature schema
+        rounds: Trees added to the booster
+        learning_rate: Learning rate of the added trees; None keeps the model's own
+        holdout_size: Share of the new rows held out from boosting for the comparison
+        reference_data_path: Training data whose holdout split is also scored; None uses
+            ``reference_dataset`` from the dataset manifest
+        reference_dataset: Manifest entry used when ``reference_data_path`` is None; None uses the default
+        manifest_path: Dataset manifest (``utils/datasets.py``)
+        use_reference: Score the reference holdout as well as the new rows
+        tolerance: Weighted-F1 drop still accepted for promotion
+        random_state: Seed for the new-row split and the added trees
+        n_cores: XGBoost threads for boosting; None uses every core this process may run on
+        feature_cache_dir: Feature cache used to load the reference workbook; None disables it
+    """
+    new_data_path: str
+    models_dir: str = os.path.join(PROJECT_ROOT, "models")
+    rounds: int = 50
+    learning_rate: Optional[float] = None
+    holdout_size: float = 0.2
+    reference_data_path: Optional[str] = None
+    reference_dataset: Optional[str] = None
+    manifest_path: str = DATASET_MANIFEST_PATH
+    use_reference: bool = True
+    tolerance: float = 0.0
+    random_state: int = 42
+    n_cores: Optional[int] = None
+    feature_cache_dir: Optional[str] = FEATURE_CACHE_DIR
+
+
+@dataclass
+class UpdateResult:
+    """Outcome of :func:`update_model`: both models' holdout metrics and the promotion decision"""
+    new_data_path: str
+    new_rows: int
+    boosted_rows: int
+    holdout_rows: int
+    trees_before: int
+    trees_after: int
+    current: ClassificationMetrics
+    candidate: ClassificationMetrics
+    promoted: bool
+    reason: str
+    reference_data_path: Optional[str] = None
+    timings: Dict[str, float] = field(default_factory=dict)
+    model_path: str = ""
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def read_labeled_rows(path: str) -> pd.DataFrame:
+    """The declared feature and target columns of a .xlsx/.csv/.parquet/.xls file, typed as for training"""
+    if detect_format(path) in DATASET_FORMATS:
+        return read_training_frame(path)
+    chunks = list(iter_chunks(path, detect_format(path)))
+    return apply_column_types(pd.concat(chunks, ignore_index=True)) if chunks else pd.DataFrame()
+
+
+def continue_boosting(model: xgb.XGBClassifier, X: np.ndarray, y: np.ndarray, rounds: int,
+                      learning_rate: Optional[float] = None, n_threads: int = 1,
+                      random_state: int = 42) -> xgb.XGBClassifier:
+    """
+    A copy of ``model`` with ``rounds`` more trees fitted on ``(X, y)``
+
+    Continues the native booster: ``XGBClassifier.fit(xgb_model=...)`` would
+    re-infer the classes from ``y``, which fails when a batch of new deals
+    does not contain every outcome. Trees past an early-stopping
+    ``best_iteration`` were never used for prediction, so they are dropped
+    before the new ones are appended.
+    """
+    booster = model.get_booster()
+    try:
+        booster = booster[: model.best_iteration + 1]
+    except AttributeError:
+        booster = booster.copy()
+    params = booster_params(model, int(model.n_classes_), n_threads, random_state)
+    if learning_rate is not None:
+        params["learning_rate"] = learning_rate
+    booster = xgb.train(params, xgb.DMatrix(X, label=y, nthread=n_threads), num_boost_round=rounds,
+                        xgb_model=booster)
+    booster.set_attr(best_iteration=None, best_score=None)
+
+    updated = xgb.XGBClassifier(**model.get_params())
+    updated.load_model(bytearray(booster.save_raw("ubj")))
+    updated.set_params(n_estimators=booster.num_boosted_rounds(), early_stopping_rounds=None)
+    return updated
+
+
+def update_model(config: UpdateConfig) -> UpdateResult:
+    """
+    Add trees for newly labeled deals and promote the result if it is no worse
+
+    Raises:
+        FileNotFoundError: The new data file or the model artifacts do not exist
+        KeyError: The new data has no ``Deal Status`` column
+        ValueError: Too few rows, or outcomes the saved label encoder does not know
+    """
+    timings: Dict[str, float] = {}
+    started = time.perf_counter()
+
+    @contextmanager
+    def timed(stage: str):
+        t0 = time.perf_counter()
+        yield
+        timings[stage] = round(time.perf_counter() - t0, 3)
+
+    model_path = os.path.join(config.models_dir, "xgb_classifier.pkl")
+    encoder_path = os.path.join(config.models_dir, "label_encoder.pkl")
+    schema_path = os.path.join(config.models_dir, FEATURE_SCHEMA_FILENAME)
+    for path in (config.new_data_path, model_path, encoder_path, schema_path):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Not found: {path}")
+
+    with timed("load"):
+        pipeline = joblib.load(model_path)
+        le = joblib.load(encoder_path)
+        schema = load_feature_schema(schema_path)
+        prep, model = pipeline.named_steps["prep"], pipeline.named_steps["model"]
+        df = read_labeled_rows(config.new_data_path)
+    if len(df) < MIN_UPDATE_ROWS:
+        raise ValueError(f"{len(df)} labeled rows in {config.new_data_path}; at least {MIN_UPDATE_ROWS} are needed")
+
+    with timed("prepare"):
+        X, target, *_ = preprocess(df, schema)
+        unknown = sorted(set(target.astype(str)) - set(str(c) for c in le.classes_))
+        if unknown:
+            raise ValueError(f"Outcomes not known to the model: {unknown} (retrain instead of updating)")
+        y = le.transform(target.astype(str))
+        M = np.ascontiguousarray(prep.transform(X), dtype=np.float32)
+
+        # Stratify the new-row holdout when every outcome has at least two rows
+        counts = np.bincount(y)
+        stratify = y if counts[counts > 0].min() >= 2 else None
+        if config.holdout_size > 0:
+            fit_idx, hold_idx = train_test_split(
+                np.arange(len(y)), test_size=config.holdout_size, stratify=stratify,
+                random_state=config.random_state
+            )
+        else:
+            fit_idx, hold_idx = np.arange(len(y)), np.arange(0)
+        M_hold, y_hold = M[hold_idx], y[hold_idx]
+
+        reference_path = None
+        if config.use_reference:
+            reference_path = config.reference_data_path or resolve_dataset(config.reference_dataset,
+                                                                            config.manifest_path)
+            reference = load_training_data(reference_path, config.feature_cache_dir)
+            y_ref = le.transform(reference.target.astype(str))
+            # The split train() evaluates on, with its defaults
+            _, ref_idx = train_test_split(
+                np.arange(len(y_ref)), test_size=TrainingConfig.test_size, stratify=y_ref,
+                random_state=TrainingConfig.random_state
+            )
+            # Encoded with the saved encoder, which may differ from the cached one
+            M_ref = np.asarray(prep.transform(reference.X.iloc[ref_idx]), dtype=np.float32)
+            M_hold = np.vstack([M_hold, M_ref])
+            y_hold = np.concatenate([y_hold, y_ref[ref_idx]])
+        if len(y_hold) == 0:
+            raise ValueError("No holdout to compare on: set holdout_size > 0 or use the reference workbook")
+
+    with timed("boost"):
+        trees_before = model.get_booster().num_boosted_rounds()
+        updated = continue_boosting(
+            model, M[fit_idx], y[fit_idx], config.rounds, config.learning_rate,
+            n_threads=config.n_cores or available_cores(), random_state=config.random_state
+        )
+
+    with timed("evaluation"):
+        current = evaluate(model, M_hold, y_hold, le.classes_)
+        candidate = evaluate(updated, M_hold, y_hold, le.classes_)
+    log_metrics("Current model on the update holdout:", current)
+    log_metrics("Updated model on the update holdout:", candidate)
+
+    promoted = candidate.f1 >= current.f1 - config.tolerance
+    reason = (f"weighted F1 {candidate.f1:.4f} vs {current.f1:.4f} on {len(y_hold)} holdout rows "
+              f"({'promoted' if promoted else 'kept the current model'})")
+    if promoted:
+        with timed("save"):
+            updated.set_params(n_jobs=-1)
+            promoted_model = Pipeline([("prep", prep), ("model", updated)])
+            # The copied booster still carries the old trees' contributions
+            holdout_importance(promoted_model, M_hold)
+            dump_atomic(promoted_model, model_path)
+            save_model_bundle(promoted_model, le, config.models_dir)
+        logger.info(f"Updated model saved to: {model_path}")
+    logger.info(reason)
+
+    timings["total"] = round(time.perf_counter() - started, 3)
+    return UpdateResult(
+        new_data_path=config.new_data_path,
+        new_rows=int(len(y)),
+        boosted_rows=int(len(fit_idx)),
+        holdout_rows=int(len(y_hold)),
+        trees_before=int(trees_before),
+        trees_after=int(updated.get_booster().num_boosted_rounds()),
+        current=current,
+        candidate=candidate,
+        promoted=bool(promoted),
+        reason=reason,
+        reference_data_path=reference_path,
+        timings=timings,
+        model_path=model_path,
+    )
@@ -0,0 +1,150 @@
+"""
+Map free-text category spellings onto the categories the model was trained on
+
+Uploads spell the same category many ways ("High", "high - existing",
+"Good"). ``NORMALIZATION_MAP`` lists, per column, lowercase substrings and the
+category they stand for; the first key (in dict order) found in the value
+wins. ``ColumnNormalizer`` compiles each column's keys into one regex and
+resolves every distinct value of a column once, then broadcasts the result
+back through the factorized codes. Resolved spellings are kept in a bounded
+LRU cache shared by all requests in the process.
+"""
+import re
+from functools import lru_cache
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+NORMALIZATION_MAP = {
+    "Account Engagement": {
+        "high": "High (Existing+Good)", "good": "High (Existing+Good)",
+        "medium": "Medium (Existing+Poor)", "average": "Medium (Existing+Poor)",
+        "low": "Low (New Account)", "new": "Low (New Account)", "none": "Low (New Account)"
+    },
+    "Client Relationship": {
+        "high": "Strong", "strong": "Strong", "good": "Strong",
+        "medium": "Neutral", "neutral": "Neutral", "average": "Neutral",
+        "low": "Weak", "weak": "Weak", "poor": "Weak", "new": "Weak", "none": "Weak"
+    },
+    "Deal Coach": {
+        "active": "Active & Available", "available": "Active & Available",
+        "passive": "Passive",
+        "not": "Not Available", "none": "Not Available"
+    },
+    "Incumbency Share": {
+        "high": "High (>50%)", ">50%": "High (>50%)",
+        "medium": "Medium (20-50%)", "20-50%": "Medium (20-50%)",
+        "low": "Low (<20%)", "<20%": "Low (<20%)", "none": "None"
+    },
+    "Bidder Rank": {
+        "1": "Top", "top": "Top", "first": "Top", "high": "Top",
+        "2": "Middle", "middle": "Middle", "second": "Middle", "medium": "Middle",
+        "3": "Bottom", "bottom": "Bottom", "last": "Bottom", "low": "Bottom"
+    },
+    "References": {
+        "strong": "Strong (Domain+Tech)",
+        "average": "Average", "medium": "Average",
+        "weak": "Weak/None", "none": "Weak/None"
+    },
+    "Solution Strength": {
+        "high": "Strong (Covers all)", "strong": "Strong (Covers all)",
+        "medium": "Average (Gaps)", "average": "Average (Gaps)",
+        "low": "Weak", "weak": "Weak"
+    },
+    "Client Impression": {
+        "positive": "Positive", "good": "Positive",
+        "neutral": "Neutral", "medium": "Neutral",
+        "negative": "Negative", "bad": "Negative"
+    },
+    "Orals Score": {
+        "strong": "Strong", "high": "Strong",
+        "par": "At Par", "medium": "At Par", "average": "At Par",
+        "weak": "Weak", "low": "Weak"
+    },
+    "Price Alignment": {
+        "on par": "On par with Client Budget", "budget": "On par with Client Budget", "aligned": "On par with Client Budget", "high": "On par with Client Budget",
+        "caveats": "Above Client Budget with Rationale/Caveats", "rationale": "Above Client Budget with Rationale/Caveats", "medium": "Above Client Budget with Rationale/Caveats",
+        "above": "Above Client Budget", "deviating": "Above Client Budget", "low": "Above Client Budget",
+        "info not available": "Client Budget Info not available", "no intel": "Client Budget Info not available"
+    },
+    "Price Position": {
+        "lowest": "Lowest", "low": "Lowest",
+        "competitive": "Competitive", "medium": "Competitive",
+        "expensive": "Expensive", "high": "Expensive"
+    }
+}
+
+
+def compile_matcher(mapping: Dict[str, str]) -> "re.Pattern":
+    """
+    One regex that finds the first key of ``mapping`` contained in a string
+
+    A plain ``k1|k2`` alternation would return the key that occurs earliest
+    in the string. Anchoring at the start and giving every key its own
+    lookahead makes the engine try the keys in dict order instead, so
+    ``match.lastindex - 1`` is the index of the first key that occurs
+    anywhere in the value, the same precedence as a loop over the dict.
+    """
+    branches = "|".join(f"(?=.*?({re.escape(key)}))" for key in mapping)
+    return re.compile(f"^(?:{branches})", re.DOTALL)
+
+
+class ColumnNormalizer:
+    """
+    Resolve category spellings with precompiled matchers and a shared cache
+
+    Args:
+        normalization_map: Column -> {lowercase substring: category}
+        cache_size: Maximum number of (column, spelling) pairs remembered
+    """
+
+    def __init__(self, normalization_map: Dict[str, Dict[str, str]], cache_size: int = 4096):
+        self.normalization_map = normalization_map
+        self._matchers = {col: compile_matcher(mapping) for col, mapping in normalization_map.items()}
+        self._targets = {col: list(mapping.values()) for col, mapping in normalization_map.items()}
+        self._resolve = lru_cache(maxsize=cache_size)(self._match)
+
+    def _match(self, col: str, text: str) -> Optional[str]:
+        m = self._matchers[col].match(text)
+        return self._targets[col][m.lastindex - 1] if m else None
+
+    def resolve(self, col: str, value) -> Optional[str]:
+        """Category for one value, or None if no key matches (or the column has no map)"""
+        if col not in self._matchers or pd.isna(value):
+            return None
+        return self._resolve(col, str(value).lower().strip())
+
+    def normalize_series(self, series: pd.Series, col: str) -> pd.Series:
+        """
+        Normalize a column, matching each distinct value once
+
+        Missing values and values without a matching key are left unchanged.
+        """
+        if col not in self._matchers or series.empty:
+            return series
+        codes, uniques = pd.factorize(series, use_na_sentinel=True)
+        resolved = np.empty(len(uniques), dtype=object)
+        for i, value in enumerate(uniques):
+            target = self.resolve(col, value)
+            resolved[i] = value if target is None else target
+
+        values = series.to_numpy(dtype=object, copy=True)
+        present = codes >= 0
+        values[present] = resolved[codes[present]]
+        return pd.Series(values, index=series.index, name=series.name)
+
+    def normalize_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Normalize every mapped column present in ``df`` in place"""
+        for col in self.normalization_map:
+            if col in df.columns:
+                df[col] = self.normalize_series(df[col], col)
+        return df
+
+    def cache_info(self) -> Dict[str, int]:
+        info = self._resolve.cache_info()
+        return {"hits": info.hits, "misses": info.misses, "size": info.currsize, "max_size": info.maxsize}
+
+
+# Process-wide instance used by the API, the UI and the batch prediction script
+NORMALIZER = ColumnNormalizer(NORMALIZATION_MAP)
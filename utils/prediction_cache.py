@@ -0,0 +1,212 @@
+"""
+Cache of class probabilities keyed by prepared feature rows
+
+The same pipeline workbook is uploaded many times a day and most of its rows
+do not change between uploads. ``PredictionCache`` hashes every row of the
+prepared model input (after cleaning, normalization and ordinal mapping), so
+two spellings that normalize to the same features share an entry. Known rows
+are answered from memory; only the misses go to the model, in one batched
+call.
+
+Keys are two independent 64-bit ``hash_pandas_object`` hashes of the row plus
+the model version, so a retrain never serves stale probabilities and an
+accidental collision is practically impossible. The in-memory LRU is bounded
+by an estimate of its size in bytes. An optional SQLite file keeps entries
+across restarts and shares them between worker processes.
+"""
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Second hash key (16 bytes, like pandas' default) for the independent hash
+_SECOND_HASH_KEY = "deal-row-cache-2"
+
+# Rough per-entry overhead of the OrderedDict slot, key tuple and ndarray header
+_ENTRY_OVERHEAD_BYTES = 200
+
+# SQLite caps the number of bound parameters per statement
+_SQL_BATCH = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    model_version TEXT NOT NULL,
+    row_key TEXT NOT NULL,
+    probabilities BLOB NOT NULL,
+    PRIMARY KEY (model_version, row_key)
+)
+"""
+
+
+def row_keys(X: pd.DataFrame) -> List[int]:
+    """One 128-bit integer key per row of ``X`` (values only; the index is ignored)"""
+    first = pd.util.hash_pandas_object(X, index=False).to_numpy()
+    second = pd.util.hash_pandas_object(X, index=False, hash_key=_SECOND_HASH_KEY).to_numpy()
+    return [(a << 64) | b for a, b in zip(first.tolist(), second.tolist())]
+
+
+class PredictionCache:
+    """
+    Bounded LRU of per-row class probabilities, optionally backed by SQLite
+
+    Args:
+        max_bytes: Approximate memory budget for cached rows
+        db_path: Optional SQLite file for a persistent second level
+    """
+
+    def __init__(self, max_bytes: int, db_path: Optional[str] = None):
+        self.max_bytes = max_bytes
+        self.db_path = db_path
+        self._entries: "OrderedDict[Tuple[str, int], np.ndarray]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._version: Optional[str] = None
+        self._disk_version: Optional[str] = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if db_path:
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+            with self._connect() as conn:
+                conn.execute(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def predict_proba(self, X: pd.DataFrame, model_version: str,
+                      predict: Callable[[pd.DataFrame], np.ndarray]) -> np.ndarray:
+        """
+        Probabilities for every row of ``X``, calling ``predict`` on the misses only
+
+        Rows that repeat within ``X`` are predicted once. Probabilities are
+        returned (and kept) as float32, the precision XGBoost predicts in.
+        """
+        if len(X) == 0:
+            return predict(X)
+        with self._lock:
+            if model_version != self._version:
+                # After a retrain the old entries can never be hit again
+                self._entries.clear()
+                self._bytes = 0
+                self._version = model_version
+        keys = row_keys(X)
+        found = self._lookup(model_version, keys)
+
+        missing: Dict[int, int] = {}
+        for i, key in enumerate(keys):
+            if key not in found and key not in missing:
+                missing[key] = i
+        if missing:
+            positions = list(missing.values())
+            computed = np.asarray(predict(X.iloc[positions]), dtype=np.float32)
+            # Copies, so a cached row does not keep the whole batch array alive
+            new_entries = {key: row.copy() for key, row in zip(missing, computed)}
+            self._store(model_version, new_entries)
+            found.update(new_entries)
+
+        with self._lock:
+            self.misses += len(missing)
+            self.hits += len(keys) - len(missing)
+        return np.stack([found[key] for key in keys])
+
+    def _lookup(self, model_version: str, keys: List[int]) -> Dict[int, np.ndarray]:
+        found = {}
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get((model_version, key))
+                if entry is not None:
+                    self._entries.move_to_end((model_version, key))
+                    found[key] = entry
+        if self.db_path:
+            remaining = list({key for key in keys if key not in found})
+            from_disk = self._disk_lookup(model_version, remaining)
+            if from_disk:
+                with self._lock:
+                    self.disk_hits += len(from_disk)
+                    for key, probs in from_disk.items():
+                        self._insert((model_version, key), probs)
+                found.update(from_disk)
+        return found
+
+    def _store(self, model_version: str, entries: Dict[int, np.ndarray]) -> None:
+        with self._lock:
+            for key, probs in entries.items():
+                self._insert((model_version, key), probs)
+        if self.db_path:
+            self._disk_store(model_version, entries)
+
+    def _insert(self, cache_key: Tuple[str, int], probs: np.ndarray) -> None:
+        """Add one entry and evict the least recently used ones over budget (lock held)"""
+        previous = self._entries.pop(cache_key, None)
+        if previous is not None:
+            self._bytes -= previous.nbytes + _ENTRY_OVERHEAD_BYTES
+        self._entries[cache_key] = probs
+        self._bytes += probs.nbytes + _ENTRY_OVERHEAD_BYTES
+        while self._bytes > self.max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.nbytes + _ENTRY_OVERHEAD_BYTES
+            self.evictions += 1
+
+    def _disk_lookup(self, model_version: str, keys: List[int]) -> Dict[int, np.ndarray]:
+        found = {}
+        if not keys:
+            return found
+        # SQLite integers are 64-bit; the 128-bit keys are stored as hex text
+        hex_keys = [f"{key:032x}" for key in keys]
+        with self._connect() as conn:
+            for start in range(0, len(hex_keys), _SQL_BATCH):
+                batch = hex_keys[start:start + _SQL_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT row_key, probabilities FROM predictions "
+                    f"WHERE model_version = ? AND row_key IN ({placeholders})",
+                    (model_version, *batch),
+                ).fetchall()
+                for key, blob in rows:
+                    found[int(key, 16)] = np.frombuffer(blob, dtype=np.float32).copy()
+        return found
+
+    def _disk_store(self, model_version: str, entries: Dict[int, np.ndarray]) -> None:
+        with self._connect() as conn:
+            if self._disk_version != model_version:
+                # Rows of earlier models can never be hit again
+                conn.execute("DELETE FROM predictions WHERE model_version != ?", (model_version,))
+                self._disk_version = model_version
+            conn.executemany(
+                "INSERT OR REPLACE INTO predictions (model_version, row_key, probabilities) VALUES (?, ?, ?)",
+                [(model_version, f"{key:032x}", np.asarray(probs, dtype=np.float32).tobytes())
+                 for key, probs in entries.items()],
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                # Included in hits: rows found in the SQLite file, not in memory
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+                "disk_path": self.db_path,
+            }
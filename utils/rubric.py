@@ -0,0 +1,160 @@
+"""
+Business-logic scoring rubric
+
+Every rubric factor is an ordinal column: the category labels map to codes
+0/2/3/5 (``ORDINAL_MAPPINGS``, with 2 used for empty or unknown values), and
+each code earns a fixed number of points. The point tables are compiled into
+one NumPy array indexed by ``[factor, code]``, so a whole block of deals is
+scored with a single fancy-indexing pass instead of a Python loop per row.
+
+The same tables feed the API, the Streamlit breakdown view and the synthetic
+data generator.
+"""
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+# Code used for empty/unrecognized values (neutral, better than the weakest category)
+NEUTRAL_CODE = 2
+
+# Category label -> ordinal code, shared by training and every prediction path
+ORDINAL_MAPPINGS = {
+    "Account Engagement": {"High (Existing+Good)": 5, "Medium (Existing+Poor)": 3, "Low (New Account)": 0},
+    "Client Relationship": {"Strong": 5, "Neutral": 3, "Weak": 0},
+    "Deal Coach": {"Active & Available": 5, "Passive": 3, "Not Available": 0},
+    "Bidder Rank": {"Top": 5, "Middle": 3, "Bottom": 0},
+    "Incumbency Share": {"High (>50%)": 5, "Medium (20-50%)": 3, "Low (<20%)": 0, "None": 0},
+    "References": {"Strong (Domain+Tech)": 5, "Average": 3, "Weak/None": 0},
+    "Solution Strength": {"Strong (Covers all)": 5, "Average (Gaps)": 3, "Weak": 0},
+    "Client Impression": {"Positive": 5, "Neutral": 3, "Negative": 0},
+    "Orals Score": {"Strong": 5, "At Par": 3, "Weak": 0},
+    "Price Alignment": {"On par with Client Budget": 5, "Above Client Budget with Rationale/Caveats": 3, "Above Client Budget": 0, "Client Budget Info not available": 2},
+    "Price Position": {"Lowest": 5, "Competitive": 3, "Expensive": 0},
+    "Current RFP Stage": {"Negotiation": 15, "Defence Cleared": 10, "Proposal Submitted": 5, "RFP Received": 0}
+}
+
+WON_THRESHOLD = 60
+LOST_THRESHOLD = 40
+
+
+@dataclass(frozen=True)
+class RubricFactor:
+    """One scored parameter: ordinal code -> points, within a rubric group"""
+    name: str
+    group: str
+    max_points: int
+    points: Dict[int, int]
+
+
+RUBRIC_GROUPS = ("Relationship", "Competition", "Solution", "Orals", "Price")
+
+# The 11 factors of the business-logic score (max 100 points)
+RUBRIC: List[RubricFactor] = [
+    RubricFactor("Account Engagement", "Relationship", 10, {5: 10, 3: 5, 2: 2, 0: 0}),
+    RubricFactor("Client Relationship", "Relationship", 10, {5: 10, 3: 5, 2: 2, 0: 0}),
+    RubricFactor("Deal Coach", "Relationship", 10, {5: 10, 3: 5, 2: 2, 0: 0}),
+    RubricFactor("Bidder Rank", "Competition", 15, {5: 15, 3: 5, 2: 2, 0: 0}),
+    RubricFactor("Incumbency Share", "Competition", 10, {5: 10, 3: 5, 2: 2, 0: 0}),
+    RubricFactor("References", "Solution", 7, {5: 7, 3: 3, 2: 1, 0: 0}),
+    RubricFactor("Solution Strength", "Solution", 7, {5: 7, 3: 3, 2: 1, 0: 0}),
+    RubricFactor("Client Impression", "Solution", 6, {5: 6, 3: 3, 2: 1, 0: 0}),
+    RubricFactor("Orals Score", "Orals", 15, {5: 15, 3: 8, 2: 4, 0: 0}),
+    RubricFactor("Price Alignment", "Price", 5, {5: 5, 3: 3, 2: 2, 0: 0}),
+    RubricFactor("Price Position", "Price", 5, {5: 5, 3: 2, 0: 0}),
+]
+
+# Used only by the synthetic data generator; not part of the business-logic score
+STAGE_FACTOR = RubricFactor("Current RFP Stage", "Process", 15, {15: 15, 10: 10, 5: 5, 0: 0})
+
+RUBRIC_BY_NAME = {factor.name: factor for factor in RUBRIC + [STAGE_FACTOR]}
+
+
+def compile_points_table(factors: Sequence[RubricFactor]) -> np.ndarray:
+    """Return an int array ``table[factor, code] = points``; codes without an entry score 0"""
+    width = max(max(f.points) for f in factors) + 1
+    table = np.zeros((len(factors), width), dtype=np.int16)
+    for i, factor in enumerate(factors):
+        for code, pts in factor.points.items():
+            table[i, code] = pts
+    return table
+
+
+POINTS_TABLE = compile_points_table(RUBRIC)
+_GROUP_INDEX = np.array([RUBRIC_GROUPS.index(f.group) for f in RUBRIC])
+
+
+@dataclass
+class RubricScores:
+    """Scores for a block of deals (all arrays have one entry per row)"""
+    total: np.ndarray
+    points: np.ndarray
+    groups: Dict[str, np.ndarray]
+    status: np.ndarray
+
+
+def lookup_points(codes: np.ndarray, table: np.ndarray = POINTS_TABLE) -> np.ndarray:
+    """
+    Points for a ``(rows, factors)`` block of ordinal codes
+
+    NaN, fractional and out-of-range codes score 0, like a missing key in the
+    original per-factor dicts.
+    """
+    codes = np.asarray(codes, dtype=np.float64)
+    width = table.shape[1]
+    valid = (codes >= 0) & (codes < width) & (codes == np.floor(codes))
+    idx = np.where(valid, codes, 0).astype(np.intp)
+    points = table[np.arange(table.shape[0]), idx]
+    return np.where(valid, points, 0)
+
+
+def score_block(X: Union[pd.DataFrame, np.ndarray], factors: Optional[Sequence[RubricFactor]] = None) -> RubricScores:
+    """
+    Score ordinal-coded deals in one vectorized pass
+
+    Args:
+        X: Frame with one column per rubric factor (missing columns score 0),
+           or a ``(rows, factors)`` array in ``RUBRIC`` order
+        factors: Factor list when not using the default ``RUBRIC``
+    """
+    factors = RUBRIC if factors is None else list(factors)
+    table = POINTS_TABLE if factors is RUBRIC else compile_points_table(factors)
+
+    if isinstance(X, pd.DataFrame):
+        codes = np.zeros((len(X), len(factors)), dtype=np.float64)
+        for i, factor in enumerate(factors):
+            if factor.name in X.columns:
+                codes[:, i] = pd.to_numeric(X[factor.name], errors="coerce").to_numpy(dtype=np.float64)
+    else:
+        codes = np.asarray(X, dtype=np.float64).reshape(-1, len(factors))
+
+    points = lookup_points(codes, table)
+    total = points.sum(axis=1)
+
+    group_names = [f.group for f in factors]
+    groups = {}
+    for group in dict.fromkeys(group_names):
+        cols = [i for i, g in enumerate(group_names) if g == group]
+        groups[group] = points[:, cols].sum(axis=1)
+
+    return RubricScores(total=total, points=points, groups=groups, status=logic_status(total))
+
+
+def logic_status(total: np.ndarray) -> np.ndarray:
+    """Won at 60+, Lost at 40 or below, Aborted/Risk in between"""
+    total = np.asarray(total)
+    return np.select([total >= WON_THRESHOLD, total <= LOST_THRESHOLD], ["Won", "Lost"], "Aborted/Risk")
+
+
+def win_probability_category(total: np.ndarray) -> np.ndarray:
+    """Bucket business-logic scores (0-100) into Very High/High/Medium/Low"""
+    pct = np.round(np.asarray(total, dtype=np.float64))
+    return np.select([pct > 80, pct >= 61, pct >= 41], ["Very High", "High", "Medium"], "Low")
+
+
+def label_points(name: str, label) -> int:
+    """Points a single category label earns for factor ``name`` (0 if unknown)"""
+    factor = RUBRIC_BY_NAME[name]
+    code = ORDINAL_MAPPINGS.get(name, {}).get(label)
+    return factor.points.get(code, 0)
@@ -0,0 +1,147 @@
+"""
+Feature schema persisted next to the trained model
+
+The training script records the column order, raw dtypes, drop list,
+categorical vocabularies and numeric medians of the data the model was fitted
+on. Prediction paths load this small JSON file instead of re-reading the
+synthetic training workbook to discover the expected columns and types.
+"""
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+FEATURE_SCHEMA_FILENAME = "feature_schema.json"
+SCHEMA_FORMAT_VERSION = 1
+
+NUMERIC_DTYPES = ("int64", "float64")
+
+
+@dataclass
+class FeatureSchema:
+    """Column layout and statistics of the training features"""
+    target: str
+    columns: List[str]
+    dtypes: Dict[str, str]
+    drop_columns: List[str]
+    numeric_columns: List[str]
+    categorical_columns: List[str]
+    ordinal_columns: List[str] = field(default_factory=list)
+    categories: Dict[str, List[str]] = field(default_factory=dict)
+    medians: Dict[str, Optional[float]] = field(default_factory=dict)
+    classes: List[str] = field(default_factory=list)
+    training_rows: int = 0
+    created_at: str = ""
+    format_version: int = SCHEMA_FORMAT_VERSION
+
+    def is_numeric(self, col: str) -> bool:
+        """Whether the column was numeric in the raw training data"""
+        return self.dtypes.get(col) in NUMERIC_DTYPES
+
+    def add_missing_columns(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Add expected columns absent from ``df`` with the same defaults as before (0.0 / "UNKNOWN")"""
+        for col in self.columns:
+            if col not in df.columns:
+                df[col] = 0.0 if self.is_numeric(col) else "UNKNOWN"
+        return df
+
+    def coerce_types(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Cast expected columns to the raw training dtype family (numeric or string)"""
+        for col in self.columns:
+            if col in df.columns:
+                if self.is_numeric(col):
+                    df[col] = pd.to_numeric(df[col], errors="coerce")
+                else:
+                    df[col] = df[col].astype(str)
+        return df
+
+    def fill_numeric(self, df: pd.DataFrame, cols: List[str]) -> pd.DataFrame:
+        """Impute numeric columns with the training medians (0.0 if none was recorded)"""
+        for col in cols:
+            if col in df.columns and df[col].isna().any():
+                median_val = self.medians.get(col)
+                df[col] = df[col].fillna(0.0 if median_val is None else median_val)
+        return df
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "FeatureSchema":
+        known = {k: v for k, v in data.items() if k in cls.__dataclass_fields__}
+        return cls(**known)
+
+
+def build_feature_schema(
+    raw_df: pd.DataFrame,
+    X: pd.DataFrame,
+    target: str,
+    drop_columns: List[str],
+    numeric_columns: List[str],
+    categorical_columns: List[str],
+    ordinal_columns: List[str],
+    classes: List[str],
+) -> FeatureSchema:
+    """
+    Describe the preprocessed training features
+
+    Args:
+        raw_df: Training data as loaded, before any cleaning
+        X: Preprocessed feature frame passed to the pipeline
+        target: Name of the target column
+        drop_columns: Columns removed before training
+        numeric_columns: Columns passed through as numbers (incl. ordinal-mapped ones)
+        categorical_columns: Columns one-hot encoded by the pipeline
+        ordinal_columns: Columns converted with the ordinal business mapping
+        classes: Label encoder classes
+    """
+    medians = {}
+    for col in numeric_columns:
+        # Several columns are empty in the synthetic data; their median is None
+        values = pd.to_numeric(X[col], errors="coerce").dropna()
+        medians[col] = float(values.median()) if len(values) else None
+
+    categories = {
+        col: sorted(str(v) for v in X[col].dropna().unique())
+        for col in categorical_columns
+    }
+
+    return FeatureSchema(
+        target=target,
+        columns=[str(c) for c in X.columns],
+        dtypes={str(c): str(raw_df[c].dtype) for c in X.columns if c in raw_df.columns},
+        drop_columns=list(drop_columns),
+        numeric_columns=list(numeric_columns),
+        categorical_columns=list(categorical_columns),
+        ordinal_columns=list(ordinal_columns),
+        categories=categories,
+        medians=medians,
+        classes=[str(c) for c in classes],
+        training_rows=int(len(X)),
+        created_at=datetime.now().isoformat(),
+    )
+
+
+def save_feature_schema(schema: FeatureSchema, path: str) -> None:
+    """Write the schema as JSON, replacing any previous file atomically"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(schema.to_dict(), f, indent=2, default=_json_default)
+    os.replace(tmp_path, path)
+
+
+def load_feature_schema(path: str) -> FeatureSchema:
+    """Read a schema written by :func:`save_feature_schema`"""
+    with open(path, "r", encoding="utf-8") as f:
+        return FeatureSchema.from_dict(json.load(f))
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
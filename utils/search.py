@@ -0,0 +1,198 @@
+"""
+Cross-validation and hyper-parameter search with early stopping in every fold
+
+``cross_val_score``, ``RandomizedSearchCV`` and ``HalvingRandomSearchCV``
+pass no ``eval_set`` to the model, so training had to switch early stopping
+off for them and every fit grew its full 500-1,500 trees. The runner here
+does the same fold fits itself: each fold's training rows are split once
+more into a fit part and a small validation part (``validation_fraction``,
+stratified), the model early-stops on that part, and the fold is scored on
+its test rows as before. Along with the score it records the best iteration
+of every fit, so the winner can be refit with the tree count its folds
+actually used.
+
+``EarlyStoppingSearch`` samples candidates with ``ParameterSampler`` and
+builds the folds with ``check_cv``, exactly as the sklearn searches do, so
+with the same ``random_state`` both evaluate the same settings on the same
+folds. It exposes the attributes training reads from a search:
+``best_params_``, ``best_score_``, ``cv_results_``, ``n_splits_`` and, for
+halving, ``n_candidates_``.
+
+Given a ``TrainingProgress`` (``utils/training_progress.py``), every fit
+gets a progress callback labelled with its candidate and fold.
+"""
+import math
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.metrics import get_scorer
+from sklearn.model_selection import ParameterSampler, check_cv, train_test_split
+
+DEFAULT_VALIDATION_FRACTION = 0.1
+
+
+def validation_split(y: np.ndarray, validation_fraction: float, random_state: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Positions of the fit and validation rows of ``y`` (stratified when every class has two rows)"""
+    counts = np.unique(y, return_counts=True)[1]
+    return train_test_split(
+        np.arange(len(y)), test_size=validation_fraction, random_state=random_state,
+        stratify=y if counts.min() >= 2 else None
+    )
+
+
+def fit_early_stopping(estimator, X, y, validation_fraction: float, random_state: int, callbacks=None):
+    """
+    Fit a Pipeline ending in an XGBoost model, early-stopping on a split of its own rows
+
+    Returns the fitted pipeline and its tree count: ``best_iteration + 1``,
+    or every boosted round when the model has no ``early_stopping_rounds``.
+    ``callbacks`` replaces the model's XGBoost callbacks for this fit.
+    """
+    fit_idx, val_idx = validation_split(y, validation_fraction, random_state)
+    step = estimator.steps[-1][0]
+    if callbacks is not None:
+        estimator.set_params(**{f"{step}__callbacks": callbacks})
+    estimator.fit(X[fit_idx], y[fit_idx], **{f"{step}__eval_set": [(X[val_idx], y[val_idx])], f"{step}__verbose": False})
+    model = estimator.steps[-1][1]
+    try:
+        n_trees = model.best_iteration + 1
+    except AttributeError:
+        n_trees = model.get_booster().num_boosted_rounds()
+    return estimator, int(n_trees)
+
+
+def _fit_and_score(estimator, X, y, train, test, params, scorer, validation_fraction, random_state,
+                   progress=None, label=None):
+    start = time.perf_counter()
+    callbacks = [progress.callback(label)] if progress is not None else None
+    fitted, n_trees = fit_early_stopping(
+        clone(estimator).set_params(**params), X[train], y[train], validation_fraction, random_state, callbacks
+    )
+    return float(scorer(fitted, X[test], y[test])), n_trees, time.perf_counter() - start
+
+
+def cross_validate_early_stopping(estimator, X, y, cv, scoring: str = "f1_weighted", n_jobs: Optional[int] = None,
+                                  validation_fraction: float = DEFAULT_VALIDATION_FRACTION,
+                                  random_state: int = 42, progress=None) -> Tuple[List[float], List[int]]:
+    """``cross_val_score`` with early stopping per fold; returns (scores, trees used per fold)"""
+    folds = list(check_cv(cv, y, classifier=True).split(X, y))
+    results = Parallel(n_jobs=n_jobs)(
+        delayed(_fit_and_score)(estimator, X, y, train, test, {}, get_scorer(scoring), validation_fraction,
+                                random_state, progress, f"fold {k + 1}/{len(folds)}")
+        for k, (train, test) in enumerate(folds)
+    )
+    return [r[0] for r in results], [r[1] for r in results]
+
+
+class EarlyStoppingSearch:
+    """
+    Random or successive-halving search whose fits early-stop on a validation split
+
+    Args:
+        estimator: Pipeline whose last step is an XGBoost model with ``early_stopping_rounds`` set
+        param_distributions: Sampled like ``RandomizedSearchCV``'s
+        search: "random" (``n_iter`` candidates) or "halving"
+        n_iter: Candidates of the random search
+        factor: Halving: share of candidates kept (1 / factor) and resource multiplier per round
+        resource: Halving: the parameter raised each round (a tree cap, with early stopping)
+        min_resources, max_resources: Halving: resource of the first and last round
+        rounds: Halving: number of rounds; the first has ``factor ** (rounds - 1)`` candidates
+        cv: Folds, as for the sklearn searches
+        scoring: Scorer name
+        validation_fraction: Share of each fold's training rows used for early stopping
+        random_state: Seed for candidate sampling and the validation splits
+        n_jobs: Parallel fits
+        verbose: Print one line per round
+        progress: ``TrainingProgress`` told about every fit (candidate and fold)
+    """
+
+    def __init__(self, estimator, param_distributions: Dict[str, Any], search: str = "random", n_iter: int = 20,
+                 factor: int = 3, resource: Optional[str] = None, min_resources: Optional[int] = None,
+                 max_resources: Optional[int] = None, rounds: int = 4, cv=3, scoring: str = "f1_weighted",
+                 validation_fraction: float = DEFAULT_VALIDATION_FRACTION, random_state: int = 42,
+                 n_jobs: Optional[int] = None, verbose: int = 0, progress=None):
+        self.estimator = estimator
+        self.param_distributions = param_distributions
+        self.search = search
+        self.n_iter = n_iter
+        self.factor = factor
+        self.resource = resource
+        self.min_resources = min_resources
+        self.max_resources = max_resources
+        self.rounds = rounds
+        self.cv = cv
+        self.scoring = scoring
+        self.validation_fraction = validation_fraction
+        self.random_state = random_state
+        self.n_jobs = n_jobs
+        self.verbose = verbose
+        self.progress = progress
+
+    def fit(self, X, y) -> "EarlyStoppingSearch":
+        folds = list(check_cv(self.cv, y, classifier=True).split(X, y))
+        self.n_splits_ = len(folds)
+        scorer = get_scorer(self.scoring)
+        results = {"params": [], "iter": [], "n_resources": [], "mean_test_score": [], "std_test_score": [],
+                   "best_iterations": [], "mean_best_iteration": [], "mean_fit_time": []}
+
+        def evaluate(candidates: List[dict], round_no: int, n_resources: Optional[int]) -> List[float]:
+            settings = [dict(c, **{self.resource: n_resources}) if n_resources else c for c in candidates]
+            prefix = f"round {round_no + 1}, " if self.search == "halving" else ""
+            out = Parallel(n_jobs=self.n_jobs)(
+                delayed(_fit_and_score)(self.estimator, X, y, train, test, params, scorer,
+                                        self.validation_fraction, self.random_state, self.progress,
+                                        f"{prefix}candidate {i + 1}/{len(settings)}, fold {k + 1}/{len(folds)}")
+                for i, params in enumerate(settings) for k, (train, test) in enumerate(folds)
+            )
+            means = []
+            for i, params in enumerate(settings):
+                scores, trees, times = zip(*out[i * len(folds):(i + 1) * len(folds)])
+                results["params"].append(params)
+                results["iter"].append(round_no)
+                results["n_resources"].append(n_resources)
+                results["mean_test_score"].append(float(np.mean(scores)))
+                results["std_test_score"].append(float(np.std(scores)))
+                results["best_iterations"].append(list(trees))
+                results["mean_best_iteration"].append(float(np.mean(trees)))
+                results["mean_fit_time"].append(float(np.mean(times)))
+                means.append(float(np.mean(scores)))
+            if self.verbose:
+                print(f"Round {round_no}: {len(settings)} candidates x {len(folds)} folds, "
+                      f"resource {n_resources}, best {max(means):.4f}")
+            return means
+
+        if self.search == "random":
+            candidates = list(ParameterSampler(self.param_distributions, self.n_iter, random_state=self.random_state))
+            evaluate(candidates, 0, None)
+            last_round = 0
+        elif self.search == "halving":
+            # As HalvingRandomSearchCV with n_candidates="exhaust": keep the best 1/factor each round
+            candidates = list(ParameterSampler(
+                self.param_distributions, self.factor ** (self.rounds - 1), random_state=self.random_state
+            ))
+            self.n_candidates_ = []
+            for round_no in range(self.rounds):
+                n_resources = min(self.min_resources * self.factor ** round_no, self.max_resources)
+                self.n_candidates_.append(len(candidates))
+                means = evaluate(candidates, round_no, n_resources)
+                last_round = round_no
+                if len(candidates) == 1:
+                    break
+                keep = max(1, math.ceil(len(candidates) / self.factor))
+                order = np.argsort(means, kind="stable")[::-1][:keep]
+                candidates = [candidates[i] for i in sorted(order)]
+        else:
+            raise ValueError(f"Unknown search mode '{self.search}'")
+
+        self.cv_results_ = results
+        scores = np.asarray(results["mean_test_score"])
+        in_last = np.flatnonzero(np.asarray(results["iter"]) == last_round)
+        self.best_index_ = int(in_last[np.argmax(scores[in_last])])
+        self.best_params_ = dict(results["params"][self.best_index_])
+        self.best_score_ = float(self.cv_results_["mean_test_score"][self.best_index_])
+        # Trees the winner's folds kept on average: the count to refit with
+        self.best_iteration_ = int(round(self.cv_results_["mean_best_iteration"][self.best_index_]))
+        return self
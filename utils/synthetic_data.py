@@ -0,0 +1,344 @@
+"""
+Columnar synthetic deal generator
+
+``src/generate_synthetic_data.py`` builds one dict per deal in
+``generate_record``: dozens of ``random.choices`` calls, a nested scoring
+closure, a Python sort of the factor list and f-string remarks per row,
+about 20,000 rows/s. ``generate_deals`` produces the same columns with the
+same distributions for all rows at once with a NumPy ``Generator``:
+
+- every factor column is a small integer code array (the index of its
+  label), drawn with per-row cumulative weights picked by the row's target
+  status (Won/Lost/Aborted, cycling with the row index as before)
+- the early-stage masking, the sparse-win and the relationship-loss
+  overrides are boolean masks applied with ``np.where``, in the precedence
+  order of the row-wise code
+- points, maxima, sentiment and the text of each (factor, label) pair come
+  from the shared rubric (``utils/rubric.py``) and are compiled into
+  ``[factor, code]`` tables, so scoring is one fancy-indexing pass
+- the top three contributing factors are an ``argsort`` of a per-row key
+  that encodes the row-wise ordering (preferred sentiment first, then
+  magnitude, then factor order)
+
+Label columns are returned as ``category``. The random stream differs from
+``random``, so the rows are a different draw from the same distributions,
+not the same rows.
+"""
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .rubric import RUBRIC_BY_NAME, label_points
+
+DEAL_STATUSES = ("Won", "Lost", "Aborted")
+WON, LOST, ABORTED = range(3)
+
+# Values that carry no information: not scored and not counted in the maximum
+MISSING_LABELS = ("Not Available", "No Intel", "Unknown")
+
+# Per target status: weights of the [best, mid, worst] options, and of the
+# 4-option factors (RFP stage, price alignment)
+STATUS_WEIGHTS = np.array([[0.90, 0.10, 0.0], [0.0, 0.10, 0.90], [0.10, 0.80, 0.10]])
+STATUS_WEIGHTS_4 = np.array([[0.80, 0.15, 0.0, 0.05], [0.0, 0.10, 0.70, 0.20], [0.05, 0.60, 0.10, 0.25]])
+# Won deals lean towards existing business (EE, EN, EE, EN, NN)
+BUSINESS_WEIGHTS = np.array([[0.4, 0.4, 0.2], [1 / 3, 1 / 3, 1 / 3], [1 / 3, 1 / 3, 1 / 3]])
+# Client Relationship (Strong, Neutral) when the account engagement is high
+HIGH_ENGAGEMENT_RELATIONSHIP_WEIGHTS = np.array([[0.9, 0.1], [0.2, 0.8], [0.5, 0.5]])
+
+SBUS = ("Europe", "IMEA", "APJ", "ASV")
+ACCOUNT_NAMES = ("HSBC", "MOHRE", "Cummins", "Cadent", "GSK", "Etihad")
+BUSINESS_TYPES = ("EE", "EN", "NN")
+QUARTERS = ("Q1'25", "Q2'25", "Q1'24", "Q2'24", "Q3'25", "Q4'24")
+SALES_STAGES = ("P1", "P2", "P3", "P3.1", "P4", "P5", "P0", "P-3", "P-2", "P-1")
+STAGE_DESCRIPTIONS = ("Active", "Won ", "Hold", "Aborted", "Lost", "Opp Identified")
+BID_TIMELINES = ("Q1'25", "Q2'25", "Q3'25", "Q4'25")
+
+
+@dataclass(frozen=True)
+class SyntheticFactor:
+    """One generated rubric column: its labels (drawn options first, then override-only ones) and L1/L2 tags"""
+    name: str
+    l1: str
+    l2: str
+    labels: Sequence[str]
+
+
+# In the order the row-wise generator scores them (ties in the factor ranking keep this order)
+FACTORS = [
+    SyntheticFactor("Current RFP Stage", "Process", "RFP Stage",
+                    ("Negotiation", "Defence Cleared", "Proposal Submitted", "RFP Received")),
+    SyntheticFactor("Account Engagement", "Relationship", "Client Relationship (CXOs, decision makers, influencers)",
+                    ("High (Existing+Good)", "Medium (Existing+Poor)", "Low (New Account)", "Unknown")),
+    SyntheticFactor("Client Relationship", "Relationship", "Client Relationship (CXOs, decision makers, influencers)",
+                    ("Strong", "Neutral", "Weak", "Unknown")),
+    SyntheticFactor("Deal Coach", "Relationship", "Deal Coach availability/ fit",
+                    ("Active & Available", "Passive", "Not Available")),
+    SyntheticFactor("Bidder Rank", "Relationship",
+                    "Competition and Incumbency (strategic, CSAT, delivery track record)",
+                    ("Top", "Middle", "Bottom", "Not Available")),
+    SyntheticFactor("Incumbency Share", "Commercials", "Incumbency advantage/discounting",
+                    ("High (>50%)", "Medium (20-50%)", "Low (<20%)", "None", "Unknown")),
+    SyntheticFactor("References", "Capability_or_Credentials", "References (Scale, Domain, Usecase) & Case Studies",
+                    ("Strong (Domain+Tech)", "Average", "Weak/None")),
+    SyntheticFactor("Solution Strength", "Solution",
+                    "Technical Response Quality (coherent, competitive, consultative, competitive)",
+                    ("Strong (Covers all)", "Average (Gaps)", "Weak", "Not Available")),
+    SyntheticFactor("Client Impression", "Solution", "PoV/ Thought Leadership", ("Positive", "Neutral", "Negative")),
+    SyntheticFactor("Orals Score", "Solution", "Orals Performance", ("Strong", "At Par", "Weak", "Not Available")),
+    SyntheticFactor("Price Alignment", "Commercials", "Deviation/fit to win price",
+                    ("On par with Client Budget", "Above Client Budget with Rationale/Caveats", "Above Client Budget",
+                     "Client Budget Info not available")),
+    SyntheticFactor("Price Position", "Commercials", "Pricing model innovation/ Commercial Structure",
+                    ("Lowest", "Competitive", "Expensive", "Not Available")),
+]
+
+# Columns of a generated frame, in the order generate_record returns them
+OUTPUT_COLUMNS = [
+    "CRM ID", "SBU", "Qtr of closure", "Deal Status", "Account Name", "Opportunity Name", "SST Sales Stage",
+    "Stage Description", "Expected TCV ($Mn)", "Deal Size bucket", "Type of Business", "Current RFP Stage",
+    "Account Engagement", "Client Relationship", "Deal Coach", "Bidder Rank", "Incumbency Share", "References",
+    "Solution Strength", "Client Impression", "Orals Score", "Price Alignment", "Price Position",
+    "Calculated Score", "Primary L1", "Primary L2", "Secondary L1", "Secondary L2", "Tertiary L1", "Tertiary L2",
+    "Detailed Remarks", "Bid Qualification (BQ)  Score", "Winnability/ BQ  Feedback", "SBU Head Involved",
+    "SL Heads Involved", "Were we the lowest price? Y/N", "Bid Timeline", "Bid-Team size", "Deal Scope", "DD", "EA",
+    "Client Partner/ Opp. Owner", "BM",
+]
+
+
+@dataclass(frozen=True)
+class _FactorTables:
+    """``[factor, code]`` lookups compiled from ``FACTORS`` and the rubric"""
+    points: np.ndarray      # points earned (0 when missing)
+    max_points: np.ndarray  # factor maximum, 0 when missing
+    rank_key: np.ndarray    # [0 Won / 1 Lost+Aborted, factor, code]: sort key, smallest ranks first
+    l1_code: np.ndarray     # index into l1_categories ("" when missing)
+    l2_code: np.ndarray     # index into l2_categories: "<L2> - <label> (<sentiment>)", "" when missing
+    l1_categories: list
+    l2_categories: list
+
+
+def _compile_tables(factors: Sequence[SyntheticFactor]) -> _FactorTables:
+    width = max(len(f.labels) for f in factors)
+    shape = (len(factors), width)
+    points = np.zeros(shape, dtype=np.int64)
+    max_points = np.zeros(shape, dtype=np.int64)
+    available = np.zeros(shape, dtype=bool)
+    magnitude = np.zeros(shape)
+    sentiment = np.zeros(shape, dtype=np.int8)  # 1 positive, -1 negative, 0 neutral
+    l1_code = np.zeros(shape, dtype=np.intp)
+    l2_code = np.zeros(shape, dtype=np.intp)
+    l1_categories, l2_categories = [""], [""]
+    for i, factor in enumerate(factors):
+        for code, label in enumerate(factor.labels):
+            if label in MISSING_LABELS:
+                continue
+            score, maximum = label_points(factor.name, label), RUBRIC_BY_NAME[factor.name].max_points
+            normalized = score / maximum
+            if normalized >= 0.7:
+                sentiment[i, code], magnitude[i, code], word = 1, normalized, "(Positive)"
+            elif normalized <= 0.3:
+                sentiment[i, code], magnitude[i, code], word = -1, 1.0 - normalized, "(Negative)"
+            else:
+                sentiment[i, code], magnitude[i, code], word = 0, 0.5, "(Neutral)"
+            points[i, code], max_points[i, code], available[i, code] = score, maximum, True
+            for table, categories, text in ((l1_code, l1_categories, factor.l1),
+                                            (l2_code, l2_categories, f"{factor.l2} - {label} {word}")):
+                if text not in categories:
+                    categories.append(text)
+                table[i, code] = categories.index(text)
+
+    # Won deals list positive factors first, Lost/Aborted negative ones; then by
+    # magnitude (largest first), then in factor order. Missing labels come last.
+    factor_index = np.arange(len(factors))[:, None]
+    rank_key = np.empty((2,) + shape, dtype=np.int16)
+    for status_class, preferred in enumerate((1, -1)):
+        group = np.where(available, np.where(sentiment == preferred, 0, 1), 2)
+        _, order = np.unique(group * 2.0 + (1.0 - magnitude), return_inverse=True)
+        rank_key[status_class] = order.reshape(shape) * len(factors) + factor_index
+    return _FactorTables(points, max_points, rank_key, l1_code, l2_code, l1_categories, l2_categories)
+
+
+_TABLES = _compile_tables(FACTORS)
+_FACTOR_INDEX = {f.name: i for i, f in enumerate(FACTORS)}
+
+
+def _cumulative(weights: np.ndarray) -> np.ndarray:
+    cum = np.cumsum(weights, axis=-1)
+    return cum / cum[..., -1:]
+
+
+def _pick(rng: np.random.Generator, weights: np.ndarray, status: np.ndarray) -> np.ndarray:
+    """
+    Option index per row, drawn with the weights of the row's status (``weights[status]``)
+
+    Like ``random.choices``: an option with weight 0 is never drawn.
+    """
+    cum = _cumulative(weights)[status]
+    u = rng.random(len(status))[:, None]
+    return np.minimum((u >= cum).sum(axis=1), weights.shape[-1] - 1).astype(np.int8)
+
+
+def _uniform(rng: np.random.Generator, options: Sequence[str], n_rows: int) -> pd.Categorical:
+    return pd.Categorical.from_codes(rng.integers(0, len(options), n_rows), categories=list(options))
+
+
+def _code(factor: str, label: str) -> int:
+    return FACTORS[_FACTOR_INDEX[factor]].labels.index(label)
+
+
+def _remarks(status: np.ndarray, l2: np.ndarray, total: np.ndarray, whole: np.ndarray) -> np.ndarray:
+    """
+    "Detailed Remarks" per row, each distinct one formatted once
+
+    A remark depends only on the status, the first two factors and the
+    score, so rows are keyed on those and the strings are built per key.
+    """
+    scores, score_index = np.unique(total, return_inverse=True)
+    n_texts, n_scores = len(_TABLES.l2_categories), 2 * len(scores)
+    key = ((status * n_texts + l2[:, 0]) * n_texts + l2[:, 1]) * n_scores + score_index * 2 + whole
+    keys, inverse = np.unique(key, return_inverse=True)
+    rest, score_key = np.divmod(keys, n_scores)
+    rest, second = np.divmod(rest, n_texts)
+    key_status, first = np.divmod(rest, n_texts)
+    texts = []
+    for st, a, b, sk in zip(key_status.tolist(), first.tolist(), second.tolist(), score_key.tolist()):
+        score = scores[sk // 2].item()
+        score_text = str(int(score)) if sk % 2 else str(score)
+        lead = "Won. Key drivers" if st == WON else f"{DEAL_STATUSES[st]}. Main issues"
+        texts.append(f"{lead}: {_TABLES.l2_categories[a]}, {_TABLES.l2_categories[b]}. Win Prob Score: {score_text}%")
+    return np.array(texts, dtype=object)[inverse]
+
+
+def generate_deals(n_rows: int, seed: Optional[int] = None, start_index: int = 1) -> pd.DataFrame:
+    """
+    ``n_rows`` synthetic deals with the columns and distributions of ``generate_record``
+
+    Args:
+        n_rows: Rows to generate
+        seed: Seed of the NumPy ``Generator`` (None: fresh entropy)
+        start_index: Index of the first row; numbers the CRM IDs and
+            opportunities and picks the target status (``index % 3``)
+    """
+    rng = np.random.default_rng(seed)
+    n = n_rows
+    index = np.arange(start_index, start_index + n)
+    status = (index % 3).astype(np.intp)
+    w, w4 = STATUS_WEIGHTS, STATUS_WEIGHTS_4
+
+    early = rng.random(n) < 0.5
+    sparse_win = (status == WON) & early & (rng.random(n) < 0.30)
+    relationship_loss = (status == LOST) & (rng.random(n) < 0.25)
+    sparse_or_early = sparse_win | early
+
+    # Relationship losses are net-new deals: no incumbency, low engagement
+    business = np.where(relationship_loss, 2, _pick(rng, BUSINESS_WEIGHTS, status))
+    net_new = business == 2
+
+    codes = {}
+    stage = _pick(rng, w4, status)
+    late_unknown = early & (rng.random(n) < 0.7)
+    codes["Current RFP Stage"] = np.where(late_unknown, 2 + (rng.random(n) >= 0.5), stage)
+
+    # Account engagement: [High, Medium] with [best, mid + worst] weights for existing business
+    engagement = _pick(rng, np.stack([w[:, 0], w[:, 1] + w[:, 2]], axis=1), status)
+    engagement = np.where(net_new, _code("Account Engagement", "Low (New Account)"), engagement)
+    unknown = _code("Account Engagement", "Unknown")
+    engagement = np.where(early & (rng.random(n) < 0.5), unknown, engagement)
+    engagement = np.where(sparse_win, unknown, engagement)
+    codes["Account Engagement"] = np.where(relationship_loss, _code("Account Engagement", "Low (New Account)"),
+                                           engagement)
+
+    high_engagement = codes["Account Engagement"] == 0
+    relationship = np.where(high_engagement, _pick(rng, HIGH_ENGAGEMENT_RELATIONSHIP_WEIGHTS, status),
+                            _pick(rng, w, status))
+    unknown = _code("Client Relationship", "Unknown")
+    relationship = np.where((early & (rng.random(n) < 0.5)) | sparse_win, unknown, relationship)
+    codes["Client Relationship"] = np.where(relationship_loss, _code("Client Relationship", "Weak"), relationship)
+
+    coach = _pick(rng, w, status)
+    codes["Deal Coach"] = np.where(sparse_win | (early & (rng.random(n) < 0.3)),
+                                   _code("Deal Coach", "Not Available"), coach)
+    codes["Bidder Rank"] = np.where(sparse_or_early, _code("Bidder Rank", "Not Available"), _pick(rng, w, status))
+
+    incumbency = np.where(net_new, _code("Incumbency Share", "None"), _pick(rng, w, status))
+    codes["Incumbency Share"] = np.where(sparse_win | (early & (rng.random(n) < 0.3)),
+                                         _code("Incumbency Share", "Unknown"), incumbency)
+
+    codes["References"] = np.where(sparse_win, _code("References", "Weak/None"), _pick(rng, w, status))
+
+    solution = _pick(rng, w, status)
+    solution = np.where(early & (rng.random(n) < 0.5), _code("Solution Strength", "Not Available"), solution)
+    codes["Solution Strength"] = np.where(sparse_win | relationship_loss,
+                                          _code("Solution Strength", "Strong (Covers all)"), solution)
+
+    codes["Client Impression"] = np.where(sparse_or_early, _code("Client Impression", "Neutral"),
+                                          _pick(rng, w, status))
+    codes["Orals Score"] = np.where(sparse_or_early, _code("Orals Score", "Not Available"), _pick(rng, w, status))
+
+    alignment = np.where(sparse_or_early, _code("Price Alignment", "Client Budget Info not available"),
+                         _pick(rng, w4, status))
+    codes["Price Alignment"] = np.where(relationship_loss, _code("Price Alignment", "Above Client Budget"), alignment)
+    position = np.where(sparse_or_early, _code("Price Position", "Not Available"), _pick(rng, w, status))
+    codes["Price Position"] = np.where(relationship_loss, _code("Price Position", "Expensive"), position)
+
+    # Score: points over the maximum of the factors that are known, as a percentage
+    code_block = np.stack([codes[f.name] for f in FACTORS], axis=1).astype(np.intp)
+    factor_index = np.arange(len(FACTORS))
+    current = _TABLES.points[factor_index, code_block].sum(axis=1)
+    maximum = _TABLES.max_points[factor_index, code_block].sum(axis=1)
+    percentage = current / maximum * 100 + rng.integers(-5, 6, n)
+    # max(0, min(100, x)) returns the int bound when x is at or past it
+    whole = (percentage <= 0) | (percentage >= 100)
+    total = np.round(np.clip(percentage, 0, 100), 2)
+
+    # Force alignment with the target status
+    won_low = (status == WON) & (total < 60)
+    lost_high = (status == LOST) & (total > 50)
+    aborted_out = (status == ABORTED) & ((total < 40) | (total > 60))
+    total = np.where(won_low, rng.integers(65, 96, n), total)
+    total = np.where(lost_high, rng.integers(20, 46, n), total)
+    total = np.where(aborted_out, rng.integers(45, 59, n), total)
+    whole |= won_low | lost_high | aborted_out
+
+    # Contributing factors: the first three by the row-wise ranking
+    keys = _TABLES.rank_key[np.minimum(status, 1)[:, None], factor_index, code_block]
+    top = np.argsort(keys, axis=1)[:, :3]
+    top_codes = code_block[np.arange(n)[:, None], top]
+    l1 = _TABLES.l1_code[top, top_codes]
+    l2 = _TABLES.l2_code[top, top_codes]
+    remarks = _remarks(status, l2, total, whole)
+
+    tcv = np.round(rng.uniform(5, 100, n), 2)
+    columns = {
+        "CRM ID": np.array([f"CRM{300000 + i}" for i in index.tolist()], dtype=object),
+        "SBU": _uniform(rng, SBUS, n),
+        "Qtr of closure": _uniform(rng, QUARTERS, n),
+        "Deal Status": pd.Categorical.from_codes(status, categories=list(DEAL_STATUSES)),
+        "Account Name": _uniform(rng, ACCOUNT_NAMES, n),
+        "Opportunity Name": np.array([f"Opportunity {i}" for i in index.tolist()], dtype=object),
+        "SST Sales Stage": _uniform(rng, SALES_STAGES, n),
+        "Stage Description": _uniform(rng, STAGE_DESCRIPTIONS, n),
+        "Expected TCV ($Mn)": tcv,
+        # TCV is at most 100, so every deal is in the smaller bucket
+        "Deal Size bucket": pd.Categorical.from_codes(np.zeros(n, dtype=np.int8), categories=["<250M", ">=250M"]),
+        "Type of Business": pd.Categorical.from_codes(business, categories=list(BUSINESS_TYPES)),
+    }
+    for factor in FACTORS:
+        columns[factor.name] = pd.Categorical.from_codes(codes[factor.name], categories=list(factor.labels))
+    columns["Calculated Score"] = total.astype(np.float64)
+    for slot, position_name in enumerate(("Primary", "Secondary", "Tertiary")):
+        columns[f"{position_name} L1"] = pd.Categorical.from_codes(l1[:, slot], categories=_TABLES.l1_categories)
+        columns[f"{position_name} L2"] = pd.Categorical.from_codes(l2[:, slot], categories=_TABLES.l2_categories)
+    columns["Detailed Remarks"] = remarks
+    for name in ("Bid Qualification (BQ)  Score", "Winnability/ BQ  Feedback", "SBU Head Involved",
+                 "SL Heads Involved"):
+        columns[name] = np.full(n, None, dtype=object)
+    columns["Were we the lowest price? Y/N"] = pd.Categorical.from_codes(
+        (codes["Price Position"] != _code("Price Position", "Lowest")).astype(np.int8), categories=["Y", "N"])
+    columns["Bid Timeline"] = _uniform(rng, BID_TIMELINES, n)
+    columns["Bid-Team size"] = np.zeros(n, dtype=np.int64)
+    for name in ("Deal Scope", "DD", "EA", "Client Partner/ Opp. Owner", "BM"):
+        columns[name] = np.full(n, "", dtype=object)
+    return pd.DataFrame(columns, columns=OUTPUT_COLUMNS)
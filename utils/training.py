@@ -0,0 +1,942 @@
+"""
+Importable training entry point for the XGBoost deal classifier
+
+``train(config)`` runs what ``src/train_xgb_classifier.py`` used to do at
+module level: load the training data named by the dataset manifest
+(``utils/datasets.py``), preprocess and encode it
+(once per dataset, see ``utils/training_data.py``), fit the
+baseline pipeline with early stopping, cross-validate, optionally tune with
+``RandomizedSearchCV``, evaluate on the holdout, compute every column's mean
+|SHAP contribution| on the holdout (stored in the model file, see
+``utils/explain.py``) and chart it, and write the artifacts (label encoder,
+feature schema, then the pipeline, each atomically, then the UBJSON model
+bundle of ``utils/model_bundle.py``). It returns a ``TrainingResult`` with
+the metrics, per-stage timings and artifact paths, so the API and the
+Streamlit UI can call it in their own worker instead of spawning an
+interpreter and scraping its stdout.
+
+Cross-validation, the search and the fits all work on rows of the cached
+float32 feature matrix; the fitted ColumnTransformer is only put in front of
+the model when the pipeline is saved.
+
+The search is either ``RandomizedSearchCV`` over ``PARAM_DISTRIBUTIONS``
+(``search="random"``) or successive halving over the same space
+(``search="halving"``). Halving uses the tree count as its budget: many
+candidates are scored with few trees, and only the best third move on to
+three times as many trees, up to the largest ``n_estimators`` of the space.
+
+Cross-validation and the search early-stop every fit on a validation split
+of its own fold (``utils/search.py``, ``early_stopping=True``), and the
+winner is refit with the tree count its folds stopped at; with
+``early_stopping=False`` they run the sklearn helpers with every fit
+growing its full tree count, as before.
+
+With ``external_memory=True`` the data is instead streamed from Parquet or
+CSV shards (``utils/training_shards.py``) into an external-memory
+``ExtMemQuantileDMatrix``, and one early-stopped model is fitted; memory is
+bounded by the batch size rather than the row count, and there is no
+cross-validation or search.
+
+Cross-validation and the search run many fits in parallel, each of which
+is multi-threaded itself. ``split_cores`` divides one core budget between
+the two levels (parallel fits x XGBoost threads per fit) instead of letting
+both default to every core and oversubscribe the machine.
+
+``train(config, progress=TrainingProgress(...))`` reports the stage, the
+search candidate / CV fold and every boosting iteration as it goes, and
+stops with ``TrainingCancelled`` soon after ``progress.cancel()``
+(``utils/training_progress.py``).
+
+A finished run is stored under a key made of the dataset's content
+fingerprint, the settings that change the model and the library versions
+(``utils/training_cache.py``). A later run with the same key restores that
+run's artifacts and result instead of training again, unless
+``reuse_cached_run=False``. A model promoted by ``utils/model_update.py``
+since then is kept rather than reverted.
+"""
+import logging
+import math
+import os
+import tempfile
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import asdict, dataclass, field, replace
+from typing import Any, Dict, List, Optional
+
+import joblib
+import numpy as np
+import xgboost as xgb
+from joblib import parallel_config
+from sklearn.base import clone
+from sklearn.metrics import (
+    accuracy_score,
+    classification_report,
+    confusion_matrix,
+    f1_score,
+    precision_score,
+    recall_score,
+)
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401  (enables HalvingRandomSearchCV)
+from sklearn.model_selection import (
+    HalvingRandomSearchCV, RandomizedSearchCV, StratifiedKFold, cross_val_score, train_test_split
+)
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import LabelEncoder
+
+from .datasets import DATASET_MANIFEST_PATH, resolve_dataset
+from .explain import (
+    booster_contributions, column_contributions, column_groups, encoded_feature_columns, mean_abs_contributions,
+    store_importance
+)
+from .fast_inference import best_iteration_range
+from .model_bundle import BUNDLE_BOOSTER_FILENAME, BUNDLE_SPEC_FILENAME, save_model_bundle
+from .model_store import file_digest
+from .search import DEFAULT_VALIDATION_FRACTION, EarlyStoppingSearch, cross_validate_early_stopping
+from .schema import FEATURE_SCHEMA_FILENAME, build_feature_schema, save_feature_schema
+from .training_cache import TRAINING_CACHE_DIR, cache_key, model_to_keep, read_entry, restore_files, write_entry
+from .training_data import (
+    DROP_COLUMNS, FEATURE_CACHE_DIR, TARGET_COLUMN, dataset_fingerprint, load_training_data
+)
+from .training_progress import TrainingCancelled, TrainingProgress
+from .training_shards import DEFAULT_BATCH_ROWS, ShardIterator, list_shards, scan_shards, shards_fingerprint
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Below roughly this many rows per thread, XGBoost's histogram building stops
+# gaining from extra threads; small sets are better served by parallel fits
+ROWS_PER_THREAD = 10_000
+
+PARAM_DISTRIBUTIONS = {
+    "model__n_estimators": [500, 1000, 1500],
+    "model__max_depth": [3, 5, 7, 9],
+    "model__learning_rate": [0.01, 0.05, 0.1, 0.2],
+    "model__subsample": [0.6, 0.8, 1.0],
+    "model__colsample_bytree": [0.5, 0.7, 0.9, 1.0],
+    "model__reg_alpha": [0, 0.1, 0.5, 1],
+    "model__reg_lambda": [1, 5, 10, 20],
+    "model__min_child_weight": [1, 3, 5]
+}
+
+SEARCH_MODES = ("random", "halving")
+
+# Successive-halving rounds: factor ** (rounds - 1) candidates start at
+# max(n_estimators) // factor ** (rounds - 1) trees (27 at 55 trees for factor 3)
+HALVING_ROUNDS = 4
+
+# External-memory runs compute the global contributions on at most this many sampled rows
+CONTRIBUTION_SAMPLE_ROWS = 5_000
+
+# TrainingConfig fields that change the trained model, and so the training cache key;
+# paths, core counts and logging only change how a run is carried out
+CACHE_KEY_FIELDS = (
+    "test_size", "cv_folds", "tune", "search", "n_iter", "halving_factor", "search_cv", "early_stopping",
+    "validation_fraction", "random_state", "external_memory", "batch_rows",
+)
+
+SHAP_SUMMARY_FILENAME = "shap_summary_classifier.png"
+
+# Files of a saved model, in the order they are written (the API reloads when the pipeline changes)
+MODEL_ARTIFACTS = ("label_encoder.pkl", FEATURE_SCHEMA_FILENAME, "xgb_classifier.pkl", BUNDLE_SPEC_FILENAME,
+                   BUNDLE_BOOSTER_FILENAME)
+
+
+@dataclass
+class TrainingConfig:
+    """
+    Inputs and switches of one training run
+
+    Args:
+        data_path: Training data (.parquet, .csv or .xlsx); None uses ``dataset`` from the dataset manifest
+        dataset: Manifest entry used when ``data_path`` is None; None uses the manifest's default
+        manifest_path: Dataset manifest (``utils/datasets.py``)
+        models_dir: Where the pipeline, label encoder and feature schema are written
+        output_dir: Where the SHAP summary plot is written
+        test_size: Holdout share for the final evaluation
+        cv_folds: Folds of the cross-validation report (0 skips it)
+        tune: Run the hyper-parameter search
+        search: "random" (RandomizedSearchCV) or "halving" (successive halving over tree counts)
+        n_iter: Parameter settings sampled by the random search
+        halving_factor: Share of candidates kept (1 / factor) and tree multiplier per halving round
+        search_cv: Folds used inside the search
+        early_stopping: Early-stop every cross-validation and search fit on a validation split of its
+            fold, and refit the winner with the tree count the folds stopped at
+        validation_fraction: Share of each fold's training rows used for that early stopping
+        shap_summary: Save a bar chart of the holdout's mean |SHAP contribution| per column
+            when matplotlib is installed
+        random_state: Seed for the split, folds, search and model
+        verbose: Print XGBoost's evaluation log and the search progress
+        n_cores: Core budget for the run; None uses every core this process may run on
+        search_workers: Force the number of parallel fits in CV and the search
+        model_threads: Force XGBoost's threads per fit in CV and the search
+        feature_cache_dir: Where encoded feature matrices are cached; None disables the cache
+        external_memory: Stream ``data_path`` (a file or a directory of .parquet/.csv/.xlsx shards)
+            batch by batch into an external-memory DMatrix; skips cross-validation and the search
+        batch_rows: Rows per batch in external-memory mode
+        training_cache_dir: Where finished runs are stored by dataset, settings and library versions;
+            None neither reads nor writes the cache
+        reuse_cached_run: Return a stored run with the same key instead of training (a fresh run
+            still replaces the stored one)
+    """
+    data_path: Optional[str] = None
+    dataset: Optional[str] = None
+    manifest_path: str = DATASET_MANIFEST_PATH
+    models_dir: str = os.path.join(PROJECT_ROOT, "models")
+    output_dir: str = os.path.join(PROJECT_ROOT, "data", "output")
+    test_size: float = 0.2
+    cv_folds: int = 5
+    tune: bool = True
+    search: str = "random"
+    n_iter: int = 20
+    halving_factor: int = 3
+    search_cv: int = 3
+    early_stopping: bool = True
+    validation_fraction: float = DEFAULT_VALIDATION_FRACTION
+    shap_summary: bool = True
+    random_state: int = 42
+    verbose: bool = False
+    n_cores: Optional[int] = None
+    search_workers: Optional[int] = None
+    model_threads: Optional[int] = None
+    feature_cache_dir: Optional[str] = FEATURE_CACHE_DIR
+    external_memory: bool = False
+    batch_rows: int = DEFAULT_BATCH_ROWS
+    training_cache_dir: Optional[str] = TRAINING_CACHE_DIR
+    reuse_cached_run: bool = True
+
+
+@dataclass(frozen=True)
+class CoreSplit:
+    """Parallel fits (joblib ``n_jobs``) and XGBoost threads per fit"""
+    workers: int
+    threads: int
+
+
+@dataclass
+class ClassificationMetrics:
+    """Holdout metrics of one fitted pipeline (precision/recall/F1 weighted by support)"""
+    accuracy: float
+    precision: float
+    recall: float
+    f1: float
+    confusion_matrix: List[List[int]]
+    report: Dict[str, Any]
+
+
+@dataclass
+class TrainingResult:
+    """Outcome of :func:`train`: metrics, timings (seconds) and artifact paths"""
+    data_path: str
+    training_rows: int
+    classes: List[str]
+    baseline: ClassificationMetrics
+    final: ClassificationMetrics
+    cv_f1_scores: List[float] = field(default_factory=list)
+    best_params: Dict[str, Any] = field(default_factory=dict)
+    search_mode: Optional[str] = None
+    search_fits: int = 0
+    search_best_f1: Optional[float] = None
+    search_candidates: List[Dict[str, Any]] = field(default_factory=list)
+    cv_best_iterations: List[int] = field(default_factory=list)
+    timings: Dict[str, float] = field(default_factory=dict)
+    model_path: str = ""
+    encoder_path: str = ""
+    schema_path: str = ""
+    bundle_path: Optional[str] = None
+    shap_summary_path: Optional[str] = None
+    feature_contributions: Dict[str, float] = field(default_factory=dict)
+    core_splits: Dict[str, CoreSplit] = field(default_factory=dict)
+    dataset_fingerprint: str = ""
+    feature_cache_hit: bool = False
+    external_memory: bool = False
+    training_cache_key: Optional[str] = None
+    training_cache_hit: bool = False
+
+    @property
+    def validation_accuracy(self) -> float:
+        """Holdout accuracy of the saved model"""
+        return self.final.accuracy
+
+    @property
+    def cv_f1_mean(self) -> Optional[float]:
+        return float(np.mean(self.cv_f1_scores)) if self.cv_f1_scores else None
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["validation_accuracy"] = self.validation_accuracy
+        data["cv_f1_mean"] = self.cv_f1_mean
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TrainingResult":
+        """Inverse of :meth:`to_dict` (derived and unknown keys are ignored)"""
+        known = {k: v for k, v in data.items() if k in cls.__dataclass_fields__}
+        known["baseline"] = ClassificationMetrics(**known["baseline"])
+        known["final"] = ClassificationMetrics(**known["final"])
+        known["core_splits"] = {stage: CoreSplit(**split) for stage, split in known.get("core_splits", {}).items()}
+        return cls(**known)
+
+
+def available_cores() -> int:
+    """Cores this process may run on (CPU affinity where the platform reports it)"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def split_cores(budget: int, n_rows: int, n_tasks: int,
+                workers: Optional[int] = None, threads: Optional[int] = None) -> CoreSplit:
+    """
+    Divide ``budget`` cores between parallel fits and threads per fit
+
+    Each fit gets about one thread per ``ROWS_PER_THREAD`` training rows, the
+    remaining cores run fits side by side (never more than there are fits),
+    and cores left over go back to the threads. Unless both are forced,
+    ``workers * threads`` never exceeds the budget.
+
+    Args:
+        budget: Cores available to the whole step
+        n_rows: Rows each fit trains on
+        n_tasks: Independent fits in the step (folds x candidates)
+        workers: Fixed number of parallel fits (derived when None)
+        threads: Fixed threads per fit (derived when None)
+    """
+    budget = max(1, budget)
+    n_tasks = max(1, n_tasks)
+    if workers is None:
+        wanted = threads or min(budget, max(1, n_rows // ROWS_PER_THREAD))
+        workers = max(1, min(n_tasks, budget // wanted))
+    if threads is None:
+        threads = max(1, budget // workers)
+    return CoreSplit(workers=workers, threads=threads)
+
+
+def build_model(num_classes: int, random_state: int = 42) -> xgb.XGBClassifier:
+    """XGBoost classifier with early stopping (multi:softprob, or binary:logistic for two outcomes)"""
+    if num_classes == 2:
+        objective, eval_metric = "binary:logistic", "logloss"
+    else:
+        objective, eval_metric = "multi:softprob", "mlogloss"
+    return xgb.XGBClassifier(
+        objective=objective,
+        eval_metric=eval_metric,
+        n_jobs=-1,
+        random_state=random_state,
+        n_estimators=1000,
+        early_stopping_rounds=50
+    )
+
+
+def booster_params(model: xgb.XGBClassifier, num_classes: int, n_threads: int, random_state: int) -> dict:
+    """Training parameters of a classifier in ``xgb.train`` form"""
+    params = {k: v for k, v in model.get_xgb_params().items() if v is not None}
+    params.pop("n_jobs", None)
+    params.pop("random_state", None)
+    params["nthread"] = n_threads
+    params["seed"] = random_state
+    if params.get("objective", "").startswith("multi:"):
+        params["num_class"] = num_classes
+    return params
+
+
+def make_search(pipeline: Pipeline, config: TrainingConfig, n_jobs: int,
+                progress: Optional[TrainingProgress] = None):
+    """
+    The configured hyper-parameter search over ``PARAM_DISTRIBUTIONS`` (not refit)
+
+    With ``config.early_stopping`` it is an :class:`EarlyStoppingSearch` over
+    the same candidates and folds, and ``pipeline`` keeps its
+    ``early_stopping_rounds``; ``progress`` is told about each of its fits.
+
+    Raises:
+        ValueError: ``config.search`` is not one of ``SEARCH_MODES``
+    """
+    common = dict(
+        cv=config.search_cv,
+        scoring="f1_weighted",
+        verbose=2 if config.verbose else 0,
+        random_state=config.random_state,
+        n_jobs=n_jobs,
+        refit=False
+    )
+    if config.search in SEARCH_MODES and config.early_stopping:
+        max_trees = max(PARAM_DISTRIBUTIONS["model__n_estimators"])
+        return EarlyStoppingSearch(
+            pipeline,
+            PARAM_DISTRIBUTIONS if config.search == "random" else
+            {k: v for k, v in PARAM_DISTRIBUTIONS.items() if k != "model__n_estimators"},
+            search=config.search,
+            n_iter=config.n_iter,
+            factor=config.halving_factor,
+            resource="model__n_estimators",
+            min_resources=max_trees // config.halving_factor ** (HALVING_ROUNDS - 1),
+            max_resources=max_trees,
+            rounds=HALVING_ROUNDS,
+            cv=config.search_cv,
+            scoring="f1_weighted",
+            validation_fraction=config.validation_fraction,
+            random_state=config.random_state,
+            n_jobs=n_jobs,
+            verbose=common["verbose"],
+            progress=progress,
+        )
+    if config.search == "random":
+        return RandomizedSearchCV(pipeline, param_distributions=PARAM_DISTRIBUTIONS, n_iter=config.n_iter, **common)
+    if config.search == "halving":
+        # The tree count is the budget that grows per round, so it is not sampled
+        max_trees = max(PARAM_DISTRIBUTIONS["model__n_estimators"])
+        params = {k: v for k, v in PARAM_DISTRIBUTIONS.items() if k != "model__n_estimators"}
+        return HalvingRandomSearchCV(
+            pipeline,
+            param_distributions=params,
+            factor=config.halving_factor,
+            resource="model__n_estimators",
+            max_resources=max_trees,
+            min_resources=max_trees // config.halving_factor ** (HALVING_ROUNDS - 1),
+            n_candidates="exhaust",
+            **common
+        )
+    raise ValueError(f"Unknown search mode '{config.search}' (expected one of {', '.join(SEARCH_MODES)})")
+
+
+def planned_search_fits(config: TrainingConfig) -> int:
+    """Model fits the configured search will run, known before it starts (for progress reporting)"""
+    if config.search == "halving":
+        first_round = config.halving_factor ** (HALVING_ROUNDS - 1)
+        candidates = sum(math.ceil(first_round / config.halving_factor ** r) for r in range(HALVING_ROUNDS))
+    else:
+        candidates = config.n_iter
+    return candidates * config.search_cv
+
+
+def search_fits(search) -> int:
+    """Model fits a finished search ran (candidates x folds, summed over halving rounds)"""
+    rounds = getattr(search, "n_candidates_", None)
+    candidates = sum(rounds) if rounds is not None else len(search.cv_results_["params"])
+    return int(candidates * search.n_splits_)
+
+
+def evaluate(model, X_test, y_test: np.ndarray, class_names) -> ClassificationMetrics:
+    return classification_metrics(y_test, model.predict(X_test), class_names)
+
+
+def classification_metrics(y_test: np.ndarray, preds: np.ndarray, class_names) -> ClassificationMetrics:
+    return ClassificationMetrics(
+        accuracy=float(accuracy_score(y_test, preds)),
+        precision=float(precision_score(y_test, preds, average="weighted", zero_division=0)),
+        recall=float(recall_score(y_test, preds, average="weighted", zero_division=0)),
+        f1=float(f1_score(y_test, preds, average="weighted", zero_division=0)),
+        confusion_matrix=confusion_matrix(y_test, preds).tolist(),
+        report=classification_report(
+            y_test, preds, labels=np.arange(len(class_names)), target_names=[str(c) for c in class_names],
+            zero_division=0, output_dict=True
+        ),
+    )
+
+
+def log_metrics(title: str, metrics: ClassificationMetrics) -> None:
+    logger.info(title)
+    logger.info(f"Accuracy : {metrics.accuracy}")
+    logger.info(f"Precision: {metrics.precision}")
+    logger.info(f"Recall   : {metrics.recall}")
+    logger.info(f"F1-score : {metrics.f1}")
+    logger.info(f"Confusion Matrix:\n{np.array(metrics.confusion_matrix)}")
+
+
+def dump_atomic(obj, path: str) -> None:
+    """Write to a temp file and rename so a running API never reads a half-written pickle"""
+    tmp_path = f"{path}.tmp"
+    joblib.dump(obj, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def save_artifacts(models_dir: str, pipeline: Pipeline, label_encoder: LabelEncoder, feature_schema) -> tuple:
+    """
+    Write the label encoder, feature schema, pipeline and model bundle
+
+    Returns their paths (model, encoder, schema, bundle booster); the bundle
+    path is None when the pipeline's layout cannot be bundled.
+    """
+    os.makedirs(models_dir, exist_ok=True)
+    model_path = os.path.join(models_dir, "xgb_classifier.pkl")
+    encoder_path = os.path.join(models_dir, "label_encoder.pkl")
+    schema_path = os.path.join(models_dir, FEATURE_SCHEMA_FILENAME)
+
+    # Encoder and schema first: the API reloads when the model file changes
+    dump_atomic(label_encoder, encoder_path)
+    save_feature_schema(feature_schema, schema_path)
+    dump_atomic(pipeline, model_path)
+    # After the pickle, so a complete bundle is never older than the pipeline it was made from
+    bundle = save_model_bundle(pipeline, label_encoder, models_dir)
+    return model_path, encoder_path, schema_path, bundle[0] if bundle else None
+
+
+def holdout_importance(model: Pipeline, M: np.ndarray) -> Dict[str, float]:
+    """
+    Mean |contribution| per raw column of ``model`` over the encoded rows ``M``, stored on its booster
+
+    Exact TreeSHAP values from ``Booster.predict(pred_contribs=True)`` in one
+    call over the whole matrix; the model file then carries them
+    (``utils.explain.stored_importance``).
+    """
+    prep, xgb_model = model.named_steps["prep"], model.named_steps["model"]
+    columns, groups = column_groups(encoded_feature_columns(prep))
+    booster = xgb_model.get_booster()
+    contribs = booster_contributions(booster, np.asarray(M, dtype=np.float32), best_iteration_range(xgb_model))
+    importance = mean_abs_contributions(column_contributions(contribs, groups), columns)
+    store_importance(booster, importance)
+    return importance
+
+
+def save_shap_summary(importance: Dict[str, float], path: str, top: int = 20) -> Optional[str]:
+    """Bar chart of the ``top`` columns by mean |SHAP contribution|; None when matplotlib is unavailable"""
+    try:
+        import matplotlib
+        matplotlib.use("Agg")  # Training may run in a worker thread without a display
+        import matplotlib.pyplot as plt
+    except ImportError:
+        logger.warning("SHAP chart skipped (install with: pip install matplotlib)")
+        return None
+
+    try:
+        names, values = list(importance)[:top][::-1], list(importance.values())[:top][::-1]
+        plt.figure(figsize=(8, 6))
+        plt.barh(names, values)
+        plt.xlabel("mean |SHAP contribution| (holdout)")
+        plt.title("Feature contributions")
+        plt.tight_layout()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        plt.savefig(path, dpi=150)
+        plt.close()
+        logger.info(f"Saved SHAP summary to {path}")
+        return path
+    except Exception as e:
+        logger.warning(f"SHAP plot skipped or failed: {e}")
+        return None
+
+
+def _plain(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Parameter dict with NumPy scalars turned into Python numbers (JSON-serialisable)"""
+    return {k: v.item() if isinstance(v, np.generic) else v for k, v in params.items()}
+
+
+def train(config: Optional[TrainingConfig] = None, progress: Optional[TrainingProgress] = None) -> TrainingResult:
+    """
+    Train, evaluate and save the deal classifier
+
+    With ``config.training_cache_dir`` set, a run whose dataset contents,
+    settings and library versions match a stored run copies that run's
+    artifacts into ``config.models_dir`` and returns its result
+    (``training_cache_hit``) without loading or fitting anything; every run
+    that trains is stored for the next one (``utils/training_cache.py``).
+
+    Args:
+        config: Run settings; defaults reproduce the original training script
+        progress: Receives stage, fold/candidate and iteration updates; cancelling it stops the run
+
+    Raises:
+        FileNotFoundError: No training workbook was found
+        KeyError: The workbook has no ``Deal Status`` column
+        TrainingCancelled: ``progress.cancel()`` was called before the artifacts were written
+    """
+    config = config or TrainingConfig()
+    started = time.perf_counter()
+    config = replace(config, data_path=config.data_path or resolve_dataset(config.dataset, config.manifest_path))
+    key = training_cache_key(config) if config.training_cache_dir else None
+    # An entry that exists now was passed over (retrain, unreadable, older format): this run replaces it
+    replace_entry = key is not None and os.path.isdir(os.path.join(config.training_cache_dir, key))
+    if key is not None and config.reuse_cached_run:
+        cached = restore_cached_run(config, key, progress, started)
+        if cached is not None:
+            return cached
+
+    # Parallel fits run as threads so their callbacks reach this progress object
+    backend = parallel_config(backend="threading") if progress is not None else nullcontext()
+    try:
+        with backend:
+            if config.external_memory:
+                result = train_external_memory(config, progress)
+            else:
+                result = train_in_memory(config, progress)
+    except TrainingCancelled:
+        raise
+    except Exception:
+        # sklearn's searches catch a cancelled fit and fail later with their own error
+        if progress is not None and progress.cancelled:
+            raise TrainingCancelled(progress.reason) from None
+        raise
+
+    if key is not None:
+        store_run(config, key, result, replace=replace_entry)
+    return result
+
+
+def training_cache_key(config: TrainingConfig) -> str:
+    """
+    Training cache key of a run: content fingerprint of its data, the settings that change the model,
+    the search space, the baseline model's parameters and the library versions
+    """
+    if config.external_memory:
+        fingerprint = shards_fingerprint(list_shards(config.data_path))
+    else:
+        if not os.path.exists(config.data_path):
+            raise FileNotFoundError(f"Synthetic data not found at {config.data_path}")
+        fingerprint = dataset_fingerprint(config.data_path)
+    definition = {name: getattr(config, name) for name in CACHE_KEY_FIELDS}
+    definition.update(
+        param_distributions=PARAM_DISTRIBUTIONS,
+        halving_rounds=HALVING_ROUNDS,
+        contribution_sample_rows=CONTRIBUTION_SAMPLE_ROWS,
+        model=build_model(3, config.random_state).get_params(),
+    )
+    return cache_key(fingerprint, definition)
+
+
+def restore_cached_run(config: TrainingConfig, key: str, progress: Optional[TrainingProgress],
+                       started: float) -> Optional[TrainingResult]:
+    """
+    The stored result of ``key`` with its artifacts copied into ``config.models_dir``; None on a miss
+
+    A newer model that no training run produced (a promoted update) is left
+    in place; the stored result is still returned.
+    """
+    entry = read_entry(config.training_cache_dir, key)
+    if entry is None:
+        return None
+    if progress is not None:
+        progress.stage("cache")
+    entry_dir, stored = entry
+    model_path = os.path.join(config.models_dir, "xgb_classifier.pkl")
+    kept = model_to_keep(config.training_cache_dir, entry_dir, model_path)
+    if kept is None:
+        restore_files(entry_dir, MODEL_ARTIFACTS, config.models_dir)
+        has_bundle = os.path.exists(os.path.join(entry_dir, BUNDLE_BOOSTER_FILENAME))
+    else:
+        logger.info(f"Kept the model in {config.models_dir} (version {kept}): it is newer than training cache "
+                    f"entry {key} and no training run produced it, e.g. it was promoted by an update")
+        has_bundle = os.path.exists(os.path.join(config.models_dir, BUNDLE_BOOSTER_FILENAME))
+    shap_path = None
+    if config.shap_summary and os.path.exists(os.path.join(entry_dir, SHAP_SUMMARY_FILENAME)):
+        restore_files(entry_dir, [SHAP_SUMMARY_FILENAME], config.output_dir)
+        shap_path = os.path.join(config.output_dir, SHAP_SUMMARY_FILENAME)
+
+    elapsed = round(time.perf_counter() - started, 3)
+    logger.info(f"Training cache hit {key}: reused the run stored in {entry_dir} ({elapsed:.3f} s)")
+    return replace(
+        TrainingResult.from_dict(stored),
+        data_path=config.data_path,
+        timings={"cache": elapsed, "total": elapsed},
+        model_path=model_path,
+        encoder_path=os.path.join(config.models_dir, "label_encoder.pkl"),
+        schema_path=os.path.join(config.models_dir, FEATURE_SCHEMA_FILENAME),
+        bundle_path=os.path.join(config.models_dir, BUNDLE_BOOSTER_FILENAME) if has_bundle else None,
+        shap_summary_path=shap_path,
+        training_cache_key=key,
+        training_cache_hit=True,
+    )
+
+
+def store_run(config: TrainingConfig, key: str, result: TrainingResult, replace: bool = False) -> None:
+    """
+    Store a finished run's artifacts and result under ``key`` (a failed write is logged, not raised)
+
+    ``replace`` swaps out an existing entry for ``key``. Without it an entry
+    that another run stored while this one trained is kept.
+    """
+    result.training_cache_key = key
+    files = [result.encoder_path, result.schema_path, result.model_path]
+    if result.bundle_path:
+        files += [os.path.join(config.models_dir, BUNDLE_SPEC_FILENAME), result.bundle_path]
+    if result.shap_summary_path:
+        files.append(result.shap_summary_path)
+    try:
+        entry_dir = write_entry(config.training_cache_dir, key, files, result.to_dict(), {
+            "data_path": config.data_path,
+            "dataset_fingerprint": result.dataset_fingerprint,
+            "model_digest": file_digest(result.model_path),
+            "settings": {name: getattr(config, name) for name in CACHE_KEY_FIELDS},
+        }, replace=replace)
+        logger.info(f"Stored training run {key} in {entry_dir}")
+    except FileExistsError as e:
+        logger.info(f"Did not store training run {key}: {e}")
+    except OSError as e:
+        logger.warning(f"Could not store training run {key}: {e}")
+
+
+def train_in_memory(config: TrainingConfig, progress: Optional[TrainingProgress] = None) -> TrainingResult:
+    """
+    :func:`train` on one workbook held in memory: baseline fit, cross-validation, search, refit
+
+    Raises:
+        FileNotFoundError: No training workbook was found
+        KeyError: The workbook has no ``Deal Status`` column
+    """
+    if config.tune and config.search not in SEARCH_MODES:
+        raise ValueError(f"Unknown search mode '{config.search}' (expected one of {', '.join(SEARCH_MODES)})")
+    budget = config.n_cores or available_cores()
+    core_splits: Dict[str, CoreSplit] = {}
+    timings: Dict[str, float] = {}
+    started = time.perf_counter()
+
+    @contextmanager
+    def timed(stage: str, fits: int = 0):
+        if progress is not None:
+            progress.stage(stage, fits)
+        t0 = time.perf_counter()
+        yield
+        timings[stage] = round(time.perf_counter() - t0, 3)
+
+    def callbacks(label: Optional[str] = None, rounds: Optional[int] = None):
+        return [progress.callback(label, rounds)] if progress is not None else None
+
+    with timed("load"):
+        data_path = config.data_path or resolve_dataset(config.dataset, config.manifest_path)
+        data = load_training_data(data_path, config.feature_cache_dir)
+
+    with timed("preprocess"):
+        le = LabelEncoder()
+        y = le.fit_transform(data.target)
+        # Split row positions; folds and candidates index the encoded matrix with them
+        train_idx, test_idx = train_test_split(
+            np.arange(len(y)), test_size=config.test_size, stratify=y, random_state=config.random_state
+        )
+        # The saved encoder only knows the training rows' categories, like a pipeline fitted on them
+        prep, columns = data.fit_encoder(train_idx)
+        M_train, M_test = data.matrix[train_idx][:, columns], data.matrix[test_idx][:, columns]
+        y_train, y_test = y[train_idx], y[test_idx]
+        # Only the model is fitted from here on; "model__" keeps the parameter names of the saved pipeline
+        estimator = Pipeline([("model", build_model(len(le.classes_), config.random_state))])
+
+    with timed("fit", fits=1):
+        # A single fit: all of the budget goes to XGBoost's threads
+        core_splits["fit"] = CoreSplit(workers=1, threads=budget)
+        estimator.set_params(model__n_jobs=budget,
+                             model__callbacks=callbacks("baseline", estimator.named_steps["model"].n_estimators))
+        estimator.fit(M_train, y_train, model__eval_set=[(M_test, y_test)], model__verbose=config.verbose)
+        baseline = evaluate(estimator, M_test, y_test, le.classes_)
+    log_metrics("Baseline classification metrics:", baseline)
+
+    if not config.early_stopping:
+        # The sklearn helpers pass no eval_set, so early stopping is off from here on
+        estimator.set_params(model__early_stopping_rounds=None)
+
+    cv_scores: List[float] = []
+    cv_trees: List[int] = []
+    if config.cv_folds > 1:
+        with timed("cross_validation", fits=config.cv_folds):
+            split = split_cores(budget, len(y) * (config.cv_folds - 1) // config.cv_folds, config.cv_folds,
+                                config.search_workers, config.model_threads)
+            core_splits["cross_validation"] = split
+            cv = StratifiedKFold(n_splits=config.cv_folds, shuffle=True, random_state=config.random_state)
+            # Folds keep the whole file's vocabulary: a category missing from a fold's
+            # training rows is an all-zero column there, which no tree splits on
+            cv_estimator = clone(estimator).set_params(model__n_jobs=split.threads, model__callbacks=callbacks())
+            if config.early_stopping:
+                cv_scores, cv_trees = cross_validate_early_stopping(
+                    cv_estimator, data.matrix, y, cv, scoring="f1_weighted", n_jobs=split.workers,
+                    validation_fraction=config.validation_fraction, random_state=config.random_state,
+                    progress=progress
+                )
+            else:
+                cv_scores = cross_val_score(
+                    cv_estimator, data.matrix, y, cv=cv, scoring="f1_weighted", n_jobs=split.workers
+                ).tolist()
+        logger.info(f"Cross-validation F1 scores: {cv_scores} (mean {np.mean(cv_scores):.4f})")
+        if cv_trees:
+            logger.info(f"Cross-validation trees after early stopping: {cv_trees}")
+
+    best_params: Dict[str, Any] = {}
+    search_candidates: List[Dict[str, Any]] = []
+    if config.tune:
+        with timed("tuning", fits=planned_search_fits(config)):
+            # Halving's first round is its widest: factor ** (rounds - 1) candidates
+            first_round = config.n_iter if config.search == "random" else config.halving_factor ** (HALVING_ROUNDS - 1)
+            split = split_cores(budget, len(y_train) * (config.search_cv - 1) // config.search_cv,
+                                first_round * config.search_cv, config.search_workers, config.model_threads)
+            core_splits["tuning"] = split
+            search = make_search(clone(estimator).set_params(model__n_jobs=split.threads, model__callbacks=callbacks()),
+                                 config, split.workers, progress)
+            search.fit(M_train, y_train)
+        best_params = _plain(search.best_params_)
+        if config.early_stopping:
+            # The tuned tree count: where the winner's folds stopped on average
+            best_params["model__n_estimators"] = search.best_iteration_
+            search_candidates = [
+                {"params": _plain(params), "cv_f1": score, "best_iterations": trees, "n_resources": resources}
+                for params, score, trees, resources in zip(
+                    search.cv_results_["params"], search.cv_results_["mean_test_score"],
+                    search.cv_results_["best_iterations"], search.cv_results_["n_resources"])
+            ]
+        logger.info(f"Best params ({config.search} search, {search_fits(search)} fits, "
+                    f"CV F1 {search.best_score_:.4f}): {best_params}")
+        with timed("refit", fits=1):
+            # Refit the winner ourselves: the search's own refit would be limited to split.threads
+            core_splits["refit"] = CoreSplit(workers=1, threads=budget)
+            estimator = clone(estimator).set_params(**best_params, model__n_jobs=budget,
+                                                    model__early_stopping_rounds=None)
+            estimator.set_params(model__callbacks=callbacks("refit", estimator.named_steps["model"].n_estimators))
+            estimator.fit(M_train, y_train)
+
+    # The saved pipeline puts the encoder fitted on the training split in front of the model
+    best_model = Pipeline([("prep", prep), ("model", estimator.named_steps["model"])])
+
+    # Saved models predict with every core of whichever machine loads them, as before;
+    # the progress callback belongs to this run and is not pickled with the model
+    best_model.set_params(model__n_jobs=-1, model__callbacks=None)
+    logger.info("Core budget %d split (workers x threads): %s", budget,
+                {stage: f"{s.workers}x{s.threads}" for stage, s in core_splits.items()})
+
+    with timed("evaluation"):
+        final = evaluate(estimator, M_test, y_test, le.classes_)
+    log_metrics("Final classification metrics:", final)
+
+    with timed("contributions"):
+        importance = holdout_importance(best_model, M_test)
+    shap_path = None
+    if config.shap_summary:
+        with timed("shap"):
+            shap_path = save_shap_summary(importance, os.path.join(config.output_dir, SHAP_SUMMARY_FILENAME))
+
+    with timed("save"):
+        # Feature schema: lets prediction run without the training workbook
+        feature_schema = build_feature_schema(
+            raw_df=data.raw_columns,
+            X=data.X,
+            target=TARGET_COLUMN,
+            drop_columns=DROP_COLUMNS + [TARGET_COLUMN],
+            numeric_columns=data.numeric_columns,
+            categorical_columns=data.categorical_columns,
+            ordinal_columns=data.ordinal_columns,
+            classes=le.classes_,
+        )
+        model_path, encoder_path, schema_path, bundle_path = save_artifacts(
+            config.models_dir, best_model, le, feature_schema
+        )
+    logger.info(f"Model saved to: {model_path}")
+
+    timings["total"] = round(time.perf_counter() - started, 3)
+    return TrainingResult(
+        data_path=data_path,
+        training_rows=int(len(y)),
+        classes=[str(c) for c in le.classes_],
+        baseline=baseline,
+        final=final,
+        cv_f1_scores=[float(s) for s in cv_scores],
+        best_params=best_params,
+        search_mode=config.search if config.tune else None,
+        search_fits=search_fits(search) if config.tune else 0,
+        search_best_f1=float(search.best_score_) if config.tune else None,
+        search_candidates=search_candidates,
+        cv_best_iterations=cv_trees,
+        timings=timings,
+        model_path=model_path,
+        encoder_path=encoder_path,
+        schema_path=schema_path,
+        bundle_path=bundle_path,
+        shap_summary_path=shap_path,
+        feature_contributions=importance,
+        core_splits=core_splits,
+        dataset_fingerprint=data.fingerprint,
+        feature_cache_hit=data.cache_hit,
+    )
+
+
+def train_external_memory(config: TrainingConfig, progress: Optional[TrainingProgress] = None) -> TrainingResult:
+    """
+    Train one early-stopped model on shards streamed through an external-memory DMatrix
+
+    ``config.data_path`` is a data file or a directory of shards. One pass
+    over the shards fixes the encoder, the feature schema and the label
+    classes (``scan_shards``); XGBoost then pulls encoded batches from two
+    ``ShardIterator``s, for the training rows and for a ``test_size`` share
+    of held-out rows that drives early stopping and the final metrics. The
+    saved artifacts are the same as :func:`train`'s.
+
+    Raises:
+        FileNotFoundError: No training data or no shards were found
+        KeyError: A shard has no ``Deal Status`` column
+    """
+    budget = config.n_cores or available_cores()
+    timings: Dict[str, float] = {}
+    started = time.perf_counter()
+    if config.tune or config.cv_folds > 1:
+        logger.info("External-memory training fits one model: cross-validation and the search are skipped")
+
+    @contextmanager
+    def timed(stage: str, fits: int = 0):
+        if progress is not None:
+            progress.stage(stage, fits)
+        t0 = time.perf_counter()
+        yield
+        timings[stage] = round(time.perf_counter() - t0, 3)
+
+    with timed("load"):
+        data_path = config.data_path or resolve_dataset(config.dataset, config.manifest_path)
+        scan = scan_shards(list_shards(data_path), config.batch_rows, random_state=config.random_state,
+                           holdout_size=config.test_size)
+    le = scan.label_encoder
+    logger.info(f"Scanned {scan.rows} rows in {len(scan.paths)} shard(s) from {data_path}")
+
+    model = build_model(len(le.classes_), config.random_state)
+    with tempfile.TemporaryDirectory(prefix="xgb-extmem-") as cache_dir:
+        with timed("fit", fits=1):
+            iterators = {
+                part: ShardIterator(scan, part, config.test_size, config.batch_rows, config.random_state,
+                                    cache_prefix=os.path.join(cache_dir, part))
+                for part in ("train", "holdout")
+            }
+            dtrain = xgb.ExtMemQuantileDMatrix(iterators["train"], nthread=budget)
+            dholdout = xgb.ExtMemQuantileDMatrix(iterators["holdout"], ref=dtrain, nthread=budget)
+            booster = xgb.train(
+                booster_params(model, len(le.classes_), budget, config.random_state), dtrain,
+                num_boost_round=model.n_estimators, evals=[(dholdout, "holdout")],
+                early_stopping_rounds=model.early_stopping_rounds, verbose_eval=config.verbose,
+                callbacks=[progress.callback("external memory", model.n_estimators)] if progress is not None else None
+            )
+
+        with timed("evaluation"):
+            probs = booster.predict(dholdout, iteration_range=(0, booster.best_iteration + 1))
+            preds = (probs > 0.5).astype(int) if probs.ndim == 1 else probs.argmax(axis=1)
+            final = classification_metrics(dholdout.get_label().astype(int), preds, le.classes_)
+    log_metrics("Final classification metrics:", final)
+
+    # Same artifacts as an in-memory run: the scan's encoder in front of the booster
+    model.load_model(bytearray(booster.save_raw("ubj")))
+    model.set_params(n_jobs=-1)
+    best_model = Pipeline([("prep", scan.prep), ("model", model)])
+
+    with timed("contributions"):
+        # The scan's uniform sample stands in for the streamed holdout
+        sample = scan.sample.sample(min(CONTRIBUTION_SAMPLE_ROWS, len(scan.sample)), random_state=config.random_state)
+        importance = holdout_importance(best_model, scan.prep.transform(sample))
+    shap_path = None
+    if config.shap_summary:
+        with timed("shap"):
+            shap_path = save_shap_summary(importance, os.path.join(config.output_dir, SHAP_SUMMARY_FILENAME))
+
+    with timed("save"):
+        model_path, encoder_path, schema_path, bundle_path = save_artifacts(
+            config.models_dir, best_model, le, scan.schema
+        )
+    logger.info(f"Model saved to: {model_path}")
+
+    timings["total"] = round(time.perf_counter() - started, 3)
+    return TrainingResult(
+        data_path=data_path,
+        training_rows=scan.rows,
+        classes=[str(c) for c in le.classes_],
+        baseline=final,
+        final=final,
+        timings=timings,
+        model_path=model_path,
+        encoder_path=encoder_path,
+        schema_path=schema_path,
+        bundle_path=bundle_path,
+        shap_summary_path=shap_path,
+        feature_contributions=importance,
+        core_splits={"fit": CoreSplit(workers=1, threads=budget)},
+        dataset_fingerprint=scan.fingerprint,
+        external_memory=True,
+    )
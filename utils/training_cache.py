@@ -0,0 +1,191 @@
+"""
+Content-addressed cache of finished training runs
+
+Pressing Train twice, or two schedulers calling ``/train-model``, used to
+repeat the whole cross-validation and search even when nothing had changed.
+``train`` now derives a key from everything that determines the trained
+model:
+
+- the dataset's content fingerprint (file bytes plus the preprocessing
+  definition, see ``utils/training_data.py`` and ``utils/training_shards.py``)
+- the ``TrainingConfig`` fields that change the model, the search space and
+  the baseline model's parameters
+- the versions of XGBoost, scikit-learn, NumPy and pandas, plus
+  ``TRAINING_CACHE_FORMAT``
+
+Every finished run writes a versioned bundle under
+``data/cache/training/<key>/``. It holds the pipeline, the label encoder,
+the feature schema and the model bundle files exactly as saved to
+``models/``, the SHAP chart if one was drawn, ``result.json`` (the
+``TrainingResult``: metrics, timings, best parameters, contributions) and
+``meta.json`` (the key's inputs, the model's digest and when the entry was
+written). A run with the same key copies those files back into the models
+folder, skipping any that are already identical, and returns the stored
+result. It does not load data or fit anything. A model in the folder that is
+newer than the entry and that no stored run produced (one promoted by
+``/train-model/update``) is kept: the run returns the stored result without
+restoring anything (``model_to_keep``).
+
+Core counts, paths and logging are not part of the key: they change how
+fast a run is, not what it learns.
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import sklearn
+import xgboost as xgb
+
+from .cache_entries import list_entries, prune_entries, writing_entry
+from .model_store import file_digest
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TRAINING_CACHE_DIR = os.path.join(PROJECT_ROOT, "data", "cache", "training")
+
+# Bump when training produces a different model for the same key inputs
+TRAINING_CACHE_FORMAT = 3
+
+# Entries kept on disk; older ones are removed when a new one is written
+TRAINING_CACHE_KEEP = 4
+
+RESULT_FILENAME = "result.json"
+META_FILENAME = "meta.json"
+
+
+def library_versions() -> Dict[str, str]:
+    """Versions of the libraries whose behaviour is baked into a trained model"""
+    return {
+        "python": f"{sys.version_info.major}.{sys.version_info.minor}",
+        "xgboost": xgb.__version__,
+        "scikit-learn": sklearn.__version__,
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+    }
+
+
+def cache_key(dataset_fingerprint: str, definition: Dict[str, Any]) -> str:
+    """Key of a training run: dataset fingerprint, run definition, library versions and cache format"""
+    payload = {
+        "format": TRAINING_CACHE_FORMAT,
+        "dataset": dataset_fingerprint,
+        "definition": definition,
+        "versions": library_versions(),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:20]
+
+
+def read_entry(cache_dir: str, key: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """(entry folder, stored result) of ``key``, or None when there is no complete entry"""
+    entry_dir = os.path.join(cache_dir, key)
+    result_path = os.path.join(entry_dir, RESULT_FILENAME)
+    if not os.path.exists(result_path):
+        return None
+    try:
+        meta = read_meta(entry_dir)
+        if meta.get("format_version") != TRAINING_CACHE_FORMAT:
+            return None
+        with open(result_path, encoding="utf-8") as f:
+            result = json.load(f)
+        os.utime(entry_dir)  # Most recently used entries survive pruning
+        return entry_dir, result
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable training cache entry {entry_dir}: {e}")
+        return None
+
+
+def read_meta(entry_dir: str) -> Dict[str, Any]:
+    """An entry's ``meta.json``"""
+    with open(os.path.join(entry_dir, META_FILENAME), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def model_to_keep(cache_dir: str, entry_dir: str, model_path: str) -> Optional[str]:
+    """
+    Digest of the model at ``model_path`` when restoring ``entry_dir`` must not replace it, else None
+
+    That is a model written after the entry that no stored run produced,
+    such as one promoted by ``utils.model_update``. Models saved by training
+    runs are replaced, so going back to an earlier cached run still works.
+    Entries record the digest of their model as ``model_digest``.
+    """
+    if not os.path.exists(model_path):
+        return None
+    digest = file_digest(model_path)
+    if os.path.getmtime(model_path) <= os.path.getmtime(os.path.join(entry_dir, META_FILENAME)):
+        return None
+    for other in list_entries(cache_dir):
+        try:
+            if read_meta(other).get("model_digest") == digest:
+                return None
+        except (OSError, ValueError):
+            continue
+    return digest
+
+
+def write_entry(cache_dir: str, key: str, files: List[str], result: Dict[str, Any],
+                meta: Dict[str, Any], replace: bool = False) -> str:
+    """
+    Store a finished run: copies of ``files`` plus its result and key inputs; returns the entry folder
+
+    Written into a temporary folder and renamed, so readers never see half
+    an entry. With ``replace`` an existing entry for ``key`` is swapped for
+    this run; otherwise an entry another process wrote first is kept and
+    ``FileExistsError`` is raised.
+    """
+    entry_dir = os.path.join(cache_dir, key)
+    with writing_entry(entry_dir, replace=replace) as tmp_dir:
+        for path in files:
+            shutil.copyfile(path, os.path.join(tmp_dir, os.path.basename(path)))
+        with open(os.path.join(tmp_dir, RESULT_FILENAME), "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2, default=str)
+        with open(os.path.join(tmp_dir, META_FILENAME), "w", encoding="utf-8") as f:
+            json.dump({
+                "format_version": TRAINING_CACHE_FORMAT,
+                "key": key,
+                "files": [os.path.basename(p) for p in files],
+                "versions": library_versions(),
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                **meta,
+            }, f, indent=2, default=str)
+    prune_entries(cache_dir, TRAINING_CACHE_KEEP)
+    return entry_dir
+
+
+def restore_files(entry_dir: str, names: List[str], target_dir: str) -> List[str]:
+    """
+    Copy the entry's ``names`` into ``target_dir`` in the given order; returns the names copied
+
+    Leading files whose contents already match are left alone, so a serving
+    process does not reload an identical model. From the first file that
+    differs on, every file is copied to a temporary name and renamed, so
+    files later in ``names`` are never older than earlier ones. The model
+    store relies on the booster being at least as new as the pickle.
+    """
+    os.makedirs(target_dir, exist_ok=True)
+    copied = []
+    for name in names:
+        source, target = os.path.join(entry_dir, name), os.path.join(target_dir, name)
+        if not os.path.exists(source):
+            continue
+        if not copied and os.path.exists(target) and _same_contents(source, target):
+            continue
+        # Keep the extension on the temporary file, as the model bundle writer does
+        tmp_path = os.path.join(target_dir, f".tmp-{name}")
+        shutil.copyfile(source, tmp_path)
+        os.replace(tmp_path, target)
+        copied.append(name)
+    return copied
+
+
+def _same_contents(a: str, b: str) -> bool:
+    return os.path.getsize(a) == os.path.getsize(b) and file_digest(a, length=64) == file_digest(b, length=64)
+
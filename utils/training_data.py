@@ -0,0 +1,282 @@
+"""
+Preprocessed and encoded training data, cached on disk per dataset fingerprint
+
+Training used to read the data file, clean it, apply the ordinal mapping and
+then let the sklearn Pipeline refit the ColumnTransformer and rebuild a dense
+matrix for every CV fold and every search candidate. ``load_training_data``
+does that work once: it reads only the feature and target columns
+(``utils.datasets.read_training_frame``), encodes every row into one float32
+matrix (the dtype XGBoost converts to anyway) with the vocabulary of the
+whole file, and stores the result under ``data/cache/features/<fingerprint>/``.
+Folds and candidates then index rows of that matrix.
+
+The cached vocabulary is only the matrix's layout. The encoder a model is
+saved with is fitted on its training rows (``TrainingData.fit_encoder``),
+which also picks the matrix columns of the categories those rows contain, so
+holdout categories never reach the model's features.
+
+The fingerprint combines a SHA-256 of the data file's bytes with a digest of
+the preprocessing definition (drop list, target, declared column types,
+ordinal tables, cache format), so editing either invalidates the entry. On a
+hit, the matrix is memory-mapped from ``matrix.npy`` and nothing is parsed or
+re-encoded.
+"""
+import hashlib
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.preprocessing import OneHotEncoder
+
+from .cache_entries import prune_entries, writing_entry
+from .datasets import TRAINING_COLUMN_TYPES, read_training_frame, schema_frame
+from .model_store import file_digest
+from .rubric import ORDINAL_MAPPINGS
+from .schema import FeatureSchema
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FEATURE_CACHE_DIR = os.path.join(PROJECT_ROOT, "data", "cache", "features")
+
+TARGET_COLUMN = "Deal Status"
+
+# Identifier and long-text columns, plus columns unavailable at prediction time
+DROP_COLUMNS = [
+    "CRM ID", "Opportunity Name", "Account Name", "Detailed Remarks",
+    "Calculated Score",  # Outcome variable (leakage)
+    "Primary L1", "Primary L2", "Secondary L1", "Secondary L2", "Tertiary L1", "Tertiary L2",  # Explanatory variables (leakage or unavailable at input)
+    "SST Sales Stage", "Stage Description"
+]
+
+# Bump when preprocess() or the encoding changes in a way the digest below cannot see
+FEATURE_CACHE_FORMAT = 2
+
+# Fingerprints kept on disk; older entries are removed when a new one is written
+FEATURE_CACHE_KEEP = 4
+
+
+@dataclass
+class TrainingData:
+    """
+    One training set, cleaned and encoded
+
+    ``matrix`` row ``i`` is ``prep.transform(X.iloc[[i]])`` as float32. It is
+    a read-only memory map when loaded from the cache. ``prep`` is fitted on
+    every row; models are saved with the encoder of ``fit_encoder`` instead.
+    """
+    data_path: str
+    fingerprint: str
+    X: pd.DataFrame
+    target: pd.Series
+    raw_columns: pd.DataFrame  # zero-row frame with the raw dtypes, for the feature schema
+    numeric_columns: List[str]
+    categorical_columns: List[str]
+    ordinal_columns: List[str]
+    prep: ColumnTransformer
+    matrix: np.ndarray
+    cache_hit: bool = False
+
+    def fit_encoder(self, rows: np.ndarray) -> Tuple[ColumnTransformer, np.ndarray]:
+        """
+        An encoder fitted on rows ``rows`` of ``X`` only, and the ``matrix`` columns it produces
+
+        Categories that do not occur in ``rows`` are left out, so
+        ``matrix[:, columns]`` equals ``prep.transform(X)`` for the returned
+        ``prep``: a category first seen outside ``rows`` encodes as all zeros.
+        """
+        prep = build_preprocessor(self.numeric_columns, self.categorical_columns)
+        prep.fit(self.X.iloc[rows])
+        keep = [np.ones(len(self.numeric_columns), dtype=bool)]
+        if self.categorical_columns:
+            every_row = self.prep.named_transformers_["onehot"].categories_
+            fitted = prep.named_transformers_["onehot"].categories_
+            keep += [np.isin(every, seen) for every, seen in zip(every_row, fitted)]
+        return prep, np.flatnonzero(np.concatenate(keep))
+
+
+def preprocess(df: pd.DataFrame, schema: Optional[FeatureSchema] = None):
+    """
+    Split a training frame into features and target and clean the features
+
+    Args:
+        df: Labeled deals
+        schema: Feature schema of an existing model. When given, the columns,
+            their numeric/categorical roles and the imputation medians come
+            from the schema instead of from ``df``, so new rows are prepared
+            exactly like the data the model was trained on.
+
+    Returns:
+        (X, target, numeric_cols, categorical_cols, ordinal_cols)
+    """
+    if TARGET_COLUMN not in df.columns:
+        raise KeyError(f"Column '{TARGET_COLUMN}' not found in the dataset")
+
+    target = df[TARGET_COLUMN]
+    X = df.drop(columns=[c for c in DROP_COLUMNS if c in df.columns] + [TARGET_COLUMN], errors="ignore").copy()
+
+    # Detect numeric vs categorical
+    if schema is None:
+        numeric_cols = X.select_dtypes(include=["int64", "float64"]).columns.tolist()
+    else:
+        X = schema.add_missing_columns(X)[schema.columns]
+        numeric_cols = [c for c in schema.columns if schema.is_numeric(c)]
+    categorical_cols = [c for c in X.columns if c not in numeric_cols]
+
+    # Clean categorical strings
+    for c in categorical_cols:
+        X[c] = X[c].astype(str).str.strip().replace({"nan": np.nan, "None": np.nan})
+
+    # Business logic: map ordinal categories to numbers so the model understands "High" > "Low"
+    ordinal_cols = []
+    for col, mapping in ORDINAL_MAPPINGS.items():
+        if col in X.columns:
+            ordinal_cols.append(col)
+            # Map values, fill unknown with 2 (Neutral-ish, better than Weak)
+            X[col] = X[col].map(mapping).fillna(2)
+            if col in categorical_cols:
+                categorical_cols.remove(col)
+            if col not in numeric_cols:
+                numeric_cols.append(col)
+
+    for c in numeric_cols:
+        X[c] = pd.to_numeric(X[c], errors="coerce")
+
+    # Impute missing values (simple)
+    if numeric_cols:
+        medians = X[numeric_cols].median()
+        if schema is not None:
+            medians = pd.Series({c: schema.medians.get(c) for c in numeric_cols}, dtype=float).fillna(medians)
+        X[numeric_cols] = X[numeric_cols].fillna(medians)
+    if categorical_cols:
+        X[categorical_cols] = X[categorical_cols].fillna("UNKNOWN")
+
+    return X, target, numeric_cols, categorical_cols, ordinal_cols
+
+
+def build_preprocessor(numeric_cols: List[str], categorical_cols: List[str],
+                       categories: Optional[Dict[str, List[str]]] = None) -> ColumnTransformer:
+    """
+    Passthrough numerics, one-hot categoricals (unknown categories encode as all zeros)
+
+    ``categories`` fixes each categorical column's vocabulary (sorted, as the
+    encoder would infer it) when the fit only sees a sample of the data.
+    """
+    onehot_categories = [categories[c] for c in categorical_cols] if categories is not None else "auto"
+    return ColumnTransformer(
+        transformers=[
+            ("num", "passthrough", numeric_cols),
+            ("onehot", OneHotEncoder(categories=onehot_categories, handle_unknown="ignore", sparse_output=False),
+             categorical_cols),
+        ],
+        remainder="drop",
+        sparse_threshold=0
+    )
+
+
+def preprocessing_digest() -> str:
+    """Digest of everything besides the data that determines the cached matrix"""
+    definition = {
+        "format": FEATURE_CACHE_FORMAT,
+        "target": TARGET_COLUMN,
+        "drop": DROP_COLUMNS,
+        "columns": TRAINING_COLUMN_TYPES,
+        "ordinal": ORDINAL_MAPPINGS,
+    }
+    return hashlib.sha256(json.dumps(definition, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:12]
+
+
+def dataset_fingerprint(data_path: str) -> str:
+    return f"{file_digest(data_path, length=16)}-{preprocessing_digest()}"
+
+
+def load_training_data(data_path: str, cache_dir: Optional[str] = FEATURE_CACHE_DIR) -> TrainingData:
+    """
+    Cleaned and encoded training data for ``data_path``, from the cache when possible
+
+    Args:
+        data_path: Training data (.parquet, .csv or .xlsx)
+        cache_dir: Root of the feature cache; None always preprocesses and writes nothing
+    """
+    if not os.path.exists(data_path):
+        raise FileNotFoundError(f"Synthetic data not found at {data_path}")
+    fingerprint = dataset_fingerprint(data_path)
+    entry_dir = os.path.join(cache_dir, fingerprint) if cache_dir else None
+
+    if entry_dir and os.path.exists(os.path.join(entry_dir, "matrix.npy")):
+        try:
+            data = _read_entry(entry_dir, data_path, fingerprint)
+            os.utime(entry_dir)  # Most recently used entries survive pruning
+            logger.info(f"Loaded encoded training data from cache: {entry_dir}")
+            return data
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable feature cache entry {entry_dir}: {e}")
+    # An entry that exists now is unreadable: the rebuilt one replaces it
+    replace_entry = bool(entry_dir) and os.path.isdir(entry_dir)
+
+    logger.info(f"Loading training data from: {data_path}")
+    df = read_training_frame(data_path)
+    X, target, numeric_cols, categorical_cols, ordinal_cols = preprocess(df)
+    prep = build_preprocessor(numeric_cols, categorical_cols)
+    matrix = np.ascontiguousarray(prep.fit_transform(X), dtype=np.float32)
+    data = TrainingData(
+        data_path=data_path,
+        fingerprint=fingerprint,
+        X=X,
+        target=target,
+        raw_columns=schema_frame(df),
+        numeric_columns=numeric_cols,
+        categorical_columns=categorical_cols,
+        ordinal_columns=ordinal_cols,
+        prep=prep,
+        matrix=matrix,
+    )
+    if entry_dir:
+        try:
+            _write_entry(entry_dir, data, replace=replace_entry)
+            prune_entries(cache_dir, keep=FEATURE_CACHE_KEEP)
+        except FileExistsError:
+            logger.info(f"Kept the feature cache entry another process wrote: {entry_dir}")
+        except OSError as e:
+            logger.warning(f"Could not write feature cache entry {entry_dir}: {e}")
+    return data
+
+
+def _read_entry(entry_dir: str, data_path: str, fingerprint: str) -> TrainingData:
+    frames = joblib.load(os.path.join(entry_dir, "frames.joblib"))
+    return TrainingData(
+        data_path=data_path,
+        fingerprint=fingerprint,
+        matrix=np.load(os.path.join(entry_dir, "matrix.npy"), mmap_mode="r"),
+        cache_hit=True,
+        **frames,
+    )
+
+
+def _write_entry(entry_dir: str, data: TrainingData, replace: bool = False) -> None:
+    with writing_entry(entry_dir, replace=replace) as tmp_dir:
+        np.save(os.path.join(tmp_dir, "matrix.npy"), data.matrix)
+        joblib.dump({
+            "X": data.X,
+            "target": data.target,
+            "raw_columns": data.raw_columns,
+            "numeric_columns": data.numeric_columns,
+            "categorical_columns": data.categorical_columns,
+            "ordinal_columns": data.ordinal_columns,
+            "prep": data.prep,
+        }, os.path.join(tmp_dir, "frames.joblib"))
+        with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "data_path": data.data_path,
+                "fingerprint": data.fingerprint,
+                "rows": int(data.matrix.shape[0]),
+                "features": int(data.matrix.shape[1]),
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            }, f, indent=2)
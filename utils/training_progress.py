@@ -0,0 +1,207 @@
+"""
+Live progress and cancellation of a training run
+
+``train(config, progress=...)`` reports into a :class:`TrainingProgress`:
+the stage it is in (load, fit, cross_validation, tuning, ...), how many of
+the stage's model fits have finished, which search candidate / CV fold the
+latest report came from, and, through :class:`ProgressCallback` (an XGBoost
+``TrainingCallback`` attached to every fit), the boosting iteration, the
+last evaluation metric and the elapsed time.
+
+The object is shared between the training thread and whoever watches it:
+``state()`` returns a JSON-ready snapshot for the Streamlit widget, and the
+optional ``publish`` hook receives the same snapshot on every stage change
+and at most every ``min_interval`` seconds in between (the API writes it to
+the job table). ``cancel()`` makes the next boosting iteration of every
+running fit raise :class:`TrainingCancelled`, and no further fit or stage
+starts, so a run with bad settings gives its cores back within one tree.
+
+Fits of the cross-validation and the search must run in threads of this
+process (``train`` switches joblib to its threading backend when a progress
+object is given); worker processes would report into copies.
+"""
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+import xgboost as xgb
+
+logger = logging.getLogger(__name__)
+
+
+class TrainingCancelled(Exception):
+    """Raised inside a training run after :meth:`TrainingProgress.cancel`"""
+
+
+class TrainingProgress:
+    """
+    Thread-safe progress state of one training run, plus its cancel flag
+
+    Args:
+        publish: Called with ``state()`` on stage changes and throttled iteration updates
+        min_interval: Seconds between two iteration-driven ``publish`` calls
+    """
+
+    def __init__(self, publish: Optional[Callable[[Dict[str, Any]], None]] = None, min_interval: float = 1.0):
+        self.publish = publish
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._reason = "Training was cancelled"
+        self._started = time.perf_counter()
+        self._published = 0.0
+        self._state: Dict[str, Any] = {
+            "stage": "starting",
+            "fits_total": 0,
+            "fits_done": 0,
+            "current": None,
+            "iteration": None,
+            "rounds": None,
+            "metric": None,
+            "metric_value": None,
+        }
+        self._stage_started = self._started
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    @property
+    def reason(self) -> str:
+        """Why the run was cancelled (the message of :class:`TrainingCancelled`)"""
+        return self._reason
+
+    def cancel(self, reason: Optional[str] = None) -> None:
+        """Ask the run to stop at its next boosting iteration or stage boundary"""
+        if reason:
+            self._reason = reason
+        self._cancel.set()
+        self._emit(force=True)
+
+    def check(self) -> None:
+        """Raise :class:`TrainingCancelled` if the run was cancelled"""
+        if self._cancel.is_set():
+            raise TrainingCancelled(self._reason)
+
+    def stage(self, name: str, fits_total: int = 0) -> None:
+        """Enter stage ``name``, which runs ``fits_total`` model fits (checks for cancellation first)"""
+        self.check()
+        with self._lock:
+            self._state.update(stage=name, fits_total=int(fits_total), fits_done=0, current=None,
+                               iteration=None, rounds=None, metric=None, metric_value=None)
+            self._stage_started = time.perf_counter()
+        self._emit(force=True)
+
+    def fit_started(self, label: Optional[str], rounds: Optional[int]) -> None:
+        self.check()
+        with self._lock:
+            self._state.update(current=label, iteration=0, rounds=rounds)
+        self._emit()
+
+    def fit_finished(self) -> None:
+        with self._lock:
+            self._state["fits_done"] += 1
+        self._emit()
+
+    def iteration(self, label: Optional[str], iteration: int, metric: Optional[str],
+                  value: Optional[float]) -> None:
+        with self._lock:
+            self._state.update(current=label, iteration=int(iteration), metric=metric, metric_value=value)
+        self._emit()
+
+    def state(self) -> Dict[str, Any]:
+        """Snapshot: stage, fits, current fit, iteration, metric, elapsed seconds, fraction and summary"""
+        with self._lock:
+            state = dict(self._state)
+            now = time.perf_counter()
+            state["elapsed_s"] = round(now - self._started, 1)
+            state["stage_elapsed_s"] = round(now - self._stage_started, 1)
+        state["cancel_requested"] = self.cancelled
+        state["fraction"] = _fraction(state)
+        state["summary"] = _summary(state)
+        return state
+
+    def callback(self, label: Optional[str] = None, rounds: Optional[int] = None) -> "ProgressCallback":
+        """An XGBoost callback reporting one fit (``label`` e.g. "candidate 3/20, fold 2/3")"""
+        return ProgressCallback(self, label, rounds)
+
+    def _emit(self, force: bool = False) -> None:
+        if self.publish is None:
+            return
+        now = time.perf_counter()
+        with self._lock:
+            if not force and now - self._published < self.min_interval:
+                return
+            self._published = now
+        try:
+            self.publish(self.state())
+        except Exception as e:
+            # A missed progress update must not fail the run
+            logger.warning(f"Could not publish training progress: {e}")
+
+
+class ProgressCallback(xgb.callback.TrainingCallback):
+    """
+    Reports each boosting iteration of one fit and stops the fit once the run is cancelled
+
+    sklearn's ``clone`` deep-copies estimator parameters; the copy of a
+    callback is the callback itself, so every cloned fit still reports into
+    the same :class:`TrainingProgress`.
+    """
+
+    def __init__(self, progress: TrainingProgress, label: Optional[str] = None, rounds: Optional[int] = None):
+        super().__init__()
+        self.progress = progress
+        self.label = label
+        self.rounds = rounds
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def before_training(self, model):
+        self.progress.fit_started(self.label, self.rounds)
+        return model
+
+    def after_iteration(self, model, epoch: int, evals_log) -> bool:
+        metric, value = None, None
+        # Last metric of the last evaluation set (the one early stopping watches)
+        for data_name, metrics in evals_log.items():
+            for metric_name, values in metrics.items():
+                last = values[-1]
+                metric, value = f"{data_name}-{metric_name}", float(last[0] if isinstance(last, tuple) else last)
+        self.progress.iteration(self.label, epoch + 1, metric, value)
+        self.progress.check()
+        return False
+
+    def after_training(self, model):
+        self.progress.fit_finished()
+        return model
+
+
+def _fraction(state: Dict[str, Any]) -> Optional[float]:
+    """Share of the current stage done: finished fits plus the running fit's share of its rounds"""
+    if not state["fits_total"]:
+        return None
+    done = state["fits_done"]
+    if state["rounds"] and state["iteration"] and done < state["fits_total"]:
+        done += min(1.0, state["iteration"] / state["rounds"])
+    return round(min(1.0, done / state["fits_total"]), 4)
+
+
+def _summary(state: Dict[str, Any]) -> str:
+    """One line for a progress bar, e.g. "tuning: 14/60 fits, candidate 5/20, fold 2/3, iteration 87" """
+    parts = [state["stage"]]
+    if state["fits_total"] > 1:
+        parts.append(f"{state['fits_done']}/{state['fits_total']} fits")
+    if state["current"]:
+        parts.append(state["current"])
+    if state["iteration"]:
+        rounds = f"/{state['rounds']}" if state["rounds"] else ""
+        parts.append(f"iteration {state['iteration']}{rounds}")
+    if state["metric"] is not None and state["metric_value"] is not None:
+        parts.append(f"{state['metric']} {state['metric_value']:.4f}")
+    parts.append(f"{state['elapsed_s']:.0f} s")
+    if state["cancel_requested"]:
+        parts.append("cancelling")
+    return f"{parts[0]}: " + ", ".join(parts[1:])
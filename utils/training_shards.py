@@ -0,0 +1,236 @@
+"""
+Out-of-core training input: Parquet/CSV shards streamed batch by batch
+
+``load_training_data`` reads the whole workbook into one DataFrame and
+encodes it into one dense matrix, so the training set has to fit in memory
+several times over. This module is the streaming alternative used by
+``train`` when ``TrainingConfig.external_memory`` is set:
+
+- ``scan_shards`` makes one pass over the shards, a batch at a time, and
+  collects what the encoder and the feature schema need: the column layout
+  (the declared columns of ``TRAINING_COLUMN_TYPES`` a shard has), the
+  categorical values of the training rows, every outcome, the row count and
+  a fixed-size uniform sample of training rows, which gives the numeric
+  medians and fits the encoder with the collected vocabularies.
+- ``ShardIterator`` is an ``xgboost.DataIter`` that re-reads the shards for
+  XGBoost, applies the same typing, cleaning, ordinal mapping, imputation
+  and one-hot encoding to each batch and hands over its float32 matrix.
+
+A seeded per-batch draw (``holdout_rows``) assigns rows to the training or
+the holdout part. The scan makes the same draw, so, as in in-memory
+training, the encoder never sees a category that only held-out rows have.
+
+XGBoost builds an ``ExtMemQuantileDMatrix`` from the iterator, keeping the
+quantised pages in a disk cache, so peak memory follows ``batch_rows`` and
+the sample size rather than the number of rows.
+"""
+import hashlib
+import os
+from collections import defaultdict
+from dataclasses import dataclass, replace
+from typing import Callable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.compose import ColumnTransformer
+from sklearn.preprocessing import LabelEncoder
+
+from .datasets import apply_column_types, schema_frame
+from .ingest import SUPPORTED_FORMATS, detect_format, iter_chunks
+from .model_store import file_digest
+from .schema import FeatureSchema, build_feature_schema
+from .training_data import DROP_COLUMNS, TARGET_COLUMN, build_preprocessor, preprocessing_digest, preprocess
+
+# Formats that can be read in row batches (.xls has no streaming reader)
+SHARD_FORMATS = tuple(ext for ext, fmt in SUPPORTED_FORMATS.items() if fmt != "xls")
+
+DEFAULT_BATCH_ROWS = 50_000
+
+# Rows kept from the scan to compute medians and fit the encoder
+SAMPLE_ROWS = 50_000
+
+
+@dataclass
+class ShardScan:
+    """What one pass over the shards learned, plus the encoder fitted from it"""
+    paths: List[str]
+    fingerprint: str
+    rows: int
+    schema: FeatureSchema
+    prep: ColumnTransformer
+    label_encoder: LabelEncoder
+    sample: pd.DataFrame  # preprocessed rows of the uniform sample
+
+    def encode(self, df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """Float32 feature matrix and encoded labels of one raw batch (rows without an outcome dropped)"""
+        df = apply_column_types(df[df[TARGET_COLUMN].notna()])
+        X, target, *_ = preprocess(df, self.schema)
+        M = np.ascontiguousarray(self.prep.transform(X), dtype=np.float32)
+        return M, self.label_encoder.transform(target.astype(str))
+
+
+def list_shards(path: str) -> List[str]:
+    """``path`` itself, or the readable data files directly inside the directory ``path``, sorted"""
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Training data not found at {path}")
+    if not os.path.isdir(path):
+        detect_format(path)
+        return [path]
+    shards = sorted(
+        os.path.join(path, name) for name in os.listdir(path)
+        if os.path.splitext(name)[1].lower() in SHARD_FORMATS and not name.startswith(("~$", "."))
+    )
+    if not shards:
+        raise FileNotFoundError(f"No {', '.join(SHARD_FORMATS)} shards in {path}")
+    return shards
+
+
+def iter_batches(paths: List[str], batch_rows: int) -> Iterator[pd.DataFrame]:
+    for path in paths:
+        yield from iter_chunks(path, detect_format(path), batch_rows)
+
+
+def holdout_rows(n: int, batch_number: int, holdout_size: float, random_state: int) -> np.ndarray:
+    """Which of a batch's ``n`` labeled rows are held out, drawn from ``(random_state, batch_number)``"""
+    return np.random.default_rng([random_state, batch_number]).random(n) < holdout_size
+
+
+def shards_fingerprint(paths: List[str]) -> str:
+    """Content digest of the shards, in order, plus the preprocessing digest"""
+    digest = hashlib.sha256("".join(file_digest(p, length=16) for p in paths).encode("ascii")).hexdigest()[:16]
+    return f"{digest}-{preprocessing_digest()}"
+
+
+def scan_shards(paths: List[str], batch_rows: int = DEFAULT_BATCH_ROWS, sample_rows: int = SAMPLE_ROWS,
+                random_state: int = 42, holdout_size: float = 0.0) -> ShardScan:
+    """
+    One streaming pass over ``paths``: layout, vocabularies, outcomes, row count and a row sample
+
+    Vocabularies and the sample come from the training rows only: the rows
+    ``ShardIterator`` holds out for ``holdout_size`` and ``random_state`` are
+    skipped. Outcomes and the row count cover every labeled row. The sample
+    is the ``sample_rows`` training rows with the smallest random keys (a
+    uniform sample without knowing the total up front). Each batch gets the
+    declared column types (``apply_column_types``), so column roles do not
+    depend on what the first batch happens to hold.
+
+    Raises:
+        KeyError: A shard has no ``Deal Status`` column
+        ValueError: The shards contain no labeled rows
+    """
+    rng = np.random.default_rng(random_state)
+    layout: Optional[FeatureSchema] = None
+    raw_columns = None
+    categories = defaultdict(set)
+    classes = set()
+    rows = 0
+    sample, sample_keys = None, np.empty(0)
+
+    # Numbered like ShardIterator's batches, so both draw the same holdout rows
+    for number, batch in enumerate(iter_batches(paths, batch_rows)):
+        if TARGET_COLUMN not in batch.columns:
+            raise KeyError(f"Column '{TARGET_COLUMN}' not found in the dataset")
+        batch = apply_column_types(batch[batch[TARGET_COLUMN].notna()]).reset_index(drop=True)
+        if batch.empty:
+            continue
+        if layout is None:
+            raw_columns = schema_frame(batch)
+            X, _, numeric_cols, categorical_cols, ordinal_cols = preprocess(batch)
+            layout = _layout(raw_columns, X, numeric_cols, categorical_cols, ordinal_cols)
+        classes.update(batch[TARGET_COLUMN].astype(str).unique())
+        rows += len(batch)
+
+        batch = batch[~holdout_rows(len(batch), number, holdout_size, random_state)].reset_index(drop=True)
+        if batch.empty:
+            continue
+        X, *_ = preprocess(batch, layout)
+        for col in layout.categorical_columns:
+            categories[col].update(X[col].unique())
+
+        keys = rng.random(len(batch))
+        if sample is None:
+            sample, sample_keys = batch, keys
+        else:
+            sample, sample_keys = pd.concat([sample, batch], ignore_index=True), np.concatenate([sample_keys, keys])
+        if len(sample) > sample_rows:
+            keep = np.sort(np.argpartition(sample_keys, sample_rows)[:sample_rows])
+            sample, sample_keys = sample.iloc[keep].reset_index(drop=True), sample_keys[keep]
+
+    if layout is None:
+        raise ValueError(f"No labeled rows in {', '.join(paths)}")
+    if sample is None:
+        raise ValueError(f"Every labeled row of {', '.join(paths)} was held out")
+
+    # Medians from the sample; every categorical value of a training row goes into the vocabulary
+    X_sample, *_ = preprocess(sample, layout)
+    vocabularies = {col: sorted(categories[col]) for col in layout.categorical_columns}
+    le = LabelEncoder().fit(sorted(classes))
+    schema = build_feature_schema(
+        raw_df=raw_columns,
+        X=X_sample,
+        target=TARGET_COLUMN,
+        drop_columns=DROP_COLUMNS + [TARGET_COLUMN],
+        numeric_columns=layout.numeric_columns,
+        categorical_columns=layout.categorical_columns,
+        ordinal_columns=layout.ordinal_columns,
+        classes=le.classes_,
+    )
+    schema = replace(schema, categories=vocabularies, training_rows=rows)
+    prep = build_preprocessor(layout.numeric_columns, layout.categorical_columns, vocabularies).fit(X_sample)
+    return ShardScan(
+        paths=list(paths),
+        fingerprint=shards_fingerprint(paths),
+        rows=rows,
+        schema=schema,
+        prep=prep,
+        label_encoder=le,
+        sample=X_sample,
+    )
+
+
+def _layout(raw_columns: pd.DataFrame, X: pd.DataFrame, numeric_cols, categorical_cols, ordinal_cols) -> FeatureSchema:
+    """Column layout of the first batch, without statistics, so ``preprocess`` treats every batch alike"""
+    layout = build_feature_schema(
+        raw_df=raw_columns, X=X, target=TARGET_COLUMN, drop_columns=DROP_COLUMNS + [TARGET_COLUMN],
+        numeric_columns=numeric_cols, categorical_columns=categorical_cols, ordinal_columns=ordinal_cols, classes=[],
+    )
+    # No medians: each batch is imputed with its own until the sample's are known
+    return replace(layout, medians={}, categories={})
+
+
+class ShardIterator(xgb.DataIter):
+    """
+    Feeds XGBoost one encoded batch at a time, for the training or the holdout rows
+
+    Each raw batch is split with a generator seeded by ``(random_state,
+    batch number)`` (``holdout_rows``), so every pass, the training and
+    holdout iterators and ``scan_shards`` agree on which rows are held out.
+    """
+
+    def __init__(self, scan: ShardScan, part: str, holdout_size: float, batch_rows: int = DEFAULT_BATCH_ROWS,
+                 random_state: int = 42, cache_prefix: Optional[str] = None):
+        if part not in ("train", "holdout"):
+            raise ValueError(f"Unknown part '{part}' (expected 'train' or 'holdout')")
+        self.scan = scan
+        self.part = part
+        self.holdout_size = holdout_size
+        self.batch_rows = batch_rows
+        self.random_state = random_state
+        self._batches = None
+        super().__init__(cache_prefix=cache_prefix, release_data=True)
+
+    def reset(self) -> None:
+        self._batches = None
+
+    def next(self, input_data: Callable) -> bool:
+        if self._batches is None:
+            self._batches = enumerate(iter_batches(self.scan.paths, self.batch_rows))
+        for number, batch in self._batches:
+            M, y = self.scan.encode(batch)
+            held_out = holdout_rows(len(y), number, self.holdout_size, self.random_state)
+            rows = held_out if self.part == "holdout" else ~held_out
+            if rows.any():
+                input_data(data=M[rows], label=y[rows])
+                return True
+        return False
@@ -0,0 +1,165 @@
+"""
+Bounded executor for blocking work called from async FastAPI handlers
+
+Pandas, XGBoost and subprocess calls block the event loop if they run inline
+in an ``async def`` endpoint. ``WorkerPool`` runs them in a thread or process
+executor and admits at most ``max_workers + max_queue`` calls at a time;
+anything beyond that is rejected immediately with ``PoolOverloaded`` so the
+API can answer 429 instead of piling up work. Each call has a timeout, and
+queue depth and wait/run times are exposed through ``stats()``.
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+
+
+class PoolOverloaded(Exception):
+    """Raised when the admission queue is full"""
+
+    def __init__(self, pool_name: str, retry_after: int):
+        super().__init__(f"{pool_name} pool is busy, retry in {retry_after}s")
+        self.pool_name = pool_name
+        self.retry_after = retry_after
+
+
+def _timed_call(fn: Callable, args: tuple, kwargs: dict):
+    """Run ``fn`` in the worker and report when it actually started (wall clock, so it works across processes)"""
+    started = time.time()
+    result = fn(*args, **kwargs)
+    return started, time.time(), result
+
+
+class WorkerPool:
+    """
+    Executor with an admission limit, per-call timeout and basic metrics
+
+    Args:
+        name: Label used in error messages and metrics
+        kind: "thread" or "process"
+        max_workers: Number of workers executing calls concurrently
+        max_queue: Number of admitted calls allowed to wait for a worker
+        timeout: Default seconds to wait for a result before giving up
+    """
+
+    def __init__(self, name: str, kind: str = "thread", max_workers: int = 2,
+                 max_queue: int = 8, timeout: Optional[float] = 120.0):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown executor kind: {kind}")
+        self.name = name
+        self.kind = kind
+        self.max_workers = max(1, int(max_workers))
+        self.max_queue = max(0, int(max_queue))
+        self.timeout = timeout
+        self._executor = None
+        self._lock = threading.Lock()
+        self._in_system = 0
+        self._wait_ms = deque(maxlen=1000)
+        self._run_ms = deque(maxlen=1000)
+        self.counters = {"submitted": 0, "completed": 0, "failed": 0, "rejected": 0, "timed_out": 0}
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.max_queue
+
+    @property
+    def in_flight(self) -> int:
+        """Calls admitted and not yet finished (running or queued)"""
+        return self._in_system
+
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self._in_system - self.max_workers)
+
+    def _get_executor(self):
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=self.name)
+        return self._executor
+
+    def retry_after(self) -> int:
+        """Rough seconds until a slot frees up, from the recent mean run time"""
+        mean_run_s = (float(np.mean(self._run_ms)) / 1000) if self._run_ms else 1.0
+        waves = (self.queue_depth // self.max_workers) + 1
+        return max(1, int(round(mean_run_s * waves)))
+
+    async def run(self, fn: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """
+        Run ``fn(*args, **kwargs)`` in the executor and await the result
+
+        Raises:
+            PoolOverloaded: If ``capacity`` calls are already admitted
+            asyncio.TimeoutError: If the result is not ready within the timeout
+        """
+        with self._lock:
+            if self._in_system >= self.capacity:
+                self.counters["rejected"] += 1
+                raise PoolOverloaded(self.name, self.retry_after())
+            self._in_system += 1
+            self.counters["submitted"] += 1
+
+        enqueued = time.time()
+        try:
+            cf_future = self._get_executor().submit(_timed_call, fn, args, kwargs)
+        except Exception:
+            self._release()
+            raise
+        # The slot is freed when the work really finishes, not when the caller
+        # stops waiting: a timed-out thread keeps its worker busy until it returns.
+        cf_future.add_done_callback(lambda f: self._on_done(f, enqueued))
+
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            _, _, result = await asyncio.wait_for(asyncio.wrap_future(cf_future), timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self.counters["timed_out"] += 1
+            raise
+        return result
+
+    def _release(self):
+        with self._lock:
+            self._in_system -= 1
+
+    def _on_done(self, cf_future, enqueued: float):
+        with self._lock:
+            self._in_system -= 1
+            if cf_future.cancelled() or cf_future.exception() is not None:
+                self.counters["failed"] += 1
+                return
+            started, finished, _ = cf_future.result()
+            self.counters["completed"] += 1
+            self._wait_ms.append((started - enqueued) * 1000)
+            self._run_ms.append((finished - started) * 1000)
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of configuration, queue state and latency percentiles"""
+        def pct(values, q):
+            return round(float(np.percentile(list(values), q)), 2) if values else None
+
+        with self._lock:
+            return {
+                "kind": self.kind,
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "timeout_seconds": self.timeout,
+                "in_flight": self._in_system,
+                "queue_depth": self.queue_depth,
+                **self.counters,
+                "wait_ms_p50": pct(self._wait_ms, 50),
+                "wait_ms_p99": pct(self._wait_ms, 99),
+                "wait_ms_max": round(max(self._wait_ms), 2) if self._wait_ms else None,
+                "run_ms_p50": pct(self._run_ms, 50),
+                "run_ms_p99": pct(self._run_ms, 99),
+            }
+
+    def shutdown(self, wait: bool = False):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None